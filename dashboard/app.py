@@ -1,10 +1,12 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
-import requests
-import json
+from pathlib import Path
+
+import figuras
+import fontes_dados
+from profiling import iniciar_perfil, renderizar_painel, secao
+
+LOGO = Path(__file__).parent / "static" / "logo.svg"
 
 # Configuração da página
 st.set_page_config(
@@ -13,6 +15,7 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded"
 )
+iniciar_perfil("app")
 
 # CSS personalizado
 st.markdown("""
@@ -42,7 +45,7 @@ st.markdown("### Sistema Inteligente de Triagem e Gestão de Filas")
 
 # Sidebar
 with st.sidebar:
-    st.image("https://cdn-icons-png.flaticon.com/512/3026/3026959.png", width=80)
+    st.image(str(LOGO), width=80)
     st.title("Configurações")
     
     # Filtros
@@ -75,35 +78,36 @@ with st.sidebar:
         st.toast("Relatório sendo gerado...", icon="📄")
 
 # Conteúdo principal - Layout em colunas
-col1, col2, col3, col4 = st.columns(4)
-
-with col1:
-    with st.container():
-        st.markdown('<div class="metric-card emergencia">', unsafe_allow_html=True)
-        st.metric("🚨 Emergências", "24", "+3 hoje", delta_color="inverse")
-        st.caption("Atendimento imediato")
-        st.markdown('</div>', unsafe_allow_html=True)
-
-with col2:
-    with st.container():
-        st.markdown('<div class="metric-card urgente">', unsafe_allow_html=True)
-        st.metric("⚠️ Urgências", "42", "+8 hoje")
-        st.caption("Atendimento em 1h")
-        st.markdown('</div>', unsafe_allow_html=True)
-
-with col3:
-    with st.container():
-        st.markdown('<div class="metric-card prioritario">', unsafe_allow_html=True)
-        st.metric("📋 Prioritários", "68", "-5 hoje")
-        st.caption("Atendimento em 4h")
-        st.markdown('</div>', unsafe_allow_html=True)
-
-with col4:
-    with st.container():
-        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.metric("⏱️ Tempo Médio", "25 min", "-40%")
-        st.caption("Redução histórica")
-        st.markdown('</div>', unsafe_allow_html=True)
+with secao("Indicadores", "figura"):
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        with st.container():
+            st.markdown('<div class="metric-card emergencia">', unsafe_allow_html=True)
+            st.metric("🚨 Emergências", "24", "+3 hoje", delta_color="inverse")
+            st.caption("Atendimento imediato")
+            st.markdown('</div>', unsafe_allow_html=True)
+
+    with col2:
+        with st.container():
+            st.markdown('<div class="metric-card urgente">', unsafe_allow_html=True)
+            st.metric("⚠️ Urgências", "42", "+8 hoje")
+            st.caption("Atendimento em 1h")
+            st.markdown('</div>', unsafe_allow_html=True)
+
+    with col3:
+        with st.container():
+            st.markdown('<div class="metric-card prioritario">', unsafe_allow_html=True)
+            st.metric("📋 Prioritários", "68", "-5 hoje")
+            st.caption("Atendimento em 4h")
+            st.markdown('</div>', unsafe_allow_html=True)
+
+    with col4:
+        with st.container():
+            st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+            st.metric("⏱️ Tempo Médio", "25 min", "-40%")
+            st.caption("Redução histórica")
+            st.markdown('</div>', unsafe_allow_html=True)
 
 # Divisor
 st.divider()
@@ -115,65 +119,53 @@ with col_grafico1:
     st.subheader("📈 Distribuição por Prioridade (24h)")
     
     # Dados de exemplo
-    dados_prioridade = pd.DataFrame({
-        'Prioridade': ['Emergência', 'Urgente', 'Prioritário', 'Eletivo'],
-        'Quantidade': [24, 42, 68, 35],
-        'Cor': ['#EF4444', '#F59E0B', '#10B981', '#3B82F6']
-    })
-    
-    fig1 = px.bar(
-        dados_prioridade,
-        x='Prioridade',
-        y='Quantidade',
-        color='Cor',
-        color_discrete_map="identity",
-        text='Quantidade'
-    )
-    fig1.update_traces(textposition='outside')
-    fig1.update_layout(
-        height=400,
-        showlegend=False,
-        yaxis_title="Número de Pacientes",
-        plot_bgcolor='rgba(0,0,0,0)'
-    )
-    st.plotly_chart(fig1, use_container_width=True)
+    with secao("Distribuição por prioridade", "figura"):
+        fig1 = figuras.barras_prioridade(emergencia=24, urgente=42, prioritario=68, eletivo=35)
+        st.plotly_chart(fig1, use_container_width=True)
 
 with col_grafico2:
     st.subheader("🌡️ Sintomas Mais Comuns")
     
-    sintomas = {
-        'Febre': 45,
-        'Dor Abdominal': 38,
-        'Dor de Cabeça': 32,
-        'Tosse': 28,
-        'Náusea': 25,
-        'Dor no Peito': 18,
-        'Falta de Ar': 15,
-        'Tontura': 12
-    }
+    with secao("Sintomas mais comuns", "dados"):
+        resumo_hoje = fontes_dados.resumo_triagens_hoje()
+        sintomas = resumo_hoje["sintomas"] if resumo_hoje else {
+            'Febre': 45,
+            'Dor Abdominal': 38,
+            'Dor de Cabeça': 32,
+            'Tosse': 28,
+            'Náusea': 25,
+            'Dor no Peito': 18,
+            'Falta de Ar': 15,
+            'Tontura': 12
+        }
     
-    fig2 = px.pie(
-        values=list(sintomas.values()),
-        names=list(sintomas.keys()),
-        hole=0.4,
-        color_discrete_sequence=px.colors.sequential.RdBu
-    )
-    fig2.update_traces(textposition='inside', textinfo='percent+label')
-    fig2.update_layout(height=400, showlegend=False)
-    st.plotly_chart(fig2, use_container_width=True)
+    with secao("Sintomas mais comuns", "figura"):
+        px = figuras.px()
+        fig2 = px.pie(
+            values=list(sintomas.values()),
+            names=list(sintomas.keys()),
+            hole=0.4,
+            color_discrete_sequence=px.colors.sequential.RdBu
+        )
+        fig2.update_traces(textposition='inside', textinfo='percent+label')
+        fig2.update_layout(height=400, showlegend=False)
+        st.plotly_chart(fig2, use_container_width=True)
 
 # Tabela de casos recentes
 st.subheader("📋 Casos Recentes - Últimas 2 Horas")
 
 # Dados de exemplo
-casos_recentes = pd.DataFrame({
-    'Hora': ['14:30', '14:15', '14:00', '13:45', '13:30', '13:15'],
-    'Paciente': 'Paciente ' + pd.Series(range(1, 7)).astype(str),
-    'Idade': [45, 32, 68, 28, 55, 39],
-    'Sintomas': ['Febre + Tosse', 'Dor abdominal', 'Dor no peito', 'Náusea', 'Dor de cabeça', 'Tontura'],
-    'Prioridade': ['Urgente', 'Prioritário', 'Emergência', 'Prioritário', 'Eletivo', 'Urgente'],
-    'Tempo Estimado': ['45 min', '2h', 'IMEDIATO', '1.5h', '4h', '30 min']
-})
+with secao("Casos recentes", "dados"):
+    import pandas as pd
+
+    casos_recentes = pd.DataFrame({
+        'Hora': ['14:30', '14:15', '14:00', '13:45', '13:30', '13:15'],
+        'Paciente': 'Paciente ' + pd.Series(range(1, 7)).astype(str),
+        'Idade': [45, 32, 68, 28, 55, 39],
+        'Sintomas': ['Febre + Tosse', 'Dor abdominal', 'Dor no peito', 'Náusea', 'Dor de cabeça', 'Tontura'],
+        'Prioridade': ['Urgente', 'Prioritário', 'Emergência', 'Prioritário', 'Eletivo', 'Urgente'],
+        'Tempo Estimado': ['45 min', '2h', 'IMEDIATO', '1.5h', '4h', '30 min']
+    })
 
 # Adiciona cores condicionais
 def color_priority(val):
@@ -186,11 +178,15 @@ def color_priority(val):
     else:
         return 'color: #6B7280'
 
-st.dataframe(
-    casos_recentes.style.applymap(color_priority, subset=['Prioridade']),
-    use_container_width=True,
-    hide_index=True
-)
+with secao("Casos recentes", "transformacao"):
+    casos_estilizados = casos_recentes.style.applymap(color_priority, subset=['Prioridade'])
+
+with secao("Casos recentes", "figura"):
+    st.dataframe(
+        casos_estilizados,
+        use_container_width=True,
+        hide_index=True
+    )
 
 # Rodapé
 st.divider()
@@ -200,7 +196,12 @@ with col_info1:
     st.caption("🔄 Última atualização: " + datetime.now().strftime("%H:%M:%S"))
     
 with col_info2:
-    st.caption("📊 Total de triagens hoje: 342")
+    if resumo_hoje:
+        st.caption(f"📊 Total de triagens hoje: {resumo_hoje['triagens']} "
+                   f"(~{resumo_hoje['pacientes']} pacientes, "
+                   f"até {resumo_hoje['atualizado_ate']:%H:%M})")
+    else:
+        st.caption("📊 Total de triagens hoje: 342")
 
 with col_info3:
     st.caption("🎯 Precisão da IA: 94.2%")
@@ -215,3 +216,5 @@ with st.expander("🔍 Detalhes Técnicos do Sistema"):
     Latência API: < 120ms
     Uptime: 99.8% (últimos 30 dias)
     """)
+
+renderizar_painel()
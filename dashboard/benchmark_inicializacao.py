@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark de inicialização das páginas do dashboard.
+Para cada página mede, em processos Python novos (como num contêiner
+recém-iniciado), o tempo das importações de nível de módulo (com e sem o
+próprio Streamlit, que já importa pandas, numpy, pyarrow e plotly) e o da
+primeira execução completa pelo AppTest do Streamlit, além de um rerun já
+aquecido. Grava um relatório JSON comparável entre commits.
+"""
+
+import ast
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DIRETORIO = Path(__file__).resolve().parent
+PAGINAS = ["app.py", "pages/01-monitoramento.py", "pages/02-triagem.py"]
+
+# O AppTest verifica o fim da execução a cada 100 ms; com 1 ms as medidas deixam de ser degraus
+_SCRIPT_RENDERIZACAO = """
+import json, time, types
+from streamlit.testing.v1 import AppTest, local_script_runner
+local_script_runner.time = types.SimpleNamespace(time=time.time, sleep=lambda s: time.sleep(0.001))
+app = AppTest.from_file({pagina!r}, default_timeout={timeout})
+inicio = time.perf_counter()
+app.run()
+primeira = time.perf_counter()
+app.run()
+fim = time.perf_counter()
+print(json.dumps({{"primeira_ms": (primeira - inicio) * 1000,
+                  "rerun_ms": (fim - primeira) * 1000,
+                  "excecoes": len(app.exception)}}))
+"""
+
+
+def importacoes_de_topo(pagina: Path) -> str:
+    """Comandos import executados no nível de módulo da página."""
+    arvore = ast.parse(pagina.read_text(encoding="utf-8"))
+    return "\n".join(ast.unparse(no) for no in arvore.body
+                     if isinstance(no, (ast.Import, ast.ImportFrom)))
+
+
+def _executar(codigo: str) -> str:
+    ambiente = {**os.environ, "PYTHONPATH": str(DIRETORIO)}
+    return subprocess.run([sys.executable, "-c", codigo], cwd=DIRETORIO, env=ambiente,
+                          capture_output=True, text=True, check=True).stdout.strip()
+
+
+def medir_importacao(pagina: Path, repeticoes: int, sem_streamlit: bool = False) -> float:
+    """Mediana (ms) das importações de topo em um interpretador novo.
+
+    Com sem_streamlit, o Streamlit é importado antes do cronômetro e sobra só
+    o custo próprio da página.
+    """
+    codigo = (("import streamlit\n" if sem_streamlit else "")
+              + "import time\ninicio = time.perf_counter()\n"
+              f"{importacoes_de_topo(pagina)}\n"
+              "print((time.perf_counter() - inicio) * 1000)")
+    return statistics.median(float(_executar(codigo).splitlines()[-1])
+                             for _ in range(repeticoes))
+
+
+def medir_renderizacao(pagina: Path, repeticoes: int, timeout: int = 60) -> Dict[str, float]:
+    """Mediana (ms) da primeira execução da página e de um rerun em seguida."""
+    codigo = _SCRIPT_RENDERIZACAO.format(pagina=str(pagina), timeout=timeout)
+    medidas = [json.loads(_executar(codigo).splitlines()[-1]) for _ in range(repeticoes)]
+    return {
+        "primeira_execucao_ms": statistics.median(m["primeira_ms"] for m in medidas),
+        "rerun_ms": statistics.median(m["rerun_ms"] for m in medidas),
+        "excecoes": max(m["excecoes"] for m in medidas),
+    }
+
+
+def run(repeticoes: int = 5) -> Dict[str, Any]:
+    """Mede todas as páginas e retorna o relatório."""
+    relatorio = {
+        "metadados": {
+            "commit": _commit_atual(),
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "repeticoes": repeticoes,
+        },
+        "resultados": {},
+    }
+    for nome in PAGINAS:
+        pagina = DIRETORIO / nome
+        try:
+            resultado = {"importacao_ms": medir_importacao(pagina, repeticoes),
+                         "importacao_pagina_ms": medir_importacao(pagina, repeticoes,
+                                                                  sem_streamlit=True),
+                         **medir_renderizacao(pagina, repeticoes)}
+        except subprocess.CalledProcessError as e:
+            logger.error(f"❌ {nome}: {e.stderr.strip().splitlines()[-1] if e.stderr else e}")
+            resultado = {"erro": str(e)}
+        else:
+            logger.info(f"   ⏱️ {nome}: importações {resultado['importacao_ms']:.0f} ms "
+                        f"({resultado['importacao_pagina_ms']:.0f} ms além do Streamlit), "
+                        f"primeira execução {resultado['primeira_execucao_ms']:.0f} ms, "
+                        f"rerun {resultado['rerun_ms']:.0f} ms")
+        relatorio["resultados"][nome] = resultado
+    return relatorio
+
+
+def comparar(atual: Dict[str, Any], base: Dict[str, Any]) -> None:
+    """Exibe a variação de cada medida em relação a um relatório anterior."""
+    logger.info(f"📊 Comparação com {base['metadados'].get('commit')}:")
+    for nome, resultado in atual["resultados"].items():
+        anterior = base["resultados"].get(nome)
+        if not anterior or "erro" in anterior or "erro" in resultado:
+            continue
+        for metrica in ("importacao_ms", "importacao_pagina_ms", "primeira_execucao_ms", "rerun_ms"):
+            if metrica not in anterior:
+                continue
+            variacao = (resultado[metrica] / anterior[metrica] - 1) * 100
+            logger.info(f"   - {nome} {metrica}: {anterior[metrica]:.1f} → "
+                        f"{resultado[metrica]:.1f} ({variacao:+.1f}%)")
+
+
+def _commit_atual() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       text=True, cwd=DIRETORIO).strip()
+    except Exception:
+        return None
+
+
+def main():
+    """Função principal."""
+    import argparse
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Benchmark de inicialização do dashboard Aurora AI')
+    parser.add_argument('--repeticoes', type=int, default=5, help='Processos medidos por página')
+    parser.add_argument('--saida', type=Path, help='Arquivo JSON do relatório')
+    parser.add_argument('--comparar', type=Path, help='Relatório anterior para comparação')
+
+    args = parser.parse_args()
+
+    logger.info("🚀 Medindo inicialização das páginas...")
+    relatorio = run(repeticoes=args.repeticoes)
+
+    saida = args.saida or Path(
+        f"inicializacao_{relatorio['metadados']['commit'] or 'local'}_"
+        f"{datetime.now():%Y%m%d%H%M%S}.json"
+    )
+    saida.write_text(json.dumps(relatorio, indent=2, ensure_ascii=False))
+    logger.info(f"💾 Relatório salvo em {saida}")
+
+    if args.comparar:
+        comparar(relatorio, json.loads(args.comparar.read_text()))
+
+    falhas = [n for n, r in relatorio["resultados"].items() if "erro" in r]
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Figuras reutilizáveis do dashboard.
+O plotly é importado só na primeira figura desenhada, e as figuras que não
+dependem de dados (indicadores e radar de demonstração) são construídas uma
+vez por processo e compartilhadas entre sessões e reruns.
+"""
+
+import streamlit as st
+
+CORES_PRIORIDADE = {
+    'Emergência': '#EF4444',
+    'Urgente': '#F59E0B',
+    'Prioritário': '#10B981',
+    'Eletivo': '#3B82F6',
+}
+
+
+def px():
+    """Módulo plotly.express, importado sob demanda."""
+    import plotly.express
+
+    return plotly.express
+
+
+def go():
+    """Módulo plotly.graph_objects, importado sob demanda."""
+    import plotly.graph_objects
+
+    return plotly.graph_objects
+
+
+@st.cache_resource
+def gauge_ocupacao(valor: float, titulo: str = "Ocupação das Unidades"):
+    """Indicador de ocupação com faixas verde/amarela/vermelha."""
+    fig = go().Figure(go().Indicator(
+        mode="gauge+number",
+        value=valor,
+        title={'text': titulo},
+        domain={'x': [0, 1], 'y': [0, 1]},
+        gauge={
+            'axis': {'range': [None, 100]},
+            'bar': {'color': "darkblue"},
+            'steps': [
+                {'range': [0, 50], 'color': "lightgreen"},
+                {'range': [50, 80], 'color': "yellow"},
+                {'range': [80, 100], 'color': "red"}
+            ],
+            'threshold': {
+                'line': {'color': "black", 'width': 4},
+                'thickness': 0.75,
+                'value': 90
+            }
+        }
+    ))
+    fig.update_layout(height=300)
+    return fig
+
+
+@st.cache_resource
+def radar_eficiencia():
+    """Radar de eficiência por unidade (dados de demonstração)."""
+    categorias = ['Triagem', 'Atendimento', 'Espera', 'Satisfação', 'Recursos']
+
+    fig = go().Figure(data=go().Scatterpolar(
+        r=[92, 85, 78, 88, 75],
+        theta=categorias,
+        fill='toself',
+        name='UPA Centro',
+        line_color='blue'
+    ))
+    fig.add_trace(go().Scatterpolar(
+        r=[85, 88, 82, 85, 80],
+        theta=categorias,
+        fill='toself',
+        name='Hospital Municipal',
+        line_color='green'
+    ))
+    fig.update_layout(
+        polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
+        showlegend=True,
+        height=300
+    )
+    return fig
+
+
+@st.cache_resource
+def barras_prioridade(emergencia: int, urgente: int, prioritario: int, eletivo: int):
+    """Barras de pacientes por prioridade com as cores do sistema."""
+    quantidades = [emergencia, urgente, prioritario, eletivo]
+    fig = go().Figure(go().Bar(
+        x=list(CORES_PRIORIDADE),
+        y=quantidades,
+        marker_color=list(CORES_PRIORIDADE.values()),
+        text=quantidades,
+        textposition='outside'
+    ))
+    fig.update_layout(
+        height=400,
+        showlegend=False,
+        yaxis_title="Número de Pacientes",
+        plot_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
@@ -0,0 +1,128 @@
+"""
+Acesso do dashboard aos dados do banco Aurora AI.
+Reaproveita os módulos de database/ e devolve None quando o banco não está
+disponível, para que as páginas recorram aos dados de demonstração.
+"""
+
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+import streamlit as st
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "database"))
+
+logger = logging.getLogger(__name__)
+
+# O st.download_button mantém o arquivo inteiro em memória
+LIMITE_DOWNLOAD_MB = float(os.getenv("AURORA_LIMITE_DOWNLOAD_MB", "200"))
+
+
+@st.cache_resource
+def roteador_banco():
+    """Primário e réplicas a partir das variáveis DB_* e DB_REPLICAS do ambiente."""
+    from replicas import roteador_do_ambiente
+
+    return roteador_do_ambiente()
+
+
+def conexao_banco():
+    """Acesso somente leitura: réplicas saudáveis, com retorno ao primário."""
+    return roteador_banco().leitura()
+
+
+@st.cache_data(ttl=300)
+def tendencias_sintomas(semanas: int = 8, top: int = 5) -> Optional["pd.DataFrame"]:
+    """Casos semanais pré-agregados dos sintomas mais frequentes."""
+    try:
+        from agregados_sintomas import carregar_tendencias
+
+        dados = carregar_tendencias(conexao_banco(), semanas=semanas, top=top)
+    except Exception as e:
+        logger.warning(f"Tendências de sintomas indisponíveis: {e}")
+        return None
+    return dados if not dados.empty else None
+
+
+@st.cache_data(ttl=300)
+def correlacao_sintomas_comorbidades() -> Optional["pd.DataFrame"]:
+    """Matriz de correlação (phi) pré-agregada entre sintomas e comorbidades."""
+    try:
+        from agregados_sintomas import carregar_correlacao
+
+        dados = carregar_correlacao(conexao_banco())
+    except Exception as e:
+        logger.warning(f"Correlação sintomas × comorbidades indisponível: {e}")
+        return None
+    return dados if not dados.empty else None
+
+
+@st.cache_data(ttl=300)
+def demanda_semanal(semanas: int = 8) -> Optional["pd.DataFrame"]:
+    """Média de chegadas por dia da semana × hora calculada de triagens.created_at."""
+    try:
+        from previsao_demanda import matriz_demanda
+
+        dados = matriz_demanda(conexao_banco(), semanas=semanas)
+    except Exception as e:
+        logger.warning(f"Matriz de demanda indisponível: {e}")
+        return None
+    return dados if dados.to_numpy().any() else None
+
+
+@st.cache_data(ttl=60)
+def resumo_triagens_hoje(top: int = 8) -> Optional[dict]:
+    """Sintomas mais comuns, triagens e pacientes distintos de hoje, pelos resumos aproximados.
+
+    Os resumos só avançam enquanto `resumos_aproximados.py --intervalo 60` roda;
+    "atualizado_ate" informa até quando eles cobrem.
+    """
+    try:
+        from datetime import datetime
+
+        from resumos_aproximados import ResumosAproximados
+
+        agora = datetime.now()
+        resumos = ResumosAproximados(conexao_banco())
+        resumo = resumos.consultar(agora.replace(hour=0, minute=0, second=0, microsecond=0), agora)
+        atualizado_ate = resumos.processado_ate()
+    except Exception as e:
+        logger.warning(f"Resumos aproximados indisponíveis: {e}")
+        return None
+    if not resumo.triagens:
+        return None
+    return {"sintomas": dict(resumo.principais(top)), "triagens": resumo.triagens,
+            "pacientes": resumo.pacientes_distintos, "atualizado_ate": atualizado_ate}
+
+
+def exportar_treinamento(data_inicio, data_fim, prioridades) -> Optional[bytes]:
+    """Exporta os dados de treinamento filtrados em CSV gzip.
+
+    O arquivo é gerado num diretório temporário, removido em seguida, e só é
+    devolvido se couber no limite de download (AURORA_LIMITE_DOWNLOAD_MB);
+    exportações maiores devem usar database/exportacao_treinamento.py.
+    """
+    try:
+        import tempfile
+
+        from exportacao_treinamento import ExportadorTreinamento
+
+        with tempfile.TemporaryDirectory(prefix="aurora_export_") as diretorio:
+            destino = Path(diretorio) / "dados_treinamento_ia.csv.gz"
+            resultado = ExportadorTreinamento(conexao_banco()).exportar(
+                destino, formato="csv", data_inicio=data_inicio, data_fim=data_fim,
+                prioridades=prioridades,
+            )
+            if resultado.bytes > LIMITE_DOWNLOAD_MB * 1e6:
+                logger.warning(f"Exportação de {resultado.bytes / 1e6:.0f} MB acima do limite "
+                               f"de download ({LIMITE_DOWNLOAD_MB:.0f} MB)")
+                return None
+            return destino.read_bytes()
+    except Exception as e:
+        logger.warning(f"Exportação de dados de treinamento indisponível: {e}")
+        return None
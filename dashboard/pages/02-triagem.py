@@ -1,15 +1,17 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import json
-from datetime import datetime
+from datetime import datetime, timedelta
 import time
 
+import figuras
+import fontes_dados
+from profiling import iniciar_perfil, renderizar_painel, secao
+
 st.set_page_config(
     page_title="Triagem Inteligente",
     page_icon="⚕️",
     layout="wide"
 )
+iniciar_perfil("triagem")
 
 st.title("⚕️ Triagem Inteligente com IA")
 st.markdown("### Sistema de classificação automática e análise preditiva")
@@ -76,58 +78,70 @@ with st.sidebar:
     st.metric("Triagens Hoje", "342", "+28")
     st.metric("Tempo Médio", "12s", "-3s")
 
-# Conteúdo principal
+# Conteúdo principal: pandas/numpy só depois que a barra lateral já foi enviada
+import numpy as np
+import pandas as pd
+
 tab1, tab2, tab3 = st.tabs(["📈 Análise de Tendências", "🤖 Modelos de IA", "🎯 Histórico de Casos"])
 
 with tab1:
     st.header("Análise de Tendências de Sintomas")
     
-    # Dados simulados
-    semanas = ['Sem 1', 'Sem 2', 'Sem 3', 'Sem 4']
-    sintomas_trend = pd.DataFrame({
-        'Semana': semanas * 5,
-        'Sintoma': ['Febre']*4 + ['Tosse']*4 + ['Dor Abdominal']*4 + ['Dor de Cabeça']*4 + ['Falta de Ar']*4,
-        'Casos': [45, 48, 52, 55, 38, 42, 45, 48, 25, 28, 32, 30, 32, 35, 38, 40, 12, 15, 18, 20]
-    })
-    
-    fig_trend = px.line(
-        sintomas_trend,
-        x='Semana',
-        y='Casos',
-        color='Sintoma',
-        markers=True,
-        title="Evolução Semanal de Sintomas",
-        height=500
-    )
+    # Agregados semanais pré-calculados (dados simulados se o banco estiver indisponível)
+    with secao("Tendência de sintomas", "dados"):
+        sintomas_trend = fontes_dados.tendencias_sintomas()
+        if sintomas_trend is None:
+            semanas = ['Sem 1', 'Sem 2', 'Sem 3', 'Sem 4']
+            sintomas_trend = pd.DataFrame({
+                'Semana': semanas * 5,
+                'Sintoma': ['Febre']*4 + ['Tosse']*4 + ['Dor Abdominal']*4 + ['Dor de Cabeça']*4 + ['Falta de Ar']*4,
+                'Casos': [45, 48, 52, 55, 38, 42, 45, 48, 25, 28, 32, 30, 32, 35, 38, 40, 12, 15, 18, 20]
+            })
+    
+    with secao("Tendência de sintomas", "figura"):
+        px = figuras.px()
+        fig_trend = px.line(
+            sintomas_trend,
+            x='Semana',
+            y='Casos',
+            color='Sintoma',
+            markers=True,
+            title="Evolução Semanal de Sintomas",
+            height=500
+        )
     
-    fig_trend.update_layout(
-        hovermode='x unified',
-        xaxis_title="Semana",
-        yaxis_title="Número de Casos"
-    )
+        fig_trend.update_layout(
+            hovermode='x unified',
+            xaxis_title="Semana",
+            yaxis_title="Número de Casos"
+        )
     
-    st.plotly_chart(fig_trend, use_container_width=True)
+        st.plotly_chart(fig_trend, use_container_width=True)
     
     # Heatmap de correlação
     st.subheader("🔥 Correlação entre Sintomas e Comorbidades")
     
-    correlacao = pd.DataFrame({
-        'Hipertensão': [0.8, 0.3, 0.2, 0.1, 0.7],
-        'Diabetes': [0.4, 0.6, 0.3, 0.2, 0.5],
-        'Cardíacos': [0.2, 0.1, 0.8, 0.3, 0.9],
-        'Respiratórios': [0.3, 0.9, 0.2, 0.4, 0.6],
-        'Obesidade': [0.5, 0.4, 0.6, 0.3, 0.4]
-    }, index=['Febre', 'Tosse', 'Dor Peito', 'Falta Ar', 'Cansaço'])
-    
-    fig_corr = px.imshow(
-        correlacao,
-        text_auto='.2f',
-        aspect='auto',
-        color_continuous_scale='RdBu',
-        title="Matriz de Correlação"
-    )
+    with secao("Correlação sintomas × comorbidades", "dados"):
+        correlacao = fontes_dados.correlacao_sintomas_comorbidades()
+        if correlacao is None:
+            correlacao = pd.DataFrame({
+                'Hipertensão': [0.8, 0.3, 0.2, 0.1, 0.7],
+                'Diabetes': [0.4, 0.6, 0.3, 0.2, 0.5],
+                'Cardíacos': [0.2, 0.1, 0.8, 0.3, 0.9],
+                'Respiratórios': [0.3, 0.9, 0.2, 0.4, 0.6],
+                'Obesidade': [0.5, 0.4, 0.6, 0.3, 0.4]
+            }, index=['Febre', 'Tosse', 'Dor Peito', 'Falta Ar', 'Cansaço'])
+    
+    with secao("Correlação sintomas × comorbidades", "figura"):
+        fig_corr = px.imshow(
+            correlacao,
+            text_auto='.2f',
+            aspect='auto',
+            color_continuous_scale='RdBu',
+            title="Matriz de Correlação"
+        )
     
-    st.plotly_chart(fig_corr, use_container_width=True)
+        st.plotly_chart(fig_corr, use_container_width=True)
 
 with tab2:
     st.header("Modelos de Inteligência Artificial")
@@ -182,20 +196,27 @@ with tab2:
     
     st.subheader("📋 Comparativo de Modelos")
     
-    modelos_comparativo = pd.DataFrame({
-        'Modelo': ['BERT + XGBoost', 'Random Forest', 'SVM', 'Redes Neurais', 'Regressão Logística'],
-        'Acurácia': [94.2, 89.5, 87.2, 91.8, 85.4],
-        'Latência (ms)': [120, 45, 180, 320, 25],
-        'Explicabilidade': ['Alta', 'Alta', 'Média', 'Baixa', 'Alta'],
-        'Treinamento (h)': [6.5, 1.2, 3.8, 12.5, 0.8]
-    })
-    
-    st.dataframe(
-        modelos_comparativo.style.highlight_max(subset=['Acurácia'], color='lightgreen')
-                               .highlight_min(subset=['Latência (ms)'], color='lightblue'),
-        use_container_width=True,
-        hide_index=True
-    )
+    with secao("Comparativo de modelos", "dados"):
+        modelos_comparativo = pd.DataFrame({
+            'Modelo': ['BERT + XGBoost', 'Random Forest', 'SVM', 'Redes Neurais', 'Regressão Logística'],
+            'Acurácia': [94.2, 89.5, 87.2, 91.8, 85.4],
+            'Latência (ms)': [120, 45, 180, 320, 25],
+            'Explicabilidade': ['Alta', 'Alta', 'Média', 'Baixa', 'Alta'],
+            'Treinamento (h)': [6.5, 1.2, 3.8, 12.5, 0.8]
+        })
+    
+    with secao("Comparativo de modelos", "transformacao"):
+        modelos_estilizados = (
+            modelos_comparativo.style.highlight_max(subset=['Acurácia'], color='lightgreen')
+                                     .highlight_min(subset=['Latência (ms)'], color='lightblue')
+        )
+    
+    with secao("Comparativo de modelos", "figura"):
+        st.dataframe(
+            modelos_estilizados,
+            use_container_width=True,
+            hide_index=True
+        )
 
 with tab3:
     st.header("Histórico de Casos e Aprendizado")
@@ -217,63 +238,86 @@ with tab3:
         )
     
     # Tabela de casos históricos
-    casos_historicos = pd.DataFrame({
-        'Data': pd.date_range(start='2024-01-01', periods=20, freq='D'),
-        'Paciente': [f'PAC{1000+i}' for i in range(20)],
-        'Idade': np.random.randint(18, 80, 20),
-        'Sintomas': ['Febre+Tosse', 'Dor abdominal', 'Dor peito', 'Tontura'] * 5,
-        'IA_Prioridade': ['Urgente', 'Emergência', 'Emergência', 'Prioritário'] * 5,
-        'Médico_Prioridade': ['Urgente', 'Emergência', 'Emergência', 'Prioritário'] * 5,
-        'Acerto': ['✅', '✅', '✅', '❌'] * 5
-    })
-    
-    st.dataframe(
-        casos_historicos,
-        use_container_width=True,
-        hide_index=True,
-        column_config={
-            "Acerto": st.column_config.TextColumn(
-                "Acerto IA",
-                help="✅ = Acerto | ❌ = Erro"
-            )
-        }
-    )
+    with secao("Histórico de casos", "dados"):
+        casos_historicos = pd.DataFrame({
+            'Data': pd.date_range(start='2024-01-01', periods=20, freq='D'),
+            'Paciente': [f'PAC{1000+i}' for i in range(20)],
+            'Idade': np.random.randint(18, 80, 20),
+            'Sintomas': ['Febre+Tosse', 'Dor abdominal', 'Dor peito', 'Tontura'] * 5,
+            'IA_Prioridade': ['Urgente', 'Emergência', 'Emergência', 'Prioritário'] * 5,
+            'Médico_Prioridade': ['Urgente', 'Emergência', 'Emergência', 'Prioritário'] * 5,
+            'Acerto': ['✅', '✅', '✅', '❌'] * 5
+        })
+    
+    with secao("Histórico de casos", "figura"):
+        st.dataframe(
+            casos_historicos,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Acerto": st.column_config.TextColumn(
+                    "Acerto IA",
+                    help="✅ = Acerto | ❌ = Erro"
+                )
+            }
+        )
     
     # Estatísticas de acerto
     st.subheader("📈 Desempenho da IA ao Longo do Tempo")
     
-    performance_data = pd.DataFrame({
-        'Mês': ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun'],
-        'Acurácia': [88.5, 90.2, 91.8, 92.5, 93.4, 94.2],
-        'Recall Emergência': [92.3, 93.1, 94.5, 95.2, 95.8, 96.8],
-        'Precisão': [87.8, 89.2, 90.5, 91.3, 92.1, 93.0]
-    })
-    
-    fig_performance = px.line(
-        performance_data,
-        x='Mês',
-        y=['Acurácia', 'Recall Emergência', 'Precisão'],
-        markers=True,
-        title="Evolução do Desempenho da IA"
-    )
+    with secao("Desempenho da IA", "dados"):
+        performance_data = pd.DataFrame({
+            'Mês': ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun'],
+            'Acurácia': [88.5, 90.2, 91.8, 92.5, 93.4, 94.2],
+            'Recall Emergência': [92.3, 93.1, 94.5, 95.2, 95.8, 96.8],
+            'Precisão': [87.8, 89.2, 90.5, 91.3, 92.1, 93.0]
+        })
+    
+    with secao("Desempenho da IA", "figura"):
+        fig_performance = px.line(
+            performance_data,
+            x='Mês',
+            y=['Acurácia', 'Recall Emergência', 'Precisão'],
+            markers=True,
+            title="Evolução do Desempenho da IA"
+        )
     
-    fig_performance.update_layout(
-        yaxis_title="Porcentagem (%)",
-        yaxis_range=[85, 100],
-        height=400
-    )
+        fig_performance.update_layout(
+            yaxis_title="Porcentagem (%)",
+            yaxis_range=[85, 100],
+            height=400
+        )
     
-    st.plotly_chart(fig_performance, use_container_width=True)
+        st.plotly_chart(fig_performance, use_container_width=True)
     
     # Botão para exportar dados
     if st.button("📤 Exportar Dados de Treinamento"):
-        st.success("Dados exportados para formato CSV")
-        st.download_button(
-            label="⬇️ Baixar CSV",
-            data=casos_historicos.to_csv(index=False).encode('utf-8'),
-            file_name="dados_treinamento_ia.csv",
-            mime="text/csv"
-        )
+        prioridades_sql = {'Emergência': 'emergencia', 'Urgente': 'urgente',
+                           'Prioritário': 'prioritario', 'Eletivo': 'eletivo'}
+        with st.spinner("Exportando dados de treinamento..."):
+            exportado = fontes_dados.exportar_treinamento(
+                data_inicio, data_fim, [prioridades_sql[p] for p in prioridade_filtro]
+            )
+        if exportado is not None:
+            st.success("Dados exportados para formato CSV (gzip)")
+            st.download_button(
+                label="⬇️ Baixar CSV",
+                data=exportado,
+                file_name="dados_treinamento_ia.csv.gz",
+                mime="application/gzip"
+            )
+        else:
+            st.warning(
+                "Exportação do banco indisponível ou acima de "
+                f"{fontes_dados.LIMITE_DOWNLOAD_MB:.0f} MB (use database/exportacao_treinamento.py); "
+                "o arquivo abaixo contém os dados de demonstração."
+            )
+            st.download_button(
+                label="⬇️ Baixar CSV de demonstração",
+                data=casos_historicos.to_csv(index=False).encode('utf-8'),
+                file_name="dados_treinamento_ia.csv",
+                mime="text/csv"
+            )
 
 # Informações finais
 st.divider()
@@ -285,3 +329,5 @@ st.info("""
 - Integração com prontuário eletrônico
 - Conformidade com LGPD e regulamentações de saúde
 """)
+
+renderizar_painel()
@@ -0,0 +1,126 @@
+"""
+Medição do tempo de renderização das páginas do dashboard.
+Cada seção da página é cronometrada por etapa (dados, transformação e
+figura); o painel lateral mostra o resultado do rerun atual contra o
+orçamento da página e, opcionalmente, grava estatísticas do cProfile.
+"""
+
+import cProfile
+import functools
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import streamlit as st
+
+ETAPAS = ("dados", "transformacao", "figura")
+ORCAMENTO_PADRAO_MS = float(os.getenv("AURORA_ORCAMENTO_RENDER_MS", "800"))
+DIRETORIO_CPROFILE = os.getenv("AURORA_CPROFILE_DIR")
+
+_CHAVE_ESTADO = "_perfil_renderizacao"
+
+
+class PerfilRerun:
+    """Tempos coletados durante uma execução (rerun) da página."""
+
+    def __init__(self, pagina: str, orcamento_ms: float):
+        self.pagina = pagina
+        self.orcamento_ms = orcamento_ms
+        self.inicio = time.perf_counter()
+        self.registros: List[Dict[str, object]] = []
+        self.profiler: Optional[cProfile.Profile] = None
+
+    def registrar(self, secao: str, etapa: str, duracao_ms: float) -> None:
+        self.registros.append({"Seção": secao, "Etapa": etapa, "ms": duracao_ms})
+
+    @property
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.inicio) * 1000
+
+
+def iniciar_perfil(pagina: str, orcamento_ms: float = ORCAMENTO_PADRAO_MS) -> PerfilRerun:
+    """Inicia a medição do rerun; deve ser chamada logo após set_page_config."""
+    # Um rerun interrompido (st.rerun, st.stop ou exceção) não chega a renderizar_painel
+    anterior = _perfil_atual()
+    if anterior is not None:
+        _parar_profiler(anterior)
+    perfil = PerfilRerun(pagina, orcamento_ms)
+    if DIRETORIO_CPROFILE:
+        perfil.profiler = cProfile.Profile()
+        perfil.profiler.enable()
+    st.session_state[_CHAVE_ESTADO] = perfil
+    return perfil
+
+
+def _perfil_atual() -> Optional[PerfilRerun]:
+    return st.session_state.get(_CHAVE_ESTADO)
+
+
+def _parar_profiler(perfil: PerfilRerun) -> Optional[cProfile.Profile]:
+    """Desativa o cProfile do rerun (uma única vez) e o devolve."""
+    profiler, perfil.profiler = perfil.profiler, None
+    if profiler is not None:
+        profiler.disable()
+    return profiler
+
+
+@contextmanager
+def secao(nome: str, etapa: str = "figura"):
+    """Cronometra um trecho da página como uma etapa de uma seção."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        perfil = _perfil_atual()
+        if perfil is not None:
+            perfil.registrar(nome, etapa, (time.perf_counter() - inicio) * 1000)
+
+
+def cronometrar(nome: str, etapa: str = "dados") -> Callable:
+    """Decorator equivalente a `secao` para funções (ex.: carregamento de dados)."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with secao(nome, etapa):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def renderizar_painel() -> None:
+    """Mostra o painel de tempos na barra lateral; deve ser chamada no fim da página."""
+    perfil = _perfil_atual()
+    if perfil is None:
+        return
+
+    total = perfil.total_ms
+    arquivo_prof = None
+    profiler = _parar_profiler(perfil)
+    if profiler is not None:
+        diretorio = Path(DIRETORIO_CPROFILE)
+        diretorio.mkdir(parents=True, exist_ok=True)
+        arquivo_prof = diretorio / f"{perfil.pagina}_{datetime.now():%Y%m%d_%H%M%S_%f}.prof"
+        profiler.dump_stats(arquivo_prof)
+
+    por_secao: Dict[str, Dict[str, float]] = {}
+    for registro in perfil.registros:
+        linha = por_secao.setdefault(registro["Seção"], {etapa: 0.0 for etapa in ETAPAS})
+        linha[registro["Etapa"]] = linha.get(registro["Etapa"], 0.0) + registro["ms"]
+    tabela = [
+        {"Seção": nome, **{e: round(ms, 1) for e, ms in etapas.items()},
+         "Total": round(sum(etapas.values()), 1)}
+        for nome, etapas in sorted(por_secao.items(), key=lambda i: -sum(i[1].values()))
+    ]
+
+    with st.sidebar:
+        with st.expander(f"⏱️ Renderização: {total:.0f} ms", expanded=False):
+            if total > perfil.orcamento_ms:
+                st.warning(f"Acima do orçamento de {perfil.orcamento_ms:.0f} ms")
+            else:
+                st.caption(f"Orçamento: {perfil.orcamento_ms:.0f} ms")
+            st.dataframe(tabela, use_container_width=True, hide_index=True)
+            if arquivo_prof is not None:
+                st.caption(f"cProfile: {arquivo_prof}")
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Agregados pré-calculados de sintomas para a análise de tendências.
+Tokeniza triagens.sintomas contra o vocabulário de embeddings_sintomas e
+mantém contagens semanais e de coocorrência sintoma × comorbidade,
+calculadas com matrizes esparsas. Roda de forma incremental (marca d'água
+em created_at) e com reconstrução completa noturna. Como created_at é o
+início da transação, triagens que confirmam depois da marca são relidas na
+janela de atraso_commit e descartadas se já agregadas.
+"""
+
+import logging
+import re
+import sys
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+from scipy import sparse
+
+from embeddings import normalizar_texto
+from vector_setup import VectorDatabaseSetup
+
+logger = logging.getLogger(__name__)
+
+JOB = "agregados_sintomas"
+
+
+class TokenizadorSintomas:
+    """Reconhece termos do vocabulário de sintomas em texto livre."""
+
+    def __init__(self, vocabulario: Sequence[str]):
+        self.vocabulario = list(vocabulario)
+        self._indice = {normalizar_texto(s): i for i, s in enumerate(self.vocabulario)}
+        termos = sorted(self._indice, key=len, reverse=True)
+        self._padrao = re.compile(r"\b(" + "|".join(map(re.escape, termos)) + r")\b") if termos else None
+
+    def tokenizar(self, texto: Optional[str]) -> Set[int]:
+        """Índices (no vocabulário) dos sintomas mencionados no texto."""
+        if not texto or self._padrao is None:
+            return set()
+        return {self._indice[m] for m in self._padrao.findall(normalizar_texto(texto))}
+
+
+def inicio_semana(momento: datetime) -> date:
+    """Segunda-feira da semana do momento informado."""
+    dia = momento.date()
+    return dia - timedelta(days=dia.weekday())
+
+
+class AgregadorSintomas:
+    """Mantém as tabelas de agregados de sintomas."""
+
+    def __init__(self, db: VectorDatabaseSetup, tamanho_lote: int = 20000,
+                 atraso_commit: timedelta = timedelta(minutes=5)):
+        self.db = db
+        self.tamanho_lote = tamanho_lote
+        self.atraso_commit = atraso_commit
+        self.tokenizador: Optional[TokenizadorSintomas] = None
+
+    def create_tables(self) -> bool:
+        """Cria as tabelas de agregados e de controle."""
+        try:
+            conn = self.db.connect()
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS agregado_sintomas_semanal (
+                    semana DATE NOT NULL,
+                    sintoma VARCHAR(255) NOT NULL,
+                    casos INT NOT NULL DEFAULT 0,
+                    PRIMARY KEY (semana, sintoma)
+                );
+
+                CREATE TABLE IF NOT EXISTS agregado_sintomas_comorbidades (
+                    sintoma VARCHAR(255) NOT NULL,
+                    comorbidade VARCHAR(100) NOT NULL,
+                    casos INT NOT NULL DEFAULT 0,
+                    PRIMARY KEY (sintoma, comorbidade)
+                );
+
+                -- Marginais usadas na normalização da correlação
+                CREATE TABLE IF NOT EXISTS agregado_marginais (
+                    tipo VARCHAR(20) NOT NULL CHECK (tipo IN ('sintoma', 'comorbidade', 'total')),
+                    termo VARCHAR(255) NOT NULL,
+                    casos BIGINT NOT NULL DEFAULT 0,
+                    PRIMARY KEY (tipo, termo)
+                );
+
+                CREATE TABLE IF NOT EXISTS controle_agregados (
+                    job VARCHAR(100) PRIMARY KEY,
+                    processado_ate TIMESTAMP NOT NULL,
+                    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+
+                -- Triagens já agregadas dentro da janela de atraso da marca d'água
+                CREATE TABLE IF NOT EXISTS agregados_triagens_recentes (
+                    triagem_id UUID PRIMARY KEY,
+                    created_at TIMESTAMP NOT NULL
+                );
+            """, nome="criar_tabelas_agregados_sintomas")
+            conn.commit()
+            cursor.close()
+            conn.close()
+            logger.info("✅ Tabelas de agregados de sintomas criadas")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao criar tabelas de agregados: {e}")
+            return False
+
+    def _carregar_vocabulario(self, cursor) -> TokenizadorSintomas:
+        cursor.execute("SELECT sintoma FROM embeddings_sintomas ORDER BY sintoma",
+                       nome="carregar_vocabulario_sintomas")
+        self.tokenizador = TokenizadorSintomas([linha[0] for linha in cursor.fetchall()])
+        return self.tokenizador
+
+    def atualizar_incremental(self) -> int:
+        """Agrega apenas as triagens criadas após a última marca d'água.
+
+        A leitura recua atraso_commit antes da marca; as triagens dessa janela
+        já agregadas ficam em agregados_triagens_recentes e não contam de novo.
+        """
+        return self._executar(reconstruir=False)
+
+    def reconstruir(self) -> int:
+        """Recalcula todos os agregados (execução noturna)."""
+        return self._executar(reconstruir=True)
+
+    def _executar(self, reconstruir: bool) -> int:
+        conn = self.db.connect()
+        total = 0
+        try:
+            cursor = conn.cursor()
+            # Uma execução incremental sobreposta à reconstrução somaria a mesma faixa duas vezes
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (JOB,),
+                           nome="bloquear_agregados")
+            tokenizador = self._carregar_vocabulario(cursor)
+            # clock_timestamp e não NOW(): a transação pode ter esperado pelo bloqueio
+            cursor.execute("SELECT clock_timestamp()::timestamp", nome="agregados_inicio")
+            ate = cursor.fetchone()[0]
+
+            if reconstruir:
+                # DELETE (e não TRUNCATE) para não bloquear leitores durante a reconstrução
+                cursor.execute("""
+                    DELETE FROM agregado_sintomas_semanal;
+                    DELETE FROM agregado_sintomas_comorbidades;
+                    DELETE FROM agregado_marginais;
+                    DELETE FROM agregados_triagens_recentes;
+                """, nome="limpar_agregados_sintomas")
+                desde = datetime.min
+            else:
+                cursor.execute("SELECT processado_ate FROM controle_agregados WHERE job = %s",
+                               (JOB,), nome="ler_marca_agregados")
+                linha = cursor.fetchone()
+                desde = linha[0] - self.atraso_commit if linha else datetime.min
+                ate = max(ate, linha[0] if linha else datetime.min)
+
+            leitura = conn.cursor(name="agregados_sintomas_triagens")
+            leitura.itersize = self.tamanho_lote
+            leitura.execute("""
+                SELECT t.id::text, t.created_at, t.sintomas, COALESCE(p.comorbidades, '{}')
+                FROM triagens t
+                LEFT JOIN pacientes p ON p.id = t.paciente_id
+                WHERE t.created_at > %s AND t.created_at <= %s
+                  AND NOT EXISTS (
+                      SELECT 1 FROM agregados_triagens_recentes r WHERE r.triagem_id = t.id
+                  )
+            """, (desde, ate), nome="ler_triagens_agregados")
+            limite_recentes = ate - self.atraso_commit
+            while True:
+                linhas = leitura.fetchmany(self.tamanho_lote)
+                if not linhas:
+                    break
+                self._agregar_lote(cursor, tokenizador, [linha[1:] for linha in linhas])
+                recentes = [(triagem_id, criada_em) for triagem_id, criada_em, _, _ in linhas
+                            if criada_em > limite_recentes]
+                if recentes:
+                    execute_values(cursor, """
+                        INSERT INTO agregados_triagens_recentes (triagem_id, created_at)
+                        VALUES %s
+                        ON CONFLICT (triagem_id) DO NOTHING
+                    """, recentes, template="(%s::uuid, %s)")
+                total += len(linhas)
+            leitura.close()
+
+            cursor.execute("DELETE FROM agregados_triagens_recentes WHERE created_at <= %s",
+                           (limite_recentes,), nome="limpar_triagens_recentes_agregados")
+
+            cursor.execute("""
+                INSERT INTO controle_agregados (job, processado_ate, atualizado_em)
+                VALUES (%s, %s, CURRENT_TIMESTAMP)
+                ON CONFLICT (job) DO UPDATE SET
+                    processado_ate = EXCLUDED.processado_ate,
+                    atualizado_em = EXCLUDED.atualizado_em
+            """, (JOB, ate), nome="gravar_marca_agregados")
+            conn.commit()
+            cursor.close()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        modo = "reconstrução" if reconstruir else "incremental"
+        logger.info(f"✅ Agregados de sintomas ({modo}): {total} triagens processadas")
+        return total
+
+    def _agregar_lote(self, cursor, tokenizador: TokenizadorSintomas,
+                      linhas: List[Tuple[datetime, str, List[str]]]) -> None:
+        """Agrega um lote com produtos de matrizes esparsas e soma nas tabelas."""
+        n = len(linhas)
+        semanas: Dict[date, int] = {}
+        comorbidades: Dict[str, int] = {}
+        s_linhas, s_colunas = [], []
+        c_linhas, c_colunas = [], []
+        w_colunas = np.empty(n, dtype=np.int64)
+
+        for i, (criado, texto, lista) in enumerate(linhas):
+            w_colunas[i] = semanas.setdefault(inicio_semana(criado), len(semanas))
+            for j in tokenizador.tokenizar(texto):
+                s_linhas.append(i)
+                s_colunas.append(j)
+            for comorbidade in set(lista or []):
+                c_linhas.append(i)
+                c_colunas.append(comorbidades.setdefault(comorbidade, len(comorbidades)))
+
+        V = len(tokenizador.vocabulario)
+        S = sparse.csr_matrix((np.ones(len(s_linhas), dtype=np.int32), (s_linhas, s_colunas)),
+                              shape=(n, V))
+        C = sparse.csr_matrix((np.ones(len(c_linhas), dtype=np.int32), (c_linhas, c_colunas)),
+                              shape=(n, len(comorbidades)))
+        W = sparse.csr_matrix((np.ones(n, dtype=np.int32), (np.arange(n), w_colunas)),
+                              shape=(n, len(semanas)))
+
+        semanal = (W.T @ S).tocoo()
+        coocorrencia = (S.T @ C).tocoo()
+        lista_semanas = list(semanas)
+        lista_comorbidades = list(comorbidades)
+        vocab = tokenizador.vocabulario
+
+        if semanal.nnz:
+            execute_values(cursor, """
+                INSERT INTO agregado_sintomas_semanal AS a (semana, sintoma, casos)
+                VALUES %s
+                ON CONFLICT (semana, sintoma) DO UPDATE SET casos = a.casos + EXCLUDED.casos
+            """, [(lista_semanas[w], vocab[s], int(c))
+                  for w, s, c in zip(semanal.row, semanal.col, semanal.data)])
+        if coocorrencia.nnz:
+            execute_values(cursor, """
+                INSERT INTO agregado_sintomas_comorbidades AS a (sintoma, comorbidade, casos)
+                VALUES %s
+                ON CONFLICT (sintoma, comorbidade) DO UPDATE SET casos = a.casos + EXCLUDED.casos
+            """, [(vocab[s], lista_comorbidades[c], int(v))
+                  for s, c, v in zip(coocorrencia.row, coocorrencia.col, coocorrencia.data)])
+
+        marginais = [("total", "triagens", n)]
+        marginais += [("sintoma", vocab[j], int(v))
+                      for j, v in enumerate(np.asarray(S.sum(axis=0)).ravel()) if v]
+        marginais += [("comorbidade", lista_comorbidades[j], int(v))
+                      for j, v in enumerate(np.asarray(C.sum(axis=0)).ravel()) if v]
+        execute_values(cursor, """
+            INSERT INTO agregado_marginais AS a (tipo, termo, casos)
+            VALUES %s
+            ON CONFLICT (tipo, termo) DO UPDATE SET casos = a.casos + EXCLUDED.casos
+        """, marginais)
+
+
+def carregar_tendencias(db: VectorDatabaseSetup, semanas: int = 8,
+                        top: int = 5) -> pd.DataFrame:
+    """Casos semanais dos sintomas mais frequentes (colunas Semana, Sintoma, Casos)."""
+    conn = db.connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            WITH recentes AS (
+                SELECT semana, sintoma, casos
+                FROM agregado_sintomas_semanal
+                WHERE semana >= date_trunc('week', CURRENT_DATE) - make_interval(weeks => %s)
+            ), principais AS (
+                SELECT sintoma FROM recentes
+                GROUP BY sintoma ORDER BY SUM(casos) DESC LIMIT %s
+            )
+            SELECT r.semana, r.sintoma, r.casos
+            FROM recentes r JOIN principais USING (sintoma)
+            ORDER BY r.semana, r.sintoma
+        """, (semanas, top), nome="ler_tendencias_sintomas")
+        linhas = cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
+    return pd.DataFrame(linhas, columns=["Semana", "Sintoma", "Casos"])
+
+
+def carregar_correlacao(db: VectorDatabaseSetup, top_sintomas: int = 5,
+                        top_comorbidades: int = 5) -> pd.DataFrame:
+    """Coeficiente phi entre sintomas e comorbidades (sintomas × comorbidades)."""
+    conn = db.connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT tipo, termo, casos FROM agregado_marginais",
+                       nome="ler_marginais_sintomas")
+        marginais = cursor.fetchall()
+        cursor.execute("SELECT sintoma, comorbidade, casos FROM agregado_sintomas_comorbidades",
+                       nome="ler_coocorrencia_sintomas")
+        coocorrencias = cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
+
+    total = next((c for tipo, _, c in marginais if tipo == "total"), 0)
+    por_tipo: Dict[str, pd.Series] = {
+        tipo: pd.Series({t: c for tp, t, c in marginais if tp == tipo}, dtype=float)
+        for tipo in ("sintoma", "comorbidade")
+    }
+    if not total or por_tipo["sintoma"].empty or por_tipo["comorbidade"].empty:
+        return pd.DataFrame()
+
+    sintomas = por_tipo["sintoma"].nlargest(top_sintomas)
+    comorbidades = por_tipo["comorbidade"].nlargest(top_comorbidades)
+    n11 = (pd.DataFrame(coocorrencias, columns=["sintoma", "comorbidade", "casos"])
+           .pivot(index="sintoma", columns="comorbidade", values="casos")
+           .reindex(index=sintomas.index, columns=comorbidades.index)
+           .fillna(0).to_numpy(dtype=float))
+
+    a = sintomas.to_numpy()[:, None]
+    b = comorbidades.to_numpy()[None, :]
+    denominador = np.sqrt(a * (total - a) * b * (total - b))
+    phi = np.divide(n11 * total - a * b, denominador,
+                    out=np.zeros_like(n11), where=denominador > 0)
+    return pd.DataFrame(phi, index=sintomas.index, columns=comorbidades.index)
+
+
+def main():
+    """Função principal."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Agregados de sintomas Aurora AI')
+    parser.add_argument('--reconstruir', action='store_true',
+                        help='Recalcula tudo (execução noturna)')
+    parser.add_argument('--host', default='localhost', help='Host do PostgreSQL')
+    parser.add_argument('--port', type=int, default=5432, help='Porta do PostgreSQL')
+    parser.add_argument('--database', default='aurora_ai', help='Nome do banco de dados')
+    parser.add_argument('--user', default='admin', help='Usuário do banco')
+    parser.add_argument('--password', default='aurora123', help='Senha do banco')
+
+    args = parser.parse_args()
+
+    db = VectorDatabaseSetup(host=args.host, port=args.port, database=args.database,
+                             user=args.user, password=args.password)
+    agregador = AgregadorSintomas(db)
+    if not agregador.create_tables():
+        sys.exit(1)
+
+    try:
+        if args.reconstruir:
+            agregador.reconstruir()
+        else:
+            agregador.atualizar_incremental()
+    except Exception as e:
+        logger.error(f"❌ Erro ao atualizar agregados de sintomas: {e}")
+        sys.exit(1)
+
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+Arquivamento frio das triagens antigas.
+Meses inteiros de triagens anteriores ao horizonte de retenção quente são
+gravados, com filas, atendimentos e logs_decisoes_ia ligados a elas, em
+Parquet comprimido particionado por ano/mês (tabela/ano=AAAA/mes=MM). Cada
+arquivo é relido e conferido (contagem, checksum dos ids contra o banco e
+checksum do conteúdo) antes de as linhas serem apagadas. ConsultaHistorica
+junta o banco e os arquivos para relatórios de vários anos.
+"""
+
+import hashlib
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from vector_setup import VectorDatabaseSetup
+
+logger = logging.getLogger(__name__)
+
+# Linhas de cada tabela que acompanham as triagens do mês (%(inicio)s, %(fim)s);
+# a ordem é a de gravação, e a inversa é a de remoção por causa das chaves estrangeiras
+_TRIAGENS_DO_MES = "SELECT id FROM triagens WHERE created_at >= %(inicio)s AND created_at < %(fim)s"
+SELECOES = {
+    "triagens": "created_at >= %(inicio)s AND created_at < %(fim)s",
+    "logs_decisoes_ia": f"""triagem_id IN ({_TRIAGENS_DO_MES})
+        OR (triagem_id IS NULL AND created_at >= %(inicio)s AND created_at < %(fim)s)""",
+    "filas": f"triagem_id IN ({_TRIAGENS_DO_MES})",
+    "atendimentos": f"""fila_id IN (SELECT id FROM filas WHERE triagem_id IN ({_TRIAGENS_DO_MES}))
+        OR (fila_id IS NULL AND created_at >= %(inicio)s AND created_at < %(fim)s)""",
+}
+
+# Tipo do PostgreSQL (udt_name) → expressão de leitura e tipo Arrow
+_TIPOS = {
+    "uuid": ("{}::text", pa.string()),
+    "text": ("{}", pa.string()),
+    "varchar": ("{}", pa.string()),
+    "int4": ("{}", pa.int32()),
+    "int8": ("{}", pa.int64()),
+    "numeric": ("{}::float8", pa.float64()),
+    "bool": ("{}", pa.bool_()),
+    "timestamp": ("{}", pa.timestamp("us")),
+    "date": ("{}", pa.date32()),
+    "interval": ("{}", pa.duration("us")),
+    "jsonb": ("{}::text", pa.string()),
+    "_text": ("{}::text[]", pa.list_(pa.string())),
+    "vector": ("{}::real[]", pa.list_(pa.float32())),
+}
+
+
+@dataclass
+class ResultadoArquivamento:
+    """Resumo do arquivamento de uma tabela em um mês."""
+
+    tabela: str
+    arquivo: Path
+    linhas: int
+    bytes: int
+    checksum_ids: str
+    checksum_conteudo: str
+
+
+def _periodo(ano: int, mes: int) -> Tuple[date, date]:
+    fim = date(ano + 1, 1, 1) if mes == 12 else date(ano, mes + 1, 1)
+    return date(ano, mes, 1), fim
+
+
+class _Checksum:
+    """Checksums incrementais: md5 da lista de ids (comparável com o banco) e sha256 das linhas."""
+
+    def __init__(self):
+        self.linhas = 0
+        self._ids = hashlib.md5()
+        self._conteudo = hashlib.sha256()
+
+    def atualizar(self, linhas: Sequence[Tuple], posicao_id: int) -> None:
+        for linha in linhas:
+            self._ids.update(((',' if self.linhas else '') + linha[posicao_id]).encode())
+            self._conteudo.update(repr(tuple(linha)).encode())
+            self.linhas += 1
+
+    @property
+    def ids(self) -> str:
+        return self._ids.hexdigest()
+
+    @property
+    def conteudo(self) -> str:
+        return self._conteudo.hexdigest()
+
+
+class ArquivadorFrio:
+    """Move meses antigos de triagens e tabelas ligadas para Parquet verificado."""
+
+    def __init__(self, db: VectorDatabaseSetup, raiz: Path,
+                 horizonte_dias: int = 730, tamanho_lote: int = 10000):
+        self.db = db
+        self.raiz = Path(raiz)
+        self.horizonte_dias = horizonte_dias
+        self.tamanho_lote = tamanho_lote
+
+    def create_tables(self) -> bool:
+        """Cria o catálogo das partições arquivadas."""
+        try:
+            conn = self.db.connect()
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS arquivo_frio_particoes (
+                    tabela VARCHAR(50) NOT NULL,
+                    ano INT NOT NULL,
+                    mes INT NOT NULL,
+                    arquivo TEXT NOT NULL,
+                    linhas BIGINT NOT NULL,
+                    bytes BIGINT NOT NULL,
+                    checksum_ids CHAR(32) NOT NULL,
+                    checksum_conteudo CHAR(64) NOT NULL,
+                    arquivado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (tabela, ano, mes)
+                );
+            """, nome="criar_tabela_arquivo_frio")
+            conn.commit()
+            cursor.close()
+            conn.close()
+            logger.info("✅ Catálogo de arquivamento frio criado")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao criar catálogo de arquivamento: {e}")
+            return False
+
+    def meses_elegiveis(self) -> List[Tuple[int, int]]:
+        """Meses completos de triagens anteriores ao horizonte que ainda estão no banco."""
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT DISTINCT EXTRACT(YEAR FROM created_at)::int, EXTRACT(MONTH FROM created_at)::int
+                FROM triagens
+                WHERE created_at < date_trunc('month', NOW() - make_interval(days => %s))
+                ORDER BY 1, 2
+            """, (self.horizonte_dias,), nome="listar_meses_arquivaveis")
+            meses = [tuple(linha) for linha in cursor.fetchall()]
+            cursor.close()
+        finally:
+            conn.close()
+        return meses
+
+    def _esquema(self, cursor, tabela: str) -> Tuple[List[str], pa.Schema]:
+        cursor.execute("""
+            SELECT column_name, udt_name
+            FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = %s
+            ORDER BY ordinal_position
+        """, (tabela,), nome="ler_colunas_tabela")
+        expressoes, campos = [], []
+        for coluna, tipo in cursor.fetchall():
+            expressao, tipo_arrow = _TIPOS.get(tipo, ("{}::text", pa.string()))
+            expressoes.append(f"{expressao.format(coluna)} AS {coluna}")
+            campos.append(pa.field(coluna, tipo_arrow))
+        return expressoes, pa.schema(campos)
+
+    def _arquivo(self, tabela: str, ano: int, mes: int) -> Path:
+        return self.raiz / tabela / f"ano={ano}" / f"mes={mes:02d}" / "parte-0.parquet"
+
+    def _exportar(self, conn, tabela: str, ano: int, mes: int,
+                  parametros: Dict[str, Any]) -> ResultadoArquivamento:
+        cursor = conn.cursor()
+        expressoes, esquema = self._esquema(cursor, tabela)
+        cursor.execute(f"""
+            SELECT COUNT(*), COALESCE(md5(string_agg(id::text, ',' ORDER BY id)), md5(''))
+            FROM {tabela} WHERE {SELECOES[tabela]}
+        """, parametros, nome=f"checksum_banco:{tabela}")
+        linhas_banco, ids_banco = cursor.fetchone()
+        cursor.close()
+
+        arquivo = self._arquivo(tabela, ano, mes)
+        arquivo.parent.mkdir(parents=True, exist_ok=True)
+        # Prefixo "." para o dataset ignorar sobras de execuções interrompidas
+        temporario = arquivo.with_name(f".{arquivo.name}.tmp")
+        posicao_id = esquema.get_field_index("id")
+
+        gravado = _Checksum()
+        cursor = conn.cursor(name=f"arquivamento_{tabela}")
+        cursor.itersize = self.tamanho_lote
+        cursor.execute(f"""
+            SELECT {', '.join(expressoes)} FROM {tabela}
+            WHERE {SELECOES[tabela]}
+            ORDER BY id
+        """, parametros, nome=f"exportar_arquivo:{tabela}")
+        with pq.ParquetWriter(temporario, esquema, compression="zstd") as writer:
+            while True:
+                linhas = cursor.fetchmany(self.tamanho_lote)
+                if not linhas:
+                    break
+                colunas = list(zip(*linhas))
+                lote = pa.RecordBatch.from_arrays(
+                    [pa.array(valores, type=campo.type) for campo, valores in zip(esquema, colunas)],
+                    schema=esquema)
+                writer.write_batch(lote)
+                # Checksum do lote já convertido (vetores em float32), comparável com a releitura
+                gravado.atualizar([tuple(linha.values()) for linha in lote.to_pylist()], posicao_id)
+        cursor.close()
+
+        relido = _Checksum()
+        for lote in pq.ParquetFile(temporario).iter_batches(batch_size=self.tamanho_lote):
+            relido.atualizar([tuple(linha.values()) for linha in lote.to_pylist()], posicao_id)
+
+        if not (linhas_banco == gravado.linhas == relido.linhas
+                and ids_banco == gravado.ids == relido.ids
+                and gravado.conteudo == relido.conteudo):
+            temporario.unlink()
+            raise RuntimeError(
+                f"Verificação falhou para {tabela} {ano}-{mes:02d}: banco {linhas_banco} linhas, "
+                f"gravado {gravado.linhas}, relido {relido.linhas}")
+        os.replace(temporario, arquivo)
+        return ResultadoArquivamento(tabela, arquivo, relido.linhas, arquivo.stat().st_size,
+                                     relido.ids, relido.conteudo)
+
+    def arquivar_mes(self, ano: int, mes: int) -> List[ResultadoArquivamento]:
+        """Grava e confere os arquivos do mês e só então remove as linhas do banco."""
+        inicio, fim = _periodo(ano, mes)
+        parametros = {"inicio": inicio, "fim": fim}
+        if self._ja_arquivado(ano, mes):
+            # Sobrescrever a partição perderia as linhas já removidas do banco
+            raise RuntimeError(f"{ano}-{mes:02d} já consta em arquivo_frio_particoes")
+
+        # Todas as tabelas saem do mesmo snapshot
+        conn = self.db.connect()
+        conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+        try:
+            resultados = [self._exportar(conn, tabela, ano, mes, parametros) for tabela in SELECOES]
+        finally:
+            conn.rollback()
+            conn.close()
+
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            for resultado in reversed(resultados):
+                cursor.execute(f"""
+                    SELECT COALESCE(md5(string_agg(id::text, ',' ORDER BY id)), md5(''))
+                    FROM {resultado.tabela} WHERE {SELECOES[resultado.tabela]}
+                """, parametros, nome=f"reconferir_checksum:{resultado.tabela}")
+                if cursor.fetchone()[0] != resultado.checksum_ids:
+                    raise RuntimeError(f"{resultado.tabela} mudou desde a exportação de "
+                                       f"{ano}-{mes:02d}; nada foi removido")
+                cursor.execute(f"DELETE FROM {resultado.tabela} WHERE {SELECOES[resultado.tabela]}",
+                               parametros, nome=f"remover_arquivado:{resultado.tabela}")
+                if cursor.rowcount != resultado.linhas:
+                    raise RuntimeError(f"{resultado.tabela}: {cursor.rowcount} linhas removidas, "
+                                       f"{resultado.linhas} arquivadas; nada foi removido")
+                cursor.execute("""
+                    INSERT INTO arquivo_frio_particoes
+                        (tabela, ano, mes, arquivo, linhas, bytes, checksum_ids, checksum_conteudo)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                """, (resultado.tabela, ano, mes, str(resultado.arquivo), resultado.linhas,
+                      resultado.bytes, resultado.checksum_ids, resultado.checksum_conteudo),
+                    nome="registrar_particao_arquivada")
+            conn.commit()
+            cursor.close()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        for resultado in resultados:
+            logger.info(f"   📦 {resultado.tabela} {ano}-{mes:02d}: {resultado.linhas} linhas, "
+                        f"{resultado.bytes / 1e6:.1f} MB")
+        return resultados
+
+    def _ja_arquivado(self, ano: int, mes: int) -> bool:
+        """Arquivos sem registro no catálogo são sobras de uma execução interrompida."""
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM arquivo_frio_particoes WHERE ano = %s AND mes = %s LIMIT 1",
+                           (ano, mes), nome="verificar_particao_arquivada")
+            existe = cursor.fetchone() is not None
+            cursor.close()
+        finally:
+            conn.close()
+        return existe
+
+    def arquivar(self) -> int:
+        """Arquiva todos os meses elegíveis; retorna o total de triagens movidas."""
+        total = 0
+        for ano, mes in self.meses_elegiveis():
+            inicio = time.perf_counter()
+            resultados = self.arquivar_mes(ano, mes)
+            total += resultados[0].linhas
+            logger.info(f"✅ {ano}-{mes:02d} arquivado em {time.perf_counter() - inicio:.1f}s")
+        return total
+
+
+class ConsultaHistorica:
+    """Consultas que juntam o banco quente e os arquivos Parquet."""
+
+    def __init__(self, db: VectorDatabaseSetup, raiz: Path):
+        self.db = db
+        self.raiz = Path(raiz)
+
+    def ler(self, tabela: str, inicio: date, fim: date,
+            colunas: Optional[List[str]] = None) -> pa.Table:
+        """Linhas arquivadas da tabela nos meses de inicio até fim (exclusivo)."""
+        diretorio = self.raiz / tabela
+        if not diretorio.exists():
+            return pa.table({coluna: pa.array([], pa.null()) for coluna in colunas or []})
+        dataset = ds.dataset(diretorio, format="parquet", partitioning="hive")
+        ano, mes = ds.field("ano"), ds.field("mes")
+        filtro = (((ano > inicio.year) | ((ano == inicio.year) & (mes >= inicio.month)))
+                  & ((ano < fim.year) | ((ano == fim.year) & (mes <= fim.month))))
+        return dataset.to_table(columns=colunas, filter=filtro)
+
+    def _triagens_por_dia(self, inicio: date, fim: date) -> Iterator[Tuple[date, Any, int, int]]:
+        """(dia, modelo_id, total, acertos) das triagens arquivadas."""
+        triagens = self.ler("triagens", inicio, fim, ["id", "created_at", "prioridade_medico", "acerto_ia"])
+        if not triagens.num_rows:
+            return
+        triagens = triagens.filter(pc.and_(
+            pc.is_valid(triagens["prioridade_medico"]),
+            pc.and_(pc.greater_equal(triagens["created_at"],
+                                     pa.scalar(datetime(inicio.year, inicio.month, inicio.day), pa.timestamp("us"))),
+                    pc.less(triagens["created_at"],
+                            pa.scalar(datetime(fim.year, fim.month, fim.day), pa.timestamp("us"))))))
+        triagens = triagens.append_column(
+            "data", pc.cast(triagens["created_at"], pa.date32())
+        ).append_column(
+            "acerto", pc.cast(pc.fill_null(triagens["acerto_ia"], False), pa.int64())
+        )
+        logs = self.ler("logs_decisoes_ia", inicio, fim, ["triagem_id", "modelo_id"])
+        if not logs.num_rows:
+            logs = pa.table({"triagem_id": pa.array([], pa.string()),
+                             "modelo_id": pa.array([], pa.string())})
+        # LEFT JOIN como na view performance_ia: uma linha por log da triagem
+        unidas = triagens.select(["id", "data", "acerto"]).join(
+            logs, keys="id", right_keys="triagem_id", join_type="left outer")
+        agregado = unidas.group_by(["data", "modelo_id"]).aggregate(
+            [("id", "count"), ("acerto", "sum")])
+        for linha in agregado.to_pylist():
+            yield linha["data"], linha["modelo_id"], linha["id_count"], linha["acerto_sum"]
+
+    def performance_ia(self, inicio: date, fim: date) -> List[Dict[str, Any]]:
+        """Mesmas colunas da view performance_ia, somando banco e arquivo, de inicio até fim (exclusivo)."""
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT DATE(t.created_at), l.modelo_id::text, COUNT(*),
+                       SUM(CASE WHEN t.acerto_ia = TRUE THEN 1 ELSE 0 END)
+                FROM triagens t
+                LEFT JOIN logs_decisoes_ia l ON l.triagem_id = t.id
+                WHERE t.prioridade_medico IS NOT NULL
+                  AND t.created_at >= %s AND t.created_at < %s
+                GROUP BY 1, 2
+            """, (inicio, fim), nome="performance_ia_quente")
+            quentes = cursor.fetchall()
+            cursor.execute("SELECT id::text, nome, versao FROM modelos_ia", nome="carregar_modelos_ia")
+            modelos = {id_: (nome, versao) for id_, nome, versao in cursor.fetchall()}
+            cursor.close()
+        finally:
+            conn.close()
+
+        somas = defaultdict(lambda: [0, 0])
+        for dia, modelo_id, total, acertos in [*quentes, *self._triagens_por_dia(inicio, fim)]:
+            chave = (dia, modelos.get(modelo_id, (None, None)))
+            somas[chave][0] += total
+            somas[chave][1] += acertos
+
+        return [
+            {"data": dia, "total_triagens": total, "acertos": acertos,
+             "acuracia_dia": round(100.0 * acertos / total, 2),
+             "modelo": modelo, "versao": versao}
+            for (dia, (modelo, versao)), (total, acertos)
+            in sorted(somas.items(), key=lambda item: item[0][0], reverse=True)
+        ]
+
+
+def main():
+    """Função principal."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Arquivamento frio de triagens Aurora AI')
+    parser.add_argument('acao', choices=['arquivar', 'listar', 'performance'])
+    parser.add_argument('--raiz', type=Path, default=Path('arquivo_frio'),
+                        help='Diretório dos arquivos Parquet')
+    parser.add_argument('--horizonte-dias', type=int, default=730,
+                        help='Idade mínima das triagens arquivadas')
+    parser.add_argument('--lote', type=int, default=10000, help='Linhas por bloco')
+    parser.add_argument('--data-inicio', type=date.fromisoformat, help='AAAA-MM-DD (performance)')
+    parser.add_argument('--data-fim', type=date.fromisoformat, help='AAAA-MM-DD exclusiva (performance)')
+    parser.add_argument('--host', default='localhost', help='Host do PostgreSQL')
+    parser.add_argument('--port', type=int, default=5432, help='Porta do PostgreSQL')
+    parser.add_argument('--database', default='aurora_ai', help='Nome do banco de dados')
+    parser.add_argument('--user', default='admin', help='Usuário do banco')
+    parser.add_argument('--password', default='aurora123', help='Senha do banco')
+
+    args = parser.parse_args()
+
+    db = VectorDatabaseSetup(host=args.host, port=args.port, database=args.database,
+                             user=args.user, password=args.password)
+    arquivador = ArquivadorFrio(db, args.raiz, horizonte_dias=args.horizonte_dias,
+                                tamanho_lote=args.lote)
+    if not arquivador.create_tables():
+        sys.exit(1)
+
+    try:
+        if args.acao == 'arquivar':
+            total = arquivador.arquivar()
+            logger.info(f"🎉 {total} triagens movidas para {args.raiz}")
+        elif args.acao == 'listar':
+            for ano, mes in arquivador.meses_elegiveis():
+                logger.info(f"   - {ano}-{mes:02d}")
+        else:
+            if not (args.data_inicio and args.data_fim):
+                parser.error('--data-inicio e --data-fim são obrigatórias')
+            for linha in ConsultaHistorica(db, args.raiz).performance_ia(args.data_inicio, args.data_fim):
+                logger.info(f"   {linha['data']} {linha['modelo'] or '-'} {linha['versao'] or ''}: "
+                            f"{linha['acertos']}/{linha['total_triagens']} ({linha['acuracia_dia']}%)")
+    except Exception as e:
+        logger.error(f"❌ Erro no arquivamento: {e}")
+        sys.exit(1)
+
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Backfill paralelo e retomável dos embeddings de triagens.
+As triagens são divididas em faixas de chave primária com limites tirados
+dos quantis dos ids; cada faixa é processada por um processo do pool, em
+lotes ordenados por id, com gravação em massa (UPDATE ... FROM VALUES) e
+ponto de controle após cada lote. O tamanho do lote e as pausas se ajustam
+(AIMD) à latência das gravações para não disputar o primário com as
+triagens em andamento. As gravações passam pelo versionamento de embeddings,
+então versões em migração recebem os mesmos lotes (gravação dupla).
+"""
+
+import logging
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from ingestao_embeddings import EmbeddingDeduplicator
+from vector_setup import VectorDatabaseSetup
+
+logger = logging.getLogger(__name__)
+
+# Vetores da versão ativa (triagens_embeddings_ativas), não das colunas legadas
+FILTRO_NULOS = ("NOT EXISTS (SELECT 1 FROM triagens_embeddings_ativas e"
+                " WHERE e.triagem_id = triagens.id AND e.embedding_sintomas IS NOT NULL"
+                " AND (e.embedding_descricao IS NOT NULL OR triagens.descricao_completa IS NULL))")
+
+
+@dataclass
+class Particao:
+    """Faixa (inicio, fim] de ids de um job e seu ponto de controle."""
+
+    indice: int
+    inicio: Optional[str]
+    fim: Optional[str]
+    ultimo_id: Optional[str] = None
+    linhas: int = 0
+    concluida: bool = False
+
+
+class ControleVazao:
+    """Ajuste AIMD do lote e da pausa pela latência da gravação.
+
+    Gravações acima do alvo indicam disputa com o tráfego do primário: o lote
+    cai pela metade e a pausa dobra. Abaixo do alvo o lote cresce aos poucos
+    e a pausa diminui.
+    """
+
+    def __init__(self, lote: int = 500, lote_minimo: int = 50, lote_maximo: int = 5000,
+                 latencia_alvo_ms: float = 250.0, pausa_maxima_s: float = 5.0,
+                 vazao_maxima: Optional[float] = None):
+        self.lote = lote
+        self.lote_minimo = lote_minimo
+        self.lote_maximo = lote_maximo
+        self.latencia_alvo_ms = latencia_alvo_ms
+        self.pausa_maxima_s = pausa_maxima_s
+        self.vazao_maxima = vazao_maxima
+        self.pausa_s = 0.0
+
+    def registrar(self, linhas: int, gravacao_ms: float, total_s: float) -> float:
+        """Atualiza o lote e devolve quantos segundos esperar antes do próximo."""
+        if gravacao_ms > self.latencia_alvo_ms:
+            self.lote = max(self.lote_minimo, self.lote // 2)
+            self.pausa_s = min(self.pausa_maxima_s, max(self.pausa_s * 2, 0.1))
+        else:
+            self.lote = min(self.lote_maximo, self.lote + self.lote_minimo)
+            self.pausa_s = self.pausa_s / 2 if self.pausa_s > 0.01 else 0.0
+
+        pausa = self.pausa_s
+        if self.vazao_maxima:
+            pausa = max(pausa, linhas / self.vazao_maxima - total_s)
+        return pausa
+
+
+def _condicoes(inicio: Optional[str], fim: Optional[str], apenas_nulos: bool) -> Tuple[str, List[Any]]:
+    condicoes, params = [], []
+    if inicio:
+        condicoes.append("id > %s::uuid")
+        params.append(inicio)
+    if fim:
+        condicoes.append("id <= %s::uuid")
+        params.append(fim)
+    if apenas_nulos:
+        condicoes.append(FILTRO_NULOS)
+    return (" AND ".join(condicoes) or "TRUE"), params
+
+
+def _processar_particao(conexao: Dict[str, Any], job: str, particao: Particao,
+                        apenas_nulos: bool,
+                        opcoes_vazao: Dict[str, Any]) -> Tuple[int, int, float]:
+    """Executado em um processo do pool: processa a faixa até o fim."""
+    from versoes_embedding import VersionamentoEmbeddings
+
+    db = VectorDatabaseSetup(**conexao)
+    versionamento = VersionamentoEmbeddings(db)
+    vazao = ControleVazao(**opcoes_vazao)
+    ultimo = particao.ultimo_id or particao.inicio
+    processadas = 0
+    inicio_particao = time.perf_counter()
+
+    while True:
+        inicio_lote = time.perf_counter()
+        where, params = _condicoes(ultimo, particao.fim, apenas_nulos)
+        conn = db.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT id::text, sintomas, descricao_completa
+                FROM triagens
+                WHERE {where}
+                ORDER BY id
+                LIMIT %s
+            """, (*params, vazao.lote), nome="backfill_selecionar_lote")
+            triagens = cursor.fetchall()
+            cursor.close()
+        finally:
+            conn.close()
+
+        if not triagens:
+            _salvar_progresso(db, job, particao.indice, ultimo, 0, concluida=True)
+            break
+
+        preparados = versionamento.preparar_triagens(triagens)
+        inicio_gravacao = time.perf_counter()
+        versionamento.gravar_triagens(preparados)
+        gravacao_ms = (time.perf_counter() - inicio_gravacao) * 1000
+        versionamento.registrar_estatisticas()
+        ultimo = triagens[-1][0]
+        _salvar_progresso(db, job, particao.indice, ultimo, len(triagens))
+        processadas += len(triagens)
+
+        pausa = vazao.registrar(len(triagens), gravacao_ms, time.perf_counter() - inicio_lote)
+        if pausa > 0:
+            time.sleep(pausa)
+
+    return particao.indice, processadas, time.perf_counter() - inicio_particao
+
+
+def _salvar_progresso(db: VectorDatabaseSetup, job: str, particao: int,
+                      ultimo_id: Optional[str], linhas: int, concluida: bool = False):
+    conn = db.connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE backfill_embeddings_progresso
+            SET ultimo_id = %s::uuid, linhas = linhas + %s, concluida = %s,
+                atualizado_em = CURRENT_TIMESTAMP
+            WHERE job = %s AND particao = %s
+        """, (ultimo_id, linhas, concluida, job, particao), nome="backfill_salvar_progresso")
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+
+class BackfillEmbeddings:
+    """Coordena as partições, o pool de processos e a retomada do job."""
+
+    def __init__(self, db: VectorDatabaseSetup,
+                 apenas_nulos: bool = True,
+                 processos: int = 4,
+                 particoes: Optional[int] = None,
+                 job: Optional[str] = None,
+                 **opcoes_vazao):
+        self.db = db
+        self.apenas_nulos = apenas_nulos
+        self.processos = processos
+        self.particoes = particoes or processos * 4
+        # Sem nome explícito, o job é "<modo>:<modelo ativo>", resolvido em preparar_particoes
+        self.job = job
+        self.opcoes_vazao = opcoes_vazao
+
+    def create_tables(self) -> bool:
+        """Cria a tabela de pontos de controle e as do versionamento de embeddings."""
+        from versoes_embedding import VersionamentoEmbeddings
+
+        try:
+            conn = self.db.connect()
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS backfill_embeddings_progresso (
+                    job VARCHAR(150) NOT NULL,
+                    particao INT NOT NULL,
+                    inicio UUID,
+                    fim UUID,
+                    ultimo_id UUID,
+                    linhas BIGINT NOT NULL DEFAULT 0,
+                    concluida BOOLEAN NOT NULL DEFAULT FALSE,
+                    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (job, particao)
+                );
+            """, nome="criar_tabela_backfill_progresso")
+            conn.commit()
+            cursor.close()
+            conn.close()
+            return (EmbeddingDeduplicator(self.db).create_tables()
+                    and VersionamentoEmbeddings(self.db).create_tables())
+        except Exception as e:
+            logger.error(f"❌ Erro ao criar tabela de progresso do backfill: {e}")
+            return False
+
+    def preparar_particoes(self) -> List[Particao]:
+        """Retoma as partições pendentes do job ou cria novas a partir dos quantis dos ids.
+
+        Um job já concluído é recomeçado com limites novos: triagens importadas
+        depois dele ficariam fora das faixas antigas, todas marcadas como concluídas.
+        """
+        if self.job is None:
+            from versoes_embedding import modelo_ativo
+
+            self.job = f"{'nulos' if self.apenas_nulos else 'todos'}:{modelo_ativo(self.db)}"
+
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT particao, inicio::text, fim::text, ultimo_id::text, linhas, concluida
+                FROM backfill_embeddings_progresso
+                WHERE job = %s
+                ORDER BY particao
+            """, (self.job,), nome="backfill_carregar_particoes")
+            existentes = [Particao(*linha) for linha in cursor.fetchall()]
+            if existentes and not all(p.concluida for p in existentes):
+                cursor.close()
+                return existentes
+            if existentes:
+                logger.info(f"🔁 Job '{self.job}' já concluído; recomeçando com novas faixas")
+                cursor.execute("DELETE FROM backfill_embeddings_progresso WHERE job = %s",
+                               (self.job,), nome="backfill_reiniciar_job")
+
+            where, params = _condicoes(None, None, self.apenas_nulos)
+            fracoes = [i / self.particoes for i in range(1, self.particoes)]
+            cursor.execute(f"""
+                SELECT percentile_disc(%s::float8[]) WITHIN GROUP (ORDER BY id)::text[]
+                FROM triagens
+                WHERE {where}
+            """, (fracoes, *params), nome="backfill_limites_particoes")
+            limites = sorted(set(filter(None, cursor.fetchone()[0] or [])))
+            bordas = [None, *limites, None]
+            particoes = [Particao(i, bordas[i], bordas[i + 1]) for i in range(len(bordas) - 1)]
+            cursor.executemany("""
+                INSERT INTO backfill_embeddings_progresso (job, particao, inicio, fim)
+                VALUES (%s, %s, %s::uuid, %s::uuid)
+            """, [(self.job, p.indice, p.inicio, p.fim) for p in particoes],
+                nome="backfill_criar_particoes")
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+        return particoes
+
+    def run(self) -> Dict[str, Any]:
+        """Processa as partições pendentes e retorna o resumo."""
+        particoes = self.preparar_particoes()
+        pendentes = [p for p in particoes if not p.concluida]
+        ja_processadas = sum(p.linhas for p in particoes)
+        logger.info(f"🚀 Job '{self.job}': {len(pendentes)}/{len(particoes)} partições pendentes"
+                    f" ({ja_processadas} linhas já processadas)")
+
+        conexao = dict(host=self.db.host, port=self.db.port, database=self.db.database,
+                       user=self.db.user, password=self.db.password)
+        inicio = time.perf_counter()
+        linhas = 0
+        with ProcessPoolExecutor(max_workers=self.processos) as executor:
+            futuros = [executor.submit(_processar_particao, conexao, self.job, p,
+                                       self.apenas_nulos, self.opcoes_vazao) for p in pendentes]
+            for futuro in as_completed(futuros):
+                indice, processadas, segundos = futuro.result()
+                linhas += processadas
+                decorrido = time.perf_counter() - inicio
+                logger.info(f"   ✅ Partição {indice}: {processadas} linhas em {segundos:.1f}s "
+                            f"(total {linhas}, {linhas / max(decorrido, 1e-9):.0f} linhas/s)")
+
+        segundos = time.perf_counter() - inicio
+        return {"job": self.job, "linhas": linhas, "segundos": segundos,
+                "linhas_por_segundo": linhas / max(segundos, 1e-9)}
+
+
+def main():
+    """Função principal."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Backfill de embeddings de triagens Aurora AI')
+    parser.add_argument('--todos', action='store_true',
+                        help='Recalcula todas as triagens, não só as sem embedding')
+    parser.add_argument('--processos', type=int, default=4, help='Processos em paralelo')
+    parser.add_argument('--particoes', type=int, help='Faixas de ids (padrão: 4 × processos)')
+    parser.add_argument('--job',
+                        help='Nome do job para retomada (padrão: nulos|todos:<modelo ativo>)')
+    parser.add_argument('--lote', type=int, default=500, help='Lote inicial por processo')
+    parser.add_argument('--latencia-alvo', type=float, default=250.0,
+                        help='Latência de gravação (ms) acima da qual o backfill recua')
+    parser.add_argument('--vazao-maxima', type=float,
+                        help='Limite de linhas/s por processo')
+    parser.add_argument('--host', default='localhost', help='Host do PostgreSQL')
+    parser.add_argument('--port', type=int, default=5432, help='Porta do PostgreSQL')
+    parser.add_argument('--database', default='aurora_ai', help='Nome do banco de dados')
+    parser.add_argument('--user', default='admin', help='Usuário do banco')
+    parser.add_argument('--password', default='aurora123', help='Senha do banco')
+
+    args = parser.parse_args()
+
+    db = VectorDatabaseSetup(host=args.host, port=args.port, database=args.database,
+                             user=args.user, password=args.password)
+    backfill = BackfillEmbeddings(db, apenas_nulos=not args.todos,
+                                  processos=args.processos, particoes=args.particoes, job=args.job,
+                                  lote=args.lote, latencia_alvo_ms=args.latencia_alvo,
+                                  vazao_maxima=args.vazao_maxima)
+    if not backfill.create_tables():
+        sys.exit(1)
+    try:
+        resumo = backfill.run()
+    except Exception as e:
+        logger.error(f"❌ Erro no backfill (o job pode ser retomado): {e}")
+        sys.exit(1)
+
+    logger.info(f"🎉 {resumo['linhas']} triagens em {resumo['segundos']:.0f}s "
+                f"({resumo['linhas_por_segundo']:.0f} linhas/s)")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
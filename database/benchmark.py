@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Benchmark ponta a ponta das consultas do banco Aurora AI.
+Mede as views do dashboard e as funções de similaridade sobre os dados
+carregados (por exemplo, pelo gerador_carga.py) e grava um relatório JSON
+comparável entre commits.
+"""
+
+import json
+import logging
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from embeddings import vetor_para_sql
+from gerador_carga import SINTOMAS, centroides_sintomas, embeddings_de_sintomas
+from vector_setup import VectorDatabaseSetup
+
+logger = logging.getLogger(__name__)
+
+TABELAS_CONTADAS = ["unidades_saude", "pacientes", "triagens", "filas",
+                    "atendimentos", "estatisticas_tempo_real"]
+
+
+class BenchmarkRunner:
+    """Executa as consultas de referência e consolida as latências."""
+
+    def __init__(self,
+                 db: VectorDatabaseSetup,
+                 repeticoes: int = 20,
+                 aquecimento: int = 3,
+                 semente: int = 42):
+        self.db = db
+        self.repeticoes = repeticoes
+        self.aquecimento = aquecimento
+        self.rng = np.random.default_rng(semente)
+        self.centroides = centroides_sintomas(semente)
+
+    def _consulta_aleatoria(self) -> Tuple[str, str]:
+        """Texto e embedding de uma queixa plausível (mesmo modelo do gerador)."""
+        idx = self.rng.choice(len(SINTOMAS), size=self.rng.integers(1, 3), replace=False)
+        vetor = embeddings_de_sintomas(self.rng, self.centroides, [idx])[0]
+        return " + ".join(SINTOMAS[i] for i in idx), vetor_para_sql(vetor)
+
+    def consultas(self) -> Dict[str, Callable[[], Tuple[str, tuple]]]:
+        """SQL e parâmetros de cada consulta medida (gerados a cada repetição)."""
+        def buscar_sintomas():
+            texto, vetor = self._consulta_aleatoria()
+            return ("SELECT * FROM buscar_sintomas_similares(%s, %s::vector)", (texto, vetor))
+
+        def calcular_similaridade():
+            _, vetor = self._consulta_aleatoria()
+            return ("SELECT * FROM calcular_similaridade_sintomas(%s::vector)", (vetor,))
+
+        return {
+            "view_dashboard_monitoramento": lambda: ("SELECT * FROM dashboard_monitoramento", ()),
+            "view_performance_ia": lambda: ("SELECT * FROM performance_ia", ()),
+            "buscar_sintomas_similares": buscar_sintomas,
+            "calcular_similaridade_sintomas": calcular_similaridade,
+        }
+
+    def medir(self, nome: str, gerar: Callable[[], Tuple[str, tuple]]) -> Dict[str, Any]:
+        """Executa uma consulta várias vezes e resume as latências."""
+        conn = self.db.connect()
+        conn.autocommit = True
+        cursor = conn.cursor()
+        latencias: List[float] = []
+        linhas = 0
+        try:
+            for i in range(self.aquecimento + self.repeticoes):
+                sql, params = gerar()
+                inicio = time.perf_counter()
+                cursor.execute(sql, params, nome=nome)
+                linhas = len(cursor.fetchall())
+                decorrido = (time.perf_counter() - inicio) * 1000
+                if i >= self.aquecimento:
+                    latencias.append(decorrido)
+        except Exception as e:
+            logger.error(f"❌ {nome}: {e}")
+            return {"erro": str(e)}
+        finally:
+            cursor.close()
+            conn.close()
+
+        amostra = np.asarray(latencias)
+        resultado = {
+            "repeticoes": len(latencias),
+            "linhas": linhas,
+            "min_ms": float(amostra.min()),
+            "media_ms": float(amostra.mean()),
+            "p50_ms": float(np.percentile(amostra, 50)),
+            "p95_ms": float(np.percentile(amostra, 95)),
+            "p99_ms": float(np.percentile(amostra, 99)),
+            "max_ms": float(amostra.max()),
+        }
+        logger.info(f"   ⏱️ {nome}: p50 {resultado['p50_ms']:.1f} ms, "
+                    f"p95 {resultado['p95_ms']:.1f} ms ({linhas} linhas)")
+        return resultado
+
+    def metadados(self) -> Dict[str, Any]:
+        """Commit, versões e volume de dados do ambiente medido."""
+        conn = self.db.connect()
+        cursor = conn.cursor()
+        cursor.execute("SHOW server_version")
+        versao_pg = cursor.fetchone()[0]
+        cursor.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+        versao_vector = cursor.fetchone()
+        volumes = {}
+        for tabela in TABELAS_CONTADAS:
+            cursor.execute(f"SELECT COUNT(*) FROM {tabela}")
+            volumes[tabela] = cursor.fetchone()[0]
+        cursor.close()
+        conn.close()
+
+        return {
+            "commit": _commit_atual(),
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "postgres": versao_pg,
+            "pgvector": versao_vector[0] if versao_vector else None,
+            "volumes": volumes,
+            "repeticoes": self.repeticoes,
+        }
+
+    def run(self) -> Dict[str, Any]:
+        """Executa todas as consultas e retorna o relatório."""
+        logger.info("🚀 Iniciando benchmark...")
+        relatorio = {"metadados": self.metadados(), "resultados": {}}
+        for nome, gerar in self.consultas().items():
+            relatorio["resultados"][nome] = self.medir(nome, gerar)
+        return relatorio
+
+
+def comparar(atual: Dict[str, Any], base: Dict[str, Any]) -> None:
+    """Exibe a variação de p50/p95 em relação a um relatório anterior."""
+    logger.info(f"📊 Comparação com {base['metadados'].get('commit')}:")
+    for nome, resultado in atual["resultados"].items():
+        anterior = base["resultados"].get(nome)
+        if not anterior or "erro" in anterior or "erro" in resultado:
+            continue
+        for metrica in ("p50_ms", "p95_ms"):
+            variacao = (resultado[metrica] / anterior[metrica] - 1) * 100
+            logger.info(f"   - {nome} {metrica}: {anterior[metrica]:.1f} → "
+                        f"{resultado[metrica]:.1f} ({variacao:+.1f}%)")
+
+
+def _commit_atual() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True,
+            cwd=Path(__file__).resolve().parent,
+        ).strip()
+    except Exception:
+        return None
+
+
+def main():
+    """Função principal."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark de consultas Aurora AI')
+    parser.add_argument('--repeticoes', type=int, default=20, help='Execuções medidas por consulta')
+    parser.add_argument('--aquecimento', type=int, default=3, help='Execuções descartadas')
+    parser.add_argument('--semente', type=int, default=42, help='Semente das consultas')
+    parser.add_argument('--saida', type=Path, help='Arquivo JSON do relatório')
+    parser.add_argument('--comparar', type=Path, help='Relatório anterior para comparação')
+    parser.add_argument('--host', default='localhost', help='Host do PostgreSQL')
+    parser.add_argument('--port', type=int, default=5432, help='Porta do PostgreSQL')
+    parser.add_argument('--database', default='aurora_ai', help='Nome do banco de dados')
+    parser.add_argument('--user', default='admin', help='Usuário do banco')
+    parser.add_argument('--password', default='aurora123', help='Senha do banco')
+
+    args = parser.parse_args()
+
+    db = VectorDatabaseSetup(host=args.host, port=args.port, database=args.database,
+                             user=args.user, password=args.password)
+    runner = BenchmarkRunner(db, repeticoes=args.repeticoes, aquecimento=args.aquecimento,
+                             semente=args.semente)
+    relatorio = runner.run()
+
+    saida = args.saida or Path(
+        f"benchmark_{relatorio['metadados']['commit'] or 'local'}_"
+        f"{datetime.now():%Y%m%d%H%M%S}.json"
+    )
+    saida.write_text(json.dumps(relatorio, indent=2, ensure_ascii=False))
+    logger.info(f"💾 Relatório salvo em {saida}")
+
+    if args.comparar:
+        comparar(relatorio, json.loads(args.comparar.read_text()))
+
+    falhas = [n for n, r in relatorio["resultados"].items() if "erro" in r]
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
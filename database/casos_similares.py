@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Recuperação de casos similares para apoio à decisão na triagem.
+Busca primeiro em um índice em memória com os casos recentes e recorre à
+tabela completa (pgvector) apenas quando necessário, sempre dentro de um
+orçamento de latência.
+"""
+
+import logging
+import math
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import psycopg2
+import psycopg2.errors
+from cachetools import TTLCache
+
+from embeddings import MODELO_PADRAO, EncoderSentenca, normalizar_texto, vetor_para_sql
+from replicas import roteador_para
+from vector_setup import VectorDatabaseSetup
+from versoes_embedding import modelo_ativo
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CasoSimilar:
+    """Caso histórico retornado pela busca."""
+
+    triagem_id: str
+    sintomas: str
+    prioridade_medico: Optional[str]
+    similaridade: float
+
+
+@dataclass
+class ResultadoBusca:
+    """Resultado de uma busca, com indicação de resposta parcial."""
+
+    casos: List[CasoSimilar] = field(default_factory=list)
+    parcial: bool = False
+    origem: str = "recente"
+    tempo_ms: float = 0.0
+
+
+class IndiceCasosRecentes:
+    """Índice em memória com os embeddings das triagens da janela recente."""
+
+    def __init__(self, db: VectorDatabaseSetup, janela_dias: int = 90,
+                 tamanho_lote: int = 5000):
+        self.db = db
+        self.janela_dias = janela_dias
+        self.tamanho_lote = tamanho_lote
+        # Snapshot imutável (ids, sintomas, prioridades, matriz); trocado atomicamente
+        self._snapshot: Tuple[List[str], List[str], List[Optional[str]], np.ndarray] = (
+            [], [], [], np.empty((0, 0), dtype=np.float32)
+        )
+        self.atualizado_em: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._snapshot[0])
+
+    def atualizar(self) -> int:
+        """Recarrega a janela recente a partir do banco."""
+        ids: List[str] = []
+        sintomas: List[str] = []
+        prioridades: List[Optional[str]] = []
+        blocos: List[np.ndarray] = []
+
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor(name="indice_casos_recentes")
+            cursor.itersize = self.tamanho_lote
+            cursor.execute("""
+                SELECT t.id::text, t.sintomas, t.prioridade_medico,
+                       e.embedding_sintomas::real[]
+                FROM triagens t
+                JOIN triagens_embeddings_ativas e ON e.triagem_id = t.id
+                WHERE t.created_at >= NOW() - make_interval(days => %s)
+                  AND e.embedding_sintomas IS NOT NULL
+                  AND t.prioridade_medico IS NOT NULL
+            """, (self.janela_dias,), nome="carregar_casos_recentes")
+            while True:
+                linhas = cursor.fetchmany(self.tamanho_lote)
+                if not linhas:
+                    break
+                for triagem_id, texto, prioridade, _ in linhas:
+                    ids.append(triagem_id)
+                    sintomas.append(texto)
+                    prioridades.append(prioridade)
+                blocos.append(np.asarray([linha[3] for linha in linhas], dtype=np.float32))
+            cursor.close()
+        finally:
+            conn.close()
+
+        matriz = np.vstack(blocos) if blocos else np.empty((0, 0), dtype=np.float32)
+        if len(matriz):
+            normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+            matriz /= np.maximum(normas, 1e-12)
+
+        self._snapshot = (ids, sintomas, prioridades, matriz)
+        self.atualizado_em = time.time()
+        logger.info(f"📚 Índice de casos recentes atualizado: {len(ids)} casos")
+        return len(ids)
+
+    def buscar(self, consulta: np.ndarray, k: int,
+               limite_similaridade: float) -> List[CasoSimilar]:
+        """Retorna os k casos mais similares por similaridade de cosseno."""
+        ids, sintomas, prioridades, matriz = self._snapshot
+        if not ids:
+            return []
+
+        similaridades = matriz @ consulta
+        k = min(k, len(ids))
+        candidatos = np.argpartition(-similaridades, k - 1)[:k]
+        candidatos = candidatos[np.argsort(-similaridades[candidatos])]
+
+        return [
+            CasoSimilar(ids[i], sintomas[i], prioridades[i], float(similaridades[i]))
+            for i in candidatos
+            if similaridades[i] > limite_similaridade
+        ]
+
+
+class SimilarCaseRetriever:
+    """Serviço de casos similares com cache e orçamento de latência."""
+
+    def __init__(self,
+                 db: VectorDatabaseSetup,
+                 encoder: Optional[EncoderSentenca] = None,
+                 janela_dias: int = 90,
+                 orcamento_ms: float = 150.0,
+                 limite_similaridade: float = 0.7,
+                 tamanho_cache: int = 10000,
+                 ttl_cache: int = 600,
+                 intervalo_atualizacao: int = 900):
+        self.db = db
+        # Sem encoder explícito, acompanha o modelo da versão ativa de embeddings,
+        # resolvido na primeira busca ou ao iniciar a atualização periódica
+        self._encoder_fixo = encoder is not None
+        self.encoder: Optional[EncoderSentenca] = encoder
+        self.indice = IndiceCasosRecentes(db, janela_dias=janela_dias)
+        self.orcamento_ms = orcamento_ms
+        self.limite_similaridade = limite_similaridade
+        self.intervalo_atualizacao = intervalo_atualizacao
+
+        self._cache: TTLCache = TTLCache(maxsize=tamanho_cache, ttl=ttl_cache)
+        self._cache_lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def iniciar_atualizacao_periodica(self) -> None:
+        """Carrega o índice e o mantém atualizado em segundo plano."""
+        self._acompanhar_versao_ativa()
+        self.indice.atualizar()
+
+        def _loop():
+            while not self._parar.wait(self.intervalo_atualizacao):
+                try:
+                    self._acompanhar_versao_ativa()
+                    self.indice.atualizar()
+                except Exception as e:
+                    logger.error(f"❌ Erro ao atualizar índice de casos recentes: {e}")
+
+        self._thread = threading.Thread(target=_loop, name="indice-casos-recentes",
+                                        daemon=True)
+        self._thread.start()
+
+    def _acompanhar_versao_ativa(self) -> None:
+        """Troca o encoder e limpa o cache quando outra versão de embeddings é ativada."""
+        if self._encoder_fixo:
+            return
+        try:
+            modelo = modelo_ativo(self.db)
+        except psycopg2.Error as e:
+            if self.encoder is not None:
+                raise
+            # A atualização periódica corrige o modelo quando o banco voltar
+            logger.warning(f"⚠️ Versão ativa de embeddings indisponível ({e}); usando {MODELO_PADRAO}")
+            modelo = MODELO_PADRAO
+        if self.encoder is None:
+            self.encoder = EncoderSentenca(modelo)
+        elif modelo != self.encoder.modelo:
+            logger.info(f"🔀 Versão ativa de embeddings mudou para {modelo}")
+            self.encoder = EncoderSentenca(modelo)
+            with self._cache_lock:
+                self._cache.clear()
+
+    def parar(self) -> None:
+        """Interrompe a atualização periódica do índice."""
+        self._parar.set()
+
+    def buscar(self, queixa: str, k: int = 5) -> ResultadoBusca:
+        """Retorna os k casos mais parecidos com a queixa informada."""
+        inicio = time.perf_counter()
+        texto = normalizar_texto(queixa)
+        chave = (texto, k)
+
+        with self._cache_lock:
+            em_cache = self._cache.get(chave)
+        if em_cache is not None:
+            return ResultadoBusca(em_cache.casos, False, "cache", self._decorrido(inicio))
+
+        # Mesma forma do texto gravado: o EmbeddingDeduplicator codifica o texto normalizado
+        if self.encoder is None:
+            self._acompanhar_versao_ativa()
+        consulta = self.encoder.encode([texto])[0]
+        casos = self.indice.buscar(consulta, k, self.limite_similaridade)
+        resultado = ResultadoBusca(casos, origem="recente")
+
+        if len(casos) < k:
+            restante = self.orcamento_ms - self._decorrido(inicio)
+            if restante <= 1:
+                resultado.parcial = True
+            else:
+                resultado = self._complementar_com_historico(
+                    consulta, k, casos, restante
+                )
+
+        resultado.tempo_ms = self._decorrido(inicio)
+        if resultado.tempo_ms > self.orcamento_ms:
+            resultado.parcial = True
+
+        if not resultado.parcial:
+            with self._cache_lock:
+                self._cache[chave] = resultado
+        return resultado
+
+    def _complementar_com_historico(self, consulta: np.ndarray, k: int,
+                                    casos: List[CasoSimilar],
+                                    restante_ms: float) -> ResultadoBusca:
+        """Completa o resultado com a tabela inteira, limitado pelo tempo restante."""
+        inicio = time.perf_counter()
+        try:
+            # O libpq só aceita segundos inteiros; o tempo real de conexão é
+            # descontado do statement_timeout logo abaixo
+            conn = self.db.connect(connect_timeout=max(1, math.ceil(restante_ms / 1000)))
+        except psycopg2.OperationalError as e:
+            logger.warning(f"⏱️ Conexão para a busca histórica falhou ({e}); retornando parcial")
+            return ResultadoBusca(casos, parcial=True, origem="recente")
+        restante_ms -= self._decorrido(inicio)
+        if restante_ms <= 1:
+            conn.close()
+            return ResultadoBusca(casos, parcial=True, origem="recente")
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SET LOCAL statement_timeout = %s", (int(restante_ms),),
+                           nome="definir_statement_timeout")
+            vetor = vetor_para_sql(consulta)
+            cursor.execute("""
+                SELECT t.id::text, t.sintomas, t.prioridade_medico,
+                       1 - (e.embedding_sintomas <=> %s::vector) AS similaridade
+                FROM triagens_embeddings_ativas e
+                JOIN triagens t ON t.id = e.triagem_id
+                WHERE e.embedding_sintomas IS NOT NULL
+                  AND t.prioridade_medico IS NOT NULL
+                ORDER BY e.embedding_sintomas <=> %s::vector
+                LIMIT %s
+            """, (vetor, vetor, k), nome="buscar_casos_historicos")
+            linhas = cursor.fetchall()
+            cursor.close()
+        except psycopg2.errors.QueryCanceled:
+            logger.warning("⏱️ Busca histórica excedeu o orçamento; retornando parcial")
+            return ResultadoBusca(casos, parcial=True, origem="recente")
+        finally:
+            conn.rollback()
+            conn.close()
+
+        combinados: Dict[str, CasoSimilar] = {c.triagem_id: c for c in casos}
+        for triagem_id, sintomas, prioridade, similaridade in linhas:
+            if similaridade > self.limite_similaridade:
+                combinados.setdefault(
+                    triagem_id,
+                    CasoSimilar(triagem_id, sintomas, prioridade, float(similaridade)),
+                )
+        ordenados = sorted(combinados.values(), key=lambda c: c.similaridade,
+                           reverse=True)
+        return ResultadoBusca(ordenados[:k], parcial=False, origem="historico")
+
+    @staticmethod
+    def _decorrido(inicio: float) -> float:
+        return (time.perf_counter() - inicio) * 1000
+
+
+def main():
+    """Função principal."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Busca de casos similares Aurora AI')
+    parser.add_argument('queixa', help='Texto da queixa do paciente')
+    parser.add_argument('-k', type=int, default=5, help='Número de casos retornados')
+    parser.add_argument('--orcamento-ms', type=float, default=150.0,
+                        help='Orçamento de latência da busca')
+    parser.add_argument('--janela-dias', type=int, default=90,
+                        help='Janela do índice em memória')
+    parser.add_argument('--replica', action='append', default=[], metavar='HOST:PORTA',
+                        help='Réplica de leitura (pode repetir)')
+    parser.add_argument('--host', default='localhost', help='Host do PostgreSQL primário')
+    parser.add_argument('--port', type=int, default=5432, help='Porta do PostgreSQL primário')
+    parser.add_argument('--database', default='aurora_ai', help='Nome do banco de dados')
+    parser.add_argument('--user', default='admin', help='Usuário do banco')
+    parser.add_argument('--password', default='aurora123', help='Senha do banco')
+
+    args = parser.parse_args()
+
+    primario = VectorDatabaseSetup(host=args.host, port=args.port, database=args.database,
+                                   user=args.user, password=args.password)
+    roteador = roteador_para(primario, args.replica)
+    roteador.verificar_saude()
+    # Só leituras: índice e busca histórica vão para a réplica elegível
+    servico = SimilarCaseRetriever(roteador.leitura(), janela_dias=args.janela_dias,
+                                   orcamento_ms=args.orcamento_ms)
+    servico.indice.atualizar()
+    resultado = servico.buscar(args.queixa, k=args.k)
+
+    logger.info(f"🔎 {len(resultado.casos)} casos ({resultado.origem}, "
+                f"{resultado.tempo_ms:.1f} ms{', parcial' if resultado.parcial else ''})")
+    for caso in resultado.casos:
+        logger.info(f"   - {caso.sintomas} → {caso.prioridade_medico} "
+                    f"({caso.similaridade:.3f})")
+
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
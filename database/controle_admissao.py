@@ -0,0 +1,567 @@
+#!/usr/bin/env python3
+"""
+Controle de admissão e descarte de carga no caminho da triagem.
+Os pedidos entram numa fila FIFO por prioridade, dada por uma classificação
+preliminar barata (sinais vitais e termos críticos), de modo que casos com
+cara de emergência passam à frente. Como no CoDel, o sinal de sobrecarga é
+o menor valor, em cada intervalo, da idade do pedido mais antigo ainda na
+fila (o atraso dos próprios pedidos não serve: emergências furam a fila e
+teriam atraso quase zero mesmo com a fila cheia). Acima do alvo o nível de
+degradação sobe; abaixo da metade dele, desce.
+
+Níveis (cumulativos), do que menos perde informação ao que mais perde:
+  1. auditoria em lotes maiores (as gravações só demoram mais);
+  2. explicações SHAP adiadas até a carga normalizar;
+  3. busca de casos similares desligada.
+Com a fila cheia, o pedido de menor prioridade é recusado; emergências são
+sempre admitidas. As tarefas adiadas também têm limite: acima dele as mais
+antigas são descartadas e contadas.
+"""
+
+import itertools
+import logging
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+from psycopg2.extras import Json, execute_values
+
+from embeddings import normalizar_texto
+
+logger = logging.getLogger(__name__)
+
+PRIORIDADES = ('emergencia', 'urgente', 'prioritario', 'eletivo')
+NIVEIS = ('normal', 'auditoria em lotes', 'SHAP adiado', 'sem casos similares')
+TERMOS_EMERGENCIA = ('dor no peito', 'falta de ar', 'desmaio', 'convulsao', 'inconsciente',
+                     'sangramento intenso', 'avc', 'paralisia', 'parada cardiaca', 'anafilaxia')
+
+NIVEL_DEGRADACAO = Gauge(
+    "aurora_triagem_nivel_degradacao",
+    "Nível de degradação atual do pipeline de triagem (0 = normal)",
+)
+TAMANHO_FILA = Gauge(
+    "aurora_triagem_fila_tamanho",
+    "Pedidos de triagem aguardando processamento",
+)
+ATRASO_FILA = Histogram(
+    "aurora_triagem_atraso_fila_segundos",
+    "Tempo entre a admissão e o início do processamento",
+    ["prioridade"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+REJEICOES = Counter(
+    "aurora_triagem_rejeicoes_total",
+    "Pedidos recusados ou descartados com a fila cheia",
+    ["prioridade"],
+)
+ESTAGIOS_DEGRADADOS = Counter(
+    "aurora_triagem_estagios_degradados_total",
+    "Estágios opcionais pulados ou adiados pela degradação",
+    ["estagio"],
+)
+ADIADOS_DESCARTADOS = Counter(
+    "aurora_triagem_adiados_descartados_total",
+    "Tarefas adiadas descartadas com o limite de adiados atingido",
+)
+LOGS_DESCARTADOS = Counter(
+    "aurora_auditoria_logs_descartados_total",
+    "Logs de decisão descartados com o limite de pendentes atingido (gravações falhando)",
+)
+
+
+class SobrecargaError(RuntimeError):
+    """Pedido recusado porque a fila de triagem está cheia."""
+
+
+def prioridade_preliminar(pedido: Dict[str, Any]) -> str:
+    """Classificação barata usada só para ordenar a fila (a IA decide a prioridade final)."""
+    saturacao = pedido.get('saturacao_o2')
+    frequencia = pedido.get('frequencia_cardiaca')
+    temperatura = pedido.get('temperatura')
+    dor = pedido.get('intensidade_dor')
+    texto = normalizar_texto(f"{pedido.get('sintomas') or ''} {pedido.get('descricao_completa') or ''}")
+
+    if ((saturacao is not None and saturacao < 90)
+            or (frequencia is not None and not 40 <= frequencia <= 130)
+            or (temperatura is not None and temperatura >= 40)
+            or any(termo in texto for termo in TERMOS_EMERGENCIA)):
+        return 'emergencia'
+    if ((saturacao is not None and saturacao < 94)
+            or (temperatura is not None and temperatura >= 39)
+            or (dor is not None and dor >= 8)):
+        return 'urgente'
+    if dor is not None and dor >= 4:
+        return 'prioritario'
+    return 'eletivo'
+
+
+@dataclass(frozen=True)
+class Degradacao:
+    """O que o pipeline pode fazer no nível atual."""
+
+    nivel: int = 0
+
+    @property
+    def fator_lote_auditoria(self) -> int:
+        return 10 if self.nivel >= 1 else 1
+
+    @property
+    def shap_imediato(self) -> bool:
+        return self.nivel < 2
+
+    @property
+    def buscar_similares(self) -> bool:
+        return self.nivel < 3
+
+
+@dataclass
+class _Pedido:
+    ordem: int
+    sequencia: int
+    prioridade: str
+    admitido_em: float
+    dados: Dict[str, Any]
+    futuro: Future
+    retirado: bool = False
+
+
+class ControleAdmissao:
+    """Fila de prioridade com trabalhadores, medição de atraso e nível de degradação."""
+
+    def __init__(self, processar: Callable[[Dict[str, Any], Degradacao], Any],
+                 trabalhadores: int = 4, capacidade: int = 2000,
+                 alvo_atraso_ms: float = 200.0, intervalo_s: float = 1.0,
+                 limite_adiados: int = 10000):
+        self.processar = processar
+        self.trabalhadores = trabalhadores
+        self.capacidade = capacidade
+        self.alvo_atraso_s = alvo_atraso_ms / 1000
+        self.intervalo_s = intervalo_s
+        self.limite_adiados = limite_adiados
+
+        # Uma fila FIFO por prioridade: o próximo e o pior pedido saem em O(1)
+        self._filas: List[deque] = [deque() for _ in PRIORIDADES]
+        self._tamanho = 0
+        # Ordem de chegada, com remoção preguiçosa, para achar o pedido mais antigo em O(1)
+        self._chegada: deque = deque()
+        self._condicao = threading.Condition()
+        self._sequencia = itertools.count()
+        self._nivel = 0
+        self._menor_espera: Optional[float] = None
+        self._fim_intervalo = time.monotonic() + intervalo_s
+        self._adiados: deque = deque()
+        self._parar = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def degradacao(self) -> Degradacao:
+        return Degradacao(self._nivel)
+
+    def iniciar(self) -> None:
+        """Inicia os trabalhadores e o executor de tarefas adiadas."""
+        for i in range(self.trabalhadores):
+            self._threads.append(threading.Thread(target=self._trabalhar, name=f"triagem-{i}",
+                                                  daemon=True))
+        self._threads.append(threading.Thread(target=self._executar_adiados,
+                                              name="triagem-adiados", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def parar(self, tempo_limite: float = 10.0) -> None:
+        """Para após esvaziar a fila (ou ao fim do tempo limite)."""
+        self._parar.set()
+        with self._condicao:
+            self._condicao.notify_all()
+        for thread in self._threads:
+            thread.join(tempo_limite)
+
+    def submeter(self, dados: Dict[str, Any]) -> Future:
+        """Admite um pedido; o futuro falha com SobrecargaError se ele for descartado."""
+        prioridade = prioridade_preliminar(dados)
+        pedido = _Pedido(PRIORIDADES.index(prioridade), next(self._sequencia), prioridade,
+                         time.monotonic(), dados, Future())
+        with self._condicao:
+            if self._tamanho >= self.capacidade and prioridade != 'emergencia':
+                # Descarta o de menor prioridade (o mais novo entre iguais): o novo ou o pior da fila
+                pior_fila = next(fila for fila in reversed(self._filas) if fila)
+                if pior_fila[-1].ordem <= pedido.ordem:
+                    REJEICOES.labels(prioridade).inc()
+                    pedido.futuro.set_exception(SobrecargaError("Fila de triagem cheia"))
+                    return pedido.futuro
+                pior = pior_fila.pop()
+                self._tamanho -= 1
+                pior.retirado = True
+                REJEICOES.labels(pior.prioridade).inc()
+                pior.futuro.set_exception(SobrecargaError("Descartado por pedido mais prioritário"))
+            self._filas[pedido.ordem].append(pedido)
+            self._tamanho += 1
+            self._chegada.append(pedido)
+            TAMANHO_FILA.set(self._tamanho)
+            self._condicao.notify()
+        return pedido.futuro
+
+    def adiar(self, tarefa: Callable[[], None]) -> None:
+        """Agenda trabalho opcional para quando a carga voltar ao normal.
+
+        Com limite_adiados atingido, a tarefa mais antiga é descartada.
+        """
+        with self._condicao:
+            if len(self._adiados) >= self.limite_adiados:
+                self._adiados.popleft()
+                ADIADOS_DESCARTADOS.inc()
+            self._adiados.append(tarefa)
+
+    def _trabalhar(self) -> None:
+        while True:
+            with self._condicao:
+                while not self._tamanho:
+                    if self._parar.is_set():
+                        return
+                    if not self._condicao.wait(self.intervalo_s):
+                        # Ocioso por um intervalo inteiro: não há fila persistente
+                        self._registrar_espera(0.0)
+                pedido = next(fila for fila in self._filas if fila).popleft()
+                self._tamanho -= 1
+                pedido.retirado = True
+                TAMANHO_FILA.set(self._tamanho)
+                agora = time.monotonic()
+                atraso = agora - pedido.admitido_em
+                while self._chegada and self._chegada[0].retirado:
+                    self._chegada.popleft()
+                self._registrar_espera(agora - self._chegada[0].admitido_em if self._chegada else 0.0)
+                degradacao = self.degradacao
+
+            ATRASO_FILA.labels(pedido.prioridade).observe(atraso)
+            if not pedido.futuro.set_running_or_notify_cancel():
+                continue
+            try:
+                pedido.futuro.set_result(self.processar(pedido.dados, degradacao))
+            except Exception as e:
+                pedido.futuro.set_exception(e)
+
+    def _registrar_espera(self, espera: float) -> None:
+        """Atualiza o nível ao fim de cada intervalo pela menor espera observada (chamar com a trava)."""
+        if self._menor_espera is None or espera < self._menor_espera:
+            self._menor_espera = espera
+        agora = time.monotonic()
+        if agora < self._fim_intervalo:
+            return
+
+        anterior = self._nivel
+        if self._menor_espera > self.alvo_atraso_s:
+            self._nivel = min(self._nivel + 1, len(NIVEIS) - 1)
+        elif self._menor_espera < self.alvo_atraso_s / 2:
+            self._nivel = max(self._nivel - 1, 0)
+        if self._nivel != anterior:
+            logger.warning(f"{'⚠️' if self._nivel > anterior else '✅'} Degradação da triagem: "
+                           f"nível {self._nivel} ({NIVEIS[self._nivel]}), menor espera "
+                           f"{self._menor_espera * 1000:.0f} ms")
+            NIVEL_DEGRADACAO.set(self._nivel)
+        self._menor_espera = None
+        self._fim_intervalo = agora + self.intervalo_s
+
+    def _executar_adiados(self) -> None:
+        while not (self._parar.is_set() and not self._adiados):
+            tarefa = None
+            if (self._nivel == 0 or self._parar.is_set()) and not self._tamanho:
+                with self._condicao:
+                    if self._adiados:
+                        tarefa = self._adiados.popleft()
+            if tarefa is None:
+                self._parar.wait(self.intervalo_s)
+                continue
+            try:
+                tarefa()
+            except Exception as e:
+                logger.error(f"❌ Erro em tarefa adiada: {e}")
+
+
+class AuditoriaEmLotes:
+    """Grava logs_decisoes_ia em lotes; o lote cresce com o nível de degradação.
+
+    Se as gravações continuam falhando, os logs voltam ao buffer até
+    limite_pendentes; acima dele os mais antigos são descartados e contados.
+    """
+
+    def __init__(self, db, lote: int = 50, intervalo_s: float = 2.0,
+                 limite_pendentes: int = 10000):
+        self.db = db
+        self.lote = lote
+        self.intervalo_s = intervalo_s
+        self.limite_pendentes = limite_pendentes
+        self._pendentes: Dict[str, list] = {}
+        # Logs de um lote ainda sem commit e os que receberam explicação nesse meio-tempo
+        self._gravando: Dict[str, list] = {}
+        self._explicados_gravando: set = set()
+        self._trava = threading.Lock()
+        self._parar = threading.Event()
+        self._fator = 1
+        self._thread = threading.Thread(target=self._descarregar_periodicamente,
+                                        name="auditoria-lotes", daemon=True)
+        self._thread.start()
+
+    def registrar(self, triagem_id: Optional[str], modelo_id: Optional[str],
+                  entrada: Dict[str, Any], predicoes: Dict[str, Any],
+                  explicacao: Optional[Dict[str, Any]], tempo_s: float,
+                  degradacao: Degradacao) -> str:
+        """Enfileira um log de decisão e retorna seu id."""
+        log_id = str(uuid.uuid4())
+        with self._trava:
+            self._fator = degradacao.fator_lote_auditoria
+            self._pendentes[log_id] = [log_id, triagem_id, modelo_id, Json(entrada), Json(predicoes),
+                                       Json(explicacao) if explicacao is not None else None,
+                                       timedelta(seconds=tempo_s)]
+            cheio = len(self._pendentes) >= self.lote * self._fator
+        if cheio:
+            self.descarregar()
+        return log_id
+
+    def anexar_explicacao(self, log_id: str, explicacao: Dict[str, Any]) -> None:
+        """Completa um log com a explicação SHAP calculada depois."""
+        with self._trava:
+            if log_id in self._pendentes:
+                self._pendentes[log_id][5] = Json(explicacao)
+                return
+            if log_id in self._gravando:
+                # O INSERT em andamento ainda não é visível: descarregar aplica após o commit
+                self._gravando[log_id][5] = Json(explicacao)
+                self._explicados_gravando.add(log_id)
+                return
+        self._atualizar_explicacoes([(Json(explicacao), log_id)])
+
+    def _atualizar_explicacoes(self, explicacoes: List[tuple]) -> None:
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            for explicacao, log_id in explicacoes:
+                cursor.execute("UPDATE logs_decisoes_ia SET explicabilidade_shap = %s WHERE id = %s",
+                               (explicacao, log_id), nome="anexar_explicacao_shap")
+                if cursor.rowcount == 0:
+                    logger.warning(f"⚠️ Log de decisão {log_id} não encontrado; explicação SHAP descartada")
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+
+    def descarregar(self) -> int:
+        with self._trava:
+            linhas, self._pendentes = list(self._pendentes.values()), {}
+            self._gravando.update((linha[0], linha) for linha in linhas)
+        if not linhas:
+            return 0
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            execute_values(cursor, """
+                INSERT INTO logs_decisoes_ia
+                    (id, triagem_id, modelo_id, input_features, output_predicoes,
+                     explicabilidade_shap, tempo_processamento)
+                VALUES %s
+            """, linhas, template="(%s::uuid, %s::uuid, %s::uuid, %s, %s, %s, %s)",
+                page_size=len(linhas))
+            conn.commit()
+            cursor.close()
+        except Exception as e:
+            logger.error(f"❌ Erro ao gravar {len(linhas)} logs de decisão: {e}")
+            with self._trava:
+                self._liberar(linhas)
+                # Devolve ao buffer para a próxima tentativa, já com as explicações anexadas
+                self._pendentes = {linha[0]: linha for linha in linhas} | self._pendentes
+                excedentes = len(self._pendentes) - self.limite_pendentes
+                if excedentes > 0:
+                    for log_id in list(itertools.islice(self._pendentes, excedentes)):
+                        del self._pendentes[log_id]
+                    LOGS_DESCARTADOS.inc(excedentes)
+                    logger.error(f"❌ {excedentes} logs de decisão descartados (limite de pendentes)")
+            return 0
+        finally:
+            conn.close()
+        with self._trava:
+            explicacoes = [(linha[5], linha[0]) for linha in linhas
+                           if linha[0] in self._explicados_gravando]
+            self._liberar(linhas)
+        if explicacoes:
+            try:
+                self._atualizar_explicacoes(explicacoes)
+            except Exception as e:
+                logger.error(f"❌ Erro ao anexar {len(explicacoes)} explicações SHAP: {e}")
+        return len(linhas)
+
+    def _liberar(self, linhas: List[list]) -> None:
+        """Tira o lote de _gravando (chamado com a trava)."""
+        for linha in linhas:
+            self._gravando.pop(linha[0], None)
+            self._explicados_gravando.discard(linha[0])
+
+    def _descarregar_periodicamente(self) -> None:
+        while not self._parar.wait(self.intervalo_s * self._fator):
+            self.descarregar()
+
+    def parar(self) -> None:
+        self._parar.set()
+        self._thread.join()
+        self.descarregar()
+
+
+@dataclass
+class ResultadoTriagem:
+    """Resultado devolvido pelo pipeline para um pedido."""
+
+    classificacao: Dict[str, Any]
+    casos_similares: Optional[Any]
+    explicacao: Optional[Dict[str, Any]]
+    explicacao_adiada: bool
+    nivel_degradacao: int
+    log_id: Optional[str] = None
+
+
+class PipelineTriagem:
+    """Classificação, casos similares, SHAP e auditoria sob controle de admissão.
+
+    classificar(pedido) devolve um dicionário com ao menos 'prioridade';
+    explicar(pedido, classificacao) devolve os valores SHAP.
+    """
+
+    def __init__(self, classificar: Callable[[Dict[str, Any]], Dict[str, Any]],
+                 explicar: Optional[Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]]] = None,
+                 casos_similares=None, auditoria: Optional[AuditoriaEmLotes] = None,
+                 modelo_id: Optional[str] = None, **opcoes_admissao):
+        self.classificar = classificar
+        self.explicar = explicar
+        self.casos_similares = casos_similares
+        self.auditoria = auditoria
+        self.modelo_id = modelo_id
+        self.controle = ControleAdmissao(self._processar, **opcoes_admissao)
+
+    def iniciar(self) -> None:
+        self.controle.iniciar()
+
+    def parar(self) -> None:
+        self.controle.parar()
+        if self.auditoria:
+            self.auditoria.parar()
+
+    def triar(self, pedido: Dict[str, Any]) -> Future:
+        """Submete um pedido de triagem; o futuro resolve com um ResultadoTriagem."""
+        return self.controle.submeter(pedido)
+
+    def _processar(self, pedido: Dict[str, Any], degradacao: Degradacao) -> ResultadoTriagem:
+        inicio = time.perf_counter()
+        classificacao = self.classificar(pedido)
+
+        casos = None
+        if self.casos_similares is not None:
+            if degradacao.buscar_similares:
+                casos = self.casos_similares.buscar(pedido['sintomas'])
+            else:
+                ESTAGIOS_DEGRADADOS.labels("casos_similares").inc()
+
+        explicacao, adiada = None, False
+        if self.explicar is not None:
+            if degradacao.shap_imediato:
+                explicacao = self.explicar(pedido, classificacao)
+            else:
+                adiada = True
+                ESTAGIOS_DEGRADADOS.labels("shap").inc()
+
+        log_id = None
+        if self.auditoria is not None:
+            log_id = self.auditoria.registrar(pedido.get('triagem_id'), self.modelo_id, pedido,
+                                              classificacao, explicacao,
+                                              time.perf_counter() - inicio, degradacao)
+        if adiada:
+            self.controle.adiar(lambda: self._explicar_depois(pedido, classificacao, log_id))
+
+        return ResultadoTriagem(classificacao, casos, explicacao, adiada, degradacao.nivel, log_id)
+
+    def _explicar_depois(self, pedido: Dict[str, Any], classificacao: Dict[str, Any],
+                         log_id: Optional[str]) -> None:
+        explicacao = self.explicar(pedido, classificacao)
+        if self.auditoria is not None and log_id:
+            self.auditoria.anexar_explicacao(log_id, explicacao)
+
+
+def simular_surto(taxa_normal: float = 20.0, taxa_surto: float = 120.0, duracao_s: float = 30.0,
+                  trabalhadores: int = 4, semente: int = 7) -> Dict[str, Any]:
+    """Surto sintético com estágios simulados por sleep; mede a latência por prioridade e os níveis."""
+    import random
+
+    rng = random.Random(semente)
+
+    def classificar(pedido):
+        time.sleep(0.01)
+        return {'prioridade': prioridade_preliminar(pedido)}
+
+    class _Similares:
+        def buscar(self, sintomas):
+            time.sleep(0.03)
+
+    def explicar(pedido, classificacao):
+        time.sleep(0.05)
+        return {}
+
+    pipeline = PipelineTriagem(classificar, explicar, _Similares(), trabalhadores=trabalhadores)
+    pipeline.iniciar()
+    atrasos: Dict[str, List[float]] = {p: [] for p in PRIORIDADES}
+    niveis: List[int] = []
+    futuros = []
+    inicio = time.monotonic()
+    while (decorrido := time.monotonic() - inicio) < duracao_s:
+        # Surto no terço central da simulação
+        taxa = taxa_surto if duracao_s / 3 <= decorrido < 2 * duracao_s / 3 else taxa_normal
+        pedido = {'sintomas': rng.choice(['febre', 'tosse', 'dor de cabeca', 'dor no peito']),
+                  'saturacao_o2': rng.choice([98, 97, 93, 88]),
+                  'intensidade_dor': rng.randint(0, 10)}
+        admitido = time.monotonic()
+        futuro = pipeline.triar(pedido)
+        futuro.add_done_callback(
+            lambda f, p=prioridade_preliminar(pedido), t=admitido:
+            atrasos[p].append(time.monotonic() - t) if not f.exception() else None)
+        futuros.append(futuro)
+        niveis.append(pipeline.controle.degradacao.nivel)
+        time.sleep(rng.expovariate(taxa))
+    pipeline.parar()
+
+    def p95(valores):
+        return sorted(valores)[int(0.95 * (len(valores) - 1))] * 1000 if valores else None
+
+    return {
+        "pedidos": len(futuros),
+        "recusados": sum(1 for f in futuros if f.done() and f.exception() is not None),
+        "nivel_maximo": max(niveis, default=0),
+        "p95_ms": {p: p95(v) for p, v in atrasos.items()},
+    }
+
+
+def main():
+    """Função principal."""
+    import argparse
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Simulação de surto no controle de admissão Aurora AI')
+    parser.add_argument('--taxa-normal', type=float, default=20.0, help='Pedidos/s fora do surto')
+    parser.add_argument('--taxa-surto', type=float, default=120.0, help='Pedidos/s durante o surto')
+    parser.add_argument('--duracao', type=float, default=30.0, help='Duração total em segundos')
+    parser.add_argument('--trabalhadores', type=int, default=4)
+
+    args = parser.parse_args()
+
+    resultado = simular_surto(args.taxa_normal, args.taxa_surto, args.duracao, args.trabalhadores)
+    logger.info(f"📊 {resultado['pedidos']} pedidos, {resultado['recusados']} recusados, "
+                f"nível máximo {resultado['nivel_maximo']} ({NIVEIS[resultado['nivel_maximo']]})")
+    for prioridade, p95 in resultado['p95_ms'].items():
+        logger.info(f"   - {prioridade}: p95 {p95:.0f} ms" if p95 is not None else f"   - {prioridade}: -")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Geração de embeddings de texto clínico.
+Encapsula o modelo sentence-transformers de 384 dimensões usado pelas
+colunas VECTOR(384) do schema.
+"""
+
+import logging
+import os
+import re
+import unicodedata
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DIMENSAO_EMBEDDING = 384
+MODELO_PADRAO = os.getenv("EMBEDDINGS_MODEL", "paraphrase-MiniLM-L6-v2")
+
+
+def normalizar_texto(texto: Optional[str]) -> str:
+    """Normaliza texto livre: minúsculas, sem acentos e separadores unificados."""
+    if not texto:
+        return ""
+    texto = unicodedata.normalize("NFKD", texto)
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    texto = texto.lower().replace("+", ",").replace("/", ",")
+    texto = re.sub(r"[^\w,;\s]", " ", texto)
+    texto = re.sub(r"\s*[,;]\s*", ", ", texto)
+    return re.sub(r"\s+", " ", texto).strip(" ,")
+
+
+def vetor_para_sql(vetor: Sequence[float]) -> str:
+    """Converte um vetor para o literal textual aceito pelo tipo VECTOR."""
+    return "[" + ",".join(f"{float(v):.7g}" for v in vetor) + "]"
+
+
+class EncoderSentenca:
+    """Encoder de sentenças com carregamento preguiçoso do modelo."""
+
+    def __init__(self, modelo: str = MODELO_PADRAO, batch_size: int = 64):
+        self.modelo = modelo
+        self.batch_size = batch_size
+        self._model = None
+
+    def _carregar(self):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+
+            logger.info(f"🧠 Carregando modelo de embeddings '{self.modelo}'")
+            self._model = SentenceTransformer(self.modelo)
+        return self._model
+
+    def encode(self, textos: List[str]) -> np.ndarray:
+        """Gera embeddings normalizados (float32, norma L2 = 1)."""
+        if not textos:
+            return np.empty((0, DIMENSAO_EMBEDDING), dtype=np.float32)
+        vetores = self._carregar().encode(
+            textos,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return np.asarray(vetores, dtype=np.float32)
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Exportação em streaming dos dados de treinamento.
+Lê triagens com ground truth (prioridade_medico) por um cursor do lado do
+servidor, em blocos, e grava Parquet comprimido (embeddings da versão ativa
+como listas float32 de tamanho fixo) ou CSV gzip de forma incremental (vetores no
+formato do pgvector, listas como arrays JSON). Os filtros são
+aplicados no SQL, e a memória fica limitada ao tamanho do bloco.
+"""
+
+import csv
+import gzip
+import json
+import logging
+import resource
+import sys
+import time
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from embeddings import DIMENSAO_EMBEDDING, vetor_para_sql
+from replicas import roteador_para
+from vector_setup import VectorDatabaseSetup
+from versoes_embedding import dimensao_ativa
+
+logger = logging.getLogger(__name__)
+
+COLUNAS = [
+    ("triagem_id", "t.id::text", pa.string()),
+    ("created_at", "t.created_at", pa.timestamp("us")),
+    ("unidade_id", "t.unidade_id::text", pa.string()),
+    ("idade", "p.idade", pa.int32()),
+    ("genero", "p.genero", pa.string()),
+    ("comorbidades", "p.comorbidades", pa.list_(pa.string())),
+    ("sintomas", "t.sintomas", pa.string()),
+    ("descricao_completa", "t.descricao_completa", pa.string()),
+    ("intensidade_dor", "t.intensidade_dor", pa.int32()),
+    ("temperatura", "t.temperatura::float8", pa.float64()),
+    ("pressao_arterial", "t.pressao_arterial", pa.string()),
+    ("frequencia_cardiaca", "t.frequencia_cardiaca", pa.int32()),
+    ("saturacao_o2", "t.saturacao_o2::float8", pa.float64()),
+    ("canal_entrada", "t.canal_entrada", pa.string()),
+    ("prioridade_ia", "t.prioridade_ia", pa.string()),
+    ("score_emergencia", "t.score_emergencia::float8", pa.float64()),
+    ("score_urgente", "t.score_urgente::float8", pa.float64()),
+    ("score_prioritario", "t.score_prioritario::float8", pa.float64()),
+    ("score_eletivo", "t.score_eletivo::float8", pa.float64()),
+    ("prioridade_medico", "t.prioridade_medico", pa.string()),
+    ("acerto_ia", "t.acerto_ia", pa.bool_()),
+    ("embedding_sintomas", "e.embedding_sintomas::real[]",
+     pa.list_(pa.float32(), DIMENSAO_EMBEDDING)),
+    ("embedding_descricao", "e.embedding_descricao::real[]",
+     pa.list_(pa.float32(), DIMENSAO_EMBEDDING)),
+]
+COLUNAS_VETORIAIS = {"embedding_sintomas", "embedding_descricao"}
+COLUNAS_LISTA = {"comorbidades"}
+
+
+def esquema(dimensao: int = DIMENSAO_EMBEDDING) -> pa.Schema:
+    """Esquema Parquet com os vetores na dimensão informada."""
+    return pa.schema([
+        (nome, pa.list_(pa.float32(), dimensao) if nome in COLUNAS_VETORIAIS else tipo)
+        for nome, _, tipo in COLUNAS
+    ])
+
+
+ESQUEMA = esquema()
+
+
+@dataclass
+class ResultadoExportacao:
+    """Resumo de uma exportação."""
+
+    arquivo: Path
+    linhas: int
+    bytes: int
+    segundos: float
+    pico_memoria_mb: float
+
+
+def montar_consulta(data_inicio: Optional[date] = None,
+                    data_fim: Optional[date] = None,
+                    prioridades: Optional[Sequence[str]] = None,
+                    unidades: Optional[Sequence[str]] = None) -> Tuple[str, List[Any]]:
+    """SQL da exportação com os filtros aplicados no banco."""
+    condicoes = ["t.prioridade_medico IS NOT NULL"]
+    params: List[Any] = []
+    if data_inicio:
+        condicoes.append("t.created_at >= %s")
+        params.append(data_inicio)
+    if data_fim:
+        condicoes.append("t.created_at < %s::date + 1")
+        params.append(data_fim)
+    if prioridades:
+        condicoes.append("t.prioridade_medico = ANY(%s)")
+        params.append(list(prioridades))
+    if unidades:
+        condicoes.append("t.unidade_id = ANY(%s::uuid[])")
+        params.append(list(unidades))
+
+    sql = f"""
+        SELECT {', '.join(expr for _, expr, _ in COLUNAS)}
+        FROM triagens t
+        LEFT JOIN pacientes p ON p.id = t.paciente_id
+        LEFT JOIN triagens_embeddings_ativas e ON e.triagem_id = t.id
+        WHERE {' AND '.join(condicoes)}
+        ORDER BY t.created_at
+    """
+    return sql, params
+
+
+class ExportadorTreinamento:
+    """Exporta dados de treinamento em blocos com memória limitada."""
+
+    def __init__(self, db: VectorDatabaseSetup, tamanho_lote: int = 10000,
+                 dimensao: Optional[int] = None):
+        self.db = db
+        self.tamanho_lote = tamanho_lote
+        # Sem dimensão explícita, usa a da versão ativa de embeddings
+        self.dimensao = dimensao
+
+    def _blocos(self, sql: str, params: List[Any]):
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor(name="exportacao_treinamento")
+            cursor.itersize = self.tamanho_lote
+            cursor.execute(sql, params, nome="exportar_dados_treinamento")
+            while True:
+                linhas = cursor.fetchmany(self.tamanho_lote)
+                if not linhas:
+                    break
+                yield linhas
+            cursor.close()
+        finally:
+            conn.rollback()
+            conn.close()
+
+    def exportar(self, destino: Path, formato: str = "parquet", **filtros) -> ResultadoExportacao:
+        """Grava o arquivo de treinamento; filtros: data_inicio, data_fim, prioridades, unidades."""
+        if formato not in ("parquet", "csv"):
+            raise ValueError("Formato deve ser 'parquet' ou 'csv'")
+        destino = Path(destino)
+        sql, params = montar_consulta(**filtros)
+        inicio = time.perf_counter()
+
+        if formato == "parquet":
+            linhas = self._gravar_parquet(destino, sql, params)
+        else:
+            linhas = self._gravar_csv(destino, sql, params)
+
+        resultado = ResultadoExportacao(
+            arquivo=destino,
+            linhas=linhas,
+            bytes=destino.stat().st_size,
+            segundos=time.perf_counter() - inicio,
+            # ru_maxrss é informado em KB no Linux
+            pico_memoria_mb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        )
+        logger.info(f"✅ {linhas} linhas exportadas para {destino} "
+                    f"({resultado.bytes / 1e6:.1f} MB em {resultado.segundos:.1f}s, "
+                    f"pico de memória {resultado.pico_memoria_mb:.0f} MB)")
+        return resultado
+
+    def _gravar_parquet(self, destino: Path, sql: str, params: List[Any]) -> int:
+        total = 0
+        esquema_ativo = esquema(self.dimensao or dimensao_ativa(self.db))
+        with pq.ParquetWriter(destino, esquema_ativo, compression="zstd") as writer:
+            for linhas in self._blocos(sql, params):
+                colunas = list(zip(*linhas))
+                arrays = [pa.array(valores, type=campo.type)
+                          for campo, valores in zip(esquema_ativo, colunas)]
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=esquema_ativo))
+                total += len(linhas)
+        return total
+
+    def _gravar_csv(self, destino: Path, sql: str, params: List[Any]) -> int:
+        total = 0
+        nomes = [nome for nome, _, _ in COLUNAS]
+        indices_vetoriais = [i for i, nome in enumerate(nomes) if nome in COLUNAS_VETORIAIS]
+        indices_lista = [i for i, nome in enumerate(nomes) if nome in COLUNAS_LISTA]
+        with gzip.open(destino, "wt", newline="", encoding="utf-8") as arquivo:
+            writer = csv.writer(arquivo)
+            writer.writerow(nomes)
+            for linhas in self._blocos(sql, params):
+                for linha in linhas:
+                    linha = list(linha)
+                    for i in indices_vetoriais:
+                        if linha[i] is not None:
+                            linha[i] = vetor_para_sql(linha[i])
+                    # Array JSON em vez do repr do Python, legível fora do Python
+                    for i in indices_lista:
+                        if linha[i] is not None:
+                            linha[i] = json.dumps(linha[i], ensure_ascii=False)
+                    writer.writerow(linha)
+                total += len(linhas)
+        return total
+
+
+def main():
+    """Função principal."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Exportação de dados de treinamento Aurora AI')
+    parser.add_argument('destino', type=Path, help='Arquivo de saída (.parquet ou .csv.gz)')
+    parser.add_argument('--formato', choices=['parquet', 'csv'], default='parquet')
+    parser.add_argument('--data-inicio', type=date.fromisoformat, help='AAAA-MM-DD')
+    parser.add_argument('--data-fim', type=date.fromisoformat, help='AAAA-MM-DD (inclusiva)')
+    parser.add_argument('--prioridade', action='append', dest='prioridades',
+                        help='Prioridade do médico (pode repetir)')
+    parser.add_argument('--unidade', action='append', dest='unidades',
+                        help='ID da unidade (pode repetir)')
+    parser.add_argument('--lote', type=int, default=10000, help='Linhas por bloco')
+    parser.add_argument('--replica', action='append', default=[], metavar='HOST:PORTA',
+                        help='Réplica de leitura (pode repetir)')
+    parser.add_argument('--host', default='localhost', help='Host do PostgreSQL primário')
+    parser.add_argument('--port', type=int, default=5432, help='Porta do PostgreSQL primário')
+    parser.add_argument('--database', default='aurora_ai', help='Nome do banco de dados')
+    parser.add_argument('--user', default='admin', help='Usuário do banco')
+    parser.add_argument('--password', default='aurora123', help='Senha do banco')
+
+    args = parser.parse_args()
+
+    primario = VectorDatabaseSetup(host=args.host, port=args.port, database=args.database,
+                                   user=args.user, password=args.password)
+    roteador = roteador_para(primario, args.replica)
+    roteador.verificar_saude()
+    exportador = ExportadorTreinamento(roteador.leitura(), tamanho_lote=args.lote)
+    try:
+        exportador.exportar(args.destino, formato=args.formato,
+                            data_inicio=args.data_inicio, data_fim=args.data_fim,
+                            prioridades=args.prioridades, unidades=args.unidades)
+    except Exception as e:
+        logger.error(f"❌ Erro ao exportar dados de treinamento: {e}")
+        sys.exit(1)
+
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Gerador de carga sintética para o banco Aurora AI.
+Preenche unidades, pacientes, triagens (com embeddings realistas), filas,
+atendimentos, estatísticas em tempo real e o vocabulário de
+embeddings_sintomas de forma reprodutível (semente e data final fixas) e em
+escala configurável, carregando as tabelas grandes via COPY.
+"""
+
+import io
+import logging
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from psycopg2.extras import execute_values
+
+from embeddings import DIMENSAO_EMBEDDING, vetor_para_sql
+from vector_setup import VectorDatabaseSetup
+
+logger = logging.getLogger(__name__)
+
+# Volumes na escala 1x; todos são multiplicados pelo fator de escala
+VOLUMES_BASE = {
+    "unidades_saude": 20,
+    "pacientes": 2000,
+    "triagens": 10000,
+}
+
+SINTOMAS = [
+    'Febre', 'Dor de cabeça', 'Tosse', 'Falta de ar', 'Dor no peito',
+    'Dor abdominal', 'Náusea/Vômito', 'Tontura', 'Dor nas costas',
+    'Sangramento', 'Inchaço', 'Visão turva', 'Palpitações',
+    'Confusão mental', 'Convulsão', 'Trauma recente'
+]
+# Frequência relativa de cada sintoma na demanda
+PESOS_SINTOMAS = np.array([18, 12, 15, 6, 4, 10, 8, 6, 7, 2, 3, 2, 3, 1, 1, 2], dtype=float)
+# Probabilidade de cada prioridade (emergencia, urgente, prioritario, eletivo) por sintoma
+PRIORIDADE_POR_SINTOMA = {
+    'Dor no peito': [0.55, 0.30, 0.10, 0.05],
+    'Falta de ar': [0.45, 0.35, 0.15, 0.05],
+    'Convulsão': [0.70, 0.25, 0.05, 0.00],
+    'Sangramento': [0.40, 0.40, 0.15, 0.05],
+    'Confusão mental': [0.35, 0.40, 0.20, 0.05],
+    'Trauma recente': [0.25, 0.45, 0.25, 0.05],
+}
+PRIORIDADE_PADRAO = [0.03, 0.22, 0.45, 0.30]
+PRIORIDADES = ['emergencia', 'urgente', 'prioritario', 'eletivo']
+
+COMORBIDADES = ['Hipertensão', 'Diabetes', 'Problemas cardíacos', 'Asma', 'Obesidade', 'Gestante']
+PREVALENCIA_COMORBIDADES = np.array([0.25, 0.10, 0.06, 0.08, 0.20, 0.02])
+
+TIPOS_UNIDADE = ['UPA', 'Hospital', 'UBS', 'Clinica']
+PESOS_TIPOS = np.array([0.3, 0.15, 0.45, 0.10])
+CAPACIDADE_POR_TIPO = {'UPA': 150, 'Hospital': 300, 'UBS': 80, 'Clinica': 60}
+CANAIS = ['app', 'web', 'presencial', 'telemedicina']
+PESOS_CANAIS = np.array([0.25, 0.15, 0.50, 0.10])
+CIDADES = [('São Paulo', 'SP', -23.55, -46.63), ('Goiânia', 'GO', -16.68, -49.25),
+           ('Belo Horizonte', 'MG', -19.92, -43.94), ('Recife', 'PE', -8.05, -34.88)]
+
+# Perfil de chegada por hora do dia (picos de manhã e no início da noite)
+PERFIL_HORARIO = np.array([1, 1, 1, 1, 1, 2, 4, 7, 9, 9, 8, 7,
+                           6, 6, 7, 7, 7, 8, 9, 8, 6, 4, 3, 2], dtype=float)
+# Seg..Dom (weekday() do Python)
+PERFIL_SEMANAL = np.array([1.25, 1.10, 1.0, 1.0, 1.05, 0.85, 0.75])
+
+# Categoria de cada sintoma em embeddings_sintomas
+CATEGORIAS_SINTOMAS = {
+    'Febre': 'sintoma_geral', 'Dor de cabeça': 'neurologico', 'Tosse': 'respiratorio',
+    'Falta de ar': 'respiratorio', 'Dor no peito': 'cardiologico',
+    'Dor abdominal': 'gastrointestinal', 'Náusea/Vômito': 'gastrointestinal',
+    'Tontura': 'neurologico', 'Dor nas costas': 'musculoesqueletico',
+    'Sangramento': 'circulatorio', 'Inchaço': 'circulatorio', 'Visão turva': 'neurologico',
+    'Palpitações': 'cardiologico', 'Confusão mental': 'neurologico',
+    'Convulsão': 'neurologico', 'Trauma recente': 'trauma',
+}
+
+# Data final padrão dos dados: fixa, para que a mesma semente gere os mesmos dados
+# (consultas com janela relativa a NOW() pedem --fim recente)
+FIM_PADRAO = datetime(2025, 1, 6)
+
+NULO = "\\N"
+
+
+class GeradorCargaSintetica:
+    """Gera e carrega dados sintéticos reprodutíveis em escala configurável."""
+
+    def __init__(self,
+                 db: VectorDatabaseSetup,
+                 escala: float = 1.0,
+                 semente: int = 42,
+                 dias: int = 30,
+                 tamanho_lote: int = 50000,
+                 fim: Optional[datetime] = None):
+        if not 1 <= escala <= 1000:
+            raise ValueError("A escala deve estar entre 1x e 1000x")
+        self.db = db
+        self.escala = escala
+        self.semente = semente
+        self.dias = dias
+        self.tamanho_lote = tamanho_lote
+        self.fim = (fim or FIM_PADRAO).replace(minute=0, second=0, microsecond=0)
+        self.rng = np.random.default_rng(semente)
+        self.centroides = centroides_sintomas(semente)
+        self.volumes = {tabela: int(n * escala) for tabela, n in VOLUMES_BASE.items()}
+
+        self._unidades: List[str] = []
+        self._pacientes: List[str] = []
+        self.tempos: Dict[str, float] = {}
+        self.linhas: Dict[str, int] = {}
+
+    def run(self, truncar: bool = False) -> bool:
+        """Gera e carrega todas as tabelas."""
+        logger.info(f"🚀 Gerando carga sintética {self.escala:g}x (semente {self.semente})...")
+        try:
+            conn = self.db.connect()
+            if truncar:
+                self._truncar(conn)
+            etapas = [
+                ("unidades_saude", self._gerar_unidades),
+                ("pacientes", self._gerar_pacientes),
+                ("triagens", self._gerar_triagens),
+                ("estatisticas_tempo_real", self._gerar_estatisticas),
+                ("embeddings_sintomas", self._gerar_embeddings_sintomas),
+            ]
+            for tabela, etapa in etapas:
+                inicio = time.perf_counter()
+                etapa(conn)
+                conn.commit()
+                self.tempos[tabela] = time.perf_counter() - inicio
+                logger.info(f"   ✅ {tabela}: {self.tempos[tabela]:.1f}s")
+            conn.close()
+        except Exception as e:
+            logger.error(f"❌ Erro ao gerar carga sintética: {e}")
+            return False
+
+        for tabela, total in self.linhas.items():
+            logger.info(f"   • {tabela}: {total} linhas")
+        return True
+
+    def _truncar(self, conn) -> None:
+        cursor = conn.cursor()
+        cursor.execute("""
+            TRUNCATE atendimentos, filas, logs_decisoes_ia, triagens,
+                     estatisticas_tempo_real, pacientes, unidades_saude CASCADE
+        """, nome="truncar_carga_sintetica")
+        conn.commit()
+        cursor.close()
+        logger.info("🧹 Tabelas de carga truncadas")
+
+    def _copy(self, conn, tabela: str, colunas: Sequence[str],
+              linhas: Iterator[str]) -> None:
+        """Carrega linhas já formatadas (COPY text) em blocos."""
+        cursor = conn.cursor()
+        sql = f"COPY {tabela} ({', '.join(colunas)}) FROM STDIN"
+        buffer = io.StringIO()
+        pendentes = 0
+        for linha in linhas:
+            buffer.write(linha)
+            pendentes += 1
+            if pendentes >= self.tamanho_lote:
+                buffer.seek(0)
+                cursor.copy_expert(sql, buffer)
+                buffer = io.StringIO()
+                self.linhas[tabela] = self.linhas.get(tabela, 0) + pendentes
+                pendentes = 0
+        if pendentes:
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+            self.linhas[tabela] = self.linhas.get(tabela, 0) + pendentes
+        cursor.close()
+
+    def _uuids(self, n: int) -> List[str]:
+        bits = self.rng.integers(0, 2**63, size=(n, 2), dtype=np.int64)
+        uuids = []
+        for alto, baixo in bits:
+            h = f"{int(alto):016x}{int(baixo):016x}"
+            uuids.append(f"{h[:8]}-{h[8:12]}-4{h[13:16]}-a{h[17:20]}-{h[20:]}")
+        return uuids
+
+    def _gerar_unidades(self, conn) -> None:
+        n = self.volumes["unidades_saude"]
+        self._unidades = self._uuids(n)
+        tipos = self.rng.choice(TIPOS_UNIDADE, size=n, p=PESOS_TIPOS)
+        cidades = self.rng.integers(0, len(CIDADES), size=n)
+        deslocamentos = self.rng.normal(0, 0.08, size=(n, 2))
+
+        def linhas():
+            for i in range(n):
+                cidade, uf, lat, lon = CIDADES[cidades[i]]
+                tipo = tipos[i]
+                yield (f"{self._unidades[i]}\t{tipo} {i + 1:05d}\tRua Sintética, {i + 1}\t"
+                       f"{cidade}\t{uf}\t{CAPACIDADE_POR_TIPO[tipo]}\t"
+                       f"{lat + deslocamentos[i, 0]:.6f}\t{lon + deslocamentos[i, 1]:.6f}\n")
+
+        self._copy(conn, "unidades_saude",
+                   ["id", "nome", "tipo", "endereco", "cidade", "estado",
+                    "capacidade", "latitude", "longitude"], linhas())
+
+    def _gerar_pacientes(self, conn) -> None:
+        n = self.volumes["pacientes"]
+        self._pacientes = self._uuids(n)
+        idades = np.clip(self.rng.gamma(4.0, 10.0, size=n), 0, 105).astype(int)
+        generos = self.rng.choice(['F', 'M'], size=n)
+        comorb = self.rng.random((n, len(COMORBIDADES))) < PREVALENCIA_COMORBIDADES
+
+        def linhas():
+            for i in range(n):
+                lista = [COMORBIDADES[j] for j in np.flatnonzero(comorb[i])]
+                array = "{" + ",".join(f'"{c}"' for c in lista) + "}"
+                yield (f"{self._pacientes[i]}\tSINT-{self.semente}-{i:09d}\t"
+                       f"{idades[i]}\t{generos[i]}\t{array}\n")
+
+        self._copy(conn, "pacientes",
+                   ["id", "codigo_anonimo", "idade", "genero", "comorbidades"], linhas())
+
+    def _gerar_triagens(self, conn) -> None:
+        total = self.volumes["triagens"]
+        for inicio in range(0, total, self.tamanho_lote):
+            n = min(self.tamanho_lote, total - inicio)
+            self._gerar_lote_triagens(conn, n)
+            conn.commit()
+
+    def _gerar_lote_triagens(self, conn, n: int) -> None:
+        rng = self.rng
+        ids = self._uuids(n)
+        fila_ids = self._uuids(n)
+        atendimento_ids = self._uuids(n)
+        pacientes = rng.integers(0, len(self._pacientes), size=n)
+        unidades = rng.integers(0, len(self._unidades), size=n)
+        momentos = horarios_chegada(rng, n, self.fim, self.dias)
+
+        qtd_sintomas = rng.choice([1, 2, 3], size=n, p=[0.5, 0.35, 0.15])
+        prob_sintomas = PESOS_SINTOMAS / PESOS_SINTOMAS.sum()
+        sintomas_idx = [rng.choice(len(SINTOMAS), size=q, replace=False, p=prob_sintomas)
+                        for q in qtd_sintomas]
+        emb_sintomas = embeddings_de_sintomas(rng, self.centroides, sintomas_idx, ruido=0.25)
+        emb_descricao = emb_sintomas + rng.normal(0, 0.35 / np.sqrt(DIMENSAO_EMBEDDING),
+                                                  size=emb_sintomas.shape)
+        emb_descricao /= np.linalg.norm(emb_descricao, axis=1, keepdims=True)
+
+        prioridades = np.empty(n, dtype=object)
+        for i, idx in enumerate(sintomas_idx):
+            probs = max((PRIORIDADE_POR_SINTOMA.get(SINTOMAS[j], PRIORIDADE_PADRAO) for j in idx),
+                        key=lambda p: p[0])
+            prioridades[i] = PRIORIDADES[rng.choice(4, p=probs)]
+        scores = rng.dirichlet(np.ones(4), size=n)
+        acerto = rng.random(n) < 0.94
+        revisado = rng.random(n) < 0.8
+        intensidade = rng.integers(0, 11, size=n)
+        temperatura = rng.normal(37.2, 0.9, size=n)
+        saturacao = np.clip(rng.normal(96.5, 2.0, size=n), 80, 99.99)
+        freq = rng.normal(85, 15, size=n).astype(int)
+        canais = rng.choice(CANAIS, size=n, p=PESOS_CANAIS)
+        espera = rng.exponential(35, size=n)
+        duracao = rng.gamma(3.0, 6.0, size=n)
+        satisfacao = rng.integers(1, 6, size=n)
+        posicoes = rng.integers(1, 60, size=n)
+
+        fmt_vetor = "[" + ",".join(["%.5f"] * DIMENSAO_EMBEDDING) + "]"
+        triagens, filas, atendimentos = [], [], []
+        for i in range(n):
+            texto = " + ".join(SINTOMAS[j] for j in sintomas_idx[i])
+            prioridade = prioridades[i]
+            if revisado[i]:
+                medico = prioridade if acerto[i] else PRIORIDADES[(PRIORIDADES.index(prioridade) + 1) % 4]
+                medico_sql, acerto_sql = medico, ("t" if medico == prioridade else "f")
+            else:
+                medico_sql, acerto_sql = NULO, NULO
+            criado = momentos[i]
+            triagens.append(
+                f"{ids[i]}\t{self._pacientes[pacientes[i]]}\t{self._unidades[unidades[i]]}\t"
+                f"{texto}\tPaciente relata {texto.lower()}.\t{intensidade[i]}\t"
+                f"{temperatura[i]:.2f}\t{saturacao[i]:.2f}\t{freq[i]}\t{prioridade}\t"
+                f"{scores[i, 0]:.4f}\t{scores[i, 1]:.4f}\t{scores[i, 2]:.4f}\t{scores[i, 3]:.4f}\t"
+                f"{medico_sql}\t{acerto_sql}\t{fmt_vetor % tuple(emb_sintomas[i])}\t"
+                f"{fmt_vetor % tuple(emb_descricao[i])}\t{canais[i]}\tsintetico-v1\t{criado}\n"
+            )
+
+            entrada = criado + timedelta(minutes=2)
+            if entrada + timedelta(minutes=float(espera[i])) < self.fim:
+                saida = entrada + timedelta(minutes=float(espera[i]))
+                filas.append(
+                    f"{fila_ids[i]}\t{ids[i]}\t{self._unidades[unidades[i]]}\t{posicoes[i]}\t"
+                    f"{prioridade}\t{espera[i]:.1f} minutes\tfinalizado\t{entrada}\t{saida}\n"
+                )
+                fim_atendimento = saida + timedelta(minutes=float(duracao[i]))
+                atendimentos.append(
+                    f"{atendimento_ids[i]}\t{fila_ids[i]}\tClínica geral\t"
+                    f"{duracao[i]:.1f} minutes\t{satisfacao[i]}\t{saida}\t{fim_atendimento}\n"
+                )
+            else:
+                status = "em_atendimento" if espera[i] < 10 else "aguardando"
+                filas.append(
+                    f"{fila_ids[i]}\t{ids[i]}\t{self._unidades[unidades[i]]}\t{posicoes[i]}\t"
+                    f"{prioridade}\t{NULO}\t{status}\t{entrada}\t{NULO}\n"
+                )
+
+        self._copy(conn, "triagens",
+                   ["id", "paciente_id", "unidade_id", "sintomas", "descricao_completa",
+                    "intensidade_dor", "temperatura", "saturacao_o2", "frequencia_cardiaca",
+                    "prioridade_ia", "score_emergencia", "score_urgente", "score_prioritario",
+                    "score_eletivo", "prioridade_medico", "acerto_ia", "embedding_sintomas",
+                    "embedding_descricao", "canal_entrada", "modelo_ia_utilizado",
+                    "created_at"], iter(triagens))
+        self._copy(conn, "filas",
+                   ["id", "triagem_id", "unidade_id", "posicao", "prioridade",
+                    "tempo_real_espera", "status", "entrada_fila", "saida_fila"], iter(filas))
+        self._copy(conn, "atendimentos",
+                   ["id", "fila_id", "especialidade", "tempo_atendimento",
+                    "satisfacao_paciente", "created_at", "finalizado_at"], iter(atendimentos))
+
+    def _gerar_estatisticas(self, conn) -> None:
+        horas = self.dias * 24
+        inicio = self.fim - timedelta(hours=horas)
+        taxa_base = self.volumes["triagens"] / max(len(self._unidades), 1) / horas
+
+        def linhas():
+            for h in range(horas):
+                ids = self._uuids(len(self._unidades))
+                momento = inicio + timedelta(hours=h)
+                fator = (PERFIL_HORARIO[momento.hour] / PERFIL_HORARIO.mean()
+                         * PERFIL_SEMANAL[momento.weekday()])
+                atendidos = self.rng.poisson(taxa_base * fator, size=len(self._unidades))
+                fila = self.rng.poisson(taxa_base * fator * 1.5, size=len(self._unidades))
+                espera = self.rng.gamma(3.0, 10.0, size=len(self._unidades))
+                ocupacao = np.clip(self.rng.normal(60 * fator, 15, size=len(self._unidades)), 0, 100)
+                for u, unidade in enumerate(self._unidades):
+                    yield (f"{ids[u]}\t{unidade}\t{momento}\t{fila[u]}\t{atendidos[u]}\t"
+                           f"{espera[u]:.1f} minutes\t{ocupacao[u]:.2f}\n")
+
+        self._copy(conn, "estatisticas_tempo_real",
+                   ["id", "unidade_id", "timestamp", "pacientes_fila",
+                    "pacientes_atendidos_hora", "tempo_medio_espera",
+                    "ocupacao_percentual"], linhas())
+
+    def _gerar_embeddings_sintomas(self, conn) -> None:
+        """Vocabulário com os centróides usados nas triagens (upsert: a tabela não é truncada)."""
+        cursor = conn.cursor()
+        execute_values(cursor, """
+            INSERT INTO embeddings_sintomas (sintoma, embedding, categoria)
+            VALUES %s
+            ON CONFLICT (sintoma) DO UPDATE SET
+                embedding = EXCLUDED.embedding,
+                categoria = EXCLUDED.categoria
+        """, [(sintoma, vetor_para_sql(self.centroides[i]), CATEGORIAS_SINTOMAS[sintoma])
+              for i, sintoma in enumerate(SINTOMAS)],
+            template="(%s, %s::vector, %s)")
+        cursor.close()
+        self.linhas["embeddings_sintomas"] = len(SINTOMAS)
+
+
+def centroides_sintomas(semente: int) -> np.ndarray:
+    """Direções base (normalizadas) de cada sintoma no espaço de embeddings."""
+    rng = np.random.default_rng(semente + 1)
+    centroides = rng.normal(size=(len(SINTOMAS), DIMENSAO_EMBEDDING))
+    return centroides / np.linalg.norm(centroides, axis=1, keepdims=True)
+
+
+def embeddings_de_sintomas(rng: np.random.Generator, centroides: np.ndarray,
+                           sintomas_idx: Sequence[Sequence[int]],
+                           ruido: float = 0.25) -> np.ndarray:
+    """Combina os centróides dos sintomas de cada caso com ruído gaussiano."""
+    vetores = np.stack([centroides[list(idx)].sum(axis=0) for idx in sintomas_idx])
+    vetores /= np.linalg.norm(vetores, axis=1, keepdims=True)
+    vetores += rng.normal(0, ruido / np.sqrt(DIMENSAO_EMBEDDING), size=vetores.shape)
+    return vetores / np.linalg.norm(vetores, axis=1, keepdims=True)
+
+
+def horarios_chegada(rng: np.random.Generator, n: int, fim: datetime,
+                     dias: int) -> List[datetime]:
+    """Sorteia horários de chegada seguindo os perfis diário e semanal."""
+    inicio = fim - timedelta(days=dias)
+    horas = np.arange(dias * 24)
+    hora_do_dia = (inicio.hour + horas) % 24
+    dia_semana = (inicio.weekday() + (inicio.hour + horas) // 24) % 7
+    pesos = PERFIL_HORARIO[hora_do_dia] * PERFIL_SEMANAL[dia_semana]
+    escolhidas = rng.choice(horas, size=n, p=pesos / pesos.sum())
+    segundos = rng.integers(0, 3600, size=n)
+    return [inicio + timedelta(hours=int(h), seconds=int(s))
+            for h, s in zip(escolhidas, segundos)]
+
+
+def main():
+    """Função principal."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Gerador de carga sintética Aurora AI')
+    parser.add_argument('--escala', type=float, default=1.0, help='Fator de escala (1 a 1000)')
+    parser.add_argument('--semente', type=int, default=42, help='Semente do gerador')
+    parser.add_argument('--dias', type=int, default=30, help='Dias de histórico gerados')
+    parser.add_argument('--fim', type=datetime.fromisoformat,
+                        default=FIM_PADRAO.isoformat(),
+                        help='Data final dos dados (AAAA-MM-DD); fixa por padrão')
+    parser.add_argument('--truncar', action='store_true',
+                        help='Esvazia as tabelas antes de carregar')
+    parser.add_argument('--host', default='localhost', help='Host do PostgreSQL')
+    parser.add_argument('--port', type=int, default=5432, help='Porta do PostgreSQL')
+    parser.add_argument('--database', default='aurora_ai', help='Nome do banco de dados')
+    parser.add_argument('--user', default='admin', help='Usuário do banco')
+    parser.add_argument('--password', default='aurora123', help='Senha do banco')
+
+    args = parser.parse_args()
+
+    db = VectorDatabaseSetup(host=args.host, port=args.port, database=args.database,
+                             user=args.user, password=args.password)
+    gerador = GeradorCargaSintetica(db, escala=args.escala, semente=args.semente,
+                                    dias=args.dias, fim=args.fim)
+    success = gerador.run(truncar=args.truncar)
+
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Importação em massa de pacientes a partir de exportações CSV de prontuário.
+O arquivo é lido em blocos; um pool de processos normaliza cada linha e
+calcula o pseudônimo (HMAC-SHA256 do identificador com a chave da variável
+PSEUDONIMIZACAO_CHAVE), de modo que o identificador real nunca chega ao
+banco. Pseudônimos já existentes são descartados contra um conjunto
+pré-carregado, e as linhas novas entram por COPY, com commit por lote (uma
+nova execução sobre o mesmo arquivo só insere o que faltou).
+"""
+
+import base64
+import csv
+import functools
+import hashlib
+import hmac
+import io
+import logging
+import os
+import re
+import resource
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import psycopg2
+import psycopg2.errors
+
+from embeddings import normalizar_texto
+from vector_setup import VectorDatabaseSetup
+
+logger = logging.getLogger(__name__)
+
+PREFIXO = "PAC-"
+# Grafias comuns nas exportações → nome canônico (chaves já normalizadas)
+COMORBIDADES_CANONICAS = {
+    "hipertensao": "Hipertensão", "has": "Hipertensão", "hipertensao arterial": "Hipertensão",
+    "diabetes": "Diabetes", "dm": "Diabetes", "diabetes mellitus": "Diabetes",
+    "problemas cardiacos": "Problemas cardíacos", "cardiopatia": "Problemas cardíacos",
+    "asma": "Asma", "obesidade": "Obesidade", "gestante": "Gestante", "gravidez": "Gestante",
+}
+GENEROS = {"f": "F", "fem": "F", "feminino": "F", "female": "F",
+           "m": "M", "masc": "M", "masculino": "M", "male": "M"}
+NULO = "\\N"
+
+# Estado de cada processo do pool (definido no inicializador)
+_CHAVE: bytes = b""
+_REFERENCIA: date = date.today()
+
+
+def pseudonimizar(identificador: str, chave: bytes) -> str:
+    """Pseudônimo estável: HMAC-SHA256 do identificador só com dígitos/letras, em base64url."""
+    normalizado = re.sub(r"[^0-9A-Za-z]", "", identificador).upper()
+    digest = hmac.new(chave, normalizado.encode(), hashlib.sha256).digest()
+    return PREFIXO + base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def chave_deduplicacao(codigo: str) -> Optional[int]:
+    """128 bits iniciais do HMAC como inteiro (ocupa menos memória que a string)."""
+    if not codigo.startswith(PREFIXO):
+        return None
+    corpo = codigo[len(PREFIXO):]
+    return int.from_bytes(base64.urlsafe_b64decode(corpo + "=" * (-len(corpo) % 4))[:16], "big")
+
+
+@functools.lru_cache(maxsize=4096)
+def normalizar_comorbidades(valor: Optional[str]) -> Tuple[str, ...]:
+    """Lista canônica e sem repetições a partir de 'a; b', 'a|b', "['a', 'b']" e afins."""
+    if not valor:
+        return ()
+    resultado = []
+    for termo in re.split(r"[;,|/]", valor.strip().strip("[]{}")):
+        termo = termo.strip().strip("'\"").strip()
+        if not termo:
+            continue
+        canonico = COMORBIDADES_CANONICAS.get(normalizar_texto(termo), termo[:1].upper() + termo[1:])
+        if canonico not in resultado:
+            resultado.append(canonico)
+    return tuple(resultado)
+
+
+def _copy_texto(valor: str) -> str:
+    return (valor.replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+@functools.lru_cache(maxsize=4096)
+def _genero(valor: Optional[str]) -> Optional[str]:
+    return GENEROS.get(normalizar_texto(valor or ""))
+
+
+def _array_texto(itens: Tuple[str, ...]) -> str:
+    """Literal TEXT[] do PostgreSQL."""
+    return "{" + ",".join('"' + i.replace("\\", "\\\\").replace('"', '\\"') + '"' for i in itens) + "}"
+
+
+def _idade(valor_idade: Optional[str], nascimento: Optional[str]) -> Optional[int]:
+    if valor_idade and valor_idade.strip().isdigit():
+        return int(valor_idade)
+    if nascimento:
+        # AAAA-MM-DD ou DD/MM/AAAA (DD-MM-AAAA), sem o custo do strptime
+        partes = nascimento.strip()[:10].replace("/", "-").split("-")
+        if len(partes) != 3 or not all(p.isdigit() for p in partes):
+            return None
+        ano, mes, dia = (partes if len(partes[0]) == 4 else partes[::-1])
+        try:
+            nascido = date(int(ano), int(mes), int(dia))
+        except ValueError:
+            return None
+        return (_REFERENCIA.year - nascido.year
+                - ((_REFERENCIA.month, _REFERENCIA.day) < (nascido.month, nascido.day)))
+    return None
+
+
+@functools.lru_cache(maxsize=4096)
+def _comorbidades_copy(valor: Optional[str]) -> str:
+    """Coluna comorbidades já no formato COPY (os valores se repetem muito entre linhas)."""
+    return _copy_texto(_array_texto(normalizar_comorbidades(valor)))
+
+
+def _iniciar_trabalhador(chave: bytes, referencia: date) -> None:
+    global _CHAVE, _REFERENCIA
+    _CHAVE, _REFERENCIA = chave, referencia
+
+
+def _transformar_bloco(linhas: List[List[str]],
+                       colunas: Dict[str, Optional[int]]) -> Tuple[List[Tuple[int, str]], int]:
+    """Executado no pool: devolve (chave de deduplicação, linha COPY) e o número de linhas inválidas."""
+    def campo(linha, nome):
+        i = colunas[nome]
+        return linha[i] if i is not None and i < len(linha) and linha[i] != "" else None
+
+    saida, invalidas = [], 0
+    for linha in linhas:
+        identificador = campo(linha, "id")
+        idade = _idade(campo(linha, "idade"), campo(linha, "nascimento"))
+        if not identificador or idade is None or not 0 <= idade <= 130:
+            invalidas += 1
+            continue
+        codigo = pseudonimizar(identificador, _CHAVE)
+        genero = _genero(campo(linha, "genero"))
+        comorbidades = _comorbidades_copy(campo(linha, "comorbidades"))
+        saida.append((chave_deduplicacao(codigo),
+                      f"{codigo}\t{idade}\t{genero or NULO}\t{comorbidades}\n"))
+    return saida, invalidas
+
+
+@dataclass
+class ResultadoImportacao:
+    """Resumo de uma importação."""
+
+    lidas: int
+    inseridas: int
+    duplicadas: int
+    invalidas: int
+    segundos: float
+    pico_memoria_mb: float
+    pico_memoria_trabalhadores_mb: float
+
+    @property
+    def linhas_por_segundo(self) -> float:
+        return self.lidas / self.segundos if self.segundos else 0.0
+
+
+class ImportadorPacientes:
+    """Importa pacientes de CSV em blocos, com pseudonimização paralela e COPY."""
+
+    COLUNAS_COPY = ("codigo_anonimo", "idade", "genero", "comorbidades")
+
+    def __init__(self, db: VectorDatabaseSetup, chave: bytes, processos: int = 4,
+                 tamanho_bloco: int = 20000, tamanho_lote: int = 100000):
+        if not chave:
+            raise ValueError("Chave de pseudonimização vazia")
+        self.db = db
+        self.chave = chave
+        self.processos = processos
+        self.tamanho_bloco = tamanho_bloco
+        self.tamanho_lote = tamanho_lote
+
+    def carregar_existentes(self) -> Set[int]:
+        """Chaves de deduplicação de todos os pacientes já cadastrados."""
+        existentes: Set[int] = set()
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor(name="importacao_pacientes_existentes")
+            cursor.itersize = 100000
+            cursor.execute("SELECT codigo_anonimo FROM pacientes WHERE codigo_anonimo LIKE %s",
+                           (PREFIXO + "%",), nome="carregar_codigos_anonimos")
+            for (codigo,) in cursor:
+                existentes.add(chave_deduplicacao(codigo))
+            cursor.close()
+        finally:
+            conn.rollback()
+            conn.close()
+        return existentes
+
+    def _blocos(self, arquivo: Path, mapeamento: Dict[str, Optional[str]], separador: str,
+                encoding: str) -> Iterator[Tuple[List[List[str]], Dict[str, Optional[int]]]]:
+        with open(arquivo, newline="", encoding=encoding) as f:
+            leitor = csv.reader(f, delimiter=separador)
+            cabecalho = [c.strip().lower() for c in next(leitor)]
+            colunas = {nome: (cabecalho.index(coluna.lower()) if coluna and coluna.lower() in cabecalho else None)
+                       for nome, coluna in mapeamento.items()}
+            if colunas["id"] is None:
+                raise ValueError(f"Coluna de identificador '{mapeamento['id']}' não encontrada")
+            if colunas["idade"] is None and colunas["nascimento"] is None:
+                raise ValueError("O arquivo precisa de uma coluna de idade ou de data de nascimento")
+            bloco: List[List[str]] = []
+            for linha in leitor:
+                bloco.append(linha)
+                if len(bloco) >= self.tamanho_bloco:
+                    yield bloco, colunas
+                    bloco = []
+            if bloco:
+                yield bloco, colunas
+
+    def _copy(self, conn, linhas: List[str]) -> int:
+        """COPY do lote; se outro processo inseriu o mesmo código, cai para INSERT ... ON CONFLICT."""
+        cursor = conn.cursor()
+        buffer = io.StringIO("".join(linhas))
+        try:
+            cursor.copy_expert(f"COPY pacientes ({', '.join(self.COLUNAS_COPY)}) FROM STDIN", buffer)
+            inseridas = len(linhas)
+        except psycopg2.errors.UniqueViolation:
+            conn.rollback()
+            buffer.seek(0)
+            cursor.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS pacientes_importacao
+                (LIKE pacientes INCLUDING DEFAULTS) ON COMMIT DELETE ROWS
+            """, nome="criar_tabela_importacao")
+            cursor.copy_expert(f"COPY pacientes_importacao ({', '.join(self.COLUNAS_COPY)}) FROM STDIN",
+                               buffer)
+            cursor.execute(f"""
+                INSERT INTO pacientes ({', '.join(self.COLUNAS_COPY)})
+                SELECT {', '.join(self.COLUNAS_COPY)} FROM pacientes_importacao
+                ON CONFLICT (codigo_anonimo) DO NOTHING
+            """, nome="inserir_pacientes_importacao")
+            inseridas = cursor.rowcount
+        conn.commit()
+        cursor.close()
+        return inseridas
+
+    def importar(self, arquivo: Path, coluna_id: str = "cns", coluna_idade: Optional[str] = "idade",
+                 coluna_nascimento: Optional[str] = "data_nascimento",
+                 coluna_genero: Optional[str] = "sexo",
+                 coluna_comorbidades: Optional[str] = "comorbidades",
+                 separador: str = ",", encoding: str = "utf-8") -> ResultadoImportacao:
+        """Importa o arquivo; colunas ausentes no cabeçalho são tratadas como vazias."""
+        inicio = time.perf_counter()
+        existentes = self.carregar_existentes()
+        logger.info(f"🔑 {len(existentes)} pacientes já cadastrados carregados para deduplicação")
+
+        mapeamento = {"id": coluna_id, "idade": coluna_idade, "nascimento": coluna_nascimento,
+                      "genero": coluna_genero, "comorbidades": coluna_comorbidades}
+        lidas = inseridas = duplicadas = invalidas = 0
+        pendentes: List[str] = []
+        conn = self.db.connect()
+        try:
+            with ProcessPoolExecutor(max_workers=self.processos, initializer=_iniciar_trabalhador,
+                                     initargs=(self.chave, date.today())) as executor:
+                # Janela limitada de blocos em voo: a memória não cresce com o arquivo
+                em_voo: deque = deque()
+                blocos = self._blocos(Path(arquivo), mapeamento, separador, encoding)
+                esgotado = False
+                while em_voo or not esgotado:
+                    while not esgotado and len(em_voo) < 2 * self.processos:
+                        try:
+                            bloco, colunas = next(blocos)
+                        except StopIteration:
+                            esgotado = True
+                            break
+                        lidas += len(bloco)
+                        em_voo.append(executor.submit(_transformar_bloco, bloco, colunas))
+                    if not em_voo:
+                        break
+
+                    saida, n_invalidas = em_voo.popleft().result()
+                    invalidas += n_invalidas
+                    for chave, linha in saida:
+                        if chave in existentes:
+                            duplicadas += 1
+                            continue
+                        existentes.add(chave)
+                        pendentes.append(linha)
+                    if len(pendentes) >= self.tamanho_lote:
+                        inseridas += self._copy(conn, pendentes)
+                        pendentes = []
+                        logger.info(f"   📥 {lidas} linhas lidas, {inseridas} inseridas "
+                                    f"({lidas / (time.perf_counter() - inicio):,.0f} linhas/s)")
+                if pendentes:
+                    inseridas += self._copy(conn, pendentes)
+        finally:
+            conn.close()
+
+        resultado = ResultadoImportacao(
+            lidas=lidas, inseridas=inseridas, duplicadas=duplicadas, invalidas=invalidas,
+            segundos=time.perf_counter() - inicio,
+            # ru_maxrss é informado em KB no Linux; RUSAGE_CHILDREN traz o maior processo do pool
+            pico_memoria_mb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            pico_memoria_trabalhadores_mb=resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+        )
+        logger.info(f"✅ {resultado.inseridas} pacientes inseridos de {resultado.lidas} linhas "
+                    f"({resultado.duplicadas} duplicados, {resultado.invalidas} inválidos) em "
+                    f"{resultado.segundos:.1f}s — {resultado.linhas_por_segundo:,.0f} linhas/s, "
+                    f"pico de memória {resultado.pico_memoria_mb:.0f} MB "
+                    f"(trabalhadores {resultado.pico_memoria_trabalhadores_mb:.0f} MB)")
+        return resultado
+
+
+def main():
+    """Função principal."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Importação em massa de pacientes Aurora AI')
+    parser.add_argument('arquivo', type=Path, help='CSV exportado do prontuário')
+    parser.add_argument('--coluna-id', default='cns', help='Identificador real (CNS, CPF...)')
+    parser.add_argument('--coluna-idade', default='idade')
+    parser.add_argument('--coluna-nascimento', default='data_nascimento')
+    parser.add_argument('--coluna-genero', default='sexo')
+    parser.add_argument('--coluna-comorbidades', default='comorbidades')
+    parser.add_argument('--separador', default=',')
+    parser.add_argument('--encoding', default='utf-8')
+    parser.add_argument('--processos', type=int, default=os.cpu_count() or 4)
+    parser.add_argument('--bloco', type=int, default=20000, help='Linhas por tarefa do pool')
+    parser.add_argument('--lote', type=int, default=100000, help='Linhas por COPY/commit')
+    parser.add_argument('--host', default='localhost', help='Host do PostgreSQL')
+    parser.add_argument('--port', type=int, default=5432, help='Porta do PostgreSQL')
+    parser.add_argument('--database', default='aurora_ai', help='Nome do banco de dados')
+    parser.add_argument('--user', default='admin', help='Usuário do banco')
+    parser.add_argument('--password', default='aurora123', help='Senha do banco')
+
+    args = parser.parse_args()
+
+    chave = os.getenv("PSEUDONIMIZACAO_CHAVE", "").encode()
+    if not chave:
+        logger.error("❌ Defina PSEUDONIMIZACAO_CHAVE (a mesma chave em todas as importações)")
+        sys.exit(1)
+
+    db = VectorDatabaseSetup(host=args.host, port=args.port, database=args.database,
+                             user=args.user, password=args.password)
+    importador = ImportadorPacientes(db, chave, processos=args.processos,
+                                     tamanho_bloco=args.bloco, tamanho_lote=args.lote)
+    try:
+        importador.importar(args.arquivo, coluna_id=args.coluna_id, coluna_idade=args.coluna_idade,
+                            coluna_nascimento=args.coluna_nascimento,
+                            coluna_genero=args.coluna_genero,
+                            coluna_comorbidades=args.coluna_comorbidades,
+                            separador=args.separador, encoding=args.encoding)
+    except Exception as e:
+        logger.error(f"❌ Erro ao importar pacientes: {e}")
+        sys.exit(1)
+
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Índice semântico das transcrições de telemedicina.
+Divide sessoes_telemedicina.transcricao_texto em trechos sobrepostos, gera
+embeddings em lote (384 dimensões) e os armazena com índice IVFFlat e
+tsvector (GIN) para busca híbrida. Sessões são indexadas de forma
+incremental conforme chegam ao status 'concluida'. Os centroides do IVFFlat
+vêm das linhas existentes quando o índice é construído, então ele só é criado
+depois da carga e é refeito quando a quantidade de trechos dobra ou cai pela
+metade.
+"""
+
+import logging
+import re
+import sys
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from psycopg2.extras import execute_values
+
+from embeddings import EncoderSentenca, vetor_para_sql
+from vector_setup import VectorDatabaseSetup, listas_ivfflat
+
+logger = logging.getLogger(__name__)
+
+INDICE_VETORIAL = "idx_transcricoes_chunks_embedding"
+
+
+@dataclass
+class Trecho:
+    """Trecho de uma transcrição com posição em caracteres no texto original."""
+
+    indice: int
+    inicio: int
+    fim: int
+    texto: str
+
+
+@dataclass
+class ResultadoTranscricao:
+    """Trecho encontrado pela busca híbrida."""
+
+    sessao_id: str
+    chunk_idx: int
+    offset_inicio: int
+    offset_fim: int
+    texto: str
+    similaridade_vetorial: float
+    similaridade_textual: float
+    score: float
+
+
+def dividir_em_trechos(texto: str, palavras_por_trecho: int = 120,
+                       sobreposicao: int = 30) -> List[Trecho]:
+    """Divide o texto em janelas de palavras sobrepostas, preservando offsets."""
+    if sobreposicao >= palavras_por_trecho:
+        raise ValueError("A sobreposição deve ser menor que o tamanho do trecho")
+    palavras = [m.span() for m in re.finditer(r"\S+", texto or "")]
+    passo = palavras_por_trecho - sobreposicao
+    trechos = []
+    for indice, inicio in enumerate(range(0, len(palavras), passo)):
+        janela = palavras[inicio:inicio + palavras_por_trecho]
+        offset_inicio, offset_fim = janela[0][0], janela[-1][1]
+        trechos.append(Trecho(indice, offset_inicio, offset_fim, texto[offset_inicio:offset_fim]))
+        if inicio + palavras_por_trecho >= len(palavras):
+            break
+    return trechos
+
+
+class IndiceTranscricoes:
+    """Indexação incremental e busca híbrida sobre transcrições."""
+
+    def __init__(self,
+                 db: VectorDatabaseSetup,
+                 encoder: Optional[EncoderSentenca] = None,
+                 palavras_por_trecho: int = 120,
+                 sobreposicao: int = 30,
+                 sessoes_por_lote: int = 50):
+        self.db = db
+        self.encoder = encoder or EncoderSentenca()
+        self.palavras_por_trecho = palavras_por_trecho
+        self.sobreposicao = sobreposicao
+        self.sessoes_por_lote = sessoes_por_lote
+
+    def create_tables(self) -> bool:
+        """Cria a tabela de trechos e o índice textual (o vetorial vem de indexar_vetores)."""
+        try:
+            conn = self.db.connect()
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS transcricoes_chunks (
+                    id BIGSERIAL PRIMARY KEY,
+                    sessao_id UUID NOT NULL REFERENCES sessoes_telemedicina(id) ON DELETE CASCADE,
+                    chunk_idx INT NOT NULL,
+                    offset_inicio INT NOT NULL,
+                    offset_fim INT NOT NULL,
+                    texto TEXT NOT NULL,
+                    embedding VECTOR(384) NOT NULL,
+                    tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('portuguese', texto)) STORED,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE (sessao_id, chunk_idx)
+                );
+            """, nome="criar_tabela_transcricoes_chunks")
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_transcricoes_chunks_tsv
+                ON transcricoes_chunks USING GIN (tsv);
+            """, nome="criar_indice_transcricoes_tsv")
+            conn.commit()
+            cursor.close()
+            conn.close()
+            logger.info("✅ Tabela de trechos de transcrições criada")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao criar tabela de trechos de transcrições: {e}")
+            return False
+
+    def indexar_pendentes(self) -> int:
+        """Indexa as sessões concluídas que ainda não têm trechos.
+
+        Transcrições vazias ou só com espaços são ignoradas: não geram trechos
+        e seriam selecionadas de novo a cada lote.
+        """
+        total = 0
+        while True:
+            conn = self.db.connect()
+            try:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT s.id::text, s.transcricao_texto
+                    FROM sessoes_telemedicina s
+                    WHERE s.status = 'concluida'
+                      AND s.transcricao_texto ~ '[^[:space:]]'
+                      AND NOT EXISTS (
+                          SELECT 1 FROM transcricoes_chunks c WHERE c.sessao_id = s.id
+                      )
+                    ORDER BY s.data_fim NULLS LAST
+                    LIMIT %s
+                """, (self.sessoes_por_lote,), nome="selecionar_transcricoes_pendentes")
+                sessoes = cursor.fetchall()
+                if not sessoes:
+                    cursor.close()
+                    break
+                trechos = self._indexar_lote(cursor, sessoes)
+                conn.commit()
+                cursor.close()
+            finally:
+                conn.close()
+            if not trechos:
+                # Nenhum progresso (ex.: espaços que o banco não reconhece como tal)
+                logger.warning(f"⚠️ {len(sessoes)} transcrições pendentes sem trechos; "
+                               "indexação interrompida")
+                break
+            total += len(sessoes)
+            logger.info(f"📝 {len(sessoes)} transcrições indexadas ({trechos} trechos)")
+        if total:
+            self.indexar_vetores()
+        return total
+
+    def indexar_vetores(self, forcar: bool = False) -> bool:
+        """(Re)constrói o índice IVFFlat a partir dos trechos já gravados.
+
+        O índice é refeito se não existe, está inválido ou a quantidade de
+        trechos dobrou ou caiu pela metade desde a construção (registrada no
+        comentário do índice). A troca usa um índice temporário criado com
+        CONCURRENTLY, sem bloquear gravações. Retorna True se reconstruiu.
+        """
+        conn = self.db.connect()
+        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT (SELECT COUNT(*) FROM transcricoes_chunks),
+                       (SELECT i.indisvalid FROM pg_index i
+                        WHERE i.indexrelid = to_regclass(%s)),
+                       substring(obj_description(to_regclass(%s), 'pg_class')
+                                 FROM 'linhas=([0-9]+)')::bigint
+            """, (INDICE_VETORIAL, INDICE_VETORIAL), nome="verificar_indice_transcricoes")
+            linhas, valido, linhas_construcao = cursor.fetchone()
+            if not linhas:
+                cursor.close()
+                return False
+            if (not forcar and valido and linhas_construcao
+                    and linhas_construcao / 2 < linhas < linhas_construcao * 2):
+                cursor.close()
+                return False
+
+            listas = listas_ivfflat(linhas)
+            temporario = f"{INDICE_VETORIAL}_novo"
+            inicio = time.perf_counter()
+            cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {temporario}",
+                           nome="remover_indice_transcricoes_temporario")
+            cursor.execute(f"""
+                CREATE INDEX CONCURRENTLY {temporario}
+                ON transcricoes_chunks
+                USING ivfflat (embedding vector_cosine_ops)
+                WITH (lists = {listas})
+            """, nome="criar_indice_transcricoes_embedding")
+            cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {INDICE_VETORIAL}",
+                           nome="remover_indice_transcricoes_embedding")
+            cursor.execute(f"ALTER INDEX {temporario} RENAME TO {INDICE_VETORIAL}",
+                           nome="renomear_indice_transcricoes_embedding")
+            cursor.execute(f"COMMENT ON INDEX {INDICE_VETORIAL} IS 'linhas={linhas}'",
+                           nome="registrar_linhas_indice_transcricoes")
+            cursor.close()
+        finally:
+            conn.close()
+        logger.info(f"🔧 {INDICE_VETORIAL}: {listas} listas para {linhas} trechos "
+                    f"({time.perf_counter() - inicio:.1f}s)")
+        return True
+
+    def _indexar_lote(self, cursor, sessoes: List[Tuple[str, str]]) -> int:
+        linhas = []
+        for sessao_id, texto in sessoes:
+            for trecho in dividir_em_trechos(texto, self.palavras_por_trecho, self.sobreposicao):
+                linhas.append((sessao_id, trecho))
+        if not linhas:
+            return 0
+
+        vetores = self.encoder.encode([trecho.texto for _, trecho in linhas])
+        execute_values(cursor, """
+            INSERT INTO transcricoes_chunks
+                (sessao_id, chunk_idx, offset_inicio, offset_fim, texto, embedding)
+            VALUES %s
+            ON CONFLICT (sessao_id, chunk_idx) DO NOTHING
+        """, [(sessao_id, t.indice, t.inicio, t.fim, t.texto, vetor_para_sql(v))
+              for (sessao_id, t), v in zip(linhas, vetores)],
+            template="(%s::uuid, %s, %s, %s, %s, %s::vector)")
+        return len(linhas)
+
+    def buscar(self, consulta: str, limite: int = 10, candidatos: int = 50,
+               peso_vetorial: float = 0.7) -> List[ResultadoTranscricao]:
+        """Busca híbrida: candidatos do índice vetorial e do textual, com score combinado."""
+        vetor = vetor_para_sql(self.encoder.encode([consulta])[0])
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SET LOCAL ivfflat.probes = 10", nome="definir_ivfflat_probes")
+            cursor.execute("""
+                WITH vetorial AS (
+                    SELECT id, 1 - (embedding <=> %(vetor)s::vector) AS sim
+                    FROM transcricoes_chunks
+                    ORDER BY embedding <=> %(vetor)s::vector
+                    LIMIT %(candidatos)s
+                ), textual AS (
+                    SELECT id, ts_rank_cd(tsv, q, 32) AS sim
+                    FROM transcricoes_chunks, websearch_to_tsquery('portuguese', %(texto)s) q
+                    WHERE tsv @@ q
+                    ORDER BY sim DESC
+                    LIMIT %(candidatos)s
+                )
+                SELECT c.sessao_id::text, c.chunk_idx, c.offset_inicio, c.offset_fim, c.texto,
+                       COALESCE(v.sim, 0) AS sim_vetorial,
+                       COALESCE(t.sim, 0) AS sim_textual,
+                       %(peso)s * COALESCE(v.sim, 0)
+                           + (1 - %(peso)s) * COALESCE(t.sim, 0) AS score
+                FROM vetorial v
+                FULL OUTER JOIN textual t ON t.id = v.id
+                JOIN transcricoes_chunks c ON c.id = COALESCE(v.id, t.id)
+                ORDER BY score DESC
+                LIMIT %(limite)s
+            """, {"vetor": vetor, "texto": consulta, "candidatos": candidatos,
+                  "peso": peso_vetorial, "limite": limite}, nome="buscar_transcricoes_hibrida")
+            linhas = cursor.fetchall()
+            cursor.close()
+        finally:
+            conn.rollback()
+            conn.close()
+        return [ResultadoTranscricao(l[0], l[1], l[2], l[3], l[4],
+                                     float(l[5]), float(l[6]), float(l[7])) for l in linhas]
+
+
+def main():
+    """Função principal."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Índice de transcrições de telemedicina Aurora AI')
+    parser.add_argument('--buscar', metavar='TEXTO', help='Executa uma busca híbrida')
+    parser.add_argument('--limite', type=int, default=10, help='Resultados da busca')
+    parser.add_argument('--reindexar', action='store_true',
+                        help='Reconstrói o índice IVFFlat mesmo sem mudança no volume')
+    parser.add_argument('--host', default='localhost', help='Host do PostgreSQL')
+    parser.add_argument('--port', type=int, default=5432, help='Porta do PostgreSQL')
+    parser.add_argument('--database', default='aurora_ai', help='Nome do banco de dados')
+    parser.add_argument('--user', default='admin', help='Usuário do banco')
+    parser.add_argument('--password', default='aurora123', help='Senha do banco')
+
+    args = parser.parse_args()
+
+    db = VectorDatabaseSetup(host=args.host, port=args.port, database=args.database,
+                             user=args.user, password=args.password)
+    indice = IndiceTranscricoes(db)
+
+    if args.buscar:
+        for r in indice.buscar(args.buscar, limite=args.limite):
+            logger.info(f"   - sessão {r.sessao_id} [{r.offset_inicio}:{r.offset_fim}] "
+                        f"score {r.score:.3f}: {r.texto[:80]}...")
+        sys.exit(0)
+
+    if not indice.create_tables():
+        sys.exit(1)
+    try:
+        total = indice.indexar_pendentes()
+        if args.reindexar:
+            indice.indexar_vetores(forcar=True)
+    except Exception as e:
+        logger.error(f"❌ Erro ao indexar transcrições: {e}")
+        sys.exit(1)
+    logger.info(f"✅ {total} sessões indexadas")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
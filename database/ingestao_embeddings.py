@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Ingestão de embeddings de triagens com deduplicação por hash de conteúdo.
+Textos são normalizados e identificados por SHA-256; vetores já calculados
+são reaproveitados da memória ou da tabela cache_embeddings e o encoder só
+é chamado para textos inéditos.
+"""
+
+import hashlib
+import logging
+import sys
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from psycopg2.extras import execute_values
+
+from embeddings import DIMENSAO_EMBEDDING, EncoderSentenca, normalizar_texto, vetor_para_sql
+from vector_setup import VectorDatabaseSetup
+
+logger = logging.getLogger(__name__)
+
+
+def hash_texto(texto_normalizado: str) -> str:
+    """Hash SHA-256 (hex) do texto já normalizado."""
+    return hashlib.sha256(texto_normalizado.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class EstatisticasDedup:
+    """Contadores de deduplicação de um dia."""
+
+    textos_recebidos: int = 0
+    reaproveitados_memoria: int = 0
+    reaproveitados_banco: int = 0
+    textos_codificados: int = 0
+
+    @property
+    def chamadas_economizadas(self) -> int:
+        return self.textos_recebidos - self.textos_codificados
+
+    @property
+    def taxa_deduplicacao(self) -> float:
+        if not self.textos_recebidos:
+            return 0.0
+        return self.chamadas_economizadas / self.textos_recebidos
+
+
+class EmbeddingDeduplicator:
+    """Encoder com deduplicação; expõe a mesma interface de EncoderSentenca."""
+
+    def __init__(self,
+                 db: VectorDatabaseSetup,
+                 encoder: Optional[EncoderSentenca] = None,
+                 tamanho_memoria: int = 100000):
+        self.db = db
+        self.encoder = encoder or EncoderSentenca()
+        self.modelo = self.encoder.modelo
+        self.tamanho_memoria = tamanho_memoria
+        self._memoria: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._pendentes = EstatisticasDedup()
+        self._dia = date.today()
+
+    def create_tables(self) -> bool:
+        """Cria a tabela de estatísticas diárias de deduplicação."""
+        try:
+            conn = self.db.connect()
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS estatisticas_dedup_embeddings (
+                    data DATE PRIMARY KEY,
+                    textos_recebidos BIGINT NOT NULL DEFAULT 0,
+                    reaproveitados_memoria BIGINT NOT NULL DEFAULT 0,
+                    reaproveitados_banco BIGINT NOT NULL DEFAULT 0,
+                    textos_codificados BIGINT NOT NULL DEFAULT 0
+                );
+            """, nome="criar_tabela_estatisticas_dedup")
+            conn.commit()
+            cursor.close()
+            conn.close()
+            logger.info("✅ Tabela de estatísticas de deduplicação criada")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao criar tabela de estatísticas: {e}")
+            return False
+
+    def encode(self, textos: List[str]) -> np.ndarray:
+        """Retorna embeddings para os textos, chamando o encoder só para inéditos.
+
+        O vetor é o do texto normalizado; consultas comparadas a estes vetores
+        devem codificar normalizar_texto(consulta).
+        """
+        self._virar_dia()
+        normalizados = [normalizar_texto(t) for t in textos]
+        hashes = [hash_texto(t) for t in normalizados]
+        self._pendentes.textos_recebidos += len(textos)
+
+        encontrados: Dict[str, np.ndarray] = {}
+        faltantes: Dict[str, str] = {}
+        for h, texto in zip(hashes, normalizados):
+            if h in encontrados or h in faltantes:
+                self._pendentes.reaproveitados_memoria += 1
+            elif h in self._memoria:
+                self._memoria.move_to_end(h)
+                encontrados[h] = self._memoria[h]
+                self._pendentes.reaproveitados_memoria += 1
+            else:
+                faltantes[h] = texto
+
+        if faltantes:
+            do_banco = self._buscar_no_banco(list(faltantes))
+            self._pendentes.reaproveitados_banco += len(do_banco)
+            encontrados.update(do_banco)
+            for h in do_banco:
+                del faltantes[h]
+
+        if faltantes:
+            novos_hashes = list(faltantes)
+            vetores = self.encoder.encode([faltantes[h] for h in novos_hashes])
+            self._pendentes.textos_codificados += len(novos_hashes)
+            novos = dict(zip(novos_hashes, vetores))
+            self._gravar_no_banco([(h, faltantes[h], novos[h]) for h in novos_hashes])
+            encontrados.update(novos)
+
+        for h, vetor in encontrados.items():
+            self._lembrar(h, vetor)
+
+        if not hashes:
+            return np.empty((0, DIMENSAO_EMBEDDING), dtype=np.float32)
+        return np.vstack([encontrados[h] for h in hashes]).astype(np.float32, copy=False)
+
+    def ingerir_triagens(self, triagens: Sequence[Tuple[str, str, Optional[str]]]) -> int:
+        """Calcula e grava embedding_sintomas/embedding_descricao das triagens.
+
+        Cada item é (triagem_id, sintomas, descricao_completa).
+        """
+        if not triagens:
+            return 0
+
+        valores = self.preparar_triagens(triagens)
+        self.gravar_triagens(valores)
+        self.registrar_estatisticas()
+        return len(valores)
+
+    def preparar_triagens(self, triagens: Sequence[Tuple[str, str, Optional[str]]]
+                          ) -> List[Tuple[str, str, Optional[str]]]:
+        """Calcula os embeddings das triagens sem gravá-los.
+
+        Devolve (triagem_id, embedding_sintomas, embedding_descricao) em
+        literais SQL, prontos para gravar_triagens.
+        """
+        textos = [sintomas for _, sintomas, _ in triagens]
+        com_descricao = [i for i, (_, _, descricao) in enumerate(triagens) if descricao]
+        textos += [triagens[i][2] for i in com_descricao]
+        vetores = self.encode(textos)
+
+        emb_descricao: Dict[int, str] = {
+            i: vetor_para_sql(vetores[len(triagens) + j])
+            for j, i in enumerate(com_descricao)
+        }
+        return [
+            (triagem_id, vetor_para_sql(vetores[i]), emb_descricao.get(i))
+            for i, (triagem_id, _, _) in enumerate(triagens)
+        ]
+
+    def gravar_triagens(self, valores: Sequence[Tuple[str, str, Optional[str]]]) -> None:
+        """Grava em massa os embeddings calculados por preparar_triagens."""
+        if not valores:
+            return
+
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            execute_values(cursor, """
+                UPDATE triagens t SET
+                    embedding_sintomas = v.es::vector,
+                    embedding_descricao = v.ed::vector
+                FROM (VALUES %s) AS v(id, es, ed)
+                WHERE t.id = v.id::uuid
+            """, valores)
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+
+    def registrar_estatisticas(self) -> None:
+        """Acumula os contadores pendentes na estatística do dia."""
+        pendentes = self._pendentes
+        if not pendentes.textos_recebidos:
+            return
+
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO estatisticas_dedup_embeddings AS e
+                    (data, textos_recebidos, reaproveitados_memoria,
+                     reaproveitados_banco, textos_codificados)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (data) DO UPDATE SET
+                    textos_recebidos = e.textos_recebidos + EXCLUDED.textos_recebidos,
+                    reaproveitados_memoria = e.reaproveitados_memoria + EXCLUDED.reaproveitados_memoria,
+                    reaproveitados_banco = e.reaproveitados_banco + EXCLUDED.reaproveitados_banco,
+                    textos_codificados = e.textos_codificados + EXCLUDED.textos_codificados;
+            """, (self._dia, pendentes.textos_recebidos, pendentes.reaproveitados_memoria,
+                  pendentes.reaproveitados_banco, pendentes.textos_codificados),
+                nome="registrar_estatisticas_dedup")
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+        self._pendentes = EstatisticasDedup()
+
+    def relatorio(self, dias: int = 7) -> List[Tuple[date, EstatisticasDedup]]:
+        """Estatísticas diárias de deduplicação dos últimos dias."""
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT data, textos_recebidos, reaproveitados_memoria,
+                       reaproveitados_banco, textos_codificados
+                FROM estatisticas_dedup_embeddings
+                WHERE data > CURRENT_DATE - %s
+                ORDER BY data
+            """, (dias,), nome="relatorio_dedup")
+            linhas = cursor.fetchall()
+            cursor.close()
+        finally:
+            conn.close()
+        return [(linha[0], EstatisticasDedup(*linha[1:])) for linha in linhas]
+
+    def _buscar_no_banco(self, hashes: List[str]) -> Dict[str, np.ndarray]:
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE cache_embeddings
+                SET last_accessed = CURRENT_TIMESTAMP
+                WHERE texto_hash = ANY(%s) AND modelo_utilizado = %s
+                RETURNING texto_hash, embedding::real[]
+            """, (hashes, self.modelo), nome="buscar_cache_embeddings")
+            linhas = cursor.fetchall()
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+        return {h: np.asarray(vetor, dtype=np.float32) for h, vetor in linhas}
+
+    def _gravar_no_banco(self, itens: List[Tuple[str, str, np.ndarray]]) -> None:
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            execute_values(cursor, """
+                INSERT INTO cache_embeddings
+                    (texto_hash, texto_original, embedding, modelo_utilizado)
+                VALUES %s
+                ON CONFLICT (texto_hash, modelo_utilizado) DO UPDATE SET
+                    embedding = EXCLUDED.embedding,
+                    last_accessed = CURRENT_TIMESTAMP
+            """, [(h, texto, vetor_para_sql(vetor), self.modelo) for h, texto, vetor in itens],
+                template="(%s, %s, %s::vector, %s)")
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+
+    def _lembrar(self, texto_hash: str, vetor: np.ndarray) -> None:
+        self._memoria[texto_hash] = vetor
+        self._memoria.move_to_end(texto_hash)
+        while len(self._memoria) > self.tamanho_memoria:
+            self._memoria.popitem(last=False)
+
+    def _virar_dia(self) -> None:
+        hoje = date.today()
+        if hoje != self._dia:
+            self.registrar_estatisticas()
+            self._dia = hoje
+
+
+def main():
+    """Função principal."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Ingestão deduplicada de embeddings Aurora AI')
+    parser.add_argument('--limite', type=int, default=1000,
+                        help='Máximo de triagens por lote')
+    parser.add_argument('--relatorio', type=int, metavar='DIAS',
+                        help='Apenas exibe o relatório dos últimos DIAS')
+    parser.add_argument('--host', default='localhost', help='Host do PostgreSQL')
+    parser.add_argument('--port', type=int, default=5432, help='Porta do PostgreSQL')
+    parser.add_argument('--database', default='aurora_ai', help='Nome do banco de dados')
+    parser.add_argument('--user', default='admin', help='Usuário do banco')
+    parser.add_argument('--password', default='aurora123', help='Senha do banco')
+
+    args = parser.parse_args()
+
+    from versoes_embedding import VersionamentoEmbeddings
+
+    db = VectorDatabaseSetup(host=args.host, port=args.port, database=args.database,
+                             user=args.user, password=args.password)
+    dedup = EmbeddingDeduplicator(db)
+    versionamento = VersionamentoEmbeddings(db)
+    if not (dedup.create_tables() and versionamento.create_tables()):
+        sys.exit(1)
+
+    if args.relatorio is None:
+        total = 0
+        while True:
+            # Gravação dupla: também preenche as versões de embedding em migração
+            processadas = versionamento.ingerir_pendentes(args.limite)
+            if not processadas:
+                break
+            total += processadas
+        logger.info(f"✅ {total} triagens com embeddings gravados")
+
+    logger.info("📊 Deduplicação por dia:")
+    for dia, estat in dedup.relatorio(args.relatorio or 7):
+        logger.info(f"   - {dia}: {estat.textos_recebidos} textos, "
+                    f"{estat.chamadas_economizadas} chamadas ao encoder economizadas "
+                    f"({estat.taxa_deduplicacao:.1%})")
+
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Instrumentação do acesso ao banco de dados.
+Registra latência, linhas e erros por consulta nomeada em métricas
+Prometheus e, opcionalmente, captura EXPLAIN (ANALYZE, BUFFERS) das
+consultas mais lentas que um limite configurado.
+"""
+
+import json
+import logging
+import os
+import re
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+import psycopg2
+import psycopg2.extensions
+from prometheus_client import Counter, Histogram, generate_latest, start_http_server
+
+logger = logging.getLogger(__name__)
+
+LATENCIA_CONSULTAS = Histogram(
+    "aurora_db_consulta_segundos",
+    "Latência das consultas ao banco por consulta nomeada",
+    ["consulta"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+LINHAS_CONSULTAS = Counter(
+    "aurora_db_consulta_linhas_total",
+    "Linhas retornadas ou afetadas por consulta nomeada",
+    ["consulta"],
+)
+ERROS_CONSULTAS = Counter(
+    "aurora_db_consulta_erros_total",
+    "Erros por consulta nomeada e tipo de exceção",
+    ["consulta", "erro"],
+)
+
+# Limite (ms) para capturar EXPLAIN ANALYZE; None desativa a captura
+_limite_explain_ms: Optional[float] = (
+    float(os.environ["AURORA_EXPLAIN_LIMITE_MS"])
+    if os.getenv("AURORA_EXPLAIN_LIMITE_MS") else None
+)
+PLANOS_LENTOS: Deque[Dict[str, Any]] = deque(maxlen=50)
+
+_PADRAO_OBJETO = re.compile(
+    r"\b(?:copy|from|into|update|table|join|index(?:\s+concurrently)?(?:\s+if\s+not\s+exists)?"
+    r"\s+\w+\s+on)\s+(?:only\s+)?([a-z_][\w.]*)",
+    re.IGNORECASE,
+)
+
+
+def configurar_explain(limite_ms: Optional[float]) -> None:
+    """Ativa (limite em ms) ou desativa (None) a captura de EXPLAIN ANALYZE."""
+    global _limite_explain_ms
+    _limite_explain_ms = limite_ms
+
+
+def nome_padrao(sql: Any) -> str:
+    """Deriva um nome estável para consultas sem nome explícito (verbo:objeto)."""
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", errors="replace")
+    texto = re.sub(r"--[^\n]*", " ", str(sql)).strip()
+    verbo = texto.split(None, 1)[0].lower() if texto else "vazia"
+    objeto = _PADRAO_OBJETO.search(texto)
+    return f"{verbo}:{objeto.group(1).lower()}" if objeto else verbo
+
+
+class InstrumentedCursor(psycopg2.extensions.cursor):
+    """Cursor que mede cada execução; aceita o argumento extra `nome`."""
+
+    _nome_atual = "sem_consulta"
+
+    def execute(self, query, vars=None, nome: Optional[str] = None):
+        self._nome_atual = nome or nome_padrao(query)
+        inicio = time.perf_counter()
+        # Como em executemany/copy_expert, a latência conta também as execuções com erro
+        try:
+            resultado = super().execute(query, vars)
+        except Exception as e:
+            ERROS_CONSULTAS.labels(self._nome_atual, type(e).__name__).inc()
+            raise
+        finally:
+            decorrido = time.perf_counter() - inicio
+            LATENCIA_CONSULTAS.labels(self._nome_atual).observe(decorrido)
+        if self.description is None and self.rowcount > 0:
+            LINHAS_CONSULTAS.labels(self._nome_atual).inc(self.rowcount)
+        if (_limite_explain_ms is not None and decorrido * 1000 > _limite_explain_ms
+                and self.name is None):
+            self._capturar_explain(query, vars, decorrido)
+        return resultado
+
+    def executemany(self, query, vars_list, nome: Optional[str] = None):
+        self._nome_atual = nome or nome_padrao(query)
+        with LATENCIA_CONSULTAS.labels(self._nome_atual).time():
+            try:
+                resultado = super().executemany(query, vars_list)
+            except Exception as e:
+                ERROS_CONSULTAS.labels(self._nome_atual, type(e).__name__).inc()
+                raise
+        if self.rowcount > 0:
+            LINHAS_CONSULTAS.labels(self._nome_atual).inc(self.rowcount)
+        return resultado
+
+    def copy_expert(self, sql, file, size=8192, nome: Optional[str] = None):
+        self._nome_atual = nome or nome_padrao(sql)
+        with LATENCIA_CONSULTAS.labels(self._nome_atual).time():
+            try:
+                resultado = super().copy_expert(sql, file, size)
+            except Exception as e:
+                ERROS_CONSULTAS.labels(self._nome_atual, type(e).__name__).inc()
+                raise
+        if self.rowcount > 0:
+            LINHAS_CONSULTAS.labels(self._nome_atual).inc(self.rowcount)
+        return resultado
+
+    def fetchone(self):
+        linha = super().fetchone()
+        if linha is not None:
+            LINHAS_CONSULTAS.labels(self._nome_atual).inc()
+        return linha
+
+    def fetchmany(self, size=None):
+        linhas = super().fetchmany(size) if size is not None else super().fetchmany()
+        LINHAS_CONSULTAS.labels(self._nome_atual).inc(len(linhas))
+        return linhas
+
+    def fetchall(self):
+        linhas = super().fetchall()
+        LINHAS_CONSULTAS.labels(self._nome_atual).inc(len(linhas))
+        return linhas
+
+    def _capturar_explain(self, query, vars, decorrido: float) -> None:
+        """Reexecuta consultas de leitura lentas com EXPLAIN (ANALYZE, BUFFERS)."""
+        sql = self.mogrify(query, vars).decode("utf-8", errors="replace")
+        if not re.match(r"\s*(select|with)\b", sql, re.IGNORECASE):
+            return
+        if self.connection.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_INERROR:
+            return
+        # A reexecução roda numa subtransação sempre desfeita: nem uma falha (timeout,
+        # bloqueio) nem os efeitos do ANALYZE chegam à transação de quem chamou
+        em_transacao = not self.connection.autocommit
+        cursor = self.connection.cursor(cursor_factory=psycopg2.extensions.cursor)
+        try:
+            cursor.execute("SAVEPOINT aurora_explain" if em_transacao else "BEGIN")
+            try:
+                cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")
+                plano = cursor.fetchone()[0]
+            finally:
+                cursor.execute("ROLLBACK TO SAVEPOINT aurora_explain; RELEASE SAVEPOINT aurora_explain"
+                               if em_transacao else "ROLLBACK")
+        except Exception as e:
+            logger.warning(f"⚠️ Falha ao capturar EXPLAIN de '{self._nome_atual}': {e}")
+            return
+        finally:
+            cursor.close()
+
+        PLANOS_LENTOS.append({
+            "consulta": self._nome_atual,
+            "duracao_ms": decorrido * 1000,
+            "capturado_em": time.time(),
+            "plano": plano,
+        })
+        raiz = plano[0] if isinstance(plano, list) else json.loads(plano)[0]
+        logger.warning(
+            f"🐢 Consulta lenta '{self._nome_atual}' ({decorrido * 1000:.1f} ms); "
+            f"EXPLAIN: {raiz.get('Execution Time', 0):.1f} ms, "
+            f"shared hit {raiz['Plan'].get('Shared Hit Blocks', 0)}, "
+            f"read {raiz['Plan'].get('Shared Read Blocks', 0)}"
+        )
+
+
+def conectar(**params):
+    """Abre uma conexão psycopg2 cujos cursores são instrumentados."""
+    return psycopg2.connect(cursor_factory=InstrumentedCursor, **params)
+
+
+def exportar_metricas() -> bytes:
+    """Métricas no formato de exposição do Prometheus."""
+    return generate_latest()
+
+
+def iniciar_servidor_metricas(porta: int = 9108) -> None:
+    """Expõe /metrics via HTTP para coleta pelo Prometheus."""
+    start_http_server(porta)
+    logger.info(f"📈 Métricas do banco expostas em :{porta}/metrics")
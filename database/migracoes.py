@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Aplicação idempotente das migrações de database/migrations/*.sql.
+Cada migração tem a estrutura (tabelas, views, funções, dados) aplicada em
+uma única transação e os índices construídos depois com
+CREATE INDEX CONCURRENTLY, em paralelo por várias conexões (um grupo por
+tabela). As versões aplicadas ficam em schema_migrations e o tempo de cada
+etapa é registrado.
+"""
+
+import hashlib
+import logging
+import re
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+from vector_setup import VectorDatabaseSetup
+
+logger = logging.getLogger(__name__)
+
+DIRETORIO_MIGRACOES = Path(__file__).resolve().parent / "migrations"
+
+_RE_INCLUDE = re.compile(r"^\\i\s+(\S+)\s*$", re.MULTILINE)
+_RE_INDICE = re.compile(
+    r"^CREATE\s+(UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?"
+    r"(\w+)\s+ON\s+(?:ONLY\s+)?(\w+)(.*)$",
+    re.IGNORECASE | re.DOTALL,
+)
+_RE_TRANSACAO = re.compile(r"^(BEGIN|COMMIT|START\s+TRANSACTION|END)\s*;?$", re.IGNORECASE)
+
+
+@dataclass
+class Indice:
+    """Índice extraído de uma migração."""
+
+    nome: str
+    tabela: str
+    sql: str
+
+
+@dataclass
+class Migracao:
+    """Arquivo de migração já expandido e separado em comandos."""
+
+    versao: str
+    nome: str
+    arquivo: Path
+    checksum: str
+    comandos: List[str]
+    indices: List[Indice]
+
+
+@dataclass
+class Etapa:
+    """Tempo de uma etapa da aplicação de migrações."""
+
+    versao: str
+    etapa: str
+    segundos: float
+    status: str = "ok"
+
+
+@dataclass
+class RelatorioMigracoes:
+    """Resultado de uma execução do aplicador."""
+
+    aplicadas: List[str] = field(default_factory=list)
+    ignoradas: List[str] = field(default_factory=list)
+    etapas: List[Etapa] = field(default_factory=list)
+
+
+def expandir_includes(arquivo: Path, visitados: Optional[set] = None) -> str:
+    """Conteúdo do arquivo com as diretivas \\i do psql substituídas pelo arquivo incluído."""
+    visitados = visitados or set()
+    arquivo = arquivo.resolve()
+    if arquivo in visitados:
+        raise ValueError(f"Inclusão circular de {arquivo}")
+    visitados = visitados | {arquivo}
+    texto = arquivo.read_text(encoding="utf-8")
+    return _RE_INCLUDE.sub(
+        lambda m: expandir_includes(arquivo.parent / m.group(1), visitados), texto
+    )
+
+
+def dividir_comandos(sql: str) -> List[str]:
+    """Separa um script SQL em comandos, respeitando aspas, comentários e $$."""
+    comandos, atual = [], []
+    i, n = 0, len(sql)
+    while i < n:
+        c = sql[i]
+        if sql.startswith("--", i):
+            fim = sql.find("\n", i)
+            i = n if fim == -1 else fim
+            continue
+        if sql.startswith("/*", i):
+            fim = sql.find("*/", i + 2)
+            i = n if fim == -1 else fim + 2
+            continue
+        if c in ("'", '"'):
+            fim = i + 1
+            while fim < n:
+                if sql[fim] == c:
+                    if fim + 1 < n and sql[fim + 1] == c:
+                        fim += 2
+                        continue
+                    break
+                fim += 1
+            atual.append(sql[i:fim + 1])
+            i = fim + 1
+            continue
+        if c == "$":
+            m = re.match(r"\$(\w*)\$", sql[i:])
+            if m:
+                marca = m.group(0)
+                fim = sql.find(marca, i + len(marca))
+                fim = n if fim == -1 else fim + len(marca)
+                atual.append(sql[i:fim])
+                i = fim
+                continue
+        if c == ";":
+            comando = "".join(atual).strip()
+            if comando:
+                comandos.append(comando)
+            atual = []
+        else:
+            atual.append(c)
+        i += 1
+    resto = "".join(atual).strip()
+    if resto:
+        comandos.append(resto)
+    return comandos
+
+
+def carregar_migracao(arquivo: Path) -> Migracao:
+    """Lê a migração, separa os índices e remove o controle de transação do arquivo."""
+    texto = expandir_includes(arquivo)
+    comandos, indices = [], []
+    for comando in dividir_comandos(texto):
+        if _RE_TRANSACAO.match(comando):
+            continue
+        m = _RE_INDICE.match(comando)
+        if m:
+            unico, nome, tabela, resto = m.groups()
+            sql = (f"CREATE {'UNIQUE ' if unico else ''}INDEX CONCURRENTLY IF NOT EXISTS "
+                   f"{nome} ON {tabela}{resto}")
+            indices.append(Indice(nome, tabela, sql))
+        else:
+            comandos.append(comando)
+
+    versao, _, nome = arquivo.stem.partition("_")
+    return Migracao(
+        versao=versao,
+        nome=nome or arquivo.stem,
+        arquivo=arquivo,
+        checksum=hashlib.sha256(texto.encode("utf-8")).hexdigest(),
+        comandos=comandos,
+        indices=indices,
+    )
+
+
+class AplicadorMigracoes:
+    """Aplica as migrações pendentes e constrói os índices em paralelo."""
+
+    def __init__(self, db: VectorDatabaseSetup,
+                 diretorio: Path = DIRETORIO_MIGRACOES,
+                 conexoes_indices: int = 4,
+                 memoria_indices: Optional[str] = "256MB"):
+        self.db = db
+        self.diretorio = Path(diretorio)
+        self.conexoes_indices = conexoes_indices
+        self.memoria_indices = memoria_indices
+
+    def create_tables(self) -> bool:
+        """Cria a tabela de controle de versões."""
+        try:
+            conn = self.db.connect()
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    versao VARCHAR(50) PRIMARY KEY,
+                    nome VARCHAR(255) NOT NULL,
+                    checksum VARCHAR(64) NOT NULL,
+                    estado VARCHAR(20) NOT NULL DEFAULT 'estrutura'
+                        CHECK (estado IN ('estrutura', 'concluida')),
+                    duracao_ms INT,
+                    aplicada_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+            """, nome="criar_tabela_schema_migrations")
+            conn.commit()
+            cursor.close()
+            conn.close()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao criar tabela de migrações: {e}")
+            return False
+
+    def _estado_aplicado(self) -> Dict[str, Tuple[str, str]]:
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT versao, estado, checksum FROM schema_migrations",
+                           nome="listar_migracoes_aplicadas")
+            estado = {versao: (situacao, checksum) for versao, situacao, checksum in cursor.fetchall()}
+            cursor.close()
+        finally:
+            conn.close()
+        return estado
+
+    def migracoes(self) -> List[Migracao]:
+        """Migrações do diretório em ordem de versão."""
+        return [carregar_migracao(arquivo) for arquivo in sorted(self.diretorio.glob("*.sql"))]
+
+    def aplicar(self) -> RelatorioMigracoes:
+        """Aplica as migrações pendentes; versões concluídas são ignoradas."""
+        if not self.create_tables():
+            raise RuntimeError("Tabela schema_migrations indisponível")
+        relatorio = RelatorioMigracoes()
+        aplicadas = self._estado_aplicado()
+
+        for migracao in self.migracoes():
+            estado, checksum = aplicadas.get(migracao.versao, (None, None))
+            if checksum and checksum != migracao.checksum:
+                logger.warning(f"⚠️ Migração {migracao.versao} foi alterada após ser aplicada")
+            if estado == "concluida":
+                relatorio.ignoradas.append(migracao.versao)
+                continue
+
+            logger.info(f"🔧 Migração {migracao.versao} ({migracao.nome})...")
+            inicio = time.perf_counter()
+            if estado is None:
+                self._aplicar_estrutura(migracao, relatorio)
+            self._construir_indices(migracao, relatorio)
+            self._concluir(migracao, time.perf_counter() - inicio)
+            relatorio.aplicadas.append(migracao.versao)
+
+        self._registrar_relatorio(relatorio)
+        return relatorio
+
+    def _aplicar_estrutura(self, migracao: Migracao, relatorio: RelatorioMigracoes):
+        inicio = time.perf_counter()
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            for comando in migracao.comandos:
+                cursor.execute(comando, nome=f"migracao_{migracao.versao}")
+            cursor.execute("""
+                INSERT INTO schema_migrations (versao, nome, checksum, estado)
+                VALUES (%s, %s, %s, 'estrutura')
+            """, (migracao.versao, migracao.nome, migracao.checksum),
+                nome="registrar_migracao")
+            conn.commit()
+            cursor.close()
+        except Exception:
+            conn.rollback()
+            relatorio.etapas.append(Etapa(migracao.versao, "estrutura",
+                                          time.perf_counter() - inicio, "erro"))
+            raise
+        finally:
+            conn.close()
+        relatorio.etapas.append(Etapa(migracao.versao, "estrutura", time.perf_counter() - inicio))
+
+    def _construir_indices(self, migracao: Migracao, relatorio: RelatorioMigracoes):
+        """Um grupo sequencial por tabela; grupos de tabelas diferentes em paralelo.
+
+        Builds concorrentes na mesma tabela disputam o mesmo lock
+        SHARE UPDATE EXCLUSIVE, então só tabelas distintas rodam em paralelo.
+        """
+        if not migracao.indices:
+            return
+        grupos: Dict[str, List[Indice]] = defaultdict(list)
+        for indice in migracao.indices:
+            grupos[indice.tabela].append(indice)
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.conexoes_indices) as executor:
+            resultados = list(executor.map(
+                lambda grupo: self._construir_grupo(migracao.versao, grupo), grupos.values()))
+        for etapas in resultados:
+            relatorio.etapas.extend(etapas)
+        relatorio.etapas.append(Etapa(migracao.versao, "indices", time.perf_counter() - inicio))
+
+        falhas = [e.etapa for etapas in resultados for e in etapas if e.status != "ok"]
+        if falhas:
+            raise RuntimeError(f"Falha ao construir índices: {', '.join(falhas)}")
+
+    def _construir_grupo(self, versao: str, indices: List[Indice]) -> List[Etapa]:
+        etapas = []
+        conn = self.db.connect()
+        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        try:
+            cursor = conn.cursor()
+            if self.memoria_indices:
+                cursor.execute("SET maintenance_work_mem = %s", (self.memoria_indices,),
+                               nome="definir_memoria_indices")
+            for indice in indices:
+                inicio = time.perf_counter()
+                try:
+                    self._descartar_invalido(cursor, indice)
+                    cursor.execute(indice.sql, nome=f"criar_indice:{indice.tabela}")
+                    status = "ok"
+                except Exception as e:
+                    logger.error(f"❌ Erro ao criar índice {indice.nome}: {e}")
+                    status = "erro"
+                etapas.append(Etapa(versao, indice.nome, time.perf_counter() - inicio, status))
+            cursor.close()
+        finally:
+            conn.close()
+        return etapas
+
+    @staticmethod
+    def _descartar_invalido(cursor, indice: Indice):
+        """Remove o índice deixado inválido por um CONCURRENTLY interrompido."""
+        cursor.execute("""
+            SELECT 1 FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = %s AND NOT i.indisvalid
+        """, (indice.nome,), nome="verificar_indice_invalido")
+        if cursor.fetchone():
+            logger.warning(f"⚠️ Índice {indice.nome} inválido, recriando")
+            cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {indice.nome}",
+                           nome="remover_indice_invalido")
+
+    def _concluir(self, migracao: Migracao, segundos: float):
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE schema_migrations
+                SET estado = 'concluida', duracao_ms = %s, aplicada_em = CURRENT_TIMESTAMP
+                WHERE versao = %s
+            """, (int(segundos * 1000), migracao.versao), nome="concluir_migracao")
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _registrar_relatorio(relatorio: RelatorioMigracoes):
+        if relatorio.ignoradas:
+            logger.info(f"⏭️ Já aplicadas: {', '.join(relatorio.ignoradas)}")
+        for etapa in relatorio.etapas:
+            marca = "✅" if etapa.status == "ok" else "❌"
+            logger.info(f"   {marca} {etapa.versao} {etapa.etapa}: {etapa.segundos * 1000:.0f} ms")
+        logger.info(f"📦 {len(relatorio.aplicadas)} migrações aplicadas")
+
+
+def main():
+    """Função principal."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Migrações do banco de dados Aurora AI')
+    parser.add_argument('--diretorio', type=Path, default=DIRETORIO_MIGRACOES,
+                        help='Diretório com os arquivos NNN_nome.sql')
+    parser.add_argument('--conexoes', type=int, default=4,
+                        help='Conexões paralelas para construção de índices')
+    parser.add_argument('--listar', action='store_true', help='Lista migrações e índices sem aplicar')
+    parser.add_argument('--host', default='localhost', help='Host do PostgreSQL')
+    parser.add_argument('--port', type=int, default=5432, help='Porta do PostgreSQL')
+    parser.add_argument('--database', default='aurora_ai', help='Nome do banco de dados')
+    parser.add_argument('--user', default='admin', help='Usuário do banco')
+    parser.add_argument('--password', default='aurora123', help='Senha do banco')
+
+    args = parser.parse_args()
+
+    db = VectorDatabaseSetup(host=args.host, port=args.port, database=args.database,
+                             user=args.user, password=args.password)
+    aplicador = AplicadorMigracoes(db, diretorio=args.diretorio, conexoes_indices=args.conexoes)
+
+    if args.listar:
+        for migracao in aplicador.migracoes():
+            logger.info(f"📄 {migracao.versao} {migracao.nome}: {len(migracao.comandos)} comandos, "
+                        f"{len(migracao.indices)} índices")
+        sys.exit(0)
+
+    try:
+        aplicador.aplicar()
+    except Exception as e:
+        logger.error(f"❌ Erro ao aplicar migrações: {e}")
+        sys.exit(1)
+
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
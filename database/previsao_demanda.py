@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Previsão de demanda por unidade para planejamento de capacidade.
+Monta o tensor unidade × semana × (dia da semana, hora) de chegadas a partir
+de triagens.created_at e ajusta um modelo sazonal semanal para todas as
+unidades em uma única operação vetorizada. As previsões ficam em cache até
+mudarem as semanas completas usadas no ajuste.
+"""
+
+import logging
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from vector_setup import VectorDatabaseSetup
+
+logger = logging.getLogger(__name__)
+
+HORAS_SEMANA = 7 * 24
+DIAS_SEMANA = ['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sáb', 'Dom']
+
+
+def janela_semanas_completas(semanas: int,
+                             fim: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """Início e fim (segunda-feira 00:00, exclusivo) das últimas semanas completas."""
+    fim = fim or datetime.now()
+    fim = (fim - timedelta(days=fim.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    return fim - timedelta(weeks=semanas), fim
+
+
+def carregar_chegadas(db: VectorDatabaseSetup, semanas: int,
+                      fim: Optional[datetime] = None) -> Tuple[List[str], np.ndarray, datetime]:
+    """Tensor de chegadas (unidades × semanas × 168 horas) das últimas semanas completas.
+
+    A contagem por hora é feita no banco; o restante é agrupado de forma
+    vetorizada em memória.
+    """
+    inicio, fim = janela_semanas_completas(semanas, fim)
+
+    conn = db.connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT unidade_id::text, date_trunc('hour', created_at) AS hora, COUNT(*)
+            FROM triagens
+            WHERE created_at >= %s AND created_at < %s AND unidade_id IS NOT NULL
+            GROUP BY 1, 2
+        """, (inicio, fim), nome="contar_chegadas_por_hora")
+        linhas = cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
+
+    contagens = pd.DataFrame(linhas, columns=["unidade_id", "hora", "chegadas"])
+    return (*montar_tensor(contagens, inicio, semanas), fim)
+
+
+def montar_tensor(contagens: pd.DataFrame, inicio: datetime,
+                  semanas: int) -> Tuple[List[str], np.ndarray]:
+    """Converte contagens (unidade_id, hora, chegadas) no tensor U × S × 168."""
+    if contagens.empty:
+        return [], np.zeros((0, semanas, HORAS_SEMANA))
+
+    codigos, unidades = pd.factorize(contagens["unidade_id"])
+    horas = (pd.to_datetime(contagens["hora"]) - pd.Timestamp(inicio)) // pd.Timedelta(hours=1)
+    semana = horas.to_numpy() // HORAS_SEMANA
+    slot = horas.to_numpy() % HORAS_SEMANA
+
+    indice = (codigos * semanas + semana) * HORAS_SEMANA + slot
+    tensor = np.bincount(indice, weights=contagens["chegadas"].to_numpy(dtype=float),
+                         minlength=len(unidades) * semanas * HORAS_SEMANA)
+    return list(unidades), tensor.reshape(len(unidades), semanas, HORAS_SEMANA)
+
+
+class ModeloSazonalSemanal:
+    """Perfil sazonal semanal com suavização exponencial e ajuste de nível.
+
+    Ajusta todas as unidades de uma vez: o perfil é a média exponencialmente
+    ponderada das semanas e o nível é corrigido pela razão entre a última
+    semana e o perfil (amortecida e limitada).
+    """
+
+    def __init__(self, alpha: float = 0.3, amortecimento: float = 0.5,
+                 limites_nivel: Tuple[float, float] = (0.5, 2.0)):
+        self.alpha = alpha
+        self.amortecimento = amortecimento
+        self.limites_nivel = limites_nivel
+        self.perfil: Optional[np.ndarray] = None
+        self.nivel: Optional[np.ndarray] = None
+
+    def fit(self, tensor: np.ndarray) -> "ModeloSazonalSemanal":
+        semanas = tensor.shape[1]
+        pesos = self.alpha * (1 - self.alpha) ** np.arange(semanas - 1, -1, -1)
+        pesos /= pesos.sum()
+        self.perfil = np.tensordot(tensor, pesos, axes=([1], [0]))
+
+        base = self.perfil.sum(axis=1)
+        ultima = tensor[:, -1, :].sum(axis=1)
+        razao = np.divide(ultima, base, out=np.ones_like(base), where=base > 0)
+        self.nivel = np.clip(razao ** self.amortecimento, *self.limites_nivel)
+        return self
+
+    def predict(self) -> np.ndarray:
+        """Chegadas esperadas na próxima semana (unidades × 168)."""
+        if self.perfil is None:
+            raise RuntimeError("Modelo não ajustado")
+        return self.perfil * self.nivel[:, None]
+
+
+def backtest(tensor: np.ndarray, modelo: Optional[ModeloSazonalSemanal] = None,
+             semanas_teste: int = 1) -> Dict[str, float]:
+    """Erro da previsão um passo à frente nas últimas semanas do histórico."""
+    modelo = modelo or ModeloSazonalSemanal()
+    erros_abs, totais, tempos = 0.0, 0.0, []
+    for k in range(semanas_teste, 0, -1):
+        treino = tensor[:, :-k, :]
+        real = tensor[:, -k, :]
+        inicio = time.perf_counter()
+        previsto = modelo.fit(treino).predict()
+        tempos.append(time.perf_counter() - inicio)
+        erros_abs += np.abs(previsto - real).sum()
+        totais += real.sum()
+    n = tensor.shape[0] * HORAS_SEMANA * semanas_teste
+    return {
+        "mae": erros_abs / max(n, 1),
+        "wape": erros_abs / totais if totais else float("nan"),
+        "tempo_ajuste_ms": float(np.mean(tempos) * 1000),
+    }
+
+
+@dataclass
+class PrevisaoDemanda:
+    """Previsão da próxima semana para todas as unidades."""
+
+    unidades: List[str]
+    chegadas: np.ndarray
+    semana_inicio: datetime
+    gerada_em: datetime
+    metricas: Dict[str, float]
+
+    def por_unidade(self, unidade_id: str) -> pd.DataFrame:
+        """Matriz dia da semana × hora de uma unidade."""
+        linha = self.chegadas[self.unidades.index(unidade_id)]
+        return pd.DataFrame(linha.reshape(7, 24), index=DIAS_SEMANA, columns=range(24))
+
+
+class PrevisorDemanda:
+    """Ajusta o modelo para todas as unidades e mantém a previsão em cache."""
+
+    def __init__(self, db: VectorDatabaseSetup, semanas_historico: int = 12,
+                 modelo: Optional[ModeloSazonalSemanal] = None):
+        self.db = db
+        self.semanas_historico = semanas_historico
+        self.modelo = modelo or ModeloSazonalSemanal()
+        self._cache: Optional[PrevisaoDemanda] = None
+        self._marca: Optional[Tuple] = None
+
+    def _marca_dados(self) -> Tuple:
+        """Identifica os dados usados pelo modelo: fim da janela, total e última triagem.
+
+        Só as semanas completas entram na marca; triagens da semana corrente
+        não invalidam o cache.
+        """
+        inicio, fim = janela_semanas_completas(self.semanas_historico)
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT COUNT(*), MAX(created_at) FROM triagens
+                WHERE created_at >= %s AND created_at < %s AND unidade_id IS NOT NULL
+            """, (inicio, fim), nome="marca_dados_demanda")
+            marca = cursor.fetchone()
+            cursor.close()
+        finally:
+            conn.close()
+        return (fim, *marca)
+
+    def prever(self) -> PrevisaoDemanda:
+        """Previsão da próxima semana; recalcula apenas se as semanas completas mudaram."""
+        marca = self._marca_dados()
+        if self._cache is not None and marca == self._marca:
+            return self._cache
+
+        unidades, tensor, fim = carregar_chegadas(self.db, self.semanas_historico, marca[0])
+        metricas = backtest(tensor, self.modelo) if tensor.shape[1] > 1 else {}
+        inicio = time.perf_counter()
+        chegadas = self.modelo.fit(tensor).predict()
+        metricas["tempo_ajuste_total_ms"] = (time.perf_counter() - inicio) * 1000
+
+        self._cache = PrevisaoDemanda(unidades, chegadas, fim, datetime.now(), metricas)
+        self._marca = marca
+        logger.info(f"📈 Previsão de demanda recalculada para {len(unidades)} unidades "
+                    f"({metricas['tempo_ajuste_total_ms']:.1f} ms)")
+        return self._cache
+
+
+def matriz_demanda(db: VectorDatabaseSetup, semanas: int = 8,
+                   unidade_id: Optional[str] = None) -> pd.DataFrame:
+    """Média semanal de chegadas por dia da semana × hora (7 × 24)."""
+    unidades, tensor, _ = carregar_chegadas(db, semanas)
+    if unidade_id is not None:
+        tensor = tensor[[unidades.index(unidade_id)]] if unidade_id in unidades else tensor[:0]
+    media = tensor.sum(axis=0).mean(axis=0) if len(tensor) else np.zeros(HORAS_SEMANA)
+    return pd.DataFrame(media.reshape(7, 24), index=DIAS_SEMANA, columns=range(24))
+
+
+def medir_escalabilidade(quantidades: Sequence[int] = (10, 100, 1000, 10000),
+                         semanas: int = 12, semente: int = 42) -> List[Dict[str, float]]:
+    """Tempo de ajuste e erro de backtest com dados sintéticos para N unidades."""
+    rng = np.random.default_rng(semente)
+    perfil = np.tile(np.concatenate([np.full(6, 1.0), np.linspace(3, 9, 6),
+                                     np.linspace(9, 5, 6), np.linspace(5, 2, 6)]), 7)
+    resultados = []
+    for n in quantidades:
+        escala = rng.gamma(2.0, 1.0, size=(n, 1, 1))
+        tensor = rng.poisson(escala * perfil[None, None, :], size=(n, semanas, HORAS_SEMANA))
+        metricas = backtest(tensor.astype(float), semanas_teste=2)
+        resultados.append({"unidades": n, **metricas})
+        logger.info(f"   - {n:>6} unidades: ajuste {metricas['tempo_ajuste_ms']:.1f} ms, "
+                    f"WAPE {metricas['wape']:.3f}")
+    return resultados
+
+
+def main():
+    """Função principal."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Previsão de demanda Aurora AI')
+    parser.add_argument('--semanas', type=int, default=12, help='Semanas de histórico')
+    parser.add_argument('--escalabilidade', action='store_true',
+                        help='Mede tempo de ajuste e erro com dados sintéticos')
+    parser.add_argument('--host', default='localhost', help='Host do PostgreSQL')
+    parser.add_argument('--port', type=int, default=5432, help='Porta do PostgreSQL')
+    parser.add_argument('--database', default='aurora_ai', help='Nome do banco de dados')
+    parser.add_argument('--user', default='admin', help='Usuário do banco')
+    parser.add_argument('--password', default='aurora123', help='Senha do banco')
+
+    args = parser.parse_args()
+
+    if args.escalabilidade:
+        logger.info("⏱️ Escalabilidade do ajuste em lote:")
+        medir_escalabilidade(semanas=args.semanas)
+        sys.exit(0)
+
+    db = VectorDatabaseSetup(host=args.host, port=args.port, database=args.database,
+                             user=args.user, password=args.password)
+    try:
+        previsao = PrevisorDemanda(db, semanas_historico=args.semanas).prever()
+    except Exception as e:
+        logger.error(f"❌ Erro ao prever demanda: {e}")
+        sys.exit(1)
+
+    logger.info(f"📊 Semana de {previsao.semana_inicio:%d/%m/%Y}: "
+                f"{previsao.chegadas.sum():.0f} chegadas previstas em "
+                f"{len(previsao.unidades)} unidades")
+    for chave, valor in previsao.metricas.items():
+        logger.info(f"   • {chave}: {valor:.3f}")
+
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Roteamento de leituras para réplicas do PostgreSQL.
+Escritas continuam no primário; leituras (busca por similaridade, views do
+dashboard, exportações) vão para a réplica saudável menos carregada cujo
+atraso de replicação está abaixo do limite, com retorno ao primário quando
+nenhuma está disponível. As verificações de saúde rodam em segundo plano (no
+máximo uma por nó) e as conexões com réplicas têm tempo limite, para que uma
+réplica inacessível não segure as leituras. A carga atendida por nó é
+exportada como métrica.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from prometheus_client import Counter, Gauge
+
+from instrumentacao import conectar
+from vector_setup import VectorDatabaseSetup
+
+logger = logging.getLogger(__name__)
+
+ROTEAMENTO = Counter(
+    "aurora_db_roteamento_total",
+    "Conexões entregues por nó e tipo de carga",
+    ["no", "tipo"],
+)
+ATRASO_REPLICA = Gauge(
+    "aurora_db_replica_atraso_segundos",
+    "Atraso de replicação medido na última verificação",
+    ["no"],
+)
+NO_SAUDAVEL = Gauge(
+    "aurora_db_no_saudavel",
+    "1 se o nó passou na última verificação de saúde",
+    ["no"],
+)
+
+
+@dataclass
+class EstadoNo:
+    """Situação de um nó do cluster."""
+
+    nome: str
+    db: VectorDatabaseSetup
+    papel: str
+    saudavel: bool = True
+    atraso_s: float = 0.0
+    verificado_em: float = 0.0
+    verificando: bool = False
+    leituras: int = 0
+    escritas: int = 0
+    falhas: int = 0
+
+
+class _FachadaLeitura:
+    """Objeto com a interface de VectorDatabaseSetup cujo connect() vai para réplicas."""
+
+    def __init__(self, roteador: "RoteadorReplicas"):
+        self._roteador = roteador
+
+    def connect(self, **opcoes):
+        return self._roteador.connect_leitura(**opcoes)
+
+    def __getattr__(self, nome):
+        return getattr(self._roteador.primario, nome)
+
+
+class RoteadorReplicas:
+    """Separa leituras e escritas entre primário e réplicas."""
+
+    def __init__(self,
+                 primario: VectorDatabaseSetup,
+                 replicas: Optional[List[VectorDatabaseSetup]] = None,
+                 atraso_maximo_s: float = 5.0,
+                 intervalo_verificacao_s: float = 10.0,
+                 tempo_limite_conexao_s: int = 2):
+        self.primario = primario
+        self.atraso_maximo_s = atraso_maximo_s
+        self.intervalo_verificacao_s = intervalo_verificacao_s
+        self.tempo_limite_conexao_s = tempo_limite_conexao_s
+        self._primario = EstadoNo(self._nome(primario), primario, "primario")
+        # Réplicas só recebem leituras depois da primeira verificação bem-sucedida
+        self._replicas = [EstadoNo(self._nome(r), r, "replica", saudavel=False)
+                          for r in replicas or []]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _nome(db: VectorDatabaseSetup) -> str:
+        return f"{db.host}:{db.port}"
+
+    def connect(self):
+        """Conexão de escrita, sempre no primário."""
+        conn = self.primario.connect()
+        self._contabilizar(self._primario, "escrita")
+        return conn
+
+    def leitura(self) -> _FachadaLeitura:
+        """Fachada para passar como `db` às classes que só leem."""
+        return _FachadaLeitura(self)
+
+    def connect_leitura(self, **opcoes):
+        """Conexão de leitura na réplica elegível menos usada, ou no primário."""
+        self._agendar_verificacoes()
+
+        with self._lock:
+            candidatas = sorted(
+                (n for n in self._replicas
+                 if n.saudavel and n.atraso_s <= self.atraso_maximo_s),
+                key=lambda n: n.leituras,
+            )
+        for no in candidatas:
+            try:
+                conn = self._conectar_replica(no, opcoes.get("connect_timeout"))
+            except Exception as e:
+                logger.warning(f"⚠️ Réplica {no.nome} indisponível: {e}")
+                self._marcar(no, saudavel=False)
+                continue
+            conn.set_session(readonly=True)
+            self._contabilizar(no, "leitura")
+            return conn
+
+        conn = self.primario.connect(**opcoes)
+        self._contabilizar(self._primario, "leitura")
+        return conn
+
+    def _conectar_replica(self, no: EstadoNo, tempo_limite_s: Optional[int] = None):
+        """Conexão com tempo limite: um nó que não responde falha rápido em vez de esperar o TCP."""
+        tempo_limite_s = min(tempo_limite_s or self.tempo_limite_conexao_s,
+                             self.tempo_limite_conexao_s)
+        return conectar(**no.db.connection_params, database=no.db.database,
+                        connect_timeout=tempo_limite_s)
+
+    def _agendar_verificacoes(self):
+        """Dispara em segundo plano as verificações vencidas, uma por nó por vez."""
+        agora = time.monotonic()
+        with self._lock:
+            vencidas = [n for n in self._replicas
+                        if not n.verificando
+                        and agora - n.verificado_em >= self.intervalo_verificacao_s]
+            for no in vencidas:
+                no.verificando = True
+        for no in vencidas:
+            threading.Thread(target=self._verificar, args=(no,),
+                             name=f"verificar-{no.nome}", daemon=True).start()
+
+    def _contabilizar(self, no: EstadoNo, tipo: str):
+        with self._lock:
+            if tipo == "leitura":
+                no.leituras += 1
+            else:
+                no.escritas += 1
+        ROTEAMENTO.labels(no=no.nome, tipo=tipo).inc()
+
+    def _marcar(self, no: EstadoNo, saudavel: bool, atraso_s: Optional[float] = None):
+        with self._lock:
+            no.saudavel = saudavel
+            no.verificado_em = time.monotonic()
+            if atraso_s is not None:
+                no.atraso_s = atraso_s
+            if not saudavel:
+                no.falhas += 1
+        NO_SAUDAVEL.labels(no=no.nome).set(1 if saudavel else 0)
+        if atraso_s is not None:
+            ATRASO_REPLICA.labels(no=no.nome).set(atraso_s)
+
+    def _verificar(self, no: EstadoNo):
+        """Verifica o nó e libera a marca de verificação em andamento."""
+        try:
+            self._medir(no)
+        finally:
+            with self._lock:
+                no.verificando = False
+
+    def _medir(self, no: EstadoNo):
+        """Confirma que o nó está em recuperação e mede o atraso de replay."""
+        try:
+            conn = self._conectar_replica(no)
+            try:
+                cursor = conn.cursor()
+                # Sem WAL pendente e com o receptor em streaming a réplica está em
+                # dia, mesmo que o primário esteja ocioso e o último replay seja
+                # antigo. Desconectada, receive = replay só diz que ela aplicou o
+                # que recebeu; vale o tempo desde o último replay (infinito se
+                # nunca aplicou nada)
+                cursor.execute("""
+                    SELECT pg_is_in_recovery(),
+                           CASE
+                               WHEN NOT pg_is_in_recovery() THEN 0
+                               WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+                                    AND EXISTS (SELECT 1 FROM pg_stat_wal_receiver
+                                                WHERE status = 'streaming') THEN 0
+                               ELSE COALESCE(EXTRACT(EPOCH FROM
+                                   NOW() - pg_last_xact_replay_timestamp())::float8,
+                                   'Infinity'::float8)
+                           END
+                """, nome="verificar_replica")
+                em_recuperacao, atraso = cursor.fetchone()
+                cursor.close()
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"⚠️ Falha na verificação de {no.nome}: {e}")
+            self._marcar(no, saudavel=False)
+            return
+
+        if not em_recuperacao:
+            logger.warning(f"⚠️ {no.nome} não está em recuperação; ignorado como réplica")
+        self._marcar(no, saudavel=bool(em_recuperacao), atraso_s=float(atraso))
+
+    def verificar_saude(self) -> List[EstadoNo]:
+        """Verifica todas as réplicas imediatamente."""
+        for no in self._replicas:
+            self._verificar(no)
+        return self._replicas
+
+    def relatorio(self) -> List[Dict]:
+        """Carga atendida e situação de cada nó."""
+        with self._lock:
+            nos = [self._primario, *self._replicas]
+            total = sum(n.leituras for n in nos) or 1
+            return [{
+                "no": n.nome,
+                "papel": n.papel,
+                "saudavel": n.saudavel,
+                "atraso_s": round(n.atraso_s, 3),
+                "leituras": n.leituras,
+                "escritas": n.escritas,
+                "falhas": n.falhas,
+                "fracao_leituras": round(n.leituras / total, 3),
+            } for n in nos]
+
+
+def roteador_para(primario: VectorDatabaseSetup, enderecos: Sequence[str],
+                  **opcoes) -> RoteadorReplicas:
+    """Roteador com réplicas "host:porta" que usam as credenciais do primário."""
+    replicas = []
+    for endereco in filter(None, (e.strip() for e in enderecos)):
+        host, _, porta = endereco.partition(":")
+        replicas.append(VectorDatabaseSetup(host=host, port=int(porta or 5432),
+                                            database=primario.database, user=primario.user,
+                                            password=primario.password))
+    return RoteadorReplicas(primario, replicas, **opcoes)
+
+
+def roteador_do_ambiente() -> RoteadorReplicas:
+    """Roteador a partir de DB_* e DB_REPLICAS ("host:porta,host:porta")."""
+    primario = VectorDatabaseSetup(host=os.getenv("DB_HOST", "localhost"),
+                                   port=int(os.getenv("DB_PORT", "5432")),
+                                   database=os.getenv("DB_NAME", "aurora_ai"),
+                                   user=os.getenv("DB_USER", "admin"),
+                                   password=os.getenv("DB_PASSWORD", "aurora123"))
+    return roteador_para(
+        primario, os.getenv("DB_REPLICAS", "").split(","),
+        atraso_maximo_s=float(os.getenv("DB_REPLICA_ATRASO_MAXIMO_S", "5")),
+        tempo_limite_conexao_s=int(os.getenv("DB_REPLICA_TEMPO_LIMITE_S", "2")),
+    )
+
+
+def main():
+    """Função principal."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Roteamento de leituras para réplicas Aurora AI',
+        epilog='Exemplo: --port 5432 --replica localhost:5433 --consultas 200',
+    )
+    parser.add_argument('--replica', action='append', default=[], metavar='HOST:PORTA',
+                        help='Réplica de leitura (pode repetir)')
+    parser.add_argument('--consultas', type=int, default=100, help='Leituras de teste')
+    parser.add_argument('--atraso-maximo', type=float, default=5.0,
+                        help='Atraso máximo de replicação aceito (s)')
+    parser.add_argument('--host', default='localhost', help='Host do PostgreSQL primário')
+    parser.add_argument('--port', type=int, default=5432, help='Porta do PostgreSQL primário')
+    parser.add_argument('--database', default='aurora_ai', help='Nome do banco de dados')
+    parser.add_argument('--user', default='admin', help='Usuário do banco')
+    parser.add_argument('--password', default='aurora123', help='Senha do banco')
+
+    args = parser.parse_args()
+
+    primario = VectorDatabaseSetup(host=args.host, port=args.port, database=args.database,
+                                   user=args.user, password=args.password)
+    roteador = roteador_para(primario, args.replica, atraso_maximo_s=args.atraso_maximo)
+
+    for no in roteador.verificar_saude():
+        logger.info(f"🩺 {no.nome}: {'saudável' if no.saudavel else 'indisponível'}, "
+                    f"atraso {no.atraso_s:.2f}s")
+
+    inicio = time.perf_counter()
+    try:
+        for _ in range(args.consultas):
+            conn = roteador.connect_leitura()
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT COUNT(*) FROM dashboard_monitoramento",
+                               nome="teste_roteamento_leitura")
+                cursor.fetchone()
+                cursor.close()
+            finally:
+                conn.close()
+    except Exception as e:
+        logger.error(f"❌ Erro nas leituras de teste: {e}")
+        sys.exit(1)
+
+    logger.info(f"📊 {args.consultas} leituras em {time.perf_counter() - inicio:.2f}s")
+    for linha in roteador.relatorio():
+        logger.info(f"   - {linha['no']} ({linha['papel']}): {linha['leituras']} leituras "
+                    f"({linha['fracao_leituras']:.0%}), {linha['falhas']} falhas")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Resumos aproximados (sketches) das triagens por unidade e por hora.
+Cada par unidade × hora guarda um Count-Min dos sintomas normalizados, os
+candidatos a top-K e um HyperLogLog dos pacientes distintos. Os resumos são
+mescláveis: qualquer janela ou grupo de unidades é respondido somando os
+resumos horários, sem GROUP BY nem COUNT(DISTINCT) sobre triagens.
+
+Limites de erro (N = total de sintomas na janela, m = 2^precisao):
+- Count-Min: a estimativa nunca é menor que a contagem real e excede-a em no
+  máximo e·N/largura com probabilidade 1 - e^-profundidade. Com os padrões
+  (2048 × 5): erro ≤ 0,13% de N em 99,3% das consultas.
+- HyperLogLog: erro relativo padrão 1,04/√m; com precisão 12 (4096
+  registradores), cerca de 1,6%.
+
+A atualização é incremental pela marca d'água de created_at e não é agendada
+pelo dashboard (que só lê réplicas): rode `resumos_aproximados.py --intervalo
+60` como processo contínuo ou, sem --intervalo, via cron. A consulta
+periódica substitui de propósito a atualização a cada triagem inserida: o
+caminho de gravação da triagem fica sem trabalho extra e cada ciclo funde um
+lote inteiro nos resumos da hora. Como created_at é o
+início da transação, triagens que confirmam depois da marca são relidas na
+janela de atraso_commit e descartadas se já incorporadas.
+"""
+
+import functools
+import hashlib
+import logging
+import math
+import struct
+import sys
+import time
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from psycopg2.extras import Json, execute_values
+
+from agregados_sintomas import TokenizadorSintomas
+from vector_setup import VectorDatabaseSetup
+
+logger = logging.getLogger(__name__)
+
+JOB = "resumos_aproximados"
+# Triagens sem unidade ficam agrupadas sob este id
+SEM_UNIDADE = "00000000-0000-0000-0000-000000000000"
+
+
+def _hash64(item: str) -> int:
+    """Hash estável de 64 bits (o hash() do Python muda entre processos)."""
+    return int.from_bytes(hashlib.blake2b(item.encode(), digest_size=8).digest(), "little")
+
+
+@functools.lru_cache(maxsize=65536)
+def _posicoes(item: str, largura: int, profundidade: int) -> np.ndarray:
+    """Coluna do item em cada linha do Count-Min (Kirsch–Mitzenmacher: um só hash)."""
+    h = _hash64(item)
+    h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+    return np.array([(h1 + i * h2) % largura for i in range(profundidade)], dtype=np.intp)
+
+
+class CountMinSketch:
+    """Contagens aproximadas por item, com erro só para cima."""
+
+    def __init__(self, largura: int = 2048, profundidade: int = 5,
+                 tabela: Optional[np.ndarray] = None):
+        self.largura = largura
+        self.profundidade = profundidade
+        self.tabela = (tabela if tabela is not None
+                       else np.zeros((profundidade, largura), dtype=np.int64))
+        self._linhas = np.arange(profundidade)
+
+    @classmethod
+    def para_erro(cls, epsilon: float, delta: float) -> "CountMinSketch":
+        """Dimensiona para erro ≤ epsilon·N com probabilidade 1 - delta."""
+        return cls(largura=math.ceil(math.e / epsilon),
+                   profundidade=math.ceil(math.log(1 / delta)))
+
+    def adicionar(self, item: str, quantidade: int = 1) -> None:
+        self.tabela[self._linhas, _posicoes(item, self.largura, self.profundidade)] += quantidade
+
+    def estimar(self, item: str) -> int:
+        return int(self.tabela[self._linhas, _posicoes(item, self.largura, self.profundidade)].min())
+
+    def estimar_varios(self, itens: Sequence[str]) -> np.ndarray:
+        """Estimativas de vários itens em uma única indexação."""
+        if not itens:
+            return np.zeros(0, dtype=np.int64)
+        colunas = np.stack([_posicoes(item, self.largura, self.profundidade) for item in itens])
+        return self.tabela[self._linhas, colunas].min(axis=1)
+
+    @property
+    def total(self) -> int:
+        return int(self.tabela[0].sum())
+
+    def fundir(self, outro: "CountMinSketch") -> "CountMinSketch":
+        if self.tabela.shape != outro.tabela.shape:
+            raise ValueError("Count-Min com dimensões diferentes não podem ser fundidos")
+        self.tabela += outro.tabela
+        return self
+
+    def serializar(self) -> bytes:
+        return (struct.pack("<II", self.largura, self.profundidade)
+                + zlib.compress(self.tabela.astype("<i8").tobytes()))
+
+    @classmethod
+    def desserializar(cls, dados: bytes) -> "CountMinSketch":
+        largura, profundidade = struct.unpack_from("<II", dados)
+        tabela = np.frombuffer(zlib.decompress(dados[8:]), dtype="<i8").astype(np.int64)
+        return cls(largura, profundidade, tabela.reshape(profundidade, largura))
+
+
+class HyperLogLog:
+    """Contagem aproximada de itens distintos."""
+
+    def __init__(self, precisao: int = 12, registradores: Optional[np.ndarray] = None):
+        self.precisao = precisao
+        self.m = 1 << precisao
+        self.registradores = (registradores if registradores is not None
+                              else np.zeros(self.m, dtype=np.uint8))
+
+    def adicionar(self, item: str) -> None:
+        h = _hash64(item)
+        indice = h >> (64 - self.precisao)
+        resto = h & ((1 << (64 - self.precisao)) - 1)
+        rho = (64 - self.precisao) - resto.bit_length() + 1
+        if rho > self.registradores[indice]:
+            self.registradores[indice] = rho
+
+    def estimar(self) -> int:
+        alfa = 0.7213 / (1 + 1.079 / self.m)
+        estimativa = alfa * self.m ** 2 / np.ldexp(1.0, -self.registradores.astype(np.int32)).sum()
+        vazios = int(np.count_nonzero(self.registradores == 0))
+        if estimativa <= 2.5 * self.m and vazios:
+            # Correção para cardinalidades pequenas (linear counting)
+            estimativa = self.m * math.log(self.m / vazios)
+        return int(round(estimativa))
+
+    def fundir(self, outro: "HyperLogLog") -> "HyperLogLog":
+        if self.m != outro.m:
+            raise ValueError("HyperLogLog com precisões diferentes não podem ser fundidos")
+        np.maximum(self.registradores, outro.registradores, out=self.registradores)
+        return self
+
+    def serializar(self) -> bytes:
+        return struct.pack("<B", self.precisao) + zlib.compress(self.registradores.tobytes())
+
+    @classmethod
+    def desserializar(cls, dados: bytes) -> "HyperLogLog":
+        precisao = dados[0]
+        registradores = np.frombuffer(zlib.decompress(dados[1:]), dtype=np.uint8).copy()
+        return cls(precisao, registradores)
+
+
+@dataclass
+class ResumoTriagens:
+    """Resumo mesclável de um conjunto de triagens (uma unidade × hora ou uma janela)."""
+
+    sintomas: CountMinSketch = field(default_factory=CountMinSketch)
+    pacientes: HyperLogLog = field(default_factory=HyperLogLog)
+    candidatos: Dict[str, int] = field(default_factory=dict)
+    triagens: int = 0
+    capacidade_topk: int = 64
+
+    def adicionar(self, sintomas: Iterable[str], paciente_id: Optional[str]) -> None:
+        self.triagens += 1
+        if paciente_id:
+            self.pacientes.adicionar(paciente_id)
+        for sintoma in sintomas:
+            self.sintomas.adicionar(sintoma)
+            self._observar(sintoma, self.sintomas.estimar(sintoma))
+
+    def _observar(self, sintoma: str, estimativa: int) -> None:
+        if sintoma in self.candidatos or len(self.candidatos) < self.capacidade_topk:
+            self.candidatos[sintoma] = estimativa
+            return
+        menor = min(self.candidatos, key=self.candidatos.get)
+        if estimativa > self.candidatos[menor]:
+            del self.candidatos[menor]
+            self.candidatos[sintoma] = estimativa
+
+    def fundir(self, outro: "ResumoTriagens") -> "ResumoTriagens":
+        self.sintomas.fundir(outro.sintomas)
+        self.pacientes.fundir(outro.pacientes)
+        self.triagens += outro.triagens
+        # Os candidatos de cada lado são reavaliados no Count-Min já fundido
+        uniao = list(self.candidatos.keys() | outro.candidatos.keys())
+        estimativas = self.sintomas.estimar_varios(uniao)
+        manter = np.argsort(-estimativas, kind="stable")[:self.capacidade_topk]
+        self.candidatos = {uniao[i]: int(estimativas[i]) for i in manter}
+        return self
+
+    def principais(self, k: int = 10) -> List[Tuple[str, int]]:
+        """Os k sintomas mais frequentes com a contagem estimada."""
+        return sorted(self.candidatos.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    @property
+    def pacientes_distintos(self) -> int:
+        return self.pacientes.estimar()
+
+
+class ResumosAproximados:
+    """Mantém os resumos horários por unidade e responde janelas arbitrárias."""
+
+    def __init__(self, db: VectorDatabaseSetup, tamanho_lote: int = 20000,
+                 largura: int = 2048, profundidade: int = 5, precisao: int = 12,
+                 capacidade_topk: int = 64, atraso_commit: timedelta = timedelta(minutes=5)):
+        self.db = db
+        self.tamanho_lote = tamanho_lote
+        self.atraso_commit = atraso_commit
+        self.largura = largura
+        self.profundidade = profundidade
+        self.precisao = precisao
+        self.capacidade_topk = capacidade_topk
+
+    def novo_resumo(self) -> ResumoTriagens:
+        return ResumoTriagens(CountMinSketch(self.largura, self.profundidade),
+                              HyperLogLog(self.precisao),
+                              capacidade_topk=self.capacidade_topk)
+
+    def create_tables(self) -> bool:
+        """Cria a tabela de resumos horários, a de controle e a das triagens recentes."""
+        try:
+            conn = self.db.connect()
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS resumos_triagens_hora (
+                    unidade_id UUID NOT NULL,
+                    hora TIMESTAMP NOT NULL,
+                    triagens INT NOT NULL,
+                    sintomas_cms BYTEA NOT NULL,
+                    sintomas_candidatos JSONB NOT NULL,
+                    pacientes_hll BYTEA NOT NULL,
+                    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (hora, unidade_id)
+                );
+
+                CREATE TABLE IF NOT EXISTS controle_agregados (
+                    job VARCHAR(100) PRIMARY KEY,
+                    processado_ate TIMESTAMP NOT NULL,
+                    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+
+                -- Triagens já incorporadas dentro da janela de atraso da marca d'água
+                CREATE TABLE IF NOT EXISTS resumos_triagens_recentes (
+                    triagem_id UUID PRIMARY KEY,
+                    created_at TIMESTAMP NOT NULL
+                );
+            """, nome="criar_tabelas_resumos_aproximados")
+            conn.commit()
+            cursor.close()
+            conn.close()
+            logger.info("✅ Tabelas de resumos aproximados criadas")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao criar tabelas de resumos aproximados: {e}")
+            return False
+
+    def _desserializar(self, triagens: int, cms: bytes, candidatos: Dict[str, int],
+                       hll: bytes) -> ResumoTriagens:
+        return ResumoTriagens(CountMinSketch.desserializar(bytes(cms)),
+                              HyperLogLog.desserializar(bytes(hll)),
+                              dict(candidatos), triagens, self.capacidade_topk)
+
+    def atualizar_incremental(self) -> int:
+        """Incorpora as triagens criadas após a última marca d'água.
+
+        A leitura recua atraso_commit antes da marca para pegar transações que
+        confirmaram depois dela; as triagens dessa janela já incorporadas ficam
+        em resumos_triagens_recentes e não são contadas de novo.
+        """
+        conn = self.db.connect()
+        total = 0
+        try:
+            cursor = conn.cursor()
+            # Execuções simultâneas leriam a mesma faixa e somariam tudo em dobro
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (JOB,),
+                           nome="bloquear_resumos")
+            cursor.execute("SELECT sintoma FROM embeddings_sintomas ORDER BY sintoma",
+                           nome="carregar_vocabulario_sintomas")
+            tokenizador = TokenizadorSintomas([linha[0] for linha in cursor.fetchall()])
+            cursor.execute("SELECT processado_ate FROM controle_agregados WHERE job = %s",
+                           (JOB,), nome="ler_marca_resumos")
+            linha = cursor.fetchone()
+            desde = linha[0] - self.atraso_commit if linha else datetime.min
+            # clock_timestamp e não NOW(): a transação pode ter esperado pelo bloqueio
+            cursor.execute("SELECT clock_timestamp()::timestamp", nome="resumos_inicio")
+            ate = max(cursor.fetchone()[0], linha[0] if linha else datetime.min)
+
+            leitura = conn.cursor(name="resumos_aproximados_triagens")
+            leitura.itersize = self.tamanho_lote
+            leitura.execute("""
+                SELECT t.id::text, t.created_at, COALESCE(t.unidade_id, %s::uuid)::text,
+                       date_trunc('hour', t.created_at), t.sintomas, t.paciente_id::text
+                FROM triagens t
+                WHERE t.created_at > %s AND t.created_at <= %s
+                  AND NOT EXISTS (
+                      SELECT 1 FROM resumos_triagens_recentes r WHERE r.triagem_id = t.id
+                  )
+                ORDER BY t.created_at
+            """, (SEM_UNIDADE, desde, ate), nome="ler_triagens_resumos")
+            limite_recentes = ate - self.atraso_commit
+            while True:
+                linhas = leitura.fetchmany(self.tamanho_lote)
+                if not linhas:
+                    break
+                # Lidas em ordem de created_at, cada lote toca poucas horas
+                resumos: Dict[Tuple[str, datetime], ResumoTriagens] = {}
+                recentes = []
+                for triagem_id, criada_em, unidade_id, hora, texto, paciente_id in linhas:
+                    resumo = resumos.setdefault((unidade_id, hora), self.novo_resumo())
+                    resumo.adicionar((tokenizador.vocabulario[i]
+                                      for i in tokenizador.tokenizar(texto)), paciente_id)
+                    if criada_em > limite_recentes:
+                        recentes.append((triagem_id, criada_em))
+                self._gravar(cursor, resumos)
+                if recentes:
+                    execute_values(cursor, """
+                        INSERT INTO resumos_triagens_recentes (triagem_id, created_at)
+                        VALUES %s
+                        ON CONFLICT (triagem_id) DO NOTHING
+                    """, recentes, template="(%s::uuid, %s)")
+                total += len(linhas)
+            leitura.close()
+
+            cursor.execute("DELETE FROM resumos_triagens_recentes WHERE created_at <= %s",
+                           (limite_recentes,), nome="limpar_triagens_recentes_resumos")
+            cursor.execute("""
+                INSERT INTO controle_agregados (job, processado_ate, atualizado_em)
+                VALUES (%s, %s, CURRENT_TIMESTAMP)
+                ON CONFLICT (job) DO UPDATE SET
+                    processado_ate = EXCLUDED.processado_ate,
+                    atualizado_em = EXCLUDED.atualizado_em
+            """, (JOB, ate), nome="gravar_marca_resumos")
+            conn.commit()
+            cursor.close()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        logger.info(f"✅ Resumos aproximados: {total} triagens incorporadas")
+        return total
+
+    def processado_ate(self) -> Optional[datetime]:
+        """Marca d'água da última atualização (None se nunca executada)."""
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT processado_ate FROM controle_agregados WHERE job = %s",
+                           (JOB,), nome="ler_marca_resumos")
+            linha = cursor.fetchone()
+            cursor.close()
+        finally:
+            conn.close()
+        return linha[0] if linha else None
+
+    def _gravar(self, cursor, resumos: Dict[Tuple[str, datetime], ResumoTriagens]) -> None:
+        """Funde os resumos do lote com os já gravados e regrava as linhas."""
+        chaves = list(resumos)
+        cursor.execute("""
+            SELECT unidade_id::text, hora, triagens, sintomas_cms, sintomas_candidatos, pacientes_hll
+            FROM resumos_triagens_hora
+            WHERE (unidade_id, hora) IN (SELECT * FROM unnest(%s::uuid[], %s::timestamp[]))
+            FOR UPDATE
+        """, ([u for u, _ in chaves], [h for _, h in chaves]), nome="carregar_resumos_hora")
+        for unidade_id, hora, *gravado in cursor.fetchall():
+            resumos[(unidade_id, hora)].fundir(self._desserializar(*gravado))
+
+        execute_values(cursor, """
+            INSERT INTO resumos_triagens_hora
+                (unidade_id, hora, triagens, sintomas_cms, sintomas_candidatos, pacientes_hll)
+            VALUES %s
+            ON CONFLICT (hora, unidade_id) DO UPDATE SET
+                triagens = EXCLUDED.triagens,
+                sintomas_cms = EXCLUDED.sintomas_cms,
+                sintomas_candidatos = EXCLUDED.sintomas_candidatos,
+                pacientes_hll = EXCLUDED.pacientes_hll,
+                atualizado_em = CURRENT_TIMESTAMP
+        """, [(unidade_id, hora, r.triagens, r.sintomas.serializar(), Json(r.candidatos),
+               r.pacientes.serializar()) for (unidade_id, hora), r in resumos.items()])
+
+    def consultar(self, inicio: datetime, fim: datetime,
+                  unidades: Optional[Sequence[str]] = None) -> ResumoTriagens:
+        """Resumo fundido das horas em [inicio, fim) das unidades informadas (todas se None)."""
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT triagens, sintomas_cms, sintomas_candidatos, pacientes_hll
+                FROM resumos_triagens_hora
+                WHERE hora >= date_trunc('hour', %s::timestamp) AND hora < %s
+                  AND (%s::uuid[] IS NULL OR unidade_id = ANY(%s::uuid[]))
+            """, (inicio, fim, list(unidades) if unidades else None,
+                  list(unidades) if unidades else None), nome="consultar_resumos_hora")
+            linhas = cursor.fetchall()
+            cursor.close()
+        finally:
+            conn.close()
+
+        resumo = self.novo_resumo()
+        for linha in linhas:
+            resumo.fundir(self._desserializar(*linha))
+        return resumo
+
+
+def main():
+    """Função principal."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Resumos aproximados de triagens Aurora AI')
+    parser.add_argument('--intervalo', type=int, metavar='SEGUNDOS',
+                        help='Repete a atualização a cada SEGUNDOS (processo contínuo)')
+    parser.add_argument('--host', default='localhost', help='Host do PostgreSQL')
+    parser.add_argument('--port', type=int, default=5432, help='Porta do PostgreSQL')
+    parser.add_argument('--database', default='aurora_ai', help='Nome do banco de dados')
+    parser.add_argument('--user', default='admin', help='Usuário do banco')
+    parser.add_argument('--password', default='aurora123', help='Senha do banco')
+
+    args = parser.parse_args()
+
+    db = VectorDatabaseSetup(host=args.host, port=args.port, database=args.database,
+                             user=args.user, password=args.password)
+    resumos = ResumosAproximados(db)
+    if not resumos.create_tables():
+        sys.exit(1)
+
+    while True:
+        try:
+            resumos.atualizar_incremental()
+        except Exception as e:
+            logger.error(f"❌ Erro ao atualizar resumos aproximados: {e}")
+            if not args.intervalo:
+                sys.exit(1)
+        if not args.intervalo:
+            break
+        time.sleep(args.intervalo)
+
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
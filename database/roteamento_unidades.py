@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Roteamento de pacientes para a unidade de saúde mais adequada.
+Mantém em memória uma BallTree (métrica haversine) por tipo de unidade e
+combina os k vizinhos mais próximos com a ocupação atual das filas para
+ordenar destinos. A carga das filas é atualizada por uma thread em segundo
+plano, fora do caminho do roteamento. O roteamento em lote consulta as
+árvores de forma vetorizada e distribui os pacientes respeitando a
+capacidade restante, atendendo primeiro as maiores prioridades.
+"""
+
+import functools
+import logging
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sklearn.neighbors import BallTree
+
+from vector_setup import VectorDatabaseSetup
+
+logger = logging.getLogger(__name__)
+
+RAIO_TERRA_KM = 6371.0
+ORDEM_PRIORIDADES = ['emergencia', 'urgente', 'prioritario', 'eletivo']
+
+# Tipos de unidade aptos a receber cada prioridade
+TIPOS_POR_PRIORIDADE = {
+    'emergencia': ('Hospital', 'UPA'),
+    'urgente': ('UPA', 'Hospital'),
+    'prioritario': ('UPA', 'UBS', 'Clinica', 'Hospital'),
+    'eletivo': ('UBS', 'Clinica'),
+}
+
+# Quilômetros equivalentes a uma unidade com ocupação de 100%: em emergências a
+# distância domina, em casos eletivos vale deslocar mais para evitar filas
+PESO_OCUPACAO_KM = {
+    'emergencia': 2.0,
+    'urgente': 5.0,
+    'prioritario': 10.0,
+    'eletivo': 20.0,
+}
+
+# Unidades lotadas só aparecem depois de todas as que têm vaga
+LOTADA = 1e6
+
+
+@dataclass
+class Destino:
+    """Unidade candidata para um paciente."""
+
+    unidade_id: str
+    nome: str
+    tipo: str
+    distancia_km: float
+    ocupacao: float
+    custo: float
+
+
+class RoteadorUnidades:
+    """Índice espacial das unidades com carga das filas atualizada periodicamente."""
+
+    def __init__(self, db: Optional[VectorDatabaseSetup] = None,
+                 vizinhos: int = 8, intervalo_carga_s: float = 15.0):
+        self.db = db
+        self.vizinhos = vizinhos
+        self.intervalo_carga_s = intervalo_carga_s
+        self.ids = np.array([], dtype=object)
+        self.nomes = np.array([], dtype=object)
+        self.tipos = np.array([], dtype=object)
+        self.capacidade = np.zeros(0)
+        self.fila = np.zeros(0)
+        self._arvores: Dict[str, BallTree] = {}
+        self._indices_tipo: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def carregar_unidades(self) -> int:
+        """Lê as unidades georreferenciadas do banco e reconstrói as árvores."""
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id::text, nome, tipo, capacidade,
+                       latitude::float8, longitude::float8
+                FROM unidades_saude
+                WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+            """, nome="carregar_unidades_georreferenciadas")
+            linhas = cursor.fetchall()
+            cursor.close()
+        finally:
+            conn.close()
+
+        if not linhas:
+            logger.warning("⚠️ Nenhuma unidade com latitude/longitude cadastrada")
+            return 0
+        ids, nomes, tipos, capacidade, lat, lon = zip(*linhas)
+        self.indexar(ids, nomes, tipos, capacidade, np.column_stack([lat, lon]))
+        self.atualizar_carga()
+        logger.info(f"🗺️ {len(ids)} unidades indexadas para roteamento")
+        return len(ids)
+
+    def indexar(self, ids: Sequence[str], nomes: Sequence[str], tipos: Sequence[str],
+                capacidade: Sequence[int], coordenadas: np.ndarray):
+        """Constrói uma árvore por tipo a partir de coordenadas (lat, lon) em graus."""
+        radianos = np.radians(np.asarray(coordenadas, dtype=float))
+        tipos_arr = np.asarray(tipos, dtype=object)
+        arvores, indices_tipo = {}, {}
+        for tipo in np.unique(tipos_arr):
+            indices = np.flatnonzero(tipos_arr == tipo)
+            arvores[tipo] = BallTree(radianos[indices], metric='haversine')
+            indices_tipo[tipo] = indices
+
+        with self._lock:
+            self.ids = np.asarray(ids, dtype=object)
+            self.nomes = np.asarray(nomes, dtype=object)
+            self.tipos = tipos_arr
+            self.capacidade = np.maximum(np.asarray(capacidade, dtype=float), 1.0)
+            self.fila = np.zeros(len(self.ids))
+            self._arvores = arvores
+            self._indices_tipo = indices_tipo
+
+    def iniciar_atualizacao_periodica(self) -> None:
+        """Mantém a carga das filas atualizada em segundo plano."""
+        def _loop():
+            while not self._parar.wait(self.intervalo_carga_s):
+                try:
+                    self.atualizar_carga()
+                except Exception as e:
+                    logger.warning(f"⚠️ Carga das filas não atualizada, usando a anterior: {e}")
+
+        self._thread = threading.Thread(target=_loop, name="carga-filas-unidades",
+                                        daemon=True)
+        self._thread.start()
+
+    def parar(self) -> None:
+        """Interrompe a atualização periódica da carga."""
+        self._parar.set()
+
+    def atualizar_carga(self):
+        """Pacientes aguardando ou em atendimento por unidade (mesma regra do dashboard)."""
+        with self._lock:
+            ids = self.ids
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT unidade_id::text, COUNT(*)
+                FROM filas
+                WHERE status IN ('aguardando', 'em_atendimento')
+                GROUP BY unidade_id
+            """, nome="carga_filas_por_unidade")
+            carga = dict(cursor.fetchall())
+            cursor.close()
+        finally:
+            conn.close()
+
+        fila = np.array([carga.get(i, 0) for i in ids], dtype=float)
+        with self._lock:
+            # Unidades reindexadas durante a consulta: a próxima atualização corrige
+            if self.ids is ids:
+                self.fila = fila
+
+    def _snapshot(self):
+        """Estado consistente para um roteamento, lido de uma vez sob o lock."""
+        with self._lock:
+            return (self.ids, self.nomes, self.tipos, self.capacidade, self.fila,
+                    self._arvores, self._indices_tipo)
+
+    def _candidatos(self, arvores: Dict[str, BallTree], indices_tipo: Dict[str, np.ndarray],
+                    radianos: np.ndarray, prioridade: str):
+        """Índices e distâncias (km) dos vizinhos em todos os tipos aptos."""
+        indices, distancias = [], []
+        for tipo in TIPOS_POR_PRIORIDADE[prioridade]:
+            arvore = arvores.get(tipo)
+            if arvore is None:
+                continue
+            k = min(self.vizinhos, len(indices_tipo[tipo]))
+            dist, ind = arvore.query(radianos, k=k)
+            indices.append(indices_tipo[tipo][ind])
+            distancias.append(dist * RAIO_TERRA_KM)
+        if not indices:
+            vazio = np.zeros((len(radianos), 0))
+            return vazio.astype(int), vazio
+        return np.hstack(indices), np.hstack(distancias)
+
+    def rotear(self, latitude: float, longitude: float, prioridade: str,
+               limite: int = 3) -> List[Destino]:
+        """Destinos ordenados para um paciente."""
+        return self.rotear_lote([(latitude, longitude)], [prioridade], limite=limite,
+                                distribuir=False)[0]
+
+    def rotear_lote(self, coordenadas: Sequence, prioridades: Sequence[str],
+                    limite: int = 3, distribuir: bool = True) -> List[List[Destino]]:
+        """Destinos para vários pacientes de uma vez.
+
+        Com `distribuir`, cada paciente ocupa uma vaga no primeiro destino, de
+        modo que os seguintes enxergam a fila já acrescida; as prioridades mais
+        altas escolhem primeiro.
+        """
+        radianos = np.radians(np.asarray(coordenadas, dtype=float).reshape(-1, 2))
+        prioridades = np.asarray(prioridades, dtype=object)
+        ids, nomes, tipos, capacidade, fila, arvores, indices_tipo = self._snapshot()
+        fila = fila.copy()
+        destino = functools.partial(self._destino, ids, nomes, tipos)
+        resultados: List[List[Destino]] = [[] for _ in range(len(radianos))]
+
+        for prioridade in ORDEM_PRIORIDADES:
+            pacientes = np.flatnonzero(prioridades == prioridade)
+            if not len(pacientes):
+                continue
+            indices, distancias = self._candidatos(arvores, indices_tipo,
+                                                   radianos[pacientes], prioridade)
+            if not indices.shape[1]:
+                continue
+            peso = PESO_OCUPACAO_KM[prioridade]
+
+            if not distribuir:
+                ocupacao = fila[indices] / capacidade[indices]
+                custos = distancias + peso * ocupacao
+                ordem = np.argsort(custos + np.where(ocupacao >= 1, LOTADA, 0), axis=1)[:, :limite]
+                for linha, paciente in enumerate(pacientes):
+                    resultados[paciente] = [
+                        destino(indices[linha, j], distancias[linha, j],
+                                ocupacao[linha, j], custos[linha, j])
+                        for j in ordem[linha]
+                    ]
+                continue
+
+            for linha, paciente in enumerate(pacientes):
+                ind = indices[linha]
+                ocupacao = fila[ind] / capacidade[ind]
+                custos = distancias[linha] + peso * ocupacao
+                ordem = np.argsort(custos + np.where(ocupacao >= 1, LOTADA, 0))[:limite]
+                resultados[paciente] = [
+                    destino(ind[j], distancias[linha, j], ocupacao[j], custos[j])
+                    for j in ordem
+                ]
+                fila[ind[ordem[0]]] += 1
+
+        return resultados
+
+    @staticmethod
+    def _destino(ids: np.ndarray, nomes: np.ndarray, tipos: np.ndarray, indice: int,
+                 distancia: float, ocupacao: float, custo: float) -> Destino:
+        return Destino(
+            unidade_id=ids[indice],
+            nome=nomes[indice],
+            tipo=tipos[indice],
+            distancia_km=float(distancia),
+            ocupacao=float(ocupacao),
+            custo=float(custo),
+        )
+
+
+def medir_latencia(unidades: int = 5000, pacientes: int = 10000,
+                   semente: int = 42) -> Dict[str, float]:
+    """Latência de roteamento individual e em lote com unidades sintéticas."""
+    rng = np.random.default_rng(semente)
+    # Região metropolitana de São Paulo
+    coordenadas = np.column_stack([rng.uniform(-24.0, -23.3, unidades),
+                                   rng.uniform(-47.0, -46.2, unidades)])
+    tipos = rng.choice(['UPA', 'Hospital', 'UBS', 'Clinica'], size=unidades, p=[.25, .15, .45, .15])
+    roteador = RoteadorUnidades()
+    roteador.indexar([str(i) for i in range(unidades)], [f"Unidade {i}" for i in range(unidades)],
+                     tipos, rng.integers(50, 300, unidades), coordenadas)
+    roteador.fila = rng.integers(0, 250, unidades).astype(float)
+
+    consultas = np.column_stack([rng.uniform(-24.0, -23.3, pacientes),
+                                 rng.uniform(-47.0, -46.2, pacientes)])
+    prioridades = rng.choice(ORDEM_PRIORIDADES, size=pacientes, p=[.05, .2, .35, .4])
+
+    inicio = time.perf_counter()
+    for (lat, lon), prioridade in zip(consultas[:1000], prioridades[:1000]):
+        roteador.rotear(lat, lon, prioridade)
+    individual_ms = (time.perf_counter() - inicio) / 1000 * 1000
+
+    inicio = time.perf_counter()
+    roteador.rotear_lote(consultas, prioridades)
+    lote_s = time.perf_counter() - inicio
+
+    return {
+        "unidades": unidades,
+        "individual_ms": individual_ms,
+        "lote_pacientes_por_s": pacientes / lote_s,
+    }
+
+
+def main():
+    """Função principal."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Roteamento de pacientes para unidades Aurora AI')
+    parser.add_argument('--latitude', type=float, help='Latitude do paciente')
+    parser.add_argument('--longitude', type=float, help='Longitude do paciente')
+    parser.add_argument('--prioridade', choices=ORDEM_PRIORIDADES, default='urgente')
+    parser.add_argument('--latencia', action='store_true',
+                        help='Mede a latência com unidades sintéticas')
+    parser.add_argument('--host', default='localhost', help='Host do PostgreSQL')
+    parser.add_argument('--port', type=int, default=5432, help='Porta do PostgreSQL')
+    parser.add_argument('--database', default='aurora_ai', help='Nome do banco de dados')
+    parser.add_argument('--user', default='admin', help='Usuário do banco')
+    parser.add_argument('--password', default='aurora123', help='Senha do banco')
+
+    args = parser.parse_args()
+
+    if args.latencia:
+        metricas = medir_latencia()
+        logger.info(f"⏱️ {metricas['unidades']} unidades: {metricas['individual_ms']:.3f} ms por "
+                    f"paciente, {metricas['lote_pacientes_por_s']:.0f} pacientes/s em lote")
+        sys.exit(0)
+
+    if args.latitude is None or args.longitude is None:
+        parser.error('--latitude e --longitude são obrigatórios')
+
+    db = VectorDatabaseSetup(host=args.host, port=args.port, database=args.database,
+                             user=args.user, password=args.password)
+    roteador = RoteadorUnidades(db)
+    try:
+        roteador.carregar_unidades()
+        destinos = roteador.rotear(args.latitude, args.longitude, args.prioridade)
+    except Exception as e:
+        logger.error(f"❌ Erro ao rotear paciente: {e}")
+        sys.exit(1)
+
+    for destino in destinos:
+        logger.info(f"   - {destino.nome} ({destino.tipo}): {destino.distancia_km:.1f} km, "
+                    f"ocupação {destino.ocupacao:.0%}")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -26,8 +26,7 @@ CREATE TABLE pacientes (
     idade INT NOT NULL,
     genero VARCHAR(20),
     comorbidades TEXT[], -- Array de comorbidades
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    INDEX idx_paciente_codigo (codigo_anonimo)
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Tabela de Triagens
@@ -63,10 +62,7 @@ CREATE TABLE triagens (
     tempo_triagem_ia INTERVAL,
     modelo_ia_utilizado VARCHAR(50),
     
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    INDEX idx_triagem_data (created_at),
-    INDEX idx_triagem_prioridade (prioridade_ia),
-    INDEX idx_triagem_unidade (unidade_id)
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Tabela de Filas
@@ -80,9 +76,7 @@ CREATE TABLE filas (
     tempo_real_espera INTERVAL,
     status VARCHAR(20) DEFAULT 'aguardando' CHECK (status IN ('aguardando', 'em_atendimento', 'finalizado', 'cancelado')),
     entrada_fila TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    saida_fila TIMESTAMP,
-    INDEX idx_fila_status (status),
-    INDEX idx_fila_unidade_prioridade (unidade_id, prioridade, entrada_fila)
+    saida_fila TIMESTAMP
 );
 
 -- Tabela de Atendimentos
@@ -98,9 +92,7 @@ CREATE TABLE atendimentos (
     tempo_atendimento INTERVAL,
     satisfacao_paciente INT CHECK (satisfacao_paciente BETWEEN 1 AND 5),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    finalizado_at TIMESTAMP,
-    INDEX idx_atendimento_data (created_at),
-    INDEX idx_atendimento_medico (medico_id)
+    finalizado_at TIMESTAMP
 );
 
 -- Tabela de Modelos de IA (versionamento)
@@ -130,9 +122,7 @@ CREATE TABLE logs_decisoes_ia (
     output_predicoes JSONB NOT NULL,
     explicabilidade_shap JSONB,
     tempo_processamento INTERVAL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    INDEX idx_logs_triagem (triagem_id),
-    INDEX idx_logs_data (created_at)
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Tabela de Alertas e Monitoramento
@@ -146,9 +136,7 @@ CREATE TABLE alertas (
     valor_limite DECIMAL(10,2),
     status VARCHAR(20) DEFAULT 'ativo' CHECK (status IN ('ativo', 'resolvido', 'monitorando')),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    resolvido_at TIMESTAMP,
-    INDEX idx_alertas_status (status),
-    INDEX idx_alertas_nivel (nivel)
+    resolvido_at TIMESTAMP
 );
 
 -- Tabela de Estatísticas em Tempo Real
@@ -161,9 +149,7 @@ CREATE TABLE estatisticas_tempo_real (
     tempo_medio_espera INTERVAL,
     ocupacao_percentual DECIMAL(5,2),
     taxa_ocupacao_emergencia DECIMAL(5,2),
-    taxa_ocupacao_urgente DECIMAL(5,2),
-    INDEX idx_estatisticas_timestamp (timestamp),
-    INDEX idx_estatisticas_unidade (unidade_id, timestamp)
+    taxa_ocupacao_urgente DECIMAL(5,2)
 );
 
 -- Tabela de Telemedicina
@@ -179,9 +165,7 @@ CREATE TABLE sessoes_telemedicina (
     duracao INTERVAL,
     gravacao_url VARCHAR(255),
     transcricao_texto TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    INDEX idx_telemedicina_status (status),
-    INDEX idx_telemedicina_data (data_agendada)
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Views para facilitar consultas
@@ -219,6 +203,22 @@ GROUP BY DATE(t.created_at), m.nome, m.versao
 ORDER BY data DESC;
 
 -- Índices para performance
+CREATE INDEX idx_paciente_codigo ON pacientes(codigo_anonimo);
+CREATE INDEX idx_triagem_data ON triagens(created_at);
+CREATE INDEX idx_triagem_prioridade ON triagens(prioridade_ia);
+CREATE INDEX idx_triagem_unidade ON triagens(unidade_id);
+CREATE INDEX idx_fila_status ON filas(status);
+CREATE INDEX idx_fila_unidade_prioridade ON filas(unidade_id, prioridade, entrada_fila);
+CREATE INDEX idx_atendimento_data ON atendimentos(created_at);
+CREATE INDEX idx_atendimento_medico ON atendimentos(medico_id);
+CREATE INDEX idx_logs_triagem ON logs_decisoes_ia(triagem_id);
+CREATE INDEX idx_logs_data ON logs_decisoes_ia(created_at);
+CREATE INDEX idx_alertas_status ON alertas(status);
+CREATE INDEX idx_alertas_nivel ON alertas(nivel);
+CREATE INDEX idx_estatisticas_timestamp ON estatisticas_tempo_real(timestamp);
+CREATE INDEX idx_estatisticas_unidade ON estatisticas_tempo_real(unidade_id, timestamp);
+CREATE INDEX idx_telemedicina_status ON sessoes_telemedicina(status);
+CREATE INDEX idx_telemedicina_data ON sessoes_telemedicina(data_agendada);
 CREATE INDEX idx_triagens_embedding ON triagens USING ivfflat (embedding_sintomas vector_cosine_ops);
 CREATE INDEX idx_triagens_similaridade ON triagens USING ivfflat (embedding_descricao vector_cosine_ops);
 CREATE INDEX idx_filas_prioridade_entrada ON filas(prioridade, entrada_fila);
@@ -7,10 +7,13 @@ Este script configura o banco de dados para armazenar embeddings vetoriais.
 import psycopg2
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 import logging
+import math
 import sys
 from typing import Optional
 from datetime import datetime
 
+from instrumentacao import conectar
+
 # Configuração de logging
 logging.basicConfig(
     level=logging.INFO,
@@ -18,6 +21,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+def listas_ivfflat(linhas: int) -> int:
+    """Número de listas IVFFlat recomendado pelo pgvector para a quantidade de linhas."""
+    # linhas/1000 até 1M de linhas, raiz quadrada acima
+    return max(10, linhas // 1000 if linhas <= 1_000_000 else int(math.sqrt(linhas)))
+
+
 class VectorDatabaseSetup:
     """Classe para configuração do banco de dados vetorial."""
     
@@ -41,10 +51,14 @@ class VectorDatabaseSetup:
             'password': password
         }
     
+    def connect(self, **opcoes):
+        """Abre uma conexão com o banco de dados da aplicação (opções extras vão para o libpq)."""
+        return conectar(**self.connection_params, database=self.database, **opcoes)
+    
     def test_connection(self) -> bool:
         """Testa a conexão com o PostgreSQL."""
         try:
-            conn = psycopg2.connect(**self.connection_params, database='postgres')
+            conn = conectar(**self.connection_params, database='postgres')
             conn.close()
             logger.info("✅ Conexão com PostgreSQL estabelecida")
             return True
@@ -56,16 +70,17 @@ class VectorDatabaseSetup:
         """Cria o banco de dados se não existir."""
         try:
             # Conecta ao banco de template
-            conn = psycopg2.connect(**self.connection_params, database='postgres')
+            conn = conectar(**self.connection_params, database='postgres')
             conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
             cursor = conn.cursor()
             
             # Verifica se o banco já existe
-            cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", (self.database,))
+            cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", (self.database,),
+                           nome="verificar_banco")
             exists = cursor.fetchone()
             
             if not exists:
-                cursor.execute(f'CREATE DATABASE {self.database}')
+                cursor.execute(f'CREATE DATABASE {self.database}', nome="criar_banco")
                 logger.info(f"✅ Banco de dados '{self.database}' criado")
             else:
                 logger.info(f"📁 Banco de dados '{self.database}' já existe")
@@ -81,11 +96,11 @@ class VectorDatabaseSetup:
     def enable_vector_extension(self) -> bool:
         """Habilita a extensão pgvector no banco de dados."""
         try:
-            conn = psycopg2.connect(**self.connection_params, database=self.database)
+            conn = self.connect()
             cursor = conn.cursor()
             
             # Habilita a extensão pgvector
-            cursor.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS vector;", nome="criar_extensao_vector")
             conn.commit()
             
             # Verifica se a extensão foi habilitada
@@ -93,7 +108,7 @@ class VectorDatabaseSetup:
                 SELECT extname, extversion 
                 FROM pg_extension 
                 WHERE extname = 'vector'
-            """)
+            """, nome="verificar_extensao_vector")
             
             result = cursor.fetchone()
             if result:
@@ -109,10 +124,27 @@ class VectorDatabaseSetup:
             logger.error(f"❌ Erro ao habilitar extensão vector: {e}")
             return False
     
+    def apply_migrations(self) -> bool:
+        """Aplica as migrações pendentes de database/migrations."""
+        from migracoes import AplicadorMigracoes
+
+        try:
+            AplicadorMigracoes(self).aplicar()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao aplicar migrações: {e}")
+            return False
+    
+    def setup_embedding_versions(self) -> bool:
+        """Registra a versão ativa de embeddings e aponta as buscas para ela."""
+        from versoes_embedding import VersionamentoEmbeddings
+
+        return VersionamentoEmbeddings(self).create_tables()
+    
     def create_vector_tables(self) -> bool:
         """Cria tabelas específicas para armazenamento vetorial."""
         try:
-            conn = psycopg2.connect(**self.connection_params, database=self.database)
+            conn = self.connect()
             cursor = conn.cursor()
             
             # Tabela de embeddings de sintomas para busca semântica
@@ -127,7 +159,7 @@ class VectorDatabaseSetup:
                     -- Índice para busca por similaridade
                     CONSTRAINT embedding_unique UNIQUE(sintoma)
                 );
-            """)
+            """, nome="criar_tabela_embeddings_sintomas")
             
             # Índice para busca por similaridade (IVFFlat para produção)
             cursor.execute("""
@@ -135,19 +167,37 @@ class VectorDatabaseSetup:
                 ON embeddings_sintomas 
                 USING ivfflat (embedding vector_cosine_ops)
                 WITH (lists = 100);
-            """)
+            """, nome="criar_indice_embeddings_sintomas")
             
-            # Tabela de cache de embeddings (para otimização)
+            # Tabela de cache de embeddings (para otimização); chave por modelo para
+            # que versões diferentes convivam durante uma troca de modelo
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS cache_embeddings (
-                    texto_hash VARCHAR(64) PRIMARY KEY,
+                    texto_hash VARCHAR(64) NOT NULL,
                     texto_original TEXT NOT NULL,
-                    embedding VECTOR(384) NOT NULL,
-                    modelo_utilizado VARCHAR(100),
+                    embedding VECTOR NOT NULL,
+                    modelo_utilizado VARCHAR(100) NOT NULL,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (texto_hash, modelo_utilizado)
                 );
-            """)
+            """, nome="criar_tabela_cache_embeddings")
+
+            # Atualiza caches criados com a chave antiga (somente texto_hash)
+            cursor.execute("""
+                DO $$
+                BEGIN
+                    IF (SELECT array_length(conkey, 1) FROM pg_constraint
+                        WHERE conrelid = 'cache_embeddings'::regclass AND contype = 'p') = 1 THEN
+                        DELETE FROM cache_embeddings WHERE modelo_utilizado IS NULL;
+                        ALTER TABLE cache_embeddings
+                            ALTER COLUMN modelo_utilizado SET NOT NULL,
+                            ALTER COLUMN embedding TYPE VECTOR,
+                            DROP CONSTRAINT cache_embeddings_pkey,
+                            ADD PRIMARY KEY (texto_hash, modelo_utilizado);
+                    END IF;
+                END $$;
+            """, nome="atualizar_chave_cache_embeddings")
             
             conn.commit()
             logger.info("✅ Tabelas vetoriais criadas com sucesso")
@@ -178,7 +228,7 @@ class VectorDatabaseSetup:
                 ("inchaço", "circulatorio")
             ]
             
-            conn = psycopg2.connect(**self.connection_params, database=self.database)
+            conn = self.connect()
             cursor = conn.cursor()
             
             for sintoma, categoria in sintomas_comuns:
@@ -192,7 +242,7 @@ class VectorDatabaseSetup:
                     ON CONFLICT (sintoma) DO UPDATE SET
                         embedding = EXCLUDED.embedding,
                         categoria = EXCLUDED.categoria;
-                """, (sintoma, embedding_ficticio, categoria))
+                """, (sintoma, embedding_ficticio, categoria), nome="upsert_embedding_sintoma")
             
             conn.commit()
             logger.info(f"✅ {len(sintomas_comuns)} embeddings iniciais populados")
@@ -208,7 +258,7 @@ class VectorDatabaseSetup:
     def test_vector_operations(self) -> bool:
         """Testa operações vetoriais básicas."""
         try:
-            conn = psycopg2.connect(**self.connection_params, database=self.database)
+            conn = self.connect()
             cursor = conn.cursor()
             
             # Testa similaridade de cosseno
@@ -221,7 +271,7 @@ class VectorDatabaseSetup:
                 FROM embeddings_sintomas
                 ORDER BY similaridade DESC
                 LIMIT 3;
-            """, (test_embedding,))
+            """, (test_embedding,), nome="teste_similaridade_vetorial")
             
             resultados = cursor.fetchall()
             logger.info("🧪 Teste de similaridade vetorial:")
@@ -229,7 +279,8 @@ class VectorDatabaseSetup:
                 logger.info(f"   - {sintoma}: {similaridade:.4f}")
             
             # Testa operações matemáticas vetoriais
-            cursor.execute("SELECT embedding + embedding FROM embeddings_sintomas LIMIT 1;")
+            cursor.execute("SELECT embedding + embedding FROM embeddings_sintomas LIMIT 1;",
+                           nome="teste_soma_vetorial")
             logger.info("✅ Operações vetoriais funcionando corretamente")
             
             cursor.close()
@@ -243,7 +294,7 @@ class VectorDatabaseSetup:
     def create_hybrid_search_function(self) -> bool:
         """Cria função para busca híbrida (texto + vetorial)."""
         try:
-            conn = psycopg2.connect(**self.connection_params, database=self.database)
+            conn = self.connect()
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -282,7 +333,7 @@ class VectorDatabaseSetup:
                     LIMIT limite_resultados;
                 END;
                 $$ LANGUAGE plpgsql;
-            """)
+            """, nome="criar_funcao_busca_hibrida")
             
             conn.commit()
             logger.info("✅ Função de busca híbrida criada")
@@ -303,9 +354,11 @@ class VectorDatabaseSetup:
             ("Teste de conexão", self.test_connection),
             ("Criação do banco de dados", self.create_database),
             ("Habilitação da extensão vector", self.enable_vector_extension),
+            ("Aplicação de migrações", self.apply_migrations),
             ("Criação de tabelas vetoriais", self.create_vector_tables),
             ("População de embeddings iniciais", self.populate_initial_embeddings),
             ("Criação de função de busca híbrida", self.create_hybrid_search_function),
+            ("Versionamento de embeddings", self.setup_embedding_versions),
             ("Teste de operações vetoriais", self.test_vector_operations)
         ]
         
@@ -324,10 +377,12 @@ class VectorDatabaseSetup:
             logger.info(f"👤 Usuário: {self.user}")
             logger.info("\n✨ Recursos disponíveis:")
             logger.info("   • Extensão pgvector habilitada")
+            logger.info("   • Migrações versionadas em schema_migrations")
             logger.info("   • Tabelas para embeddings")
             logger.info("   • Índices IVFFlat para busca eficiente")
             logger.info("   • Funções de busca híbrida")
             logger.info("   • Cache de embeddings")
+            logger.info("   • Versões de embedding com troca atômica")
         else:
             logger.error("\n💥 Setup falhou. Verifique os logs acima.")
         
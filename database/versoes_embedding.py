@@ -0,0 +1,601 @@
+#!/usr/bin/env python3
+"""
+Versionamento de embeddings para troca de modelo sem indisponibilidade.
+Cada modelo tem uma versão registrada em versoes_embedding; versões novas
+gravam em tabelas sombra próprias enquanto as buscas continuam servidas pela
+versão ativa por meio das views triagens_embeddings_ativas e
+embeddings_sintomas_ativos. O fluxo é: iniciar (gravação dupla ligada),
+recalcular em segundo plano, indexar e ativar, que troca as views em uma
+única transação.
+"""
+
+import hashlib
+import logging
+import sys
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import psycopg2
+import psycopg2.errors
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from psycopg2.extras import execute_values
+
+from backfill_embeddings import ControleVazao
+from embeddings import DIMENSAO_EMBEDDING, MODELO_PADRAO, EncoderSentenca, vetor_para_sql
+from ingestao_embeddings import EmbeddingDeduplicator
+from vector_setup import VectorDatabaseSetup, listas_ivfflat
+
+logger = logging.getLogger(__name__)
+
+# Versões que recebem gravação dupla
+ESTADOS_GRAVACAO = ('recalculando', 'indexando', 'pronta', 'ativa')
+
+# Hash do texto de origem gravado nas tabelas sombra; deve coincidir com hash_conteudo
+HASH_CONTEUDO_SQL = "md5(coalesce(t.sintomas, '') || chr(31) || coalesce(t.descricao_completa, ''))"
+
+
+def hash_conteudo(sintomas: Optional[str], descricao: Optional[str]) -> str:
+    """Hash dos textos de uma triagem, igual ao calculado por HASH_CONTEUDO_SQL."""
+    return hashlib.md5(f"{sintomas or ''}\x1f{descricao or ''}".encode("utf-8")).hexdigest()
+
+
+@dataclass
+class VersaoEmbedding:
+    """Modelo de embeddings registrado e onde seus vetores ficam."""
+
+    id: int
+    modelo: str
+    dimensao: int
+    estado: str
+    legado: bool
+
+    @property
+    def tabela_triagens(self) -> str:
+        return "triagens" if self.legado else f"triagens_embeddings_v{self.id}"
+
+    @property
+    def tabela_sintomas(self) -> str:
+        return "embeddings_sintomas" if self.legado else f"embeddings_sintomas_v{self.id}"
+
+
+def modelo_ativo(db: VectorDatabaseSetup) -> str:
+    """Modelo da versão que serve as buscas (o padrão se não houver versionamento)."""
+    conn = db.connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT modelo FROM versoes_embedding WHERE estado = 'ativa'",
+                       nome="consultar_modelo_ativo")
+        linha = cursor.fetchone()
+        cursor.close()
+    except psycopg2.errors.UndefinedTable:
+        linha = None
+    finally:
+        conn.close()
+    return linha[0] if linha else MODELO_PADRAO
+
+
+def dimensao_ativa(db: VectorDatabaseSetup) -> int:
+    """Dimensão dos vetores da versão que serve as buscas."""
+    conn = db.connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT dimensao FROM versoes_embedding WHERE estado = 'ativa'",
+                       nome="consultar_dimensao_ativa")
+        linha = cursor.fetchone()
+        cursor.close()
+    except psycopg2.errors.UndefinedTable:
+        linha = None
+    finally:
+        conn.close()
+    return linha[0] if linha else DIMENSAO_EMBEDDING
+
+
+class VersionamentoEmbeddings:
+    """Ciclo de vida das versões de embedding e troca atômica da versão ativa."""
+
+    def __init__(self, db: VectorDatabaseSetup, tamanho_lote: int = 500, **opcoes_vazao):
+        self.db = db
+        self.tamanho_lote = tamanho_lote
+        self.opcoes_vazao = opcoes_vazao
+        self._deduplicadores = {}
+
+    def create_tables(self) -> bool:
+        """Registra a versão legada, cria as views ativas e as funções de busca sobre elas."""
+        try:
+            conn = self.db.connect()
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS versoes_embedding (
+                    id SERIAL PRIMARY KEY,
+                    modelo VARCHAR(100) UNIQUE NOT NULL,
+                    dimensao INT NOT NULL,
+                    estado VARCHAR(20) NOT NULL CHECK (estado IN
+                        ('recalculando', 'indexando', 'pronta', 'ativa', 'aposentada')),
+                    legado BOOLEAN NOT NULL DEFAULT FALSE,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    ativada_em TIMESTAMP
+                );
+            """, nome="criar_tabela_versoes_embedding")
+            cursor.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_versoes_embedding_ativa
+                ON versoes_embedding (estado) WHERE estado = 'ativa';
+            """, nome="criar_indice_versao_ativa")
+            # As colunas originais (VECTOR(384)) são a versão legada
+            cursor.execute("""
+                INSERT INTO versoes_embedding (modelo, dimensao, estado, legado, ativada_em)
+                SELECT %s, %s, 'ativa', TRUE, CURRENT_TIMESTAMP
+                WHERE NOT EXISTS (SELECT 1 FROM versoes_embedding)
+            """, (MODELO_PADRAO, DIMENSAO_EMBEDDING), nome="registrar_versao_legada")
+            cursor.execute("SELECT to_regclass('triagens_embeddings_ativas') IS NOT NULL",
+                           nome="verificar_views_ativas")
+            if not cursor.fetchone()[0]:
+                cursor.execute("SELECT id, modelo, dimensao, estado, legado "
+                               "FROM versoes_embedding WHERE estado = 'ativa'",
+                               nome="carregar_versao_ativa")
+                self._criar_views(cursor, VersaoEmbedding(*cursor.fetchone()))
+            self._criar_funcoes(cursor)
+            conn.commit()
+            cursor.close()
+            conn.close()
+            logger.info("✅ Versionamento de embeddings configurado")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao configurar versionamento de embeddings: {e}")
+            return False
+
+    @staticmethod
+    def _criar_views(cursor, versao: VersaoEmbedding):
+        cursor.execute("DROP VIEW IF EXISTS triagens_embeddings_ativas",
+                       nome="remover_view_triagens_ativas")
+        cursor.execute("DROP VIEW IF EXISTS embeddings_sintomas_ativos",
+                       nome="remover_view_sintomas_ativos")
+        chave = "id" if versao.legado else "triagem_id"
+        cursor.execute(f"""
+            CREATE VIEW triagens_embeddings_ativas AS
+            SELECT {chave} AS triagem_id, embedding_sintomas, embedding_descricao
+            FROM {versao.tabela_triagens}
+        """, nome="criar_view_triagens_ativas")
+        cursor.execute(f"""
+            CREATE VIEW embeddings_sintomas_ativos AS
+            SELECT sintoma, categoria, embedding
+            FROM {versao.tabela_sintomas}
+        """, nome="criar_view_sintomas_ativos")
+
+    @staticmethod
+    def _criar_funcoes(cursor):
+        """Funções de busca lendo das views; o VECTOR sem dimensão aceita qualquer modelo."""
+        cursor.execute("""
+            CREATE OR REPLACE FUNCTION calcular_similaridade_sintomas(
+                embedding_input VECTOR,
+                limite_similaridade DECIMAL DEFAULT 0.7
+            )
+            RETURNS TABLE (
+                triagem_id UUID,
+                sintomas TEXT,
+                similaridade DECIMAL
+            ) AS $$
+            BEGIN
+                RETURN QUERY
+                SELECT
+                    t.id,
+                    t.sintomas,
+                    (1 - (e.embedding_sintomas <=> embedding_input))::DECIMAL as similaridade
+                FROM triagens_embeddings_ativas e
+                JOIN triagens t ON t.id = e.triagem_id
+                WHERE 1 - (e.embedding_sintomas <=> embedding_input) > limite_similaridade
+                ORDER BY e.embedding_sintomas <=> embedding_input
+                LIMIT 10;
+            END;
+            $$ LANGUAGE plpgsql;
+        """, nome="criar_funcao_similaridade_versionada")
+        cursor.execute("""
+            CREATE OR REPLACE FUNCTION buscar_sintomas_similares(
+                query_text TEXT,
+                query_embedding VECTOR,
+                limite_similaridade DECIMAL DEFAULT 0.5,
+                limite_resultados INT DEFAULT 10
+            )
+            RETURNS TABLE (
+                sintoma VARCHAR,
+                categoria VARCHAR,
+                similaridade_vetorial DECIMAL,
+                similaridade_textual DECIMAL,
+                score_final DECIMAL
+            ) AS $$
+            BEGIN
+                RETURN QUERY
+                SELECT
+                    es.sintoma,
+                    es.categoria,
+                    (1 - (es.embedding <=> query_embedding))::DECIMAL as sim_vetorial,
+                    similarity(es.sintoma, query_text)::DECIMAL as sim_textual,
+                    (0.7 * (1 - (es.embedding <=> query_embedding)) +
+                     0.3 * similarity(es.sintoma, query_text))::DECIMAL as score_final
+                FROM embeddings_sintomas_ativos es
+                WHERE
+                    1 - (es.embedding <=> query_embedding) > limite_similaridade OR
+                    similarity(es.sintoma, query_text) > 0.3
+                ORDER BY score_final DESC
+                LIMIT limite_resultados;
+            END;
+            $$ LANGUAGE plpgsql;
+        """, nome="criar_funcao_busca_hibrida_versionada")
+
+    def versoes(self, estados: Optional[Sequence[str]] = None) -> List[VersaoEmbedding]:
+        """Versões registradas, opcionalmente filtradas por estado."""
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, modelo, dimensao, estado, legado
+                FROM versoes_embedding
+                WHERE %s::text[] IS NULL OR estado = ANY(%s::text[])
+                ORDER BY id
+            """, (list(estados) if estados else None,) * 2, nome="listar_versoes_embedding")
+            versoes = [VersaoEmbedding(*linha) for linha in cursor.fetchall()]
+            cursor.close()
+        finally:
+            conn.close()
+        return versoes
+
+    def versao(self, modelo: str) -> VersaoEmbedding:
+        for versao in self.versoes():
+            if versao.modelo == modelo:
+                return versao
+        raise ValueError(f"Modelo '{modelo}' não registrado")
+
+    def _deduplicador(self, versao: VersaoEmbedding) -> EmbeddingDeduplicator:
+        if versao.modelo not in self._deduplicadores:
+            self._deduplicadores[versao.modelo] = EmbeddingDeduplicator(
+                self.db, EncoderSentenca(versao.modelo))
+        return self._deduplicadores[versao.modelo]
+
+    def iniciar(self, modelo: str) -> VersaoEmbedding:
+        """Registra o modelo, cria as tabelas sombra e liga a gravação dupla."""
+        dimensao = len(EncoderSentenca(modelo).encode(["dimensao"])[0])
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO versoes_embedding (modelo, dimensao, estado)
+                VALUES (%s, %s, 'recalculando')
+                RETURNING id, modelo, dimensao, estado, legado
+            """, (modelo, dimensao), nome="registrar_versao_embedding")
+            versao = VersaoEmbedding(*cursor.fetchone())
+            cursor.execute(f"""
+                CREATE TABLE {versao.tabela_triagens} (
+                    triagem_id UUID PRIMARY KEY REFERENCES triagens(id) ON DELETE CASCADE,
+                    embedding_sintomas VECTOR({dimensao}),
+                    embedding_descricao VECTOR({dimensao}),
+                    texto_hash CHAR(32) NOT NULL,
+                    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """, nome="criar_tabela_sombra_triagens")
+            cursor.execute(f"""
+                CREATE TABLE {versao.tabela_sintomas} (
+                    sintoma VARCHAR(255) PRIMARY KEY,
+                    categoria VARCHAR(100),
+                    embedding VECTOR({dimensao}) NOT NULL
+                )
+            """, nome="criar_tabela_sombra_sintomas")
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+        logger.info(f"🆕 Versão {versao.id} ({modelo}, {dimensao} dimensões) em recálculo")
+        return versao
+
+    def ingerir_triagens(self, triagens: Sequence[Tuple[str, str, Optional[str]]]) -> int:
+        """Gravação dupla: calcula e grava os embeddings em todas as versões em uso.
+
+        Cada item é (triagem_id, sintomas, descricao_completa).
+        """
+        if not triagens:
+            return 0
+        self.gravar_triagens(self.preparar_triagens(triagens))
+        self.registrar_estatisticas()
+        return len(triagens)
+
+    def preparar_triagens(self, triagens: Sequence[Tuple[str, str, Optional[str]]]
+                          ) -> List[Tuple[VersaoEmbedding, list]]:
+        """Calcula os embeddings de cada versão em uso sem gravá-los."""
+        return [(versao, self._preparar(versao, triagens))
+                for versao in self.versoes(ESTADOS_GRAVACAO)]
+
+    def gravar_triagens(self, preparados: Sequence[Tuple[VersaoEmbedding, list]]) -> None:
+        """Grava os embeddings calculados por preparar_triagens."""
+        for versao, valores in preparados:
+            self._gravar(versao, valores)
+
+    def registrar_estatisticas(self) -> None:
+        """Acumula as estatísticas de deduplicação de todos os modelos usados."""
+        for deduplicador in self._deduplicadores.values():
+            deduplicador.registrar_estatisticas()
+
+    def ingerir_pendentes(self, limite: int = 1000) -> int:
+        """Processa triagens sem vetor atualizado em alguma versão em uso."""
+        versoes = self.versoes(ESTADOS_GRAVACAO)
+        if not versoes:
+            return 0
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT t.id::text, t.sintomas, t.descricao_completa
+                FROM triagens t
+                WHERE {" OR ".join(self._filtro_pendentes(v) for v in versoes)}
+                ORDER BY t.created_at
+                LIMIT %s
+            """, (limite,), nome="selecionar_triagens_pendentes_versoes")
+            triagens = cursor.fetchall()
+            cursor.close()
+        finally:
+            conn.close()
+        return self.ingerir_triagens(triagens)
+
+    @staticmethod
+    def _filtro_pendentes(versao: VersaoEmbedding) -> str:
+        """Condição sobre triagens t: sem vetor na versão ou com vetor de um texto antigo."""
+        if versao.legado:
+            return "t.embedding_sintomas IS NULL"
+        return f"""NOT EXISTS (
+            SELECT 1 FROM {versao.tabela_triagens} v
+            WHERE v.triagem_id = t.id AND v.texto_hash = {HASH_CONTEUDO_SQL})"""
+
+    def _preparar(self, versao: VersaoEmbedding,
+                  triagens: Sequence[Tuple[str, str, Optional[str]]]) -> list:
+        valores = self._deduplicador(versao).preparar_triagens(triagens)
+        if versao.legado:
+            return valores
+        return [(*valor, hash_conteudo(sintomas, descricao))
+                for valor, (_, sintomas, descricao) in zip(valores, triagens)]
+
+    def _gravar(self, versao: VersaoEmbedding, valores: list) -> None:
+        if versao.legado:
+            self._deduplicador(versao).gravar_triagens(valores)
+            return
+        if not valores:
+            return
+
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            execute_values(cursor, f"""
+                INSERT INTO {versao.tabela_triagens}
+                    (triagem_id, embedding_sintomas, embedding_descricao, texto_hash)
+                VALUES %s
+                ON CONFLICT (triagem_id) DO UPDATE SET
+                    embedding_sintomas = EXCLUDED.embedding_sintomas,
+                    embedding_descricao = EXCLUDED.embedding_descricao,
+                    texto_hash = EXCLUDED.texto_hash,
+                    atualizado_em = CURRENT_TIMESTAMP
+            """, valores, template="(%s::uuid, %s::vector, %s::vector, %s)")
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+
+    def recalcular(self, modelo: str) -> int:
+        """Preenche a versão com as triagens e o vocabulário que ainda faltam.
+
+        Também recalcula as triagens cujo texto mudou depois do vetor gravado.
+        """
+        versao = self.versao(modelo)
+        if versao.estado == 'aposentada':
+            # Religa a gravação dupla antes de varrer a tabela
+            self._definir_estado(versao, 'recalculando')
+        if versao.legado:
+            # Volta à versão legada: completa as colunas originais que ficaram nulas
+            total = 0
+            while (processadas := self.ingerir_pendentes(self.tamanho_lote)):
+                total += processadas
+            self._definir_estado(versao, 'pronta')
+            return total
+        self._recalcular_vocabulario(versao)
+
+        vazao = ControleVazao(lote=self.tamanho_lote, **self.opcoes_vazao)
+        ultimo, total = None, 0
+        while True:
+            inicio_lote = time.perf_counter()
+            conn = self.db.connect()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(f"""
+                    SELECT t.id::text, t.sintomas, t.descricao_completa
+                    FROM triagens t
+                    WHERE {self._filtro_pendentes(versao)}
+                      AND (%s::uuid IS NULL OR t.id > %s::uuid)
+                    ORDER BY t.id
+                    LIMIT %s
+                """, (ultimo, ultimo, vazao.lote), nome="recalculo_selecionar_lote")
+                triagens = cursor.fetchall()
+                cursor.close()
+            finally:
+                conn.close()
+            if not triagens:
+                break
+
+            valores = self._preparar(versao, triagens)
+            inicio_gravacao = time.perf_counter()
+            self._gravar(versao, valores)
+            gravacao_ms = (time.perf_counter() - inicio_gravacao) * 1000
+            self.registrar_estatisticas()
+            ultimo = triagens[-1][0]
+            total += len(triagens)
+            pausa = vazao.registrar(len(triagens), gravacao_ms, time.perf_counter() - inicio_lote)
+            if pausa > 0:
+                time.sleep(pausa)
+
+        self._definir_estado(versao, 'indexando')
+        logger.info(f"✅ Versão {versao.id}: {total} triagens recalculadas")
+        return total
+
+    def _recalcular_vocabulario(self, versao: VersaoEmbedding) -> None:
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT sintoma, categoria FROM embeddings_sintomas",
+                           nome="carregar_vocabulario_sintomas")
+            vocabulario = cursor.fetchall()
+            if vocabulario:
+                vetores = self._deduplicador(versao).encode([s for s, _ in vocabulario])
+                execute_values(cursor, f"""
+                    INSERT INTO {versao.tabela_sintomas} (sintoma, categoria, embedding)
+                    VALUES %s
+                    ON CONFLICT (sintoma) DO UPDATE SET
+                        categoria = EXCLUDED.categoria, embedding = EXCLUDED.embedding
+                """, [(s, c, vetor_para_sql(v)) for (s, c), v in zip(vocabulario, vetores)],
+                    template="(%s, %s, %s::vector)")
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+
+    def indexar(self, modelo: str) -> None:
+        """Constrói os índices IVFFlat da versão sem bloquear gravações."""
+        versao = self.versao(modelo)
+        conn = self.db.connect()
+        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT COUNT(*) FROM {versao.tabela_triagens}",
+                           nome="contar_tabela_sombra")
+            listas = listas_ivfflat(cursor.fetchone()[0])
+            indices = [
+                (f"idx_{versao.tabela_triagens}_sintomas", versao.tabela_triagens,
+                 "embedding_sintomas", listas),
+                (f"idx_{versao.tabela_triagens}_descricao", versao.tabela_triagens,
+                 "embedding_descricao", listas),
+                (f"idx_{versao.tabela_sintomas}", versao.tabela_sintomas, "embedding", 100),
+            ]
+            for nome, tabela, coluna, n in indices:
+                inicio = time.perf_counter()
+                # Um CREATE INDEX CONCURRENTLY interrompido deixa o índice INVALID,
+                # que o IF NOT EXISTS pularia
+                cursor.execute("""
+                    SELECT NOT i.indisvalid FROM pg_index i
+                    WHERE i.indexrelid = to_regclass(%s)
+                """, (nome,), nome="verificar_indice_invalido")
+                linha = cursor.fetchone()
+                if linha and linha[0]:
+                    logger.warning(f"⚠️ {nome} inválido; recriando")
+                    cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {nome}",
+                                   nome=f"remover_indice_invalido:{tabela}")
+                cursor.execute(f"""
+                    CREATE INDEX CONCURRENTLY IF NOT EXISTS {nome}
+                    ON {tabela} USING ivfflat ({coluna} vector_cosine_ops)
+                    WITH (lists = {n})
+                """, nome=f"criar_indice:{tabela}")
+                logger.info(f"   🔧 {nome}: {time.perf_counter() - inicio:.1f}s")
+            cursor.close()
+        finally:
+            conn.close()
+        self._definir_estado(versao, 'pronta')
+
+    def ativar(self, modelo: str) -> None:
+        """Troca a versão ativa em uma transação, se a nova estiver completa."""
+        nova = self.versao(modelo)
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            if not nova.legado:
+                cursor.execute(f"""
+                    SELECT
+                        (SELECT COUNT(*) FROM triagens t WHERE {self._filtro_pendentes(nova)}),
+                        (SELECT COUNT(*) FROM embeddings_sintomas s WHERE NOT EXISTS (
+                            SELECT 1 FROM {nova.tabela_sintomas} v WHERE v.sintoma = s.sintoma)),
+                        (SELECT COUNT(*) FROM pg_index i
+                         WHERE i.indrelid IN (%s::regclass, %s::regclass) AND NOT i.indisvalid)
+                """, (nova.tabela_triagens, nova.tabela_sintomas), nome="verificar_versao_completa")
+                faltam_triagens, faltam_sintomas, invalidos = cursor.fetchone()
+                if faltam_triagens or faltam_sintomas or invalidos:
+                    raise RuntimeError(
+                        f"Versão {nova.id} incompleta: {faltam_triagens} triagens sem vetor "
+                        f"atualizado, {faltam_sintomas} sintomas sem vetor, "
+                        f"{invalidos} índices inválidos")
+
+            cursor.execute("LOCK TABLE versoes_embedding IN EXCLUSIVE MODE",
+                           nome="bloquear_versoes_embedding")
+            cursor.execute("""
+                UPDATE versoes_embedding SET estado = 'aposentada'
+                WHERE estado = 'ativa' AND id <> %s
+            """, (nova.id,), nome="aposentar_versao_ativa")
+            cursor.execute("""
+                UPDATE versoes_embedding SET estado = 'ativa', ativada_em = CURRENT_TIMESTAMP
+                WHERE id = %s
+            """, (nova.id,), nome="ativar_versao_embedding")
+            self._criar_views(cursor, nova)
+            conn.commit()
+            cursor.close()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        logger.info(f"🔀 Buscas servidas pela versão {nova.id} ({nova.modelo})")
+
+    def migrar(self, modelo: str) -> None:
+        """Executa o fluxo completo, retomando do estado atual da versão."""
+        existentes = {v.modelo: v for v in self.versoes()}
+        if modelo not in existentes:
+            self.iniciar(modelo)
+        estado = self.versao(modelo).estado
+        if estado in ('recalculando', 'aposentada'):
+            self.recalcular(modelo)
+        if self.versao(modelo).estado == 'indexando':
+            self.indexar(modelo)
+        # Gravações feitas durante a indexação já chegaram por gravação dupla
+        self.ativar(modelo)
+
+    def _definir_estado(self, versao: VersaoEmbedding, estado: str) -> None:
+        conn = self.db.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE versoes_embedding SET estado = %s WHERE id = %s",
+                           (estado, versao.id), nome="definir_estado_versao")
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+
+
+def main():
+    """Função principal."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Versionamento de embeddings Aurora AI')
+    parser.add_argument('acao', choices=['status', 'iniciar', 'recalcular', 'indexar', 'ativar', 'migrar'])
+    parser.add_argument('--modelo', help='Modelo sentence-transformers da versão')
+    parser.add_argument('--lote', type=int, default=500, help='Lote inicial do recálculo')
+    parser.add_argument('--host', default='localhost', help='Host do PostgreSQL')
+    parser.add_argument('--port', type=int, default=5432, help='Porta do PostgreSQL')
+    parser.add_argument('--database', default='aurora_ai', help='Nome do banco de dados')
+    parser.add_argument('--user', default='admin', help='Usuário do banco')
+    parser.add_argument('--password', default='aurora123', help='Senha do banco')
+
+    args = parser.parse_args()
+    if args.acao != 'status' and not args.modelo:
+        parser.error('--modelo é obrigatório para esta ação')
+
+    db = VectorDatabaseSetup(host=args.host, port=args.port, database=args.database,
+                             user=args.user, password=args.password)
+    versionamento = VersionamentoEmbeddings(db, tamanho_lote=args.lote)
+    if not versionamento.create_tables():
+        sys.exit(1)
+
+    try:
+        if args.acao == 'status':
+            for versao in versionamento.versoes():
+                logger.info(f"   - v{versao.id} {versao.modelo} ({versao.dimensao}d): {versao.estado}")
+        else:
+            getattr(versionamento, args.acao)(args.modelo)
+    except Exception as e:
+        logger.error(f"❌ Erro ao executar '{args.acao}': {e}")
+        sys.exit(1)
+
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""
+Configuração comum dos testes.
+Os módulos de database/ se importam pelo nome (como quando executados como
+script), então o diretório entra no sys.path.
+"""
+
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(RAIZ / "database"))
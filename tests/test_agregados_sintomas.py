@@ -0,0 +1,208 @@
+"""
+Testes da tokenização de sintomas, da agregação por lote com matrizes
+esparsas e do coeficiente phi; a marca d'água incremental roda contra um
+PostgreSQL local (AURORA_TESTE_PRIMARIO=host:porta).
+"""
+
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("psycopg2")
+pytest.importorskip("pandas")
+pytest.importorskip("scipy")
+
+import agregados_sintomas  # noqa: E402
+from agregados_sintomas import (  # noqa: E402
+    AgregadorSintomas,
+    TokenizadorSintomas,
+    carregar_correlacao,
+    inicio_semana,
+)
+from vector_setup import VectorDatabaseSetup  # noqa: E402
+
+VOCABULARIO = ["Dor", "Dor de cabeça", "Febre", "Tosse"]
+
+
+def test_tokenizador_prefere_o_termo_mais_longo():
+    tokenizador = TokenizadorSintomas(VOCABULARIO)
+
+    assert tokenizador.tokenizar("DOR DE CABEÇA e febre") == {1, 2}
+    assert tokenizador.tokenizar("dor nas costas") == {0}
+
+
+def test_tokenizador_respeita_limites_de_palavra():
+    tokenizador = TokenizadorSintomas(VOCABULARIO)
+
+    assert tokenizador.tokenizar("febres e tosseira") == set()
+    assert tokenizador.tokenizar("Tosse/Febre") == {2, 3}
+
+
+def test_tokenizador_sem_vocabulario_ou_texto():
+    assert TokenizadorSintomas([]).tokenizar("febre") == set()
+    assert TokenizadorSintomas(VOCABULARIO).tokenizar(None) == set()
+
+
+@pytest.fixture
+def gravacoes(monkeypatch):
+    """Captura os INSERTs de _agregar_lote por tabela de destino."""
+    capturas = {}
+
+    def execute_values(cursor, sql, valores, **kwargs):
+        tabela = sql.split("INSERT INTO", 1)[1].split()[0]
+        capturas[tabela] = sorted(valores)
+
+    monkeypatch.setattr(agregados_sintomas, "execute_values", execute_values)
+    return capturas
+
+
+def test_agregar_lote_conta_semanas_coocorrencias_e_marginais(gravacoes):
+    segunda = datetime(2026, 3, 2, 10)
+    linhas = [
+        (segunda, "Febre e tosse", ["hipertensao", "diabetes"]),
+        (segunda + timedelta(days=3), "febre", ["hipertensao", "hipertensao"]),
+        (segunda + timedelta(days=7), "Tosse", None),
+        (segunda + timedelta(days=8), "sem sintoma conhecido", ["asma"]),
+    ]
+
+    AgregadorSintomas(db=None)._agregar_lote(None, TokenizadorSintomas(VOCABULARIO), linhas)
+
+    semana1, semana2 = inicio_semana(segunda), inicio_semana(segunda + timedelta(days=7))
+    assert gravacoes["agregado_sintomas_semanal"] == sorted([
+        (semana1, "Febre", 2), (semana1, "Tosse", 1), (semana2, "Tosse", 1),
+    ])
+    assert gravacoes["agregado_sintomas_comorbidades"] == sorted([
+        ("Febre", "diabetes", 1), ("Febre", "hipertensao", 2),
+        ("Tosse", "diabetes", 1), ("Tosse", "hipertensao", 1),
+    ])
+    assert gravacoes["agregado_marginais"] == sorted([
+        ("total", "triagens", 4),
+        ("sintoma", "Febre", 2), ("sintoma", "Tosse", 2),
+        ("comorbidade", "asma", 1), ("comorbidade", "diabetes", 1),
+        ("comorbidade", "hipertensao", 2),
+    ])
+
+
+class BancoAgregados:
+    """Devolve marginais e coocorrências fixas às consultas de carregar_correlacao."""
+
+    def __init__(self, marginais, coocorrencias):
+        self.respostas = [marginais, coocorrencias]
+
+    def connect(self):
+        return self
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None, nome=None):
+        pass
+
+    def fetchall(self):
+        return self.respostas.pop(0)
+
+    def close(self):
+        pass
+
+
+def test_phi_entre_sintomas_e_comorbidades():
+    marginais = [
+        ("total", "triagens", 4),
+        ("sintoma", "Febre", 2), ("sintoma", "Tosse", 2),
+        ("comorbidade", "hipertensao", 2), ("comorbidade", "asma", 1),
+    ]
+    coocorrencias = [("Febre", "hipertensao", 2), ("Tosse", "asma", 1)]
+
+    phi = carregar_correlacao(BancoAgregados(marginais, coocorrencias))
+
+    assert phi.loc["Febre", "hipertensao"] == pytest.approx(1.0)
+    assert phi.loc["Tosse", "hipertensao"] == pytest.approx(-1.0)
+    # n=4, a=2, b=1, n11=1: (4 - 2) / sqrt(2·2·1·3)
+    assert phi.loc["Tosse", "asma"] == pytest.approx(2 / np.sqrt(12))
+    assert phi.loc["Febre", "asma"] == pytest.approx(-2 / np.sqrt(12))
+
+
+def test_phi_sem_agregados_e_vazio():
+    assert carregar_correlacao(BancoAgregados([], [])).empty
+
+
+PRIMARIO = os.getenv("AURORA_TESTE_PRIMARIO")
+
+
+@pytest.fixture
+def agregador_no_banco(monkeypatch):
+    """AgregadorSintomas num schema descartável do PostgreSQL de teste."""
+    if not PRIMARIO:
+        pytest.skip("defina AURORA_TESTE_PRIMARIO (host:porta)")
+    host, _, porta = PRIMARIO.partition(":")
+    db = VectorDatabaseSetup(
+        host=host, port=int(porta or 5432),
+        database=os.getenv("AURORA_TESTE_DB_NAME", "postgres"),
+        user=os.getenv("AURORA_TESTE_DB_USER", "postgres"),
+        password=os.getenv("AURORA_TESTE_DB_PASSWORD", ""),
+    )
+    schema = f"teste_agregados_{uuid.uuid4().hex[:8]}"
+    conn = db.connect()
+    cursor = conn.cursor()
+    cursor.execute("SHOW server_encoding")
+    if cursor.fetchone()[0] != "UTF8":
+        conn.close()
+        pytest.skip("o banco de teste precisa ser UTF8 (AURORA_TESTE_DB_NAME)")
+    cursor.execute(f"""
+        CREATE SCHEMA {schema};
+        CREATE TABLE {schema}.embeddings_sintomas (sintoma VARCHAR(255) PRIMARY KEY);
+        INSERT INTO {schema}.embeddings_sintomas VALUES ('febre');
+        CREATE TABLE {schema}.pacientes (id UUID PRIMARY KEY, comorbidades TEXT[]);
+        CREATE TABLE {schema}.triagens (
+            id UUID PRIMARY KEY,
+            paciente_id UUID,
+            sintomas TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL
+        );
+        SET search_path = {schema};
+    """)
+    conn.commit()
+    monkeypatch.setenv("PGOPTIONS", f"-c search_path={schema}")
+    agregador = AgregadorSintomas(db, atraso_commit=timedelta(minutes=5))
+    assert agregador.create_tables()
+    yield agregador, conn
+    cursor.execute(f"DROP SCHEMA {schema} CASCADE")
+    conn.commit()
+    conn.close()
+
+
+def _inserir_triagem(conn, criada_em: datetime) -> None:
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO triagens (id, sintomas, created_at) VALUES (%s, 'Febre', %s)",
+                   (str(uuid.uuid4()), criada_em))
+    conn.commit()
+
+
+def _casos_febre(conn) -> int:
+    cursor = conn.cursor()
+    cursor.execute("SELECT COALESCE(SUM(casos), 0) FROM agregado_sintomas_semanal")
+    return cursor.fetchone()[0]
+
+
+def test_triagem_confirmada_depois_da_marca_entra_uma_vez(agregador_no_banco):
+    agregador, conn = agregador_no_banco
+    cursor = conn.cursor()
+    cursor.execute("SELECT LOCALTIMESTAMP")
+    agora = cursor.fetchone()[0]
+    _inserir_triagem(conn, agora - timedelta(seconds=30))
+    assert agregador.atualizar_incremental() == 1
+
+    # Transação iniciada antes da marca d'água e confirmada depois dela
+    cursor.execute("SELECT processado_ate FROM controle_agregados")
+    _inserir_triagem(conn, cursor.fetchone()[0] - timedelta(minutes=1))
+
+    assert agregador.atualizar_incremental() == 1
+    assert agregador.atualizar_incremental() == 0
+    assert _casos_febre(conn) == 2
+
+    assert agregador.reconstruir() == 2
+    assert agregador.atualizar_incremental() == 0
+    assert _casos_febre(conn) == 2
@@ -0,0 +1,140 @@
+"""
+Testes da seleção de meses e filtros de ConsultaHistorica.ler e dos
+checksums do arquivamento frio; a comparação com o md5 calculado pelo banco
+roda contra um PostgreSQL local (AURORA_TESTE_PRIMARIO=host:porta).
+"""
+
+import hashlib
+import os
+from datetime import date, datetime
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+pytest.importorskip("psycopg2")
+
+from arquivamento import ConsultaHistorica, _Checksum, _periodo  # noqa: E402
+from vector_setup import VectorDatabaseSetup  # noqa: E402
+
+MESES = [(2023, 10), (2023, 11), (2023, 12), (2024, 1), (2024, 2), (2024, 3)]
+
+
+@pytest.fixture
+def consulta(tmp_path):
+    """Uma triagem arquivada por mês, gravada no layout tabela/ano=AAAA/mes=MM."""
+    for ano, mes in MESES:
+        arquivo = tmp_path / "triagens" / f"ano={ano}" / f"mes={mes:02d}" / "parte-0.parquet"
+        arquivo.parent.mkdir(parents=True)
+        pq.write_table(pa.table({
+            "id": [f"{ano}-{mes:02d}"],
+            "created_at": pa.array([datetime(ano, mes, 15)], pa.timestamp("us")),
+        }), arquivo)
+    # Sobra de execução interrompida: ignorada pelo dataset
+    (tmp_path / "triagens" / "ano=2024" / "mes=01" / ".parte-0.parquet.tmp").write_bytes(b"lixo")
+    return ConsultaHistorica(db=None, raiz=tmp_path)
+
+
+def _ids(tabela):
+    return sorted(tabela.column("id").to_pylist())
+
+
+def test_ler_atravessa_a_virada_do_ano(consulta):
+    tabela = consulta.ler("triagens", date(2023, 11, 20), date(2024, 2, 10), ["id"])
+
+    assert _ids(tabela) == ["2023-11", "2023-12", "2024-01", "2024-02"]
+    assert tabela.column_names == ["id"]
+
+
+def test_ler_dentro_de_um_mes(consulta):
+    assert _ids(consulta.ler("triagens", date(2024, 1, 1), date(2024, 1, 31))) == ["2024-01"]
+
+
+def test_ler_fora_do_arquivo(consulta):
+    assert consulta.ler("triagens", date(2022, 1, 1), date(2022, 12, 31)).num_rows == 0
+
+
+def test_ler_tabela_sem_arquivos(consulta):
+    tabela = consulta.ler("atendimentos", date(2023, 1, 1), date(2024, 1, 1), ["id", "fila_id"])
+
+    assert tabela.num_rows == 0
+    assert tabela.column_names == ["id", "fila_id"]
+
+
+def test_periodo_de_dezembro_termina_no_ano_seguinte():
+    assert _periodo(2023, 12) == (date(2023, 12, 1), date(2024, 1, 1))
+    assert _periodo(2024, 2) == (date(2024, 2, 1), date(2024, 3, 1))
+
+
+def _checksum(linhas, lotes=1):
+    checksum = _Checksum()
+    tamanho = max(1, len(linhas) // lotes)
+    for i in range(0, len(linhas), tamanho):
+        checksum.atualizar(linhas[i:i + tamanho], posicao_id=0)
+    return checksum
+
+
+def test_checksum_de_ids_e_o_md5_da_lista_separada_por_virgulas():
+    linhas = [("a", 1), ("b", 2), ("c", 3)]
+
+    checksum = _checksum(linhas)
+
+    assert checksum.linhas == 3
+    assert checksum.ids == hashlib.md5(b"a,b,c").hexdigest()
+    assert _Checksum().ids == hashlib.md5(b"").hexdigest()
+
+
+def test_checksum_nao_depende_dos_lotes():
+    linhas = [(str(i), i * 0.5, None) for i in range(10)]
+
+    inteiro, em_lotes = _checksum(linhas), _checksum(linhas, lotes=4)
+
+    assert (inteiro.ids, inteiro.conteudo) == (em_lotes.ids, em_lotes.conteudo)
+
+
+def test_checksum_de_conteudo_detecta_alteracao_e_confere_a_releitura(tmp_path):
+    tabela = pa.table({
+        "id": ["a", "b"],
+        "created_at": pa.array([datetime(2024, 1, 1, 8), None], pa.timestamp("us")),
+        "comorbidades": pa.array([["asma"], None], pa.list_(pa.string())),
+        "embedding": pa.array([[0.1, 0.2], [0.3, 0.4]], pa.list_(pa.float32())),
+    })
+    linhas = [tuple(linha.values()) for linha in tabela.to_pylist()]
+    pq.write_table(tabela, tmp_path / "parte-0.parquet", compression="zstd")
+    relidas = [tuple(linha.values()) for linha in pq.read_table(tmp_path / "parte-0.parquet").to_pylist()]
+
+    assert _checksum(relidas).conteudo == _checksum(linhas).conteudo
+    alteradas = [linhas[0], (*linhas[1][:3], [0.3, 0.5])]
+    assert _checksum(alteradas).ids == _checksum(linhas).ids
+    assert _checksum(alteradas).conteudo != _checksum(linhas).conteudo
+
+
+PRIMARIO = os.getenv("AURORA_TESTE_PRIMARIO")
+
+
+def test_checksum_de_ids_bate_com_o_do_banco():
+    if not PRIMARIO:
+        pytest.skip("defina AURORA_TESTE_PRIMARIO (host:porta)")
+    host, _, porta = PRIMARIO.partition(":")
+    db = VectorDatabaseSetup(
+        host=host, port=int(porta or 5432),
+        database=os.getenv("AURORA_TESTE_DB_NAME", "postgres"),
+        user=os.getenv("AURORA_TESTE_DB_USER", "postgres"),
+        password=os.getenv("AURORA_TESTE_DB_PASSWORD", ""),
+    )
+    ids = sorted(["0b0e7c4e-1f3a-4d8e-9c51-2a6f0d9b7e10", "5f2d9a61-8c4b-4e3f-a7d2-61b0c8e9f345",
+                  "c3a1e5f7-2b9d-4c6e-8f01-7d3b5a9e1c24"])
+    conn = db.connect()
+    try:
+        cursor = conn.cursor()
+        # Mesma expressão de _exportar e arquivar_mes
+        consulta = "SELECT COALESCE(md5(string_agg(id::text, ',' ORDER BY id)), md5('')) FROM unnest(%s::uuid[]) id"
+        cursor.execute(consulta, (ids,))
+        no_banco = cursor.fetchone()[0]
+        cursor.execute(consulta, ([],))
+        vazio = cursor.fetchone()[0]
+    finally:
+        conn.close()
+
+    assert _checksum([(i,) for i in ids]).ids == no_banco
+    assert _Checksum().ids == vazio
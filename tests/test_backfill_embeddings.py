@@ -0,0 +1,59 @@
+"""Testes do ajuste AIMD de lote e pausa do backfill de embeddings."""
+
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("numpy")
+
+from backfill_embeddings import ControleVazao  # noqa: E402
+
+
+def test_gravacao_rapida_aumenta_o_lote_aos_poucos():
+    vazao = ControleVazao(lote=500, lote_minimo=50, latencia_alvo_ms=250)
+
+    pausas = [vazao.registrar(500, gravacao_ms=100, total_s=0.2) for _ in range(3)]
+
+    assert vazao.lote == 650
+    assert pausas == [0.0, 0.0, 0.0]
+
+
+def test_gravacao_lenta_corta_o_lote_pela_metade_e_dobra_a_pausa():
+    vazao = ControleVazao(lote=800, lote_minimo=50, latencia_alvo_ms=250)
+
+    assert vazao.registrar(800, gravacao_ms=400, total_s=0.5) == pytest.approx(0.1)
+    assert vazao.lote == 400
+    assert vazao.registrar(400, gravacao_ms=400, total_s=0.5) == pytest.approx(0.2)
+    assert vazao.lote == 200
+
+
+def test_limites_de_lote_e_pausa():
+    vazao = ControleVazao(lote=60, lote_minimo=50, lote_maximo=100, pausa_maxima_s=0.3)
+
+    for _ in range(5):
+        pausa = vazao.registrar(60, gravacao_ms=1000, total_s=1)
+    assert vazao.lote == 50
+    assert pausa == pytest.approx(0.3)
+
+    for _ in range(5):
+        vazao.registrar(50, gravacao_ms=10, total_s=0.1)
+    assert vazao.lote == 100
+
+
+def test_pausa_diminui_pela_metade_ate_zerar():
+    vazao = ControleVazao(latencia_alvo_ms=250)
+    vazao.registrar(500, gravacao_ms=400, total_s=0.5)
+    vazao.registrar(250, gravacao_ms=400, total_s=0.5)
+
+    pausas = [vazao.registrar(250, gravacao_ms=10, total_s=0.1) for _ in range(6)]
+
+    assert pausas[:2] == [pytest.approx(0.1), pytest.approx(0.05)]
+    assert pausas == sorted(pausas, reverse=True)
+    assert pausas[-1] == 0.0
+
+
+def test_vazao_maxima_impoe_pausa_minima():
+    vazao = ControleVazao(vazao_maxima=1000)
+
+    # 500 linhas a 1000 linhas/s levam 0,5 s; o lote levou 0,2 s
+    assert vazao.registrar(500, gravacao_ms=10, total_s=0.2) == pytest.approx(0.3)
+    assert vazao.registrar(500, gravacao_ms=10, total_s=0.6) == 0.0
@@ -0,0 +1,157 @@
+"""Testes do índice de casos recentes e do orçamento de latência da busca de similares."""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("cachetools")
+
+import psycopg2.errors  # noqa: E402
+
+from casos_similares import IndiceCasosRecentes, SimilarCaseRetriever  # noqa: E402
+
+
+class EncoderFixo:
+    """Devolve sempre o mesmo vetor e conta as chamadas."""
+
+    modelo = "fixo"
+
+    def __init__(self, vetor):
+        self.vetor = np.asarray(vetor, dtype=np.float32)
+        self.chamadas = 0
+
+    def encode(self, textos):
+        self.chamadas += 1
+        return np.tile(self.vetor, (len(textos), 1))
+
+
+class CursorCancelado:
+    def execute(self, sql, params=None, nome=None):
+        if sql.startswith("SET LOCAL"):
+            return
+        raise psycopg2.errors.QueryCanceled("canceling statement due to statement timeout")
+
+    def close(self):
+        pass
+
+
+class ConexaoFalsa:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.fechada = False
+
+    def cursor(self):
+        return self._cursor
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.fechada = True
+
+
+class BancoFalso:
+    """Registra as opções de conexão recebidas."""
+
+    def __init__(self, conexao=None, erro=None):
+        self.conexao = conexao
+        self.erro = erro
+        self.opcoes = []
+
+    def connect(self, **opcoes):
+        self.opcoes.append(opcoes)
+        if self.erro:
+            raise self.erro
+        return self.conexao
+
+
+def _indice(vetores, ids=None):
+    indice = IndiceCasosRecentes(db=None)
+    matriz = np.asarray(vetores, dtype=np.float32)
+    matriz /= np.linalg.norm(matriz, axis=1, keepdims=True)
+    ids = ids or [f"t{i}" for i in range(len(vetores))]
+    indice._snapshot = (ids, [f"sintoma {i}" for i in ids], ["urgente"] * len(ids), matriz)
+    return indice
+
+
+def test_indice_ordena_por_similaridade():
+    indice = _indice([[0, 1], [1, 0.1], [1, 0.5], [1, 0]])
+
+    casos = indice.buscar(np.array([1, 0], dtype=np.float32), k=3, limite_similaridade=0)
+
+    assert [c.triagem_id for c in casos] == ["t3", "t1", "t2"]
+    assert casos[0].similaridade == pytest.approx(1.0)
+    assert casos[0].similaridade >= casos[1].similaridade >= casos[2].similaridade
+
+
+def test_indice_descarta_abaixo_do_limite():
+    indice = _indice([[1, 0], [1, 1], [0, 1]])
+
+    casos = indice.buscar(np.array([1, 0], dtype=np.float32), k=3, limite_similaridade=0.7)
+
+    # cos 45° ≈ 0.707 passa; o ortogonal não
+    assert [c.triagem_id for c in casos] == ["t0", "t1"]
+
+
+def test_indice_com_k_maior_que_o_tamanho():
+    indice = _indice([[1, 0], [1, 1]])
+
+    casos = indice.buscar(np.array([1, 0], dtype=np.float32), k=10, limite_similaridade=0)
+
+    assert [c.triagem_id for c in casos] == ["t0", "t1"]
+
+
+def test_indice_vazio_nao_busca():
+    assert IndiceCasosRecentes(db=None).buscar(np.ones(2, dtype=np.float32), 5, 0) == []
+
+
+def test_resultado_completo_vai_para_o_cache():
+    encoder = EncoderFixo([1, 0])
+    servico = SimilarCaseRetriever(BancoFalso(), encoder=encoder, limite_similaridade=0.5)
+    servico.indice = _indice([[1, 0], [1, 0.2]])
+
+    primeiro = servico.buscar("Febre alta", k=2)
+    segundo = servico.buscar("  febre ALTA ", k=2)
+
+    assert primeiro.origem == "recente" and not primeiro.parcial
+    assert segundo.origem == "cache"
+    assert [c.triagem_id for c in segundo.casos] == [c.triagem_id for c in primeiro.casos]
+    assert encoder.chamadas == 1
+
+
+def test_orcamento_esgotado_retorna_parcial_sem_cache():
+    banco = BancoFalso()
+    servico = SimilarCaseRetriever(banco, encoder=EncoderFixo([1, 0]), orcamento_ms=0)
+    servico.indice = _indice([[1, 0]])
+
+    resultado = servico.buscar("febre", k=3)
+
+    assert resultado.parcial
+    assert [c.triagem_id for c in resultado.casos] == ["t0"]
+    assert banco.opcoes == []
+    assert servico.buscar("febre", k=3).origem != "cache"
+
+
+def test_busca_historica_cancelada_retorna_parcial():
+    conexao = ConexaoFalsa(CursorCancelado())
+    banco = BancoFalso(conexao)
+    servico = SimilarCaseRetriever(banco, encoder=EncoderFixo([1, 0]), orcamento_ms=5000)
+    servico.indice = _indice([[1, 0]])
+
+    resultado = servico.buscar("febre", k=3)
+
+    assert resultado.parcial and resultado.origem == "recente"
+    assert [c.triagem_id for c in resultado.casos] == ["t0"]
+    assert conexao.fechada
+    assert servico.buscar("febre", k=3).origem != "cache"
+
+
+def test_conexao_historica_tem_tempo_limite():
+    banco = BancoFalso(erro=psycopg2.OperationalError("timeout expired"))
+    servico = SimilarCaseRetriever(banco, encoder=EncoderFixo([1, 0]), orcamento_ms=150)
+    servico.indice = _indice([[1, 0]])
+
+    resultado = servico.buscar("febre", k=3)
+
+    assert resultado.parcial
+    assert banco.opcoes == [{"connect_timeout": 1}]
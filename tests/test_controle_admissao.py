@@ -0,0 +1,204 @@
+"""Testes da classificação preliminar, da fila de admissão, dos níveis de degradação
+e da auditoria em lotes."""
+
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("prometheus_client")
+
+from prometheus_client import REGISTRY  # noqa: E402
+
+import controle_admissao  # noqa: E402
+from controle_admissao import (  # noqa: E402
+    AuditoriaEmLotes,
+    ControleAdmissao,
+    Degradacao,
+    SobrecargaError,
+    prioridade_preliminar,
+)
+
+EMERGENCIA = {"saturacao_o2": 85}
+URGENTE = {"temperatura": 39.5}
+ELETIVO = {"sintomas": "Tosse"}
+
+
+@pytest.mark.parametrize("pedido", [
+    {"saturacao_o2": 88},
+    {"frequencia_cardiaca": 35},
+    {"frequencia_cardiaca": 150},
+    {"temperatura": 40.2},
+    {"sintomas": "Dor no peito + Tontura"},
+    {"descricao_completa": "Teve uma CONVULSÃO em casa"},
+])
+def test_sinais_criticos_sao_emergencia(pedido):
+    assert prioridade_preliminar(pedido) == 'emergencia'
+
+
+@pytest.mark.parametrize("pedido", [
+    {"saturacao_o2": 92},
+    {"temperatura": 39.0},
+    {"intensidade_dor": 8},
+])
+def test_sinais_alterados_sao_urgentes(pedido):
+    assert prioridade_preliminar(pedido) == 'urgente'
+
+
+def test_dor_moderada_e_prioritaria():
+    assert prioridade_preliminar({"intensidade_dor": 5, "sintomas": "Dor nas costas"}) == 'prioritario'
+
+
+def test_sem_sinais_e_eletivo():
+    assert prioridade_preliminar({"sintomas": "Tosse", "saturacao_o2": None,
+                                  "temperatura": None, "frequencia_cardiaca": 80}) == 'eletivo'
+    assert prioridade_preliminar({}) == 'eletivo'
+
+
+def test_niveis_de_degradacao_sao_cumulativos():
+    assert Degradacao(0).fator_lote_auditoria == 1
+    assert Degradacao(0).shap_imediato and Degradacao(0).buscar_similares
+    assert Degradacao(1).fator_lote_auditoria > 1 and Degradacao(1).shap_imediato
+    assert not Degradacao(2).shap_imediato and Degradacao(2).buscar_similares
+    assert not Degradacao(3).shap_imediato and not Degradacao(3).buscar_similares
+
+
+def _controle(**opcoes) -> ControleAdmissao:
+    # Sem iniciar(): os pedidos só se acumulam na fila
+    return ControleAdmissao(lambda pedido, degradacao: None, **opcoes)
+
+
+def test_fila_cheia_descarta_o_eletivo_mais_novo():
+    controle = _controle(capacidade=3)
+    antigo, novo, urgente = (controle.submeter(p) for p in (ELETIVO, ELETIVO, URGENTE))
+
+    controle.submeter(URGENTE)
+
+    assert isinstance(novo.exception(timeout=0), SobrecargaError)
+    assert not antigo.done() and not urgente.done()
+    assert controle._tamanho == 3
+
+
+def test_fila_cheia_recusa_o_novo_de_prioridade_igual_ou_menor():
+    controle = _controle(capacidade=2)
+    fila = [controle.submeter(URGENTE) for _ in range(2)]
+
+    assert isinstance(controle.submeter(ELETIVO).exception(timeout=0), SobrecargaError)
+    assert isinstance(controle.submeter(URGENTE).exception(timeout=0), SobrecargaError)
+    assert not any(f.done() for f in fila)
+
+
+def test_emergencia_e_admitida_acima_da_capacidade():
+    controle = _controle(capacidade=1)
+    controle.submeter(EMERGENCIA)
+
+    assert not controle.submeter(EMERGENCIA).done()
+    assert controle._tamanho == 2
+
+
+def test_adiados_acima_do_limite_descartam_os_mais_antigos():
+    controle = _controle(limite_adiados=2)
+    antes = REGISTRY.get_sample_value("aurora_triagem_adiados_descartados_total") or 0
+    tarefas = [lambda i=i: i for i in range(5)]
+
+    for tarefa in tarefas:
+        controle.adiar(tarefa)
+
+    assert list(controle._adiados) == tarefas[-2:]
+    assert REGISTRY.get_sample_value("aurora_triagem_adiados_descartados_total") - antes == 3
+
+
+class BancoLogs:
+    """logs_decisoes_ia em memória: INSERTs via execute_values só ficam visíveis no commit."""
+
+    def __init__(self):
+        self.logs = {}
+        self.inseridos = []
+        self.rowcount = 0
+
+    def connect(self):
+        return self
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None, nome=None):
+        explicacao, log_id = params
+        self.rowcount = int(log_id in self.logs)
+        if self.rowcount:
+            self.logs[log_id][5] = explicacao
+
+    def commit(self):
+        self.logs.update((linha[0], list(linha)) for linha in self.inseridos)
+        self.inseridos = []
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def auditoria(monkeypatch):
+    """AuditoriaEmLotes sem descarga periódica; gravar(cursor, linhas) substitui o INSERT."""
+    banco = BancoLogs()
+    auditoria = AuditoriaEmLotes(banco, intervalo_s=3600, limite_pendentes=3)
+    auditoria.gravar = lambda cursor, linhas: banco.inseridos.extend(linhas)
+    monkeypatch.setattr(controle_admissao, "execute_values",
+                        lambda cursor, sql, linhas, **kwargs: auditoria.gravar(cursor, linhas))
+    yield auditoria, banco
+    # parar() descarrega o que sobrou; os testes podem ter trocado gravar
+    auditoria.gravar = lambda cursor, linhas: banco.inseridos.extend(linhas)
+    auditoria.parar()
+
+
+def _registrar(auditoria) -> str:
+    return auditoria.registrar(None, None, {}, {}, None, 0.01, Degradacao(0))
+
+
+def test_explicacao_de_log_pendente_e_gravado(auditoria):
+    auditoria, banco = auditoria
+    pendente = _registrar(auditoria)
+    auditoria.anexar_explicacao(pendente, {"febre": 0.3})
+    gravado = _registrar(auditoria)
+    auditoria.descarregar()
+
+    auditoria.anexar_explicacao(gravado, {"tosse": 0.1})
+
+    assert banco.logs[pendente][5].adapted == {"febre": 0.3}
+    assert banco.logs[gravado][5].adapted == {"tosse": 0.1}
+
+
+def test_explicacao_durante_a_gravacao_do_lote_nao_se_perde(auditoria):
+    auditoria, banco = auditoria
+    log_id = _registrar(auditoria)
+    gravar = auditoria.gravar
+
+    def gravar_e_explicar(cursor, linhas):
+        gravar(cursor, linhas)
+        # SHAP termina antes do commit do INSERT
+        auditoria.anexar_explicacao(log_id, {"febre": 0.3})
+
+    auditoria.gravar = gravar_e_explicar
+    assert auditoria.descarregar() == 1
+
+    assert banco.logs[log_id][5].adapted == {"febre": 0.3}
+    assert not auditoria._gravando
+
+
+def test_gravacao_falhando_mantem_explicacao_e_limita_pendentes(auditoria):
+    auditoria, banco = auditoria
+    ids = [_registrar(auditoria) for _ in range(2)]
+
+    def falhar(cursor, linhas):
+        auditoria.anexar_explicacao(ids[0], {"febre": 0.3})
+        raise RuntimeError("banco fora do ar")
+
+    auditoria.gravar = falhar
+    antes = REGISTRY.get_sample_value("aurora_auditoria_logs_descartados_total") or 0
+    assert auditoria.descarregar() == 0
+    assert auditoria._pendentes[ids[0]][5].adapted == {"febre": 0.3}
+
+    ids += [_registrar(auditoria) for _ in range(2)]
+    assert auditoria.descarregar() == 0
+
+    # Limite de 3: o mais antigo sai
+    assert list(auditoria._pendentes) == ids[1:]
+    assert REGISTRY.get_sample_value("aurora_auditoria_logs_descartados_total") - antes == 1
+    assert not banco.logs
@@ -0,0 +1,92 @@
+"""Testes dos filtros SQL e dos formatos de saída da exportação de treinamento."""
+
+import csv
+import gzip
+import json
+from datetime import date, datetime
+
+import pytest
+
+pytest.importorskip("psycopg2")
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from embeddings import DIMENSAO_EMBEDDING  # noqa: E402
+from exportacao_treinamento import (  # noqa: E402
+    COLUNAS,
+    ESQUEMA,
+    ExportadorTreinamento,
+    montar_consulta,
+)
+
+
+def test_consulta_sem_filtros_exige_ground_truth():
+    sql, params = montar_consulta()
+
+    assert "WHERE t.prioridade_medico IS NOT NULL\n" in sql
+    assert "ORDER BY t.created_at" in sql
+    assert params == []
+
+
+def test_consulta_com_todos_os_filtros():
+    sql, params = montar_consulta(
+        data_inicio=date(2026, 1, 1), data_fim=date(2026, 1, 31),
+        prioridades=("urgente", "emergencia"), unidades=["u1"],
+    )
+
+    assert ("t.prioridade_medico IS NOT NULL AND t.created_at >= %s"
+            " AND t.created_at < %s::date + 1"
+            " AND t.prioridade_medico = ANY(%s)"
+            " AND t.unidade_id = ANY(%s::uuid[])") in sql
+    assert params == [date(2026, 1, 1), date(2026, 1, 31), ["urgente", "emergencia"], ["u1"]]
+    assert sql.count("%s") == len(params)
+
+
+def test_consulta_ignora_filtros_vazios():
+    assert montar_consulta(prioridades=[], unidades=None)[1] == []
+
+
+def _linha(**valores):
+    padrao = {nome: None for nome, _, _ in COLUNAS}
+    padrao.update(triagem_id="t1", created_at=datetime(2026, 1, 2, 8, 30),
+                  sintomas="Febre", prioridade_medico="urgente")
+    padrao.update(valores)
+    return tuple(padrao[nome] for nome, _, _ in COLUNAS)
+
+
+@pytest.fixture
+def exportador(monkeypatch):
+    vetor = [0.5] * DIMENSAO_EMBEDDING
+    blocos = [
+        [_linha(comorbidades=["Hipertensão", 'asma "grave"'], embedding_sintomas=vetor)],
+        [_linha(triagem_id="t2", comorbidades=None, idade=40, acerto_ia=True)],
+    ]
+    exportador = ExportadorTreinamento(db=None, dimensao=DIMENSAO_EMBEDDING)
+    monkeypatch.setattr(exportador, "_blocos", lambda sql, params: iter(blocos))
+    return exportador
+
+
+def test_parquet_segue_o_esquema(exportador, tmp_path):
+    resultado = exportador.exportar(tmp_path / "treino.parquet")
+
+    tabela = pq.read_table(resultado.arquivo)
+    assert resultado.linhas == 2
+    assert tabela.schema.equals(ESQUEMA)
+    assert tabela.schema.field("embedding_sintomas").type == pa.list_(pa.float32(), DIMENSAO_EMBEDDING)
+    assert tabela.column("comorbidades").to_pylist() == [["Hipertensão", 'asma "grave"'], None]
+    assert tabela.column("idade").to_pylist() == [None, 40]
+
+
+def test_csv_grava_listas_como_array_json(exportador, tmp_path):
+    resultado = exportador.exportar(tmp_path / "treino.csv.gz", formato="csv")
+
+    with gzip.open(resultado.arquivo, "rt", encoding="utf-8") as arquivo:
+        linhas = list(csv.DictReader(arquivo))
+    assert json.loads(linhas[0]["comorbidades"]) == ["Hipertensão", 'asma "grave"']
+    assert linhas[1]["comorbidades"] == ""
+    assert linhas[0]["embedding_sintomas"] == "[" + ",".join(["0.5"] * DIMENSAO_EMBEDDING) + "]"
+
+
+def test_formato_invalido(exportador, tmp_path):
+    with pytest.raises(ValueError):
+        exportador.exportar(tmp_path / "treino.json", formato="json")
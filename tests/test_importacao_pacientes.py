@@ -0,0 +1,80 @@
+"""Testes da normalização e pseudonimização da importação de pacientes."""
+
+from datetime import date
+
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("numpy")
+
+import importacao_pacientes  # noqa: E402
+from importacao_pacientes import (  # noqa: E402
+    _idade,
+    chave_deduplicacao,
+    normalizar_comorbidades,
+    pseudonimizar,
+)
+
+CHAVE = b"chave-de-teste"
+
+
+@pytest.fixture
+def referencia(monkeypatch):
+    monkeypatch.setattr(importacao_pacientes, "_REFERENCIA", date(2024, 6, 15))
+
+
+def test_idade_informada_tem_precedencia(referencia):
+    assert _idade("42", "1950-01-01") == 42
+
+
+@pytest.mark.parametrize("nascimento, esperada", [
+    ("1990-06-15", 34),
+    ("1990-06-16", 33),
+    ("15/06/1990", 34),
+    ("16-06-1990", 33),
+    ("1990-06-14T10:00:00", 34),
+])
+def test_idade_pela_data_de_nascimento(referencia, nascimento, esperada):
+    assert _idade(None, nascimento) == esperada
+
+
+@pytest.mark.parametrize("nascimento", ["1990-02-30", "ontem", "1990/06", ""])
+def test_data_invalida_nao_gera_idade(referencia, nascimento):
+    assert _idade(None, nascimento) is None
+    assert _idade("", nascimento) is None
+
+
+def test_comorbidades_sao_canonicas_e_sem_repeticao():
+    assert normalizar_comorbidades("HAS; diabetes mellitus|Hipertensão arterial") == (
+        "Hipertensão", "Diabetes")
+
+
+@pytest.mark.parametrize("valor", ["['asma', 'obesidade']", "{asma,obesidade}", "asma / Obesidade"])
+def test_formatos_de_lista_de_comorbidades(valor):
+    assert normalizar_comorbidades(valor) == ("Asma", "Obesidade")
+
+
+def test_comorbidade_desconhecida_mantem_o_texto_capitalizado():
+    assert normalizar_comorbidades("doença renal crônica") == ("Doença renal crônica",)
+
+
+@pytest.mark.parametrize("valor", [None, "", " ; , "])
+def test_sem_comorbidades(valor):
+    assert normalizar_comorbidades(valor) == ()
+
+
+def test_pseudonimo_estavel_e_independente_da_formatacao():
+    codigo = pseudonimizar("123.456.789-00", CHAVE)
+
+    assert codigo == pseudonimizar("12345678900", CHAVE)
+    assert codigo.startswith("PAC-") and len(codigo) == 47
+    assert "12345678900" not in codigo
+    assert codigo != pseudonimizar("12345678900", b"outra-chave")
+
+
+def test_chave_de_deduplicacao():
+    codigo = pseudonimizar("abc-1", CHAVE)
+
+    assert chave_deduplicacao(codigo) == chave_deduplicacao(pseudonimizar("ABC1", CHAVE))
+    assert 0 <= chave_deduplicacao(codigo) < 2 ** 128
+    assert chave_deduplicacao("SINT-42-000000001") is None
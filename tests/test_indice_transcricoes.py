@@ -0,0 +1,149 @@
+"""
+Testes da divisão de transcrições em trechos e da construção do índice
+IVFFlat depois da carga, esta contra um PostgreSQL local com pgvector
+(AURORA_TESTE_PRIMARIO=host:porta).
+"""
+
+import os
+import uuid
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("psycopg2")
+
+from indice_transcricoes import INDICE_VETORIAL, IndiceTranscricoes, dividir_em_trechos  # noqa: E402
+from vector_setup import VectorDatabaseSetup, listas_ivfflat  # noqa: E402
+
+
+def _texto(palavras: int) -> str:
+    return "  ".join(f"p{i}" for i in range(palavras))
+
+
+def test_offsets_apontam_para_o_texto_original():
+    texto = "Paciente  relata\tfebre há\n3 dias e tosse seca."
+    for trecho in dividir_em_trechos(texto, palavras_por_trecho=3, sobreposicao=1):
+        assert texto[trecho.inicio:trecho.fim] == trecho.texto
+
+
+def test_janelas_sobrepostas_cobrem_o_texto_inteiro():
+    trechos = dividir_em_trechos(_texto(250), palavras_por_trecho=100, sobreposicao=20)
+
+    assert [t.indice for t in trechos] == [0, 1, 2]
+    assert trechos[0].texto.split()[-20:] == trechos[1].texto.split()[:20]
+    assert trechos[-1].texto.split()[-1] == "p249"
+
+
+def test_texto_menor_que_um_trecho_gera_um_unico_trecho():
+    trechos = dividir_em_trechos("dor de cabeça", palavras_por_trecho=120, sobreposicao=30)
+    assert len(trechos) == 1
+    assert trechos[0].texto == "dor de cabeça"
+
+
+@pytest.mark.parametrize("texto", [None, "", "   ", "\n\t "])
+def test_texto_vazio_nao_gera_trechos(texto):
+    assert dividir_em_trechos(texto) == []
+
+
+def test_sobreposicao_maior_que_o_trecho_e_recusada():
+    with pytest.raises(ValueError):
+        dividir_em_trechos("a b c", palavras_por_trecho=10, sobreposicao=10)
+
+
+@pytest.mark.parametrize("linhas, listas", [
+    (0, 10), (5_000, 10), (250_000, 250), (1_000_000, 1000), (4_000_000, 2000),
+])
+def test_listas_ivfflat(linhas, listas):
+    assert listas_ivfflat(linhas) == listas
+
+
+class EncoderAleatorio:
+    def encode(self, textos):
+        vetores = np.random.default_rng(len(textos)).random((len(textos), 384), dtype=np.float32)
+        return vetores / np.linalg.norm(vetores, axis=1, keepdims=True)
+
+
+PRIMARIO = os.getenv("AURORA_TESTE_PRIMARIO")
+
+
+@pytest.fixture
+def indice_no_banco(monkeypatch):
+    """IndiceTranscricoes num schema descartável do PostgreSQL de teste."""
+    if not PRIMARIO:
+        pytest.skip("defina AURORA_TESTE_PRIMARIO (host:porta)")
+    host, _, porta = PRIMARIO.partition(":")
+    db = VectorDatabaseSetup(
+        host=host, port=int(porta or 5432),
+        database=os.getenv("AURORA_TESTE_DB_NAME", "postgres"),
+        user=os.getenv("AURORA_TESTE_DB_USER", "postgres"),
+        password=os.getenv("AURORA_TESTE_DB_PASSWORD", ""),
+    )
+    schema = f"teste_transcricoes_{uuid.uuid4().hex[:8]}"
+    conn = db.connect()
+    conn.autocommit = True
+    cursor = conn.cursor()
+    try:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    except Exception:
+        conn.close()
+        pytest.skip("pgvector indisponível no banco de teste")
+    cursor.execute(f"""
+        CREATE SCHEMA {schema};
+        CREATE TABLE {schema}.sessoes_telemedicina (
+            id UUID PRIMARY KEY,
+            status VARCHAR(20) NOT NULL,
+            transcricao_texto TEXT,
+            data_fim TIMESTAMP
+        );
+        SET search_path = {schema}, public;
+    """)
+    monkeypatch.setenv("PGOPTIONS", f"-c search_path={schema},public")
+    indice = IndiceTranscricoes(db, encoder=EncoderAleatorio(), palavras_por_trecho=10,
+                                sobreposicao=0)
+    assert indice.create_tables()
+    yield indice, cursor
+    cursor.execute(f"DROP SCHEMA {schema} CASCADE")
+    conn.close()
+
+
+def _concluir_sessoes(cursor, quantidade: int) -> None:
+    cursor.execute("""
+        INSERT INTO sessoes_telemedicina (id, status, transcricao_texto)
+        SELECT gen_random_uuid(), 'concluida', 'paciente relata febre e tosse ' || g
+        FROM generate_series(1, %s) g
+    """, (quantidade,))
+
+
+def _indice_vetorial(cursor):
+    cursor.execute("""
+        SELECT c.reloptions, obj_description(c.oid, 'pg_class')
+        FROM pg_class c WHERE c.oid = to_regclass(%s)
+    """, (INDICE_VETORIAL,))
+    return cursor.fetchone()
+
+
+def test_indice_vetorial_so_e_criado_depois_da_carga(indice_no_banco):
+    indice, cursor = indice_no_banco
+    assert _indice_vetorial(cursor) is None
+
+    _concluir_sessoes(cursor, 20)
+    assert indice.indexar_pendentes() == 20
+
+    opcoes, comentario = _indice_vetorial(cursor)
+    assert opcoes == ["lists=10"] and comentario == "linhas=20"
+
+
+def test_indice_vetorial_refeito_quando_o_volume_dobra(indice_no_banco):
+    indice, cursor = indice_no_banco
+    _concluir_sessoes(cursor, 20)
+    indice.indexar_pendentes()
+
+    _concluir_sessoes(cursor, 5)
+    indice.indexar_pendentes()
+    assert _indice_vetorial(cursor)[1] == "linhas=20"
+
+    _concluir_sessoes(cursor, 20)
+    indice.indexar_pendentes()
+    assert _indice_vetorial(cursor)[1] == "linhas=45"
+    assert not indice.indexar_vetores()
+    assert indice.indexar_vetores(forcar=True)
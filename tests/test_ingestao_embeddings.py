@@ -0,0 +1,96 @@
+"""Testes do hash de conteúdo e da memória LRU do EmbeddingDeduplicator."""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from embeddings import normalizar_texto  # noqa: E402
+from ingestao_embeddings import EmbeddingDeduplicator, hash_texto  # noqa: E402
+
+
+class EncoderContador:
+    """Vetor determinístico por texto; guarda os lotes recebidos."""
+
+    modelo = "contador"
+
+    def __init__(self):
+        self.lotes = []
+
+    def encode(self, textos):
+        self.lotes.append(list(textos))
+        return np.asarray([[len(t), 1.0] for t in textos], dtype=np.float32)
+
+
+@pytest.fixture
+def banco_cache():
+    """Tabela cache_embeddings simulada em um dict (hash → vetor)."""
+    return {}
+
+
+@pytest.fixture
+def dedup(monkeypatch, banco_cache):
+    def buscar(self, hashes):
+        return {h: banco_cache[h] for h in hashes if h in banco_cache}
+
+    def gravar(self, itens):
+        banco_cache.update({h: vetor for h, _, vetor in itens})
+
+    monkeypatch.setattr(EmbeddingDeduplicator, "_buscar_no_banco", buscar)
+    monkeypatch.setattr(EmbeddingDeduplicator, "_gravar_no_banco", gravar)
+    return EmbeddingDeduplicator(db=None, encoder=EncoderContador(), tamanho_memoria=2)
+
+
+def test_hash_ignora_acentos_caixa_e_separadores():
+    variantes = ["Dor de cabeça + Febre", "dor de cabeca, febre", "  DOR DE CABEÇA / febre "]
+    hashes = {hash_texto(normalizar_texto(t)) for t in variantes}
+    assert len(hashes) == 1
+    assert len(next(iter(hashes))) == 64
+    assert hash_texto(normalizar_texto("febre")) != hash_texto(normalizar_texto("tosse"))
+
+
+def test_duplicatas_no_lote_codificam_uma_vez(dedup):
+    vetores = dedup.encode(["Febre", "febre", "Tosse"])
+
+    assert dedup.encoder.lotes == [["febre", "tosse"]]
+    assert np.array_equal(vetores[0], vetores[1])
+    assert dedup._pendentes.textos_recebidos == 3
+    assert dedup._pendentes.textos_codificados == 2
+    assert dedup._pendentes.reaproveitados_memoria == 1
+
+
+def test_acerto_na_memoria_nao_chama_encoder_nem_banco(dedup, banco_cache):
+    dedup.encode(["febre"])
+    banco_cache.clear()
+
+    vetores = dedup.encode(["Febre"])
+
+    assert len(dedup.encoder.lotes) == 1
+    assert vetores.shape == (1, 2)
+    assert dedup._pendentes.reaproveitados_memoria == 1
+    assert dedup._pendentes.reaproveitados_banco == 0
+
+
+def test_memoria_descarta_o_menos_usado(dedup):
+    dedup.encode(["febre"])
+    dedup.encode(["tosse"])
+    dedup.encode(["febre"])      # febre volta a ser o mais recente
+    dedup.encode(["vomito"])     # excede tamanho_memoria=2 e descarta tosse
+
+    assert list(dedup._memoria) == [hash_texto("febre"), hash_texto("vomito")]
+
+
+def test_falta_na_memoria_recorre_ao_banco(dedup, banco_cache):
+    dedup.encode(["febre", "tosse", "vomito"])
+    assert hash_texto("febre") not in dedup._memoria
+
+    dedup.encode(["febre"])
+
+    assert len(dedup.encoder.lotes) == 1
+    assert dedup._pendentes.reaproveitados_banco == 1
+    assert hash_texto("febre") in dedup._memoria
+
+
+def test_lote_vazio(dedup):
+    assert dedup.encode([]).shape[0] == 0
+    assert dedup.encoder.lotes == []
@@ -0,0 +1,113 @@
+"""
+Testes dos rótulos e métricas do InstrumentedCursor; os que executam SQL
+usam um PostgreSQL local (AURORA_TESTE_PRIMARIO=host:porta).
+"""
+
+import io
+import os
+import uuid
+
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("prometheus_client")
+
+import psycopg2  # noqa: E402
+from prometheus_client import REGISTRY  # noqa: E402
+
+from instrumentacao import conectar, nome_padrao  # noqa: E402
+
+PRIMARIO = os.getenv("AURORA_TESTE_PRIMARIO")
+
+
+def _amostra(metrica: str, **rotulos) -> float:
+    return REGISTRY.get_sample_value(metrica, rotulos) or 0.0
+
+
+def _latencias(consulta: str) -> float:
+    return _amostra("aurora_db_consulta_segundos_count", consulta=consulta)
+
+
+@pytest.mark.parametrize("sql, nome", [
+    ("SELECT * FROM triagens WHERE id = %s", "select:triagens"),
+    ("insert into public.filas (id) values (1)", "insert:public.filas"),
+    ("UPDATE ONLY unidades SET x = 1", "update:unidades"),
+    ("-- comentário\nDELETE FROM cache_embeddings", "delete:cache_embeddings"),
+    ("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_x ON triagens (id)", "create:triagens"),
+    ("COPY pacientes FROM STDIN", "copy:pacientes"),
+    ("COPY (SELECT * FROM triagens) TO STDOUT", "copy:triagens"),
+    (b"SELECT 1", "select"),
+    ("   ", "vazia"),
+])
+def test_nome_padrao(sql, nome):
+    assert nome_padrao(sql) == nome
+
+
+@pytest.fixture
+def conn():
+    if not PRIMARIO:
+        pytest.skip("defina AURORA_TESTE_PRIMARIO (host:porta)")
+    host, _, porta = PRIMARIO.partition(":")
+    conexao = conectar(
+        host=host, port=int(porta or 5432),
+        database=os.getenv("AURORA_TESTE_DB_NAME", "postgres"),
+        user=os.getenv("AURORA_TESTE_DB_USER", "postgres"),
+        password=os.getenv("AURORA_TESTE_DB_PASSWORD", ""),
+    )
+    yield conexao
+    conexao.close()
+
+
+def test_execute_usa_o_nome_informado(conn):
+    nome = f"teste_{uuid.uuid4().hex[:8]}"
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT generate_series(1, 3)", nome=nome)
+    cursor.fetchall()
+
+    assert _latencias(nome) == 1
+    assert _amostra("aurora_db_consulta_linhas_total", consulta=nome) == 3
+
+
+def test_execute_sem_nome_usa_verbo_e_objeto(conn):
+    cursor = conn.cursor()
+    cursor.execute("CREATE TEMP TABLE instrumentacao_teste (x INT)")
+    antes = _latencias("insert:instrumentacao_teste")
+    linhas = _amostra("aurora_db_consulta_linhas_total", consulta="insert:instrumentacao_teste")
+
+    cursor.execute("INSERT INTO instrumentacao_teste SELECT generate_series(1, 4)")
+
+    assert _latencias("insert:instrumentacao_teste") == antes + 1
+    assert _amostra("aurora_db_consulta_linhas_total",
+                    consulta="insert:instrumentacao_teste") == linhas + 4
+
+
+@pytest.mark.parametrize("metodo", ["execute", "executemany", "copy_expert"])
+def test_erro_conta_erro_e_latencia(conn, metodo):
+    nome = f"teste_{uuid.uuid4().hex[:8]}"
+    cursor = conn.cursor()
+
+    with pytest.raises(psycopg2.errors.UndefinedTable):
+        if metodo == "execute":
+            cursor.execute("SELECT * FROM tabela_inexistente", nome=nome)
+        elif metodo == "executemany":
+            cursor.executemany("INSERT INTO tabela_inexistente VALUES (%s)", [(1,)], nome=nome)
+        else:
+            cursor.copy_expert("COPY tabela_inexistente FROM STDIN", io.StringIO("1\n"), nome=nome)
+
+    assert _amostra("aurora_db_consulta_erros_total", consulta=nome, erro="UndefinedTable") == 1
+    assert _latencias(nome) == 1
+    conn.rollback()
+
+
+def test_executemany_e_copy_contam_linhas(conn):
+    cursor = conn.cursor()
+    cursor.execute("CREATE TEMP TABLE instrumentacao_lote (x INT)")
+    nome_lote, nome_copy = (f"teste_{uuid.uuid4().hex[:8]}" for _ in range(2))
+
+    cursor.executemany("INSERT INTO instrumentacao_lote VALUES (%s)", [(1,), (2,)], nome=nome_lote)
+    cursor.copy_expert("COPY instrumentacao_lote FROM STDIN", io.StringIO("3\n4\n5\n"), nome=nome_copy)
+
+    assert _latencias(nome_lote) == 1 and _latencias(nome_copy) == 1
+    assert _amostra("aurora_db_consulta_linhas_total", consulta=nome_copy) == 3
+    conn.rollback()
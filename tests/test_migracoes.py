@@ -0,0 +1,76 @@
+"""Testes do leitor de migrações SQL."""
+
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from migracoes import (  # noqa: E402
+    DIRETORIO_MIGRACOES,
+    carregar_migracao,
+    dividir_comandos,
+    expandir_includes,
+)
+
+
+def test_ponto_e_virgula_em_texto_comentario_e_dollar_quote():
+    sql = """
+        INSERT INTO t VALUES ('a;b', 'it''s');  -- comentário; com ponto e vírgula
+        /* bloco; */ CREATE FUNCTION f() RETURNS int AS $corpo$
+            BEGIN RETURN 1; END;
+        $corpo$ LANGUAGE plpgsql;
+        SELECT "col;una" FROM t
+    """
+
+    comandos = dividir_comandos(sql)
+
+    assert len(comandos) == 3
+    assert comandos[0] == "INSERT INTO t VALUES ('a;b', 'it''s')"
+    assert "BEGIN RETURN 1; END;" in comandos[1]
+    assert comandos[2] == 'SELECT "col;una" FROM t'
+
+
+def test_indices_sao_separados_e_construidos_concurrently(tmp_path):
+    arquivo = tmp_path / "002_indices.sql"
+    arquivo.write_text("""
+        BEGIN;
+        CREATE TABLE x (id int, nome text);
+        CREATE INDEX idx_x_nome ON x (nome);
+        create unique index if not exists idx_x_id on only x using btree (id);
+        COMMIT;
+    """, encoding="utf-8")
+
+    migracao = carregar_migracao(arquivo)
+
+    assert (migracao.versao, migracao.nome) == ("002", "indices")
+    assert migracao.comandos == ["CREATE TABLE x (id int, nome text)"]
+    assert [(i.nome, i.tabela) for i in migracao.indices] == [("idx_x_nome", "x"), ("idx_x_id", "x")]
+    assert migracao.indices[0].sql == "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_x_nome ON x (nome)"
+    assert migracao.indices[1].sql.startswith("CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_x_id ON x")
+
+
+def test_includes_sao_expandidos_e_ciclos_recusados(tmp_path):
+    (tmp_path / "base.sql").write_text("CREATE TABLE y (id int);\n", encoding="utf-8")
+    (tmp_path / "001_a.sql").write_text("\\i base.sql\nSELECT 1;\n", encoding="utf-8")
+    (tmp_path / "ciclo.sql").write_text("\\i ciclo.sql\n", encoding="utf-8")
+
+    assert "CREATE TABLE y" in expandir_includes(tmp_path / "001_a.sql")
+    assert carregar_migracao(tmp_path / "001_a.sql").comandos == ["CREATE TABLE y (id int)", "SELECT 1"]
+    with pytest.raises(ValueError):
+        expandir_includes(tmp_path / "ciclo.sql")
+
+
+def test_checksum_muda_com_o_conteudo(tmp_path):
+    arquivo = tmp_path / "003_x.sql"
+    arquivo.write_text("SELECT 1;", encoding="utf-8")
+    antes = carregar_migracao(arquivo).checksum
+    arquivo.write_text("SELECT 2;", encoding="utf-8")
+    assert carregar_migracao(arquivo).checksum != antes
+
+
+def test_migracao_inicial_do_repositorio():
+    migracao = carregar_migracao(DIRETORIO_MIGRACOES / "001_initial_schema.sql")
+
+    assert migracao.versao == "001"
+    assert migracao.indices
+    assert not any(c.upper() in ("BEGIN", "COMMIT") for c in migracao.comandos)
+    assert all("CONCURRENTLY" in i.sql for i in migracao.indices)
@@ -0,0 +1,97 @@
+"""Testes do modelo sazonal semanal de demanda."""
+
+from datetime import datetime
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+pytest.importorskip("psycopg2")
+
+from previsao_demanda import (  # noqa: E402
+    HORAS_SEMANA,
+    ModeloSazonalSemanal,
+    backtest,
+    janela_semanas_completas,
+    montar_tensor,
+)
+
+
+def _perfil(rng):
+    return rng.poisson(5, size=HORAS_SEMANA).astype(float) + 1
+
+
+def test_semanas_iguais_reproduzem_o_perfil():
+    perfil = _perfil(np.random.default_rng(1))
+    tensor = np.tile(perfil, (3, 8, 1))
+
+    modelo = ModeloSazonalSemanal().fit(tensor)
+
+    np.testing.assert_allclose(modelo.nivel, 1.0)
+    np.testing.assert_allclose(modelo.predict(), tensor[:, 0, :])
+
+
+def test_nivel_acompanha_a_ultima_semana_com_limites():
+    perfil = _perfil(np.random.default_rng(2))
+    tensor = np.tile(perfil, (3, 6, 1))
+    tensor[0, -1] *= 1.44
+    tensor[1, -1] *= 1000
+    tensor[2, -1] = 0
+
+    modelo = ModeloSazonalSemanal(alpha=0.3, amortecimento=0.5, limites_nivel=(0.5, 1.5)).fit(tensor)
+
+    base = modelo.perfil.sum(axis=1)
+    esperado = (tensor[0, -1].sum() / base[0]) ** 0.5
+    assert modelo.nivel[0] == pytest.approx(esperado)
+    assert modelo.nivel[1] == 1.5
+    assert modelo.nivel[2] == 0.5
+
+
+def test_unidade_sem_chegadas_nao_gera_nan():
+    tensor = np.zeros((2, 4, HORAS_SEMANA))
+    tensor[1] = 3
+
+    previsto = ModeloSazonalSemanal().fit(tensor).predict()
+
+    assert np.isfinite(previsto).all()
+    assert previsto[0].sum() == 0
+
+
+def test_predict_sem_ajuste_falha():
+    with pytest.raises(RuntimeError):
+        ModeloSazonalSemanal().predict()
+
+
+def test_backtest_em_serie_estavel_tem_erro_baixo():
+    rng = np.random.default_rng(3)
+    perfil = _perfil(rng) * 4
+    tensor = rng.poisson(np.tile(perfil, (5, 12, 1))).astype(float)
+
+    metricas = backtest(tensor, semanas_teste=2)
+
+    assert metricas["wape"] < 0.25
+
+
+def test_montar_tensor_posiciona_contagens():
+    inicio = datetime(2024, 1, 1)
+    contagens = pd.DataFrame({
+        "unidade_id": ["a", "b", "a"],
+        "hora": [datetime(2024, 1, 1, 0), datetime(2024, 1, 2, 5), datetime(2024, 1, 9, 23)],
+        "chegadas": [3, 4, 5],
+    })
+
+    unidades, tensor = montar_tensor(contagens, inicio, semanas=2)
+
+    assert unidades == ["a", "b"]
+    assert tensor.shape == (2, 2, HORAS_SEMANA)
+    assert tensor[0, 0, 0] == 3
+    assert tensor[1, 0, 24 + 5] == 4
+    assert tensor[0, 1, 24 + 23] == 5
+    assert tensor.sum() == 12
+
+
+def test_janela_termina_na_segunda_feira():
+    inicio, fim = janela_semanas_completas(4, datetime(2024, 1, 10, 15, 30))
+
+    assert fim == datetime(2024, 1, 8)
+    assert inicio == datetime(2023, 12, 11)
@@ -0,0 +1,155 @@
+"""
+Testes do roteamento de leituras contra dois PostgreSQL locais (primário e
+réplica em streaming), por exemplo:
+
+    AURORA_TESTE_PRIMARIO=localhost:5432 AURORA_TESTE_REPLICA=localhost:5433 pytest tests/test_replicas.py
+
+Credenciais em AURORA_TESTE_DB_NAME / AURORA_TESTE_DB_USER / AURORA_TESTE_DB_PASSWORD.
+"""
+
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("prometheus_client")
+
+from replicas import RoteadorReplicas  # noqa: E402
+from vector_setup import VectorDatabaseSetup  # noqa: E402
+
+PRIMARIO = os.getenv("AURORA_TESTE_PRIMARIO")
+REPLICA = os.getenv("AURORA_TESTE_REPLICA")
+
+pytestmark = pytest.mark.skipif(
+    not (PRIMARIO and REPLICA),
+    reason="defina AURORA_TESTE_PRIMARIO e AURORA_TESTE_REPLICA (host:porta)",
+)
+
+
+def _no(endereco: str) -> VectorDatabaseSetup:
+    host, _, porta = endereco.partition(":")
+    return VectorDatabaseSetup(
+        host=host, port=int(porta or 5432),
+        database=os.getenv("AURORA_TESTE_DB_NAME", "postgres"),
+        user=os.getenv("AURORA_TESTE_DB_USER", "postgres"),
+        password=os.getenv("AURORA_TESTE_DB_PASSWORD", ""),
+    )
+
+
+def _em_recuperacao(conn) -> bool:
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_is_in_recovery()")
+        return cursor.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_leituras_na_replica_e_escritas_no_primario():
+    roteador = RoteadorReplicas(_no(PRIMARIO), [_no(REPLICA)])
+
+    [replica] = roteador.verificar_saude()
+
+    assert replica.saudavel
+    assert _em_recuperacao(roteador.connect_leitura())
+    assert not _em_recuperacao(roteador.connect())
+    relatorio = {linha["papel"]: linha for linha in roteador.relatorio()}
+    assert relatorio["replica"]["leituras"] == 1
+    assert relatorio["primario"]["escritas"] == 1
+
+
+def test_replica_em_streaming_e_em_dia_tem_atraso_zero():
+    roteador = RoteadorReplicas(_no(PRIMARIO), [_no(REPLICA)])
+    conn = roteador.connect()
+    cursor = conn.cursor()
+    cursor.execute("SELECT pg_current_wal_lsn()")
+    lsn = cursor.fetchone()[0]
+    conn.close()
+
+    # Espera a réplica aplicar o WAL atual para não medir um atraso real
+    limite = time.monotonic() + 10
+    while time.monotonic() < limite:
+        replica = _no(REPLICA).connect()
+        try:
+            cursor = replica.cursor()
+            cursor.execute("SELECT pg_last_wal_replay_lsn() >= %s::pg_lsn", (lsn,))
+            if cursor.fetchone()[0]:
+                break
+        finally:
+            replica.close()
+        time.sleep(0.05)
+
+    [no] = roteador.verificar_saude()
+    assert no.saudavel and no.atraso_s == 0
+
+
+def test_replica_atrasada_desvia_leituras_para_o_primario():
+    roteador = RoteadorReplicas(_no(PRIMARIO), [_no(REPLICA)], atraso_maximo_s=-1)
+    roteador.verificar_saude()
+
+    assert not _em_recuperacao(roteador.connect_leitura())
+
+
+def test_primeiras_leituras_nao_esperam_a_verificacao():
+    roteador = RoteadorReplicas(_no(PRIMARIO), [_no(REPLICA)])
+
+    # Ainda sem verificação concluída: primário, com a verificação em segundo plano
+    assert not _em_recuperacao(roteador.connect_leitura())
+    limite = time.monotonic() + 10
+    while not roteador.relatorio()[1]["saudavel"] and time.monotonic() < limite:
+        time.sleep(0.05)
+    assert _em_recuperacao(roteador.connect_leitura())
+
+
+@pytest.fixture
+def no_mudo():
+    """Porta que aceita TCP (fila do kernel) mas nunca responde, como um nó travado."""
+    servidor = socket.socket()
+    servidor.bind(("127.0.0.1", 0))
+    servidor.listen(16)
+    yield f"127.0.0.1:{servidor.getsockname()[1]}"
+    servidor.close()
+
+
+def test_replica_que_nao_responde_falha_rapido_com_uma_verificacao_por_vez(monkeypatch, no_mudo):
+    roteador = RoteadorReplicas(_no(PRIMARIO), [_no(no_mudo)],
+                                intervalo_verificacao_s=0, tempo_limite_conexao_s=2)
+    verificacoes = {"em_andamento": 0, "maximo": 0, "total": 0}
+    trava = threading.Lock()
+    medir = roteador._medir
+
+    def medir_contando(no):
+        with trava:
+            verificacoes["em_andamento"] += 1
+            verificacoes["total"] += 1
+            verificacoes["maximo"] = max(verificacoes["maximo"], verificacoes["em_andamento"])
+        try:
+            medir(no)
+        finally:
+            with trava:
+                verificacoes["em_andamento"] -= 1
+
+    monkeypatch.setattr(roteador, "_medir", medir_contando)
+    # Como se a réplica tivesse passado na última verificação e depois sumido da rede
+    roteador._marcar(roteador._replicas[0], saudavel=True, atraso_s=0.0)
+
+    duracoes = []
+
+    def ler():
+        inicio = time.monotonic()
+        assert not _em_recuperacao(roteador.connect_leitura())
+        duracoes.append(time.monotonic() - inicio)
+
+    leitores = [threading.Thread(target=ler) for _ in range(8)]
+    for leitor in leitores:
+        leitor.start()
+    for leitor in leitores:
+        leitor.join()
+
+    assert len(duracoes) == 8
+    assert max(duracoes) < 5
+    assert verificacoes["total"] >= 1 and verificacoes["maximo"] == 1
+    assert not roteador._replicas[0].saudavel
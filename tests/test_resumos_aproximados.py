@@ -0,0 +1,200 @@
+"""
+Testes dos resumos aproximados: limites de erro documentados no módulo,
+comparados com contagens exatas em dados sintéticos (distribuição Zipf), e
+a marca d'água da atualização incremental contra um PostgreSQL local
+(AURORA_TESTE_PRIMARIO=host:porta).
+"""
+
+import math
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("psycopg2")
+pytest.importorskip("pandas")
+pytest.importorskip("scipy")
+
+from resumos_aproximados import (  # noqa: E402
+    CountMinSketch,
+    HyperLogLog,
+    ResumoTriagens,
+    ResumosAproximados,
+)
+from vector_setup import VectorDatabaseSetup  # noqa: E402
+
+TRIAGENS = 30_000
+PACIENTES = 12_000
+
+
+@pytest.fixture(scope="module")
+def dados():
+    """Resumos horários de 5 unidades × 24 horas e as contagens exatas."""
+    rng = np.random.default_rng(7)
+    vocabulario = [f"sintoma_{i}" for i in range(500)]
+    pesos = 1 / np.arange(1, len(vocabulario) + 1) ** 1.1
+    pesos /= pesos.sum()
+
+    exatas = {}
+    distintos = set()
+    horarios = [ResumoTriagens() for _ in range(5 * 24)]
+    for _ in range(TRIAGENS):
+        sintomas = {vocabulario[i] for i in rng.choice(len(vocabulario), size=rng.integers(1, 4), p=pesos)}
+        paciente = f"paciente_{rng.integers(PACIENTES)}"
+        distintos.add(paciente)
+        for s in sintomas:
+            exatas[s] = exatas.get(s, 0) + 1
+        horarios[rng.integers(len(horarios))].adicionar(sintomas, paciente)
+
+    janela = ResumoTriagens()
+    for resumo in horarios:
+        janela.fundir(resumo)
+    return janela, exatas, distintos
+
+
+def test_count_min_nunca_subestima_e_respeita_o_limite(dados):
+    janela, exatas, _ = dados
+    cms = janela.sintomas
+    limite = math.e / cms.largura * sum(exatas.values())
+
+    excessos = np.array([cms.estimar(s) - c for s, c in exatas.items()])
+
+    assert excessos.min() >= 0
+    assert np.mean(excessos <= limite) >= 1 - math.exp(-cms.profundidade)
+
+
+def test_hyperloglog_dentro_de_tres_erros_padrao(dados):
+    janela, _, distintos = dados
+
+    erro = abs(janela.pacientes_distintos - len(distintos)) / len(distintos)
+
+    assert erro <= 3 * 1.04 / math.sqrt(janela.pacientes.m)
+
+
+def test_top10_da_janela_fundida_recupera_os_mais_frequentes(dados):
+    janela, exatas, _ = dados
+    reais = sorted(exatas, key=exatas.get, reverse=True)[:10]
+
+    estimados = [s for s, _ in janela.principais(10)]
+
+    assert len(set(reais) & set(estimados)) / 10 >= 0.9
+    assert janela.triagens == TRIAGENS
+
+
+def test_fundir_equivale_a_um_resumo_unico():
+    rng = np.random.default_rng(3)
+    itens = [(f"s{rng.integers(50)}", f"p{rng.integers(300)}") for _ in range(2000)]
+    unico, partes = ResumoTriagens(), [ResumoTriagens() for _ in range(4)]
+    for i, (sintoma, paciente) in enumerate(itens):
+        unico.adicionar([sintoma], paciente)
+        partes[i % 4].adicionar([sintoma], paciente)
+
+    fundido = partes[0]
+    for parte in partes[1:]:
+        fundido.fundir(parte)
+
+    np.testing.assert_array_equal(fundido.sintomas.tabela, unico.sintomas.tabela)
+    np.testing.assert_array_equal(fundido.pacientes.registradores, unico.pacientes.registradores)
+    assert fundido.candidatos == unico.candidatos
+
+
+def test_serializacao_preserva_os_resumos():
+    cms, hll = CountMinSketch(256, 4), HyperLogLog(10)
+    for i in range(500):
+        cms.adicionar(f"s{i % 37}")
+        hll.adicionar(f"p{i}")
+
+    np.testing.assert_array_equal(CountMinSketch.desserializar(cms.serializar()).tabela, cms.tabela)
+    assert HyperLogLog.desserializar(hll.serializar()).estimar() == hll.estimar()
+
+
+def test_dimensoes_diferentes_nao_se_fundem():
+    with pytest.raises(ValueError):
+        CountMinSketch(256, 4).fundir(CountMinSketch(512, 4))
+    with pytest.raises(ValueError):
+        HyperLogLog(10).fundir(HyperLogLog(12))
+
+
+def test_para_erro_dimensiona_largura_e_profundidade():
+    cms = CountMinSketch.para_erro(epsilon=0.001, delta=0.01)
+
+    assert cms.largura == math.ceil(math.e / 0.001)
+    assert cms.profundidade == math.ceil(math.log(100))
+
+
+PRIMARIO = os.getenv("AURORA_TESTE_PRIMARIO")
+
+
+@pytest.fixture
+def resumos_no_banco(monkeypatch):
+    """ResumosAproximados num schema descartável do PostgreSQL de teste."""
+    if not PRIMARIO:
+        pytest.skip("defina AURORA_TESTE_PRIMARIO (host:porta)")
+    host, _, porta = PRIMARIO.partition(":")
+    db = VectorDatabaseSetup(
+        host=host, port=int(porta or 5432),
+        database=os.getenv("AURORA_TESTE_DB_NAME", "postgres"),
+        user=os.getenv("AURORA_TESTE_DB_USER", "postgres"),
+        password=os.getenv("AURORA_TESTE_DB_PASSWORD", ""),
+    )
+    schema = f"teste_resumos_{uuid.uuid4().hex[:8]}"
+    conn = db.connect()
+    cursor = conn.cursor()
+    cursor.execute("SHOW server_encoding")
+    if cursor.fetchone()[0] != "UTF8":
+        conn.close()
+        pytest.skip("o banco de teste precisa ser UTF8 (AURORA_TESTE_DB_NAME)")
+    cursor.execute(f"""
+        CREATE SCHEMA {schema};
+        CREATE TABLE {schema}.embeddings_sintomas (sintoma VARCHAR(255) PRIMARY KEY);
+        INSERT INTO {schema}.embeddings_sintomas VALUES ('febre'), ('tosse');
+        CREATE TABLE {schema}.triagens (
+            id UUID PRIMARY KEY,
+            unidade_id UUID,
+            paciente_id UUID,
+            sintomas TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL
+        );
+        SET search_path = {schema};
+    """)
+    conn.commit()
+    monkeypatch.setenv("PGOPTIONS", f"-c search_path={schema}")
+    resumos = ResumosAproximados(db, atraso_commit=timedelta(minutes=5))
+    assert resumos.create_tables()
+    yield resumos, conn
+    cursor.execute(f"DROP SCHEMA {schema} CASCADE")
+    conn.commit()
+    conn.close()
+
+
+def _agora(conn) -> datetime:
+    cursor = conn.cursor()
+    cursor.execute("SELECT LOCALTIMESTAMP")
+    return cursor.fetchone()[0]
+
+
+def _inserir_triagem(conn, criada_em: datetime) -> None:
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO triagens (id, paciente_id, sintomas, created_at)
+        VALUES (%s, %s, 'Febre e tosse', %s)
+    """, (str(uuid.uuid4()), str(uuid.uuid4()), criada_em))
+    conn.commit()
+
+
+def test_triagem_confirmada_depois_da_marca_entra_uma_vez(resumos_no_banco):
+    resumos, conn = resumos_no_banco
+    agora = _agora(conn)
+    _inserir_triagem(conn, agora - timedelta(seconds=30))
+    assert resumos.atualizar_incremental() == 1
+
+    # Transação iniciada antes da marca d'água e confirmada depois dela
+    _inserir_triagem(conn, resumos.processado_ate() - timedelta(minutes=1))
+
+    assert resumos.atualizar_incremental() == 1
+    assert resumos.atualizar_incremental() == 0
+    resumo = resumos.consultar(agora - timedelta(hours=2), agora + timedelta(hours=1))
+    assert resumo.triagens == 2
+    assert dict(resumo.principais(2)) == {"febre": 2, "tosse": 2}
@@ -0,0 +1,134 @@
+"""Testes do ranking de unidades, do filtro por tipo e da distribuição em lote."""
+
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sklearn")
+pytest.importorskip("psycopg2")
+
+from roteamento_unidades import RoteadorUnidades  # noqa: E402
+
+# Unidades sobre o equador: 0,01° de longitude ≈ 1,1 km a partir do paciente em (0, 0)
+UNIDADES = [
+    ("h1", "Hospital", 0.010),
+    ("h2", "Hospital", 0.050),
+    ("u1", "UPA", 0.020),
+    ("b1", "UBS", 0.005),
+    ("c1", "Clinica", 0.030),
+]
+
+
+def _roteador(capacidade=100, db=None, **kwargs) -> RoteadorUnidades:
+    roteador = RoteadorUnidades(db, **kwargs)
+    ids, tipos, longitudes = zip(*UNIDADES)
+    roteador.indexar(ids, [f"Unidade {i}" for i in ids], tipos, [capacidade] * len(ids),
+                     np.column_stack([np.zeros(len(ids)), longitudes]))
+    return roteador
+
+
+def _ids(destinos):
+    return [d.unidade_id for d in destinos]
+
+
+def test_emergencia_ordena_hospitais_e_upas_pela_distancia():
+    destinos = _roteador().rotear(0, 0, 'emergencia')
+
+    assert _ids(destinos) == ["h1", "u1", "h2"]
+    assert destinos[0].distancia_km == pytest.approx(1.11, abs=0.01)
+    assert [d.distancia_km for d in destinos] == sorted(d.distancia_km for d in destinos)
+
+
+@pytest.mark.parametrize("prioridade, esperados", [
+    ('emergencia', {"h1", "h2", "u1"}),
+    ('urgente', {"h1", "h2", "u1"}),
+    ('prioritario', {"h1", "h2", "u1", "b1", "c1"}),
+    ('eletivo', {"b1", "c1"}),
+])
+def test_somente_tipos_aptos_a_prioridade(prioridade, esperados):
+    destinos = _roteador().rotear(0, 0, prioridade, limite=10)
+
+    assert set(_ids(destinos)) == esperados
+
+
+def test_ocupacao_pesa_no_custo():
+    roteador = _roteador()
+    roteador.fila = np.array([50, 0, 0, 0, 0], dtype=float)
+
+    # h1 a 50%: 1,1 km + 5 km × 0,5 perde para u1 a 2,2 km vazia
+    assert _ids(roteador.rotear(0, 0, 'urgente'))[0] == "u1"
+    # Em emergências a distância domina: 1,1 + 2 × 0,5 < 2,2
+    assert _ids(roteador.rotear(0, 0, 'emergencia'))[0] == "h1"
+
+
+def test_unidade_lotada_fica_por_ultimo():
+    roteador = _roteador()
+    roteador.fila = np.array([100, 0, 0, 0, 0], dtype=float)
+
+    destinos = roteador.rotear(0, 0, 'emergencia')
+
+    assert _ids(destinos) == ["u1", "h2", "h1"]
+    assert destinos[-1].ocupacao == 1.0
+
+
+def test_lote_ocupa_vagas_e_atende_prioridades_maiores_primeiro():
+    roteador = _roteador(capacidade=1)
+
+    destinos = roteador.rotear_lote([(0, 0)] * 4, ['eletivo', 'urgente', 'emergencia', 'eletivo'])
+
+    # A emergência escolhe antes e fica com h1; a urgência vai para u1
+    assert destinos[2][0].unidade_id == "h1"
+    assert destinos[1][0].unidade_id == "u1"
+    # O segundo eletivo encontra b1 lotada
+    assert [d[0].unidade_id for d in (destinos[0], destinos[3])] == ["b1", "c1"]
+    # A carga compartilhada não muda com o lote
+    assert not roteador.fila.any()
+
+
+def test_sem_distribuir_todos_veem_a_mesma_carga():
+    destinos = _roteador(capacidade=1).rotear_lote([(0, 0)] * 2, ['eletivo'] * 2,
+                                                   distribuir=False)
+
+    assert [d[0].unidade_id for d in destinos] == ["b1", "b1"]
+
+
+class BancoCarga:
+    """Devolve a carga das filas e conta as consultas."""
+
+    def __init__(self, carga):
+        self.carga = carga
+        self.consultas = 0
+
+    def connect(self):
+        return self
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None, nome=None):
+        self.consultas += 1
+
+    def fetchall(self):
+        return list(self.carga.items())
+
+    def close(self):
+        pass
+
+
+def test_carga_atualizada_em_segundo_plano():
+    banco = BancoCarga({"h1": 100})
+    roteador = _roteador(db=banco, intervalo_carga_s=0.01)
+
+    assert _ids(roteador.rotear(0, 0, 'emergencia'))[0] == "h1"
+    assert banco.consultas == 0
+
+    roteador.iniciar_atualizacao_periodica()
+    try:
+        limite = time.monotonic() + 5
+        while not roteador.fila.any() and time.monotonic() < limite:
+            time.sleep(0.01)
+    finally:
+        roteador.parar()
+
+    assert _ids(roteador.rotear(0, 0, 'emergencia'))[-1] == "h1"
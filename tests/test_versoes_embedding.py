@@ -0,0 +1,175 @@
+"""
+Testes da troca de versão de embeddings contra um PostgreSQL local com
+pgvector (AURORA_TESTE_PRIMARIO=host:porta): a verificação de completude de
+ativar e as leituras que passam a usar a versão ativa. O encoder é trocado
+por vetores derivados do hash do texto.
+"""
+
+import hashlib
+import os
+import uuid
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("psycopg2")
+pytest.importorskip("prometheus_client")
+pq = pytest.importorskip("pyarrow.parquet")
+
+import embeddings  # noqa: E402
+from backfill_embeddings import FILTRO_NULOS  # noqa: E402
+from exportacao_treinamento import ExportadorTreinamento  # noqa: E402
+from vector_setup import VectorDatabaseSetup  # noqa: E402
+from versoes_embedding import VersionamentoEmbeddings, dimensao_ativa  # noqa: E402
+
+PRIMARIO = os.getenv("AURORA_TESTE_PRIMARIO")
+NOVO = "teste-8"
+
+
+def _encode(self, textos):
+    dimensao = 8 if self.modelo == NOVO else embeddings.DIMENSAO_EMBEDDING
+    vetores = []
+    for texto in textos:
+        digest = hashlib.sha256((self.modelo + texto).encode()).digest()
+        vetor = np.frombuffer((digest * 50)[:dimensao], dtype=np.uint8).astype(np.float32) + 1
+        vetores.append(vetor / np.linalg.norm(vetor))
+    return np.asarray(vetores, dtype=np.float32).reshape(len(textos), dimensao)
+
+
+@pytest.fixture
+def banco(monkeypatch):
+    """Schema descartável com triagens, vocabulário e a versão legada preenchida."""
+    if not PRIMARIO:
+        pytest.skip("defina AURORA_TESTE_PRIMARIO (host:porta)")
+    host, _, porta = PRIMARIO.partition(":")
+    db = VectorDatabaseSetup(
+        host=host, port=int(porta or 5432),
+        database=os.getenv("AURORA_TESTE_DB_NAME", "postgres"),
+        user=os.getenv("AURORA_TESTE_DB_USER", "postgres"),
+        password=os.getenv("AURORA_TESTE_DB_PASSWORD", ""),
+    )
+    schema = f"teste_versoes_{uuid.uuid4().hex[:8]}"
+    conn = db.connect()
+    conn.autocommit = True
+    cursor = conn.cursor()
+    cursor.execute("SHOW server_encoding")
+    if cursor.fetchone()[0] != "UTF8":
+        conn.close()
+        pytest.skip("o banco de teste precisa ser UTF8 (AURORA_TESTE_DB_NAME)")
+    try:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    except Exception:
+        conn.close()
+        pytest.skip("pgvector indisponível no banco de teste")
+    cursor.execute(f"""
+        CREATE SCHEMA {schema};
+        SET search_path = {schema}, public;
+        CREATE TABLE pacientes (
+            id UUID PRIMARY KEY, idade INT, genero VARCHAR(20), comorbidades TEXT[]
+        );
+        CREATE TABLE triagens (
+            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            paciente_id UUID, unidade_id UUID,
+            sintomas TEXT NOT NULL, descricao_completa TEXT,
+            intensidade_dor INT, temperatura DECIMAL(4,2), pressao_arterial VARCHAR(20),
+            frequencia_cardiaca INT, saturacao_o2 DECIMAL(4,2),
+            prioridade_ia VARCHAR(20), score_emergencia DECIMAL(5,4),
+            score_urgente DECIMAL(5,4), score_prioritario DECIMAL(5,4),
+            score_eletivo DECIMAL(5,4), prioridade_medico VARCHAR(20), acerto_ia BOOLEAN,
+            embedding_sintomas VECTOR(384), embedding_descricao VECTOR(384),
+            canal_entrada VARCHAR(50),
+            created_at TIMESTAMP DEFAULT clock_timestamp()
+        );
+        CREATE TABLE embeddings_sintomas (
+            sintoma VARCHAR(255) PRIMARY KEY, categoria VARCHAR(100), embedding VECTOR(384)
+        );
+        INSERT INTO embeddings_sintomas VALUES ('febre', 'geral', NULL), ('tosse', 'respiratorio', NULL);
+        INSERT INTO triagens (sintomas, descricao_completa, prioridade_medico)
+        SELECT 'sintoma ' || g, CASE WHEN g % 2 = 0 THEN 'descricao ' || g END, 'urgente'
+        FROM generate_series(1, 30) g;
+    """)
+    monkeypatch.setenv("PGOPTIONS", f"-c search_path={schema},public")
+    monkeypatch.setattr(embeddings.EncoderSentenca, "encode", _encode)
+
+    assert db.create_vector_tables()
+    versoes = VersionamentoEmbeddings(db, tamanho_lote=10)
+    assert versoes.create_tables()
+    while versoes.ingerir_pendentes(100):
+        pass
+    yield db, versoes, cursor
+    cursor.execute(f"DROP SCHEMA {schema} CASCADE")
+    conn.close()
+
+
+def _preparar_versao(versoes):
+    versoes.iniciar(NOVO)
+    versoes.recalcular(NOVO)
+    versoes.indexar(NOVO)
+
+
+def test_ativar_recusa_triagem_sem_vetor_na_nova_versao(banco):
+    _, versoes, cursor = banco
+    _preparar_versao(versoes)
+    # Gravada sem passar pela ingestão (sem gravação dupla)
+    cursor.execute("INSERT INTO triagens (sintomas) VALUES ('chegou depois')")
+
+    with pytest.raises(RuntimeError, match="1 triagens sem vetor"):
+        versoes.ativar(NOVO)
+
+    versoes.recalcular(NOVO)
+    versoes.ativar(NOVO)
+    assert versoes.versao(NOVO).estado == "ativa"
+
+
+def test_ativar_recusa_vetor_de_texto_antigo(banco):
+    _, versoes, cursor = banco
+    _preparar_versao(versoes)
+    cursor.execute("UPDATE triagens SET sintomas = 'texto corrigido' "
+                   "WHERE sintomas = 'sintoma 1'")
+
+    with pytest.raises(RuntimeError, match="1 triagens sem vetor"):
+        versoes.ativar(NOVO)
+
+
+def test_ativar_recusa_sintoma_sem_vetor(banco):
+    _, versoes, cursor = banco
+    _preparar_versao(versoes)
+    cursor.execute("INSERT INTO embeddings_sintomas VALUES ('vomito', 'geral', NULL)")
+
+    with pytest.raises(RuntimeError, match="1 sintomas sem vetor"):
+        versoes.ativar(NOVO)
+
+
+def test_ativar_recusa_indice_invalido(banco):
+    _, versoes, cursor = banco
+    _preparar_versao(versoes)
+    tabela = versoes.versao(NOVO).tabela_triagens
+    # Índice único sobre valores repetidos: o CONCURRENTLY falha e deixa o índice INVALID
+    with pytest.raises(Exception):
+        cursor.execute(f"CREATE UNIQUE INDEX CONCURRENTLY idx_teste_invalido ON {tabela} ((1))")
+
+    with pytest.raises(RuntimeError, match="1 índices inválidos"):
+        versoes.ativar(NOVO)
+    assert versoes.versao(NOVO).estado == "pronta"
+
+
+def test_exportacao_e_backfill_leem_a_versao_ativa(banco, tmp_path):
+    db, versoes, cursor = banco
+    _preparar_versao(versoes)
+    versoes.ativar(NOVO)
+    tabela = versoes.versao(NOVO).tabela_triagens
+
+    resultado = ExportadorTreinamento(db).exportar(tmp_path / "treino.parquet")
+
+    exportado = pq.read_table(resultado.arquivo).to_pydict()
+    cursor.execute(f"SELECT triagem_id::text, embedding_sintomas::real[] FROM {tabela}")
+    ativos = dict(cursor.fetchall())
+    assert dimensao_ativa(db) == 8
+    assert resultado.linhas == 30
+    for triagem_id, vetor in zip(exportado["triagem_id"], exportado["embedding_sintomas"]):
+        assert vetor == pytest.approx(ativos[triagem_id])
+
+    # Triagem com vetor legado mas sem vetor na versão ativa: pendente para o backfill
+    cursor.execute(f"DELETE FROM {tabela} WHERE triagem_id = %s", (exportado["triagem_id"][0],))
+    cursor.execute(f"SELECT id::text FROM triagens WHERE {FILTRO_NULOS}")
+    assert cursor.fetchall() == [(exportado["triagem_id"][0],)]